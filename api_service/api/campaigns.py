@@ -0,0 +1,122 @@
+from typing import Dict, Optional, Tuple
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.models import (
+    CampaignCell,
+    CampaignCreate,
+    CampaignProgress,
+    CampaignResponse,
+    CampaignResults,
+)
+from api.sources import ensure_sources_uploaded
+from db.database import get_db, get_read_db
+from db.models import Campaign
+from db.operations import (
+    count_campaign_tasks,
+    create_campaign,
+    get_campaign,
+    list_campaign_tasks,
+)
+from services.campaigns import TERMINAL_STATUSES, schedule_campaigns, summarize_task
+
+router = APIRouter(prefix="/campaigns", tags=["campaigns"])
+
+
+def _campaign_response(campaign: Campaign, by_status: Dict[str, int]) -> CampaignResponse:
+    """Собирает ответ о кампании с агрегированным прогрессом."""
+    finished = sum(by_status.get(s, 0) for s in TERMINAL_STATUSES)
+    total = campaign.total_tasks
+    return CampaignResponse(
+        campaign_id=campaign.campaign_id,
+        name=campaign.name,
+        status=campaign.status,
+        created_at=campaign.created_at,
+        completed_at=campaign.completed_at,
+        progress=CampaignProgress(
+            total=total,
+            finished=finished,
+            percent=round(100.0 * finished / total, 1) if total else 100.0,
+            by_status=by_status,
+        ),
+    )
+
+
+@router.post("", response_model=CampaignResponse, status_code=status.HTTP_201_CREATED)
+async def start_campaign(
+    campaign_data: CampaignCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Запускает кампанию: по задаче на каждую пару (репозиторий, анализатор).
+    Задачи ставятся в общую очередь кампаний и передаются в очередь
+    runner'ов по мере освобождения слотов.
+    """
+    # Повторы в списках не должны порождать одинаковые задачи
+    repositories = list(dict.fromkeys(str(url) for url in campaign_data.repositories))
+    analyzers = list(dict.fromkeys(campaign_data.analyzers))
+    ensure_sources_uploaded(repositories)
+
+    campaign, tasks = await create_campaign(
+        db,
+        name=campaign_data.name,
+        repositories=repositories,
+        analyzers=analyzers,
+        command_template=campaign_data.command_template,
+        mode=campaign_data.mode,
+        max_workers=campaign_data.max_workers,
+        edit_files=campaign_data.edit_files,
+        schedule=campaign_data.schedule,
+        seed=campaign_data.seed,
+        exclusive=campaign_data.exclusive,
+        memory_max_mb=campaign_data.memory_max_mb,
+        cpu_max=campaign_data.cpu_max,
+    )
+
+    background_tasks.add_task(schedule_campaigns)
+
+    return _campaign_response(campaign, {"pending": len(tasks)})
+
+
+@router.get("/{campaign_id}", response_model=CampaignResponse)
+async def get_campaign_progress(campaign_id: str, db: AsyncSession = Depends(get_read_db)):
+    """Возвращает кампанию с прогрессом по статусам задач."""
+    campaign = await get_campaign(db, campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+    return _campaign_response(campaign, await count_campaign_tasks(db, campaign_id))
+
+
+@router.get("/{campaign_id}/results", response_model=CampaignResults)
+async def get_campaign_results(campaign_id: str, db: AsyncSession = Depends(get_read_db)):
+    """
+    Возвращает матрицу результатов кампании: строки - репозитории,
+    столбцы - анализаторы, в ячейке - медианы метрик анализатора.
+    """
+    campaign = await get_campaign(db, campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+    tasks = await list_campaign_tasks(db, campaign_id)
+    repositories = list(dict.fromkeys(task.repository_url for task in tasks))
+    analyzers = list(dict.fromkeys(task.analyzer_name for task in tasks))
+
+    cells: Dict[Tuple[str, str], CampaignCell] = {}
+    for task in tasks:
+        cells[(task.repository_url, task.analyzer_name)] = CampaignCell(
+            **await summarize_task(db, task)
+        )
+
+    matrix: list[list[Optional[CampaignCell]]] = [
+        [cells.get((repository, analyzer)) for analyzer in analyzers]
+        for repository in repositories
+    ]
+    return CampaignResults(
+        campaign_id=campaign_id,
+        repositories=repositories,
+        analyzers=analyzers,
+        matrix=matrix,
+    )
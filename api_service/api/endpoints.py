@@ -1,22 +1,57 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple
+
+import httpx
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
 from api.models import (
     CancelTaskResponse,
+    IncrementalSummary,
     PyPISearchResponse,
+    ScalingSummary,
+    StartupSummary,
     TaskCreate,
+    TaskProfile,
+    TaskListItem,
+    TaskListResponse,
     TaskResponse,
     TaskStatusResponse,
+    TaskSummary,
+    TaskTimeline,
+    TimelineSpan,
 )
-from db.database import get_db
+from api.sources import ensure_sources_uploaded
+from config import get_settings
+from db.database import async_session_maker, get_db, get_read_db
 from db.operations import (
+    close_job,
     create_task,
+    get_repository_stats,
     get_task_by_id,
+    get_task_status_snapshot,
+    list_task_spans,
+    list_tasks,
     mark_metrics_downloaded,
+    touch_artifact,
     update_task_status,
 )
+from metrics import QUEUE_REJECTIONS
+from services.artifacts import get_or_ingest_artifact, open_artifact, read_artifact
+from services.campaigns import RESULT_STATUSES, schedule_campaigns
+from services.compression import compress_stream, negotiate_encoding
+from services.eta import get_queue_forecast, invalidate_forecast, predict_task, retry_after_seconds
 from services.pypi import search_pypi_packages
-from services.runner_client import cancel_analysis, get_metrics_file, start_analysis
+from services.runner_client import cancel_analysis
+from services.summary import normalize, tool_medians
+from services.tracing import parse_attributes
+
+settings = get_settings()
 
 router = APIRouter()
 
@@ -33,38 +68,122 @@ async def search_pypi(query: str = ""):
 )
 async def start_analyzer(
     task_data: TaskCreate,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Запускает анализ репозитория с использованием выбранного инструмента.
-    Возвращает ID задачи для отслеживания статуса.
+    Задача ставится в очередь, откуда ее забирает свободный runner сервис.
+    Возвращает ID задачи для отслеживания статуса и прогноз ее завершения.
+    Если прогноз ожидания в очереди превышает QUEUE_MAX_BACKLOG_SECONDS,
+    задача отклоняется с HTTP 429 и заголовком Retry-After.
     """
-    # Создаем задачу в БД
+    ensure_sources_uploaded([str(task_data.repository_url)])
+
+    forecast = await get_queue_forecast(db, fresh=True)
+    retry_after = retry_after_seconds(forecast)
+    if retry_after is not None:
+        QUEUE_REJECTIONS.inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Task queue is full: predicted wait {forecast.backlog_seconds:.0f} s "
+            f"exceeds {settings.queue_max_backlog_seconds} s",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    # Создаем задачу в БД вместе с записью в очереди
     task = await create_task(
         db=db,
         analyzer_name=task_data.analyzer_name,
         repository_url=str(task_data.repository_url),
         command_template=task_data.command_template,
+        mode=task_data.mode,
+        max_workers=task_data.max_workers,
+        edit_files=task_data.edit_files,
+        schedule=task_data.schedule,
+        seed=task_data.seed,
+        exclusive=task_data.exclusive,
+        memory_max_mb=task_data.memory_max_mb,
+        cpu_max=task_data.cpu_max,
+        profile=task_data.profile,
+        startup_analysis=task_data.startup_analysis,
     )
+    invalidate_forecast()
+
+    # Новая задача занимает первый слот, который освободится по прогнозу
+    prediction = await predict_task(db, task)
+    response = TaskResponse.model_validate(task)
+    response.queue_position = sum(1 for eta in forecast.tasks.values() if eta.position is not None) + 1
+    response.estimated_duration_s = prediction.seconds
+    response.estimated_start_at = min(forecast.free_at, default=forecast.computed_at)
+    response.estimated_completion_at = response.estimated_start_at + timedelta(seconds=prediction.seconds)
+    return response
+
 
-    # Асинхронно запускаем анализ
-    background_tasks.add_task(
-        start_analysis,
-        task.task_id,
-        task_data.analyzer_name,
-        str(task_data.repository_url),
-        task_data.command_template,
+def _encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Кодирует позицию последней строки страницы в непрозрачный курсор."""
+    payload = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Разбирает курсор, полученный из next_cursor предыдущей страницы."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get(
+    "/tasks", response_model=TaskListResponse, response_model_exclude_unset=True
+)
+async def get_tasks(
+    analyzer_name: Optional[str] = None,
+    repository_url: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    include_errors: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    История задач с фильтрами, от новых к старым.
+    Следующая страница запрашивается с cursor=next_cursor.
+    """
+    # Одна лишняя строка показывает, есть ли следующая страница
+    rows = await list_tasks(
         db,
+        limit=limit + 1,
+        analyzer_name=analyzer_name,
+        repository_url=repository_url,
+        status=status_filter,
+        created_from=created_from,
+        created_to=created_to,
+        after=_decode_cursor(cursor) if cursor else None,
+        include_errors=include_errors,
     )
 
-    return task
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    items = []
+    for row in rows:
+        values = row._asdict()
+        values.pop("id")
+        items.append(TaskListItem(**values))
+
+    return TaskListResponse(items=items, next_cursor=next_cursor)
 
 
 @router.get("/tasks/{task_id}/status", response_model=TaskStatusResponse)
-async def get_task_status(task_id: str, db: AsyncSession = Depends(get_db)):
+async def get_task_status(task_id: str, db: AsyncSession = Depends(get_read_db)):
     """Проверяет статус задачи по её ID."""
-    task = await get_task_by_id(db, task_id)
+    task = await get_task_status_snapshot(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
@@ -72,33 +191,97 @@ async def get_task_status(task_id: str, db: AsyncSession = Depends(get_db)):
     if task.status == "completed" and task.metrics_downloaded:
         return {"task_id": task.task_id, "status": "data_already_retrieved"}
 
+    # Прогноз сроков - из кэшированного прогноза очереди
+    if task.status in ("queued", "running"):
+        eta = (await get_queue_forecast(db)).tasks.get(task.task_id)
+        if eta is not None:
+            return {
+                "task_id": task.task_id,
+                "status": task.status,
+                "queue_position": eta.position,
+                "estimated_start_at": eta.estimated_start_at,
+                "estimated_completion_at": eta.estimated_completion_at,
+            }
+
     return {"task_id": task.task_id, "status": task.status}
 
 
+@router.get("/tasks/{task_id}/timeline", response_model=TaskTimeline)
+async def get_task_timeline(task_id: str, db: AsyncSession = Depends(get_read_db)):
+    """
+    Возвращает интервалы этапов задачи в хронологическом порядке:
+    ожидание в очереди, отправку на runner, установку, клонирование,
+    замеры каждого анализатора, экспорт и загрузку артефактов.
+    """
+    task = await get_task_by_id(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    spans = [
+        TimelineSpan(
+            name=item.name,
+            source=item.source,
+            start=item.started_at,
+            end=item.ended_at,
+            duration_s=(item.ended_at - item.started_at).total_seconds(),
+            attributes=parse_attributes(item.attributes),
+        )
+        for item in await list_task_spans(db, task_id)
+    ]
+    return TaskTimeline(task_id=task.task_id, status=task.status, spans=spans)
+
+
 @router.post("/tasks/{task_id}/cancel", response_model=CancelTaskResponse)
-async def cancel_task(task_id: str, db: AsyncSession = Depends(get_db)):
+async def cancel_task(
+    task_id: str,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
     """Отменяет выполнение задачи анализа."""
     task = await get_task_by_id(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
     # Проверяем, что задачу можно отменить
-    if task.status not in ["pending", "running"]:
+    if task.status not in ["pending", "queued", "running"]:
         return CancelTaskResponse(
             task_id=task_id,
             status=task.status,
             message=f"Task cannot be cancelled because it is in '{task.status}' state",
         )
 
-    # Обновляем статус в БД
+    # Задача, еще не выданная runner'у, просто снимается с очереди
+    if task.status == "queued" and await close_job(db, task_id, only_queued=True):
+        await update_task_status(db, task_id, "cancelled")
+        if task.campaign_id:
+            background_tasks.add_task(schedule_campaigns)
+        return CancelTaskResponse(
+            task_id=task_id,
+            status="cancelled",
+            message="Task has been removed from the queue",
+        )
+
+    # Обновляем статус в БД (объект задачи в сессии тоже получит новый статус)
+    previous_status = task.status
     await update_task_status(db, task_id, "cancelling")
 
     # Отправляем запрос на отмену в Runner сервис
-    success = await cancel_analysis(task_id)
+    final_status = await cancel_analysis(task_id)
 
-    if success:
+    if final_status == "partial":
+        # Завершенные замеры сохранены: runner уже сообщил статус partial
+        # с файлом результатов, их загрузка запущена из внутреннего эндпоинта
+        return CancelTaskResponse(
+            task_id=task_id,
+            status="partial",
+            message="Task has been cancelled, completed samples were saved",
+        )
+    if final_status:
         # Обновляем статус в БД на "cancelled"
         await update_task_status(db, task_id, "cancelled")
+        await close_job(db, task_id)
+        if task.campaign_id:
+            background_tasks.add_task(schedule_campaigns)
         return CancelTaskResponse(
             task_id=task_id,
             status="cancelled",
@@ -106,43 +289,299 @@ async def cancel_task(task_id: str, db: AsyncSession = Depends(get_db)):
         )
     else:
         # Возвращаем статус в "running", если не удалось отменить
-        await update_task_status(db, task_id, task.status)
+        await update_task_status(db, task_id, previous_status)
         raise HTTPException(
             status_code=500,
             detail="Failed to cancel task. It might be already completed or failed.",
         )
 
 
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Разбирает заголовок Range с одним диапазоном байтов.
+
+    Returns:
+        Optional[Tuple[int, int]]: Границы [start, end] включительно
+        или None, если диапазон не удовлетворим
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            # Суффиксный диапазон: последние N байтов
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
 @router.get("/tasks/{task_id}/metrics")
-async def download_metrics(task_id: str, db: AsyncSession = Depends(get_db)):
+async def download_metrics(
+    task_id: str,
+    request: Request,
+    format: Literal["csv", "npz", "arrow", "scaling_csv"] = "csv",
+    db: AsyncSession = Depends(get_db),
+):
     """
     Скачивает файл с метриками для анализа.
-    После успешной загрузки, запрашивает очистку ресурсов у runner сервиса.
+    npz и arrow - типизированные столбцовые файлы с полной точностью
+    (без сжатия, пригодны для отображения в память), csv - текстовый экспорт,
+    scaling_csv - все прогоны режима scaling по числу воркеров.
+
+    Файл отдается потоком из хранилища артефактов, поэтому загрузку можно
+    повторять. Сжатие (zstd/gzip) выбирается по Accept-Encoding: если оно
+    совпадает с форматом хранения, файл отдается без перекодирования.
+    Заголовок Range позволяет докачку (частичные ответы не сжимаются).
     """
     task = await get_task_by_id(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    if task.status != "completed":
+    if task.status not in RESULT_STATUSES:
         raise HTTPException(status_code=400, detail="Task is not completed yet")
 
-    if task.metrics_downloaded:
-        raise HTTPException(status_code=404, detail="Metrics already downloaded")
-
+    # Если артефакт еще не забран у runner сервиса, он забирается сейчас
     try:
-        # Получаем файл метрик от runner сервиса
-        metrics_data, content_type = await get_metrics_file(task_id)
-
-        # Отмечаем, что метрики скачаны
-        await mark_metrics_downloaded(db, task_id)
-
-        # Возвращаем файл как ответ
-        return Response(
-            content=metrics_data,
-            media_type=content_type,
-            headers={
-                "Content-Disposition": f"attachment; filename=metrics_comparison_{task_id}.csv"
-            },
-        )
+        artifact = await get_or_ingest_artifact(db, task_id, format)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Metrics file not found")
+        raise HTTPException(status_code=500, detail=f"Failed to get metrics: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get metrics: {str(e)}")
+
+    await touch_artifact(db, artifact.id)
+
+    headers = {
+        "Content-Disposition": f"attachment; filename=metrics_comparison_{task_id}.{format.replace('_', '.')}",
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+        "ETag": f'"{artifact.digest}"',
+    }
+    status_code = 200
+
+    range_header = request.headers.get("range")
+    if range_header:
+        byte_range = _parse_range(range_header, artifact.size)
+        if byte_range is None:
+            raise HTTPException(
+                status_code=416,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{artifact.size}"},
+            )
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{artifact.size}"
+        headers["Content-Length"] = str(end - start + 1)
+        body = read_artifact(artifact, start, end)
+    else:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding == artifact.encoding:
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(artifact.stored_size)
+            body = open_artifact(artifact)
+        elif encoding:
+            headers["Content-Encoding"] = encoding
+            body = compress_stream(read_artifact(artifact), encoding)
+        else:
+            headers["Content-Length"] = str(artifact.size)
+            body = read_artifact(artifact)
+
+    completed = False
+
+    async def tracked(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        nonlocal completed
+        async for chunk in chunks:
+            yield chunk
+        completed = True
+
+    async def finalize() -> None:
+        # Только полностью переданный файл считается скачанным
+        if status_code == 200 and completed:
+            async with async_session_maker() as session:
+                await mark_metrics_downloaded(session, task_id)
+
+    return StreamingResponse(
+        tracked(body),
+        status_code=status_code,
+        media_type=artifact.media_type,
+        headers=headers,
+        background=BackgroundTask(finalize),
+    )
+
+
+@router.get("/tasks/{task_id}/scaling", response_model=List[ScalingSummary])
+async def get_task_scaling(task_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Возвращает кривые ускорения анализаторов для задачи в режиме scaling:
+    ускорение, эффективность и последовательную долю по закону Амдала.
+    """
+    task = await get_task_by_id(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if task.mode != "scaling":
+        raise HTTPException(status_code=400, detail="Task was not run in scaling mode")
+
+    if task.status not in RESULT_STATUSES:
+        raise HTTPException(status_code=400, detail="Task is not completed yet")
+
+    try:
+        artifact = await get_or_ingest_artifact(db, task_id, "scaling")
+        content = b"".join([chunk async for chunk in read_artifact(artifact)])
+        return json.loads(content)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Scaling summary not found")
+        raise HTTPException(status_code=500, detail=f"Failed to get scaling summary: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get scaling summary: {str(e)}")
+
+
+@router.get("/tasks/{task_id}/summary", response_model=TaskSummary)
+async def get_task_summary(task_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Возвращает медианы метрик анализаторов задачи вместе с индексом
+    репозитория и метриками, нормированными на его размер: логические
+    строки и файлы в секунду, память на 1000 логических строк.
+    """
+    task = await get_task_by_id(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if task.mode != "standard":
+        raise HTTPException(status_code=400, detail="Summary is available only for standard mode")
+
+    if task.status not in RESULT_STATUSES:
+        raise HTTPException(status_code=400, detail="Task is not completed yet")
+
+    try:
+        artifact = await get_or_ingest_artifact(db, task_id, "csv")
+        content = b"".join([chunk async for chunk in read_artifact(artifact)])
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Metrics file not found")
+        raise HTTPException(status_code=500, detail=f"Failed to get task summary: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get task summary: {str(e)}")
+
+    stats = await get_repository_stats(db, task.commit_sha) if task.commit_sha else None
+    return {
+        "task_id": task.task_id,
+        "status": task.status,
+        "repository": stats,
+        "tools": [
+            {**medians, **normalize(medians, stats)}
+            for medians in tool_medians(content.decode("utf-8"))
+        ],
+    }
+
+
+@router.get("/tasks/{task_id}/incremental", response_model=List[IncrementalSummary])
+async def get_task_incremental(task_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Возвращает результаты задачи в режиме incremental: время холодного
+    запуска отдельно от медиан перепроверки после правок каждого вида.
+    """
+    task = await get_task_by_id(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if task.mode != "incremental":
+        raise HTTPException(status_code=400, detail="Task was not run in incremental mode")
+
+    if task.status not in RESULT_STATUSES:
+        raise HTTPException(status_code=400, detail="Task is not completed yet")
+
+    try:
+        artifact = await get_or_ingest_artifact(db, task_id, "incremental")
+        content = b"".join([chunk async for chunk in read_artifact(artifact)])
+        return json.loads(content)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Incremental summary not found")
+        raise HTTPException(status_code=500, detail=f"Failed to get incremental summary: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get incremental summary: {str(e)}")
+
+
+@router.get("/tasks/{task_id}/startup", response_model=List[StartupSummary])
+async def get_task_startup(task_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Возвращает анализ запуска анализаторов задачи: базовую линию голого
+    интерпретатора, стоимость запуска на пустом каталоге, самые медленные
+    импорты и время анализа каждой итерации (полное время за вычетом запуска).
+    """
+    task = await get_task_by_id(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if not task.startup_analysis:
+        raise HTTPException(status_code=400, detail="Task was not run with startup analysis")
+
+    if task.status not in RESULT_STATUSES:
+        raise HTTPException(status_code=400, detail="Task is not completed yet")
+
+    try:
+        artifact = await get_or_ingest_artifact(db, task_id, "startup")
+        content = b"".join([chunk async for chunk in read_artifact(artifact)])
+        return json.loads(content)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Startup summary not found")
+        raise HTTPException(status_code=500, detail=f"Failed to get startup summary: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get startup summary: {str(e)}")
+
+
+async def _load_profile(db: AsyncSession, task_id: str) -> Dict[str, Any]:
+    """Загружает профиль анализатора задачи из хранилища артефактов."""
+    task = await get_task_by_id(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if not task.profile:
+        raise HTTPException(status_code=400, detail="Task was not run with profiling")
+
+    if task.status not in RESULT_STATUSES:
+        raise HTTPException(status_code=400, detail="Task is not completed yet")
+
+    try:
+        artifact = await get_or_ingest_artifact(db, task_id, "profile")
+        content = b"".join([chunk async for chunk in read_artifact(artifact)])
+        return json.loads(content)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        raise HTTPException(status_code=500, detail=f"Failed to get profile: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get profile: {str(e)}")
+
+
+@router.get("/tasks/{task_id}/profile", response_model=TaskProfile)
+async def get_task_profile(task_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Возвращает профиль отдельного прогона анализатора: накопленное и
+    собственное время функций и свернутые стеки (веса в микросекундах).
+    Анализаторы не на Python (ruff, pyright) не профилируются.
+    """
+    profile = await _load_profile(db, task_id)
+    return {"task_id": task_id, **profile}
+
+
+@router.get("/tasks/{task_id}/profile/collapsed", response_class=PlainTextResponse)
+async def get_task_profile_collapsed(task_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Возвращает свернутые стеки профиля в текстовом формате ("кадр;кадр вес"),
+    который принимают flamegraph.pl, speedscope и d3-flame-graph.
+    """
+    profile = await _load_profile(db, task_id)
+    lines = [f"{item['stack']} {item['value']}" for item in profile["stacks"]]
+    return PlainTextResponse("".join(f"{line}\n" for line in lines))
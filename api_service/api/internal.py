@@ -1,33 +1,127 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import datetime
+from typing import List
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.models import TaskStatusUpdate
+from api.models import JobHeartbeat, JobLease, JobLeaseRequest, TaskStatusUpdate
+from config import get_settings
 from db.database import get_db
-from db.operations import get_task_by_id, update_task_status
+from db.operations import (
+    close_job,
+    extend_job_leases,
+    get_job,
+    get_task_by_id,
+    mark_runner_cleaned,
+    save_repository_stats,
+    update_task_status,
+)
+from services.artifacts import ingest_task_artifacts
+from services.campaigns import RESULT_STATUSES, TERMINAL_STATUSES, schedule_campaigns
+from services.jobs import lease_for_runner, retry_failed_task, update_queue_metrics
+from services.sources import source_exists, source_path, touch_source
+from services.tracing import export_task_trace, record_spans, span
+
+settings = get_settings()
 
 router = APIRouter(prefix="/internal", tags=["internal"])
 
 
 @router.post("/tasks/{task_id}/status", status_code=status.HTTP_200_OK)
 async def update_task_status_internal(
-    task_id: str, status_update: TaskStatusUpdate, db: AsyncSession = Depends(get_db)
+    task_id: str,
+    status_update: TaskStatusUpdate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Внутренний эндпоинт для обновления статуса задачи от Runner сервиса.
     Не предназначен для использования клиентами.
     """
-    # Проверяем существование задачи
-    task = await get_task_by_id(db, task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
+    # Очистка ресурсов на runner сервисе не меняет итоговый статус задачи:
+    # результаты к этому моменту уже в хранилище артефактов
+    if status_update.status in ("cleaned", "cleanup_failed"):
+        if not await mark_runner_cleaned(db, task_id, status_update.status == "cleaned"):
+            raise HTTPException(status_code=404, detail="Task not found")
+        await record_spans(db, task_id, "runner", [s.model_dump() for s in status_update.spans])
+        return {"status": "updated", "task_id": task_id}
+
+    # Завершенная или отмененная задача не запускается повторно
+    # (например, если runner получил ее в аренду до отмены)
+    if status_update.status == "running":
+        current = await get_task_by_id(db, task_id)
+        if current is not None and current.status in TERMINAL_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Task is already {current.status}")
+
+    # Неудачная попытка повторяется с отсрочкой, пока не исчерпан лимит попыток
+    if status_update.status == "failed" and await retry_failed_task(db, task_id, status_update.error):
+        await record_spans(db, task_id, "runner", [s.model_dump() for s in status_update.spans])
+        return {"status": "requeued", "task_id": task_id}
 
-    # Обновляем статус задачи
-    await update_task_status(
+    # Обновляем статус задачи; отсутствие строки в RETURNING означает, что задачи нет
+    task = await update_task_status(
         db=db,
         task_id=task_id,
         status=status_update.status,
         error_message=status_update.error,
         metrics_file_path=status_update.metrics_file,
     )
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    # Индекс репозитория, на который нормируются метрики анализаторов
+    if status_update.repo_stats is not None:
+        await save_repository_stats(db, task_id, task.repository_url, status_update.repo_stats.model_dump())
+
+    # Интервалы этапов, завершившихся на runner сервисе с прошлого обновления
+    await record_spans(db, task_id, "runner", [s.model_dump() for s in status_update.spans])
+    if status_update.status in TERMINAL_STATUSES:
+        await close_job(db, task_id, "dead" if status_update.status == "failed" else "done")
+        background_tasks.add_task(export_task_trace, task)
+
+    # Отправка на runner: от выдачи в аренду до начала выполнения
+    if status_update.status == "running":
+        job = await get_job(db, task_id)
+        if job is not None and job.leased_at is not None:
+            await record_spans(
+                db, task_id, "api", [span("dispatch", job.leased_at, datetime.datetime.now(), runner=job.lease_owner)]
+            )
+
+    # Забираем результаты (в том числе неполные) в хранилище артефактов,
+    # после чего runner освобождает ресурсы
+    if status_update.status in RESULT_STATUSES:
+        background_tasks.add_task(ingest_task_artifacts, task_id)
+
+    # Освободившийся слот занимает следующая задача из очереди кампаний
+    if task.campaign_id and status_update.status in TERMINAL_STATUSES:
+        background_tasks.add_task(schedule_campaigns)
 
     return {"status": "updated", "task_id": task_id}
+
+
+@router.post("/jobs/lease", response_model=List[JobLease])
+async def lease_jobs_internal(request: JobLeaseRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Выдает runner сервису задачи из очереди (не больше его свободных слотов).
+    Задачи, аренда которых истекла, предварительно возвращаются в очередь.
+    """
+    return await lease_for_runner(db, request.runner_id, request.capacity, request.runner_url)
+
+
+@router.post("/jobs/heartbeat", status_code=status.HTTP_200_OK)
+async def heartbeat_jobs_internal(heartbeat: JobHeartbeat, db: AsyncSession = Depends(get_db)):
+    """Продлевает аренду задач, которые runner сервис продолжает выполнять."""
+    lease_until = datetime.datetime.now() + datetime.timedelta(seconds=settings.job_lease_seconds)
+    extended = await extend_job_leases(db, heartbeat.runner_id, heartbeat.task_ids, lease_until)
+    await update_queue_metrics(db)
+    return {"extended": extended}
+
+
+@router.get("/sources/{digest}")
+async def download_source_internal(digest: str):
+    """Отдает runner сервису загруженные исходники задачи."""
+    if not source_exists(digest):
+        raise HTTPException(status_code=404, detail="Source not found")
+    touch_source(digest)
+    return FileResponse(source_path(digest), media_type="application/octet-stream")
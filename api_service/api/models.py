@@ -1,7 +1,14 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import AnyUrl, BaseModel, Field, HttpUrl, UrlConstraints
+
+# Источник кода задачи: git-репозиторий, синтетический репозиторий
+# (synthetic://python?seed=1&modules=50), каталог, архив или git bundle
+# на runner сервисе (file:///...) либо загруженные исходники (upload://sha256/...)
+RepositoryUrl = Union[
+    HttpUrl, Annotated[AnyUrl, UrlConstraints(allowed_schemes=["synthetic", "file", "upload"])]
+]
 
 
 # PyPI пакеты
@@ -17,8 +24,26 @@ class PyPISearchResponse(BaseModel):
 # Задачи анализа
 class TaskCreate(BaseModel):
     analyzer_name: str
-    repository_url: HttpUrl
+    repository_url: RepositoryUrl
     command_template: str = "{analyzer_cmd} {path}"  # Шаблон команды для запуска
+    # standard - обычный сбор метрик, scaling - кривая ускорения по числу воркеров,
+    # incremental - время перепроверки после правок (в том числе в демон-режиме)
+    mode: Literal["standard", "scaling", "incremental"] = "standard"
+    max_workers: Optional[int] = Field(None, ge=1)  # Бюджет ядер для режима scaling
+    edit_files: Optional[int] = Field(None, ge=1, le=100)  # Файлов в каждой правке режима incremental
+    # Контроль шума: grouped - замеры по инструментам, interleaved - случайное чередование
+    schedule: Literal["grouped", "interleaved"] = "grouped"
+    seed: Optional[int] = None  # Зерно перемешивания (None = случайное)
+    exclusive: bool = False  # Не допускать одновременного выполнения замеров
+    # Лимиты ресурсов одной итерации анализатора (cgroup v2 на runner сервисе)
+    memory_max_mb: Optional[int] = Field(None, ge=16)
+    cpu_max: Optional[float] = Field(None, gt=0)  # Ядер, например 1.5
+    # Отдельный прогон анализатора под профилировщиком после замеров:
+    # cprofile - точные числа вызовов, sampling - низкие накладные расходы
+    profile: Optional[Literal["cprofile", "sampling"]] = None
+    # Анализ запуска (режим standard): голый интерпретатор, прогон на пустом
+    # каталоге и импорты отдельно от времени анализа каждой итерации
+    startup_analysis: bool = False
 
 
 class TaskResponse(BaseModel):
@@ -26,10 +51,22 @@ class TaskResponse(BaseModel):
     analyzer_name: str
     repository_url: str
     command_template: str
+    mode: str = "standard"
+    schedule: str = "grouped"
+    exclusive: bool = False
+    memory_max_mb: Optional[int] = None
+    cpu_max: Optional[float] = None
+    profile: Optional[str] = None
+    startup_analysis: bool = False
     status: str
     created_at: datetime
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
+    # Прогноз по истории длительностей задач и текущей очереди
+    queue_position: Optional[int] = None
+    estimated_duration_s: Optional[float] = None
+    estimated_start_at: Optional[datetime] = None
+    estimated_completion_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -38,11 +75,275 @@ class TaskResponse(BaseModel):
 class TaskStatusResponse(BaseModel):
     task_id: str
     status: str
+    # Прогноз для задач в очереди и выполняющихся (места в очереди нет у выполняющихся)
+    queue_position: Optional[int] = None
+    estimated_start_at: Optional[datetime] = None
+    estimated_completion_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class TaskListItem(BaseModel):
+    """Краткая запись истории задач (текст ошибки - только по запросу)"""
+
+    task_id: str
+    analyzer_name: str
+    repository_url: str
+    mode: str
+    status: str
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    error_message: Optional[str] = None
+
+
+class TaskListResponse(BaseModel):
+    items: List[TaskListItem]
+    next_cursor: Optional[str] = None  # None - страниц больше нет
+
+
+# Кампании
+class CampaignCreate(BaseModel):
+    """Кампания разворачивается в задачи для каждой пары (репозиторий, анализатор)"""
+
+    name: Optional[str] = None
+    repositories: List[RepositoryUrl] = Field(..., min_length=1)
+    analyzers: List[str] = Field(..., min_length=1)
+    command_template: str = "{analyzer_cmd} {path}"
+    mode: Literal["standard", "scaling", "incremental"] = "standard"
+    max_workers: Optional[int] = Field(None, ge=1)
+    edit_files: Optional[int] = Field(None, ge=1, le=100)
+    schedule: Literal["grouped", "interleaved"] = "grouped"
+    seed: Optional[int] = None
+    exclusive: bool = False
+    memory_max_mb: Optional[int] = Field(None, ge=16)
+    cpu_max: Optional[float] = Field(None, gt=0)
+
+
+class CampaignProgress(BaseModel):
+    total: int
+    finished: int  # Задачи в конечном статусе
+    percent: float
+    by_status: Dict[str, int]
+
+
+class CampaignResponse(BaseModel):
+    campaign_id: str
+    name: Optional[str] = None
+    status: str
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    progress: CampaignProgress
+
+
+class CampaignCell(BaseModel):
+    """Результат одной пары (репозиторий, анализатор)"""
+
+    task_id: str
+    status: str
+    iterations: int = 0
+    median_exec_time: Optional[float] = None  # с
+    median_cpu_percent: Optional[float] = None
+    median_memory_kb: Optional[float] = None
+    # Медианы, нормированные на размер репозитория (см. /tasks/{task_id}/summary)
+    loc_per_second: Optional[float] = None
+    files_per_second: Optional[float] = None
+    kb_per_kloc: Optional[float] = None
+    # Диагностики анализатора (см. /tasks/{task_id}/summary)
+    findings: Optional[int] = None
+    diagnostic_fingerprint: Optional[str] = None
+    time_per_finding: Optional[float] = None  # с
+    broken_iterations: int = 0
+    inconsistent_iterations: int = 0
+
+
+class CampaignResults(BaseModel):
+    campaign_id: str
+    repositories: List[str]
+    analyzers: List[str]
+    # matrix[i][j] - результат анализатора analyzers[j] на репозитории repositories[i]
+    matrix: List[List[Optional[CampaignCell]]]
+
+
+# Загруженные исходники
+class SourceUploadResponse(BaseModel):
+    """Исходники в хранилище API сервиса, адресуемые по sha256 содержимого"""
+
+    digest: str
+    kind: str  # tar, tar.gz, tar.bz2, tar.xz, zip или bundle
+    size: int
+    source_url: str  # repository_url для задач и кампаний
+
+
+# Индекс репозитория и нормированные метрики
+class RepositoryStatsIn(BaseModel):
+    """Индекс репозитория, построенный Runner сервисом для ревизии"""
+
+    commit_sha: str
+    files: int
+    physical_loc: int
+    logical_loc: int  # Инструкции Python
+    ast_nodes: int
+    parse_errors: int = 0
+
+
+class RepositoryStatsResponse(RepositoryStatsIn):
+    repository_url: str
+    computed_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class ToolSummary(BaseModel):
+    """Медианы метрик анализатора, их значения на единицу размера репозитория и диагностики"""
+
+    tool: str
+    iterations: int
+    median_exec_time: Optional[float] = None  # с
+    median_cpu_percent: Optional[float] = None
+    median_memory_kb: Optional[float] = None
+    loc_per_second: Optional[float] = None  # Логических строк в секунду
+    files_per_second: Optional[float] = None
+    kb_per_kloc: Optional[float] = None  # Память на 1000 логических строк
+    # Диагностики из вывода анализатора: число замечаний и отпечаток их набора
+    # по большинству корректных итераций (None - формат вывода не разбирается)
+    findings: Optional[int] = None
+    diagnostic_fingerprint: Optional[str] = None
+    time_per_finding: Optional[float] = None  # Медианное время на одно замечание, с
+    broken_iterations: int = 0  # Итерации, где анализатор завершился с ошибкой (не входят в медианы)
+    inconsistent_iterations: int = 0  # Итерации с набором замечаний, отличным от большинства
+
+
+class TaskSummary(BaseModel):
+    task_id: str
+    status: str
+    repository: Optional[RepositoryStatsResponse] = None
+    tools: List[ToolSummary]
+
+
+# Масштабирование анализаторов
+class ScalingPoint(BaseModel):
+    workers: int
+    median_time: float
+    speedup: float
+    efficiency: float
+
+
+class ScalingSummary(BaseModel):
+    """Кривая ускорения анализатора и оценка последовательной доли по Амдалу"""
+
+    tool: str
+    strategy: str
+    serial_fraction: float
+    points: List[ScalingPoint]
+
+
+# Инкрементальный режим
+class IncrementalEditStats(BaseModel):
+    edit: str  # touch, add_function, change_signature
+    samples: int
+    median_time: float
+    median_memory_kb: float
+
+
+class IncrementalSummary(BaseModel):
+    """Холодный запуск и перепроверки после правок для анализатора и варианта запуска"""
+
+    tool: str
+    variant: str  # cli - повторный запуск с теплым кешем, daemon - клиент демона
+    cold_time: float
+    cold_memory_kb: int
+    median_recheck_time: float
+    speedup: float
+    edits: List[IncrementalEditStats]
+
+
+# Профиль анализатора
+class ProfileFunction(BaseModel):
+    function: str  # module:function
+    calls: Optional[int] = None  # Только для cprofile
+    self_s: float
+    cumulative_s: float
+
+
+class ProfileStack(BaseModel):
+    stack: str  # Кадры от корня через ";"
+    value: int  # Вес стека, мкс
+
+
+class TaskProfile(BaseModel):
+    """Профиль отдельного прогона анализатора: функции и свернутые стеки для flamegraph"""
+
+    task_id: str
+    profiler: str  # cprofile, sampling
+    command: List[str]
+    exit_code: int
+    wall_time_s: float
+    samples: Optional[int] = None
+    interval_ms: Optional[float] = None
+    functions: List[ProfileFunction]
+    stacks: List[ProfileStack]
+
+
+# Анализ запуска
+class ImportTime(BaseModel):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int  # Вложенность импорта
+
+
+class StartupIteration(BaseModel):
+    iteration: int
+    total_s: float
+    analysis_s: float  # Время итерации за вычетом медианы запуска
+
+
+class StartupSummary(BaseModel):
+    """Стоимость запуска анализатора и время анализа итераций без нее"""
+
+    tool: str
+    python: bool  # Анализатор на Python (есть базовая линия и импорты)
+    samples: int
+    empty_exit_code: int
+    interpreter_s: Optional[float] = None  # Медиана python -c pass
+    startup_s: float  # Медиана прогона на пустом каталоге
+    analyzer_init_s: Optional[float] = None  # startup_s - interpreter_s
+    import_time_s: Optional[float] = None  # Сумма по -X importtime
+    imported_modules: int
+    top_imports: List[ImportTime]
+    median_total_s: Optional[float] = None
+    median_analysis_s: Optional[float] = None
+    startup_share: Optional[float] = None  # Доля запуска в медиане итерации
+    iterations: List[StartupIteration]
+
+
+# Интервалы этапов задачи
+class SpanIn(BaseModel):
+    """Интервал этапа, измеренный Runner сервисом"""
+
+    name: str
+    start: datetime
+    end: datetime
+    attributes: Dict[str, Any] = {}
+
+
+class TimelineSpan(BaseModel):
+    name: str
+    source: str  # api, runner
+    start: datetime
+    end: datetime
+    duration_s: float
+    attributes: Dict[str, Any] = {}
+
+
+class TaskTimeline(BaseModel):
+    task_id: str
+    status: str
+    spans: List[TimelineSpan]
+
+
 # Внутренний API
 class TaskStatusUpdate(BaseModel):
     """Модель для обновления статуса задачи от Runner сервиса"""
@@ -50,6 +351,34 @@ class TaskStatusUpdate(BaseModel):
     status: str
     error: Optional[str] = None
     metrics_file: Optional[str] = None
+    spans: List[SpanIn] = []  # Этапы, завершившиеся с прошлого обновления
+    repo_stats: Optional[RepositoryStatsIn] = None  # Индекс репозитория задачи
+
+
+# Очередь задач (внутренний API для runner сервисов)
+class JobLeaseRequest(BaseModel):
+    """Запрос runner'а на задачи в пределах свободных слотов"""
+
+    runner_id: str
+    capacity: int = Field(1, ge=1, le=100)
+    runner_url: Optional[str] = None  # Адрес runner'а для запросов API сервиса
+
+
+class JobLease(BaseModel):
+    """Задача, выданная runner'у в аренду"""
+
+    job_id: int
+    task_id: str
+    attempt: int
+    lease_expires_at: datetime
+    task: Dict[str, Any]  # Параметры запуска в формате runner сервиса
+
+
+class JobHeartbeat(BaseModel):
+    """Продление аренды задач, которые runner продолжает выполнять"""
+
+    runner_id: str
+    task_ids: List[str]
 
 
 # Отмена задачи
@@ -0,0 +1,42 @@
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Request, status
+
+from api.models import SourceUploadResponse
+from services.sources import (
+    SourceTooLargeError,
+    UnsupportedSourceError,
+    evict_sources,
+    missing_sources,
+    store_source,
+)
+
+router = APIRouter(prefix="/sources", tags=["sources"])
+
+
+@router.post("", response_model=SourceUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_source(request: Request):
+    """
+    Загружает исходники для анализа без доступа runner'а к git-хостингу:
+    архив tar (в том числе .tar.gz, .tar.bz2, .tar.xz), zip или файл
+    `git bundle` передается телом запроса (application/octet-stream).
+    Возвращает source_url, который указывается как repository_url задачи.
+    """
+    try:
+        source = await store_source(request.stream())
+    except SourceTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedSourceError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    await evict_sources(keep=str(source["digest"]))
+    return source
+
+
+def ensure_sources_uploaded(repository_urls: List[str]) -> None:
+    """Отклоняет задачи с загруженными исходниками, которых нет в хранилище."""
+    try:
+        missing = missing_sources(repository_urls)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Uploaded source not found: {', '.join(missing)}")
@@ -0,0 +1,294 @@
+"""
+Нагрузочный бенчмарк API сервиса.
+
+Запускает приложение в процессе (ASGI-транспорт httpx) с временной БД SQLite,
+а runner сервис и индекс PyPI заменяет поддельными сервисами на локальных
+портах. Параллельные нагрузки (число клиентов задается для каждой):
+
+    submit   - постановка задач (POST /analyze)
+    status   - опрос статусов задач
+    update   - обновления статусов от runner сервиса (внутренний API)
+    lease    - выдача задач из очереди runner'ам
+    search   - поиск анализаторов в PyPI
+    download - скачивание результатов (первый запрос забирает файл у runner сервиса)
+
+Для каждого эндпоинта выводятся пропускная способность и p50/p95/p99 задержки;
+--output сохраняет их базовой линией в JSON, --compare сравнивает с базовой
+линией другого коммита (код возврата 1, если ухудшение больше --threshold).
+
+Запуск из каталога api_service:
+
+    python -m benchmarks.load --duration 10 --output baseline.json
+    python -m benchmarks.load --workload search=8 --workload status=0 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.harness import (
+    FakeServer,
+    LatencyRecorder,
+    build_baseline,
+    compare,
+    load_baseline,
+    print_table,
+    write_baseline,
+)
+
+# Клиентов каждой нагрузки по умолчанию
+WORKLOADS = {"submit": 4, "status": 16, "update": 4, "lease": 1, "search": 2, "download": 2}
+
+# Запрос нагрузки: (эндпоинт для отчета, метод, путь, тело JSON)
+Request = Tuple[str, str, str, Any]
+
+
+def fake_runner(csv_rows: int) -> Any:
+    """Поддельный runner сервис: принимает отмену и очистку, отдает файл результатов."""
+    from fastapi import FastAPI, Response
+
+    app = FastAPI()
+    lines = ["Tool,Iteration,Execution Time (s),CPU Used (%),Memory Used (KB)"]
+    lines += [f"ruff,{i},{0.1 + i % 7 / 100:.3f},95.0,{20000 + i % 13}" for i in range(csv_rows)]
+    content = ("\n".join(lines) + "\n").encode()
+
+    @app.get("/tasks/{task_id}/metrics")
+    async def metrics(task_id: str, format: str = "csv") -> Response:
+        if format != "csv":
+            return Response(status_code=404)
+        return Response(content=content, media_type="text/csv")
+
+    @app.post("/tasks/{task_id}/cancel")
+    async def cancel(task_id: str) -> Dict[str, str]:
+        return {"task_id": task_id, "status": "cancelled", "message": "cancelled"}
+
+    @app.post("/tasks/{task_id}/cleanup")
+    async def cleanup(task_id: str) -> Dict[str, str]:
+        return {"status": "cleanup_started", "task_id": task_id}
+
+    @app.delete("/campaigns/{campaign_id}")
+    async def release(campaign_id: str) -> Dict[str, str]:
+        return {"status": "releasing", "campaign_id": campaign_id}
+
+    return app
+
+
+def fake_pypi(projects: int) -> Any:
+    """Поддельный индекс PyPI Simple API с заданным числом проектов."""
+    from fastapi import FastAPI, Response
+
+    app = FastAPI()
+    names = ["lint", "check", "static", "type", "ast", "util", "http", "data"]
+    index = json.dumps(
+        {
+            "meta": {"api-version": "1.1"},
+            "projects": [
+                {"name": f"{names[i % len(names)]}-package-{i}", "_last-serial": i} for i in range(projects)
+            ],
+        }
+    ).encode()
+
+    @app.get("/simple/")
+    async def simple() -> Response:
+        return Response(content=index, media_type="application/vnd.pypi.simple.v1+json")
+
+    return app
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    """Выполняет замер в текущем процессе (временная БД уже задана окружением)."""
+    with FakeServer(fake_runner(args.csv_rows)) as runner, FakeServer(fake_pypi(args.pypi_projects)) as pypi:
+        # Настройки читаются при импорте приложения
+        os.environ["RUNNER_SERVICE_URL"] = runner.url
+        os.environ["PYPI_SIMPLE_URL"] = f"{pypi.url}/simple/"
+        return await _load(args)
+
+
+async def _load(args: argparse.Namespace) -> dict:
+    import httpx
+
+    from db.database import async_session_maker, close_db_connection, create_tables
+    from db.operations import close_job, create_task, update_task_status
+    from main import app
+
+    rng = random.Random(args.seed)
+    await create_tables()
+    async with async_session_maker() as db:
+        task_ids = [
+            (await create_task(db, "ruff", "https://github.com/example/repo")).task_id
+            for _ in range(args.tasks)
+        ]
+        completed_ids = []
+        for _ in range(args.completed_tasks):
+            task = await create_task(db, "ruff", "https://github.com/example/completed")
+            await update_task_status(db, task.task_id, "completed")
+            await close_job(db, task.task_id, "done")
+            completed_ids.append(task.task_id)
+
+    requests: Dict[str, Callable[[int], Request]] = {
+        "submit": lambda n: (
+            "POST /api/v1/analyze",
+            "POST",
+            "/api/v1/analyze",
+            {"analyzer_name": "ruff", "repository_url": f"https://github.com/example/repo-{n % 50}"},
+        ),
+        "status": lambda n: (
+            "GET /api/v1/tasks/{task_id}/status",
+            "GET",
+            f"/api/v1/tasks/{rng.choice(task_ids)}/status",
+            None,
+        ),
+        "update": lambda n: (
+            "POST /api/v1/internal/tasks/{task_id}/status",
+            "POST",
+            f"/api/v1/internal/tasks/{rng.choice(task_ids)}/status",
+            {"status": ("pending", "running")[n % 2]},
+        ),
+        "lease": lambda n: (
+            "POST /api/v1/internal/jobs/lease",
+            "POST",
+            "/api/v1/internal/jobs/lease",
+            {"runner_id": f"bench-{uuid.uuid4().hex[:8]}", "capacity": 1},
+        ),
+        "search": lambda n: (
+            "GET /api/v1/pypi/search",
+            "GET",
+            f"/api/v1/pypi/search?query={('lint', 'type', '')[n % 3]}",
+            None,
+        ),
+        "download": lambda n: (
+            "GET /api/v1/tasks/{task_id}/metrics",
+            "GET",
+            f"/api/v1/tasks/{rng.choice(completed_ids)}/metrics?format=csv",
+            None,
+        ),
+    }
+
+    recorder = LatencyRecorder()
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    deadline = measure_from + args.duration
+
+    # Необработанное исключение приложения считается ошибкой запроса (ответ 500)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+
+        async def client_loop(make_request: Callable[[int], Request]) -> None:
+            n = 0
+            while time.perf_counter() < deadline:
+                endpoint, method, path, body = make_request(n)
+                n += 1
+                request_started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                # Запросы прогрева (заполнение кэшей, первые загрузки артефактов) не учитываются
+                if request_started >= measure_from:
+                    recorder.record(endpoint, time.perf_counter() - request_started, ok)
+
+        await asyncio.gather(
+            *(
+                client_loop(requests[name])
+                for name, clients in args.workloads.items()
+                for _ in range(clients)
+            )
+        )
+
+    await close_db_connection()
+    return recorder.summary(args.duration)
+
+
+def _parse_workloads(parser: argparse.ArgumentParser, values: List[str]) -> Dict[str, int]:
+    workloads = dict(WORKLOADS)
+    for value in values:
+        name, _, clients = value.partition("=")
+        if name not in WORKLOADS or not clients.isdigit():
+            parser.error(f"invalid workload {value!r}, expected one of {list(WORKLOADS)}=N")
+        workloads[name] = int(clients)
+    return {name: clients for name, clients in workloads.items() if clients > 0}
+
+
+def _run_worker(args: argparse.Namespace) -> dict:
+    """
+    Запускает замер в отдельном процессе: движки БД и клиенты создаются
+    при импорте по настройкам из окружения.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp_dir}/bench.db"
+        env["ARTIFACT_STORE_DIR"] = os.path.join(tmp_dir, "artifacts")
+        env["DB_ECHO"] = "false"
+        command = [sys.executable, "-m", "benchmarks.load", "--worker", "--config", json.dumps(_config(args))]
+        output = subprocess.run(command, env=env, capture_output=True, text=True)
+        if output.returncode != 0:
+            sys.stderr.write(output.stderr)
+            sys.exit(output.returncode)
+        return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def _config(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "workloads": args.workloads,
+        "tasks": args.tasks,
+        "completed_tasks": args.completed_tasks,
+        "pypi_projects": args.pypi_projects,
+        "csv_rows": args.csv_rows,
+        "seed": args.seed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк API сервиса")
+    parser.add_argument(
+        "--workload",
+        action="append",
+        default=[],
+        metavar="NAME=CLIENTS",
+        help=f"Число клиентов нагрузки (0 - отключить), по умолчанию {WORKLOADS}",
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность замера, с")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Прогрев перед замером, с")
+    parser.add_argument("--tasks", type=int, default=200, help="Задач в БД для опроса и обновлений")
+    parser.add_argument("--completed-tasks", type=int, default=20, help="Завершенных задач для скачивания")
+    parser.add_argument("--pypi-projects", type=int, default=50000, help="Проектов в поддельном индексе PyPI")
+    parser.add_argument("--csv-rows", type=int, default=300, help="Строк в файле результатов runner'а")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно выбора задач")
+    parser.add_argument("--output", help="Сохранить базовую линию в JSON")
+    parser.add_argument("--compare", help="Сравнить с базовой линией из JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Допустимое ухудшение p95 и req/s (доля)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(_run(argparse.Namespace(**json.loads(args.config))))))
+        return
+
+    args.workloads = _parse_workloads(parser, args.workload)
+    endpoints = _run_worker(args)
+    baseline = build_baseline("api_load", _config(args), endpoints)
+    print_table(endpoints)
+
+    if args.output:
+        write_baseline(args.output, baseline)
+    if args.compare:
+        regressions = compare(baseline, load_baseline(args.compare), args.threshold)
+        if regressions:
+            print(f"регрессии (> {args.threshold:.0%}): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Бенчмарк чтения статусов задач под нагрузкой опроса.
+
+Запускает приложение в процессе (ASGI-транспорт httpx) с временной БД SQLite
+и сравнивает две конфигурации:
+
+    baseline - журнал по умолчанию, без пула читателей и без кэша статусов
+    tuned    - WAL, отдельный пул читателей и кэш статусов активных задач
+
+Параллельно с читателями писатель обновляет статусы через внутренний
+эндпоинт, как это делает runner сервис.
+
+Запуск из каталога api_service:
+
+    python -m benchmarks.status_reads --tasks 200 --readers 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+CONFIGURATIONS = {
+    "baseline": {"DB_WAL": "false", "DB_READER_POOL_SIZE": "0", "STATUS_CACHE_SIZE": "0"},
+    "tuned": {},
+}
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    """Выполняет один замер в текущем процессе (настройки уже заданы окружением)."""
+    import httpx
+
+    from db.database import async_session_maker, close_db_connection, create_tables
+    from db.operations import create_task
+    from main import app
+
+    await create_tables()
+    async with async_session_maker() as db:
+        task_ids = [
+            (await create_task(db, "ruff", "https://github.com/example/repo")).task_id
+            for _ in range(args.tasks)
+        ]
+
+    deadline = time.perf_counter() + args.duration
+    reads = 0
+    errors = 0
+    writes = 0
+    latencies: list[float] = []
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def reader() -> None:
+            nonlocal reads, errors
+            while time.perf_counter() < deadline:
+                task_id = random.choice(task_ids)
+                started = time.perf_counter()
+                response = await client.get(f"/api/v1/tasks/{task_id}/status")
+                latencies.append(time.perf_counter() - started)
+                if response.status_code == 200:
+                    reads += 1
+                else:
+                    errors += 1
+
+        async def writer() -> None:
+            nonlocal writes, errors
+            statuses = ("pending", "running")
+            while time.perf_counter() < deadline:
+                task_id = random.choice(task_ids)
+                response = await client.post(
+                    f"/api/v1/internal/tasks/{task_id}/status",
+                    json={"status": statuses[writes % 2]},
+                )
+                if response.status_code == 200:
+                    writes += 1
+                else:
+                    errors += 1
+                await asyncio.sleep(args.write_interval)
+
+        await asyncio.gather(*(reader() for _ in range(args.readers)), writer())
+
+    await close_db_connection()
+
+    latencies.sort()
+    return {
+        "reads_per_second": reads / args.duration,
+        "writes": writes,
+        "errors": errors,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+    }
+
+
+def _run_configuration(name: str, args: argparse.Namespace) -> dict:
+    """
+    Запускает замер в отдельном процессе: движки БД и кэш создаются
+    при импорте по настройкам из окружения.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ)
+        env.update(CONFIGURATIONS[name])
+        env["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp_dir}/bench.db"
+        env["ARTIFACT_STORE_DIR"] = os.path.join(tmp_dir, "artifacts")
+        env["DB_ECHO"] = "false"
+        command = [
+            sys.executable,
+            "-m",
+            "benchmarks.status_reads",
+            "--worker",
+            "--tasks",
+            str(args.tasks),
+            "--readers",
+            str(args.readers),
+            "--duration",
+            str(args.duration),
+            "--write-interval",
+            str(args.write_interval),
+        ]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True)
+        return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк чтения статусов задач")
+    parser.add_argument("--tasks", type=int, default=200, help="Число задач в БД")
+    parser.add_argument("--readers", type=int, default=32, help="Число параллельных читателей")
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность замера, с")
+    parser.add_argument(
+        "--write-interval", type=float, default=0.01, help="Пауза между обновлениями статуса, с"
+    )
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(_run(args))))
+        return
+
+    results = {name: _run_configuration(name, args) for name in CONFIGURATIONS}
+    print(f"{'config':<10} {'reads/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'writes':>7} {'errors':>7}")
+    for name, result in results.items():
+        print(
+            f"{name:<10} {result['reads_per_second']:>10.1f} {result['p50_ms']:>8.2f} "
+            f"{result['p99_ms']:>8.2f} {result['writes']:>7} {result['errors']:>7}"
+        )
+    speedup = results["tuned"]["reads_per_second"] / max(results["baseline"]["reads_per_second"], 1e-9)
+    print(f"speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
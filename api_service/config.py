@@ -19,13 +19,56 @@ class Settings(BaseSettings):
     # База данных
     database_url: str = "sqlite+aiosqlite:///./analyzer.db"
     db_echo: bool = False
+    db_wal: bool = True  # Режим журнала WAL для SQLite
+    db_busy_timeout_ms: int = 5000
+    db_cache_size_kb: int = 16384  # Размер страничного кэша SQLite на соединение
+    db_reader_pool_size: int = 4  # Соединения только для чтения (0 - читать через основное)
+
+    # Кэш статусов активных задач (0 - отключен)
+    status_cache_size: int = 10000
 
     # Runner сервис
     runner_service_url: str = "http://runner:8080"
 
+    # Индекс пакетов PyPI (Simple API в формате JSON)
+    pypi_simple_url: str = "https://pypi.org/simple/"
+
+    # Очередь задач: runner сервисы забирают задачи по аренде с heartbeat'ами
+    job_lease_seconds: int = 120  # Аренда без продления возвращает задачу в очередь
+    job_max_attempts: int = 3  # Попыток выполнения задачи (включая первую)
+    job_retry_base_seconds: int = 30  # Отсрочка повтора: base, 2*base, 4*base, ...
+
+    # Прогноз сроков задач по истории длительностей этапов и допуск в очередь
+    queue_max_backlog_seconds: int = 0  # Предел прогноза ожидания новой задачи (0 = без предела, иначе HTTP 429)
+    queue_slots: int = 0  # Слотов runner'ов для прогноза (0 = оценка по очереди)
+    queue_saturation_grace_seconds: int = 15  # Ожидание выдачи, после которого runner'ы считаются занятыми
+    eta_history_tasks: int = 500  # Последних завершенных задач в истории моделей
+    eta_min_samples: int = 3  # Замеров ключа модели, при которых он используется
+    eta_default_seconds: int = 900  # Прогноз без истории
+    eta_model_refresh_seconds: int = 300  # Период перестроения моделей
+    eta_forecast_refresh_seconds: int = 10  # Время жизни прогноза очереди для опроса статусов
+
+    # Кампании: сколько задач кампаний одновременно отправлено на runner сервис
+    campaign_max_running: int = 2
+
+    # Экспорт интервалов этапов задач в OpenTelemetry Collector (OTLP/HTTP, пусто - отключен)
+    otlp_endpoint: str = ""  # например, http://localhost:4318
+
     # Таймауты
     request_timeout: int = 30
 
+    # Хранилище артефактов (файлов результатов)
+    artifact_backend: str = "local"
+    artifact_store_dir: str = "./artifacts"
+    artifact_ttl_hours: int = 168  # Удалять артефакты, не запрашивавшиеся неделю
+    artifact_store_max_mb: int = 2048  # Предельный объем хранилища на диске
+
+    # Загруженные исходники задач (архивы tar/zip и git bundle, адресуются по sha256)
+    source_store_dir: str = "./sources"
+    source_max_upload_mb: int = 2048  # Предельный размер одной загрузки
+    source_ttl_hours: int = 168  # Удалять исходники, не использовавшиеся неделю
+    source_store_max_mb: int = 10240  # Предельный объем хранилища исходников
+
     model_config = SettingsConfigDict(
         env_file=".env.development.local" if os.environ.get("ENV") != "production" else ".env.production.local",
         env_file_encoding="utf-8",
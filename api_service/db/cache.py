@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from config import get_settings
+from metrics import CACHE_REQUESTS
+
+# Статусы, при которых клиенты опрашивают задачу
+ACTIVE_STATUSES = frozenset({"pending", "queued", "running", "cancelling"})
+
+_HITS = CACHE_REQUESTS.labels("task_status", "hit")
+_MISSES = CACHE_REQUESTS.labels("task_status", "miss")
+
+
+@dataclass(frozen=True)
+class TaskStatusSnapshot:
+    """Минимальный набор полей задачи, нужный для ответа о статусе."""
+
+    task_id: str
+    status: str
+    metrics_downloaded: bool
+
+
+class TaskStatusCache:
+    """
+    Write-through кэш статусов задач в памяти процесса.
+    Все изменения статуса проходят через db.operations, поэтому записи
+    обновляются вместе с БД. При чтении кэшируются только активные задачи,
+    вытеснение - LRU по числу записей.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, TaskStatusSnapshot] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, task_id: str) -> Optional[TaskStatusSnapshot]:
+        snapshot = self._entries.get(task_id)
+        if snapshot is not None:
+            self._entries.move_to_end(task_id)
+            _HITS.inc()
+        elif self.enabled:
+            _MISSES.inc()
+        return snapshot
+
+    def put(self, snapshot: TaskStatusSnapshot) -> None:
+        """Сохраняет состояние задачи после записи в БД."""
+        if not self.enabled:
+            return
+        self._entries[snapshot.task_id] = snapshot
+        self._entries.move_to_end(snapshot.task_id)
+        self._evict()
+
+    def fill(self, snapshot: TaskStatusSnapshot) -> None:
+        """
+        Сохраняет состояние, прочитанное из БД при промахе.
+        Не перезаписывает уже имеющуюся запись: она могла появиться
+        от более поздней записи, пока шло чтение.
+        """
+        if not self.enabled or snapshot.status not in ACTIVE_STATUSES:
+            return
+        self._entries.setdefault(snapshot.task_id, snapshot)
+        self._evict()
+
+    def discard(self, task_id: str) -> None:
+        self._entries.pop(task_id, None)
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+# Синглтон для кэша статусов
+_status_cache: Optional[TaskStatusCache] = None
+
+
+def get_status_cache() -> TaskStatusCache:
+    """
+    Фабрика кэша статусов задач.
+    """
+    global _status_cache
+    if _status_cache is None:
+        _status_cache = TaskStatusCache(get_settings().status_cache_size)
+    return _status_cache
@@ -1,27 +1,134 @@
+import time
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import Connection, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.schema import CreateTable, DefaultClause
 
 from config import get_settings
 from db.models import Base
+from metrics import DB_QUERY_DURATION
 
 # Получение настроек
 settings = get_settings()
 
+_url = make_url(settings.database_url)
+_is_sqlite_file = _url.get_backend_name() == "sqlite" and _url.database not in (None, "", ":memory:")
+
+
+def _configure_sqlite(engine: AsyncEngine, readonly: bool = False) -> None:
+    """
+    Настраивает каждое новое соединение SQLite.
+    WAL позволяет читателям не блокироваться на записи runner сервиса,
+    busy_timeout заменяет немедленную ошибку "database is locked" ожиданием.
+    """
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if settings.db_wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # В режиме WAL NORMAL не теряет целостность, но не делает fsync на каждый коммит
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.db_busy_timeout_ms}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA cache_size=-{settings.db_cache_size_kb}")
+        if readonly:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
 # Инициализация базы данных
 engine = create_async_engine(settings.database_url, echo=settings.db_echo)
+if _is_sqlite_file:
+    _configure_sqlite(engine)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
 
+def _instrument(engine: AsyncEngine, pool: str) -> None:
+    """Учитывает длительность каждого SQL-запроса в метриках."""
+    histogram = DB_QUERY_DURATION.labels(pool)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        histogram.observe(time.perf_counter() - conn.info["query_started"].pop())
+
+
+_instrument(engine, "writer")
+
+# Отдельный пул соединений только для чтения: в режиме WAL читатели
+# не ждут писателя и не занимают соединения, нужные для записи
+if _is_sqlite_file and settings.db_wal and settings.db_reader_pool_size > 0:
+    read_engine = create_async_engine(
+        settings.database_url,
+        echo=settings.db_echo,
+        pool_size=settings.db_reader_pool_size,
+        max_overflow=0,
+    )
+    _configure_sqlite(read_engine, readonly=True)
+else:
+    read_engine = engine
+if read_engine is not engine:
+    _instrument(read_engine, "reader")
+read_session_maker = async_sessionmaker(read_engine, expire_on_commit=False)
+
+
 # Функции для управления жизненным циклом БД
 async def create_tables():
     """Создает таблицы в базе данных"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_add_missing_indexes)
+
+
+def _add_missing_columns(conn: Connection) -> None:
+    """
+    Добавляет в существующие таблицы колонки, появившиеся в моделях.
+    create_all не изменяет уже созданные таблицы, поэтому новые поля
+    добавляются через ALTER TABLE (только nullable или со значением по умолчанию).
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        ddl_compiler = conn.dialect.ddl_compiler(conn.dialect, CreateTable(table))
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+            if isinstance(column.server_default, DefaultClause):
+                # Значение по умолчанию в синтаксисе диалекта: строки в кавычках, выражения как есть
+                ddl += f" DEFAULT {ddl_compiler.get_column_default_string(column)}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            conn.execute(text(ddl))
+
+
+def _add_missing_indexes(conn: Connection) -> None:
+    """
+    Создает индексы, добавленные в модели после создания таблиц
+    (create_all создает индексы только вместе с новой таблицей).
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
 
 
 async def close_db_connection():
     """Закрывает соединение с базой данных"""
+    if read_engine is not engine:
+        await read_engine.dispose()
     await engine.dispose()
 
 
@@ -34,3 +141,15 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Зависимость для получения сессии БД только для чтения.
+    Используется в часто опрашиваемых эндпоинтах.
+    """
+    async with read_session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
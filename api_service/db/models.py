@@ -2,7 +2,17 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, Integer, String, Text
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    false,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -14,6 +24,13 @@ class Base(DeclarativeBase):
 
 class Task(Base):
     __tablename__ = "tasks"
+    # Индексы под историю задач: фильтр по равенству + порядок курсора (created_at, id)
+    __table_args__ = (
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_analyzer_created_at_id", "analyzer_name", "created_at", "id"),
+        Index("ix_tasks_repository_created_at_id", "repository_url", "created_at", "id"),
+        Index("ix_tasks_status_created_at_id", "status", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     task_id: Mapped[str] = mapped_column(
@@ -28,11 +45,45 @@ class Task(Base):
     command_template: Mapped[str] = mapped_column(
         String(255), nullable=False, default="{analyzer_cmd} ."
     )
+    mode: Mapped[str] = mapped_column(
+        String(20), nullable=False, default="standard", server_default="standard"
+    )  # standard, scaling, incremental
+    max_workers: Mapped[Optional[int]] = mapped_column(
+        Integer, nullable=True, default=None
+    )
+    edit_files: Mapped[Optional[int]] = mapped_column(
+        Integer, nullable=True, default=None
+    )  # Файлов в каждой правке режима incremental
+    schedule: Mapped[str] = mapped_column(
+        String(20), nullable=False, default="grouped", server_default="grouped"
+    )  # grouped, interleaved
+    seed: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, default=None)
+    exclusive: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
+    memory_max_mb: Mapped[Optional[int]] = mapped_column(
+        Integer, nullable=True, default=None
+    )  # Лимит памяти итерации
+    cpu_max: Mapped[Optional[float]] = mapped_column(
+        Float, nullable=True, default=None
+    )  # Лимит CPU итерации, ядер
+    profile: Mapped[Optional[str]] = mapped_column(
+        String(20), nullable=True, default=None
+    )  # Профилировщик отдельного прогона анализатора: cprofile, sampling
+    startup_analysis: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )  # Анализ стоимости запуска анализаторов
+    campaign_id: Mapped[Optional[str]] = mapped_column(
+        String(36), nullable=True, index=True, default=None
+    )  # Кампания, из которой развернута задача
+    commit_sha: Mapped[Optional[str]] = mapped_column(
+        String(80), nullable=True, index=True, default=None
+    )  # Ревизия репозитория, на которой выполнены замеры
     status: Mapped[str] = mapped_column(
         String(20), default="pending", nullable=False
-    )  # pending, running, completed, failed
+    )  # pending, queued, running, completed, partial, failed
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.now(), nullable=False
+        DateTime, default=datetime.now, nullable=False
     )
     completed_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime, nullable=True, default=None
@@ -44,3 +95,126 @@ class Task(Base):
         String(255), nullable=True, default=None
     )
     metrics_downloaded: Mapped[bool] = mapped_column(Boolean, default=False)
+    runner_cleaned: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )  # Ресурсы задачи на runner сервисе удалены
+
+
+class Campaign(Base):
+    """Пакетный запуск: декартово произведение репозиториев и анализаторов"""
+
+    __tablename__ = "campaigns"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    campaign_id: Mapped[str] = mapped_column(String(36), unique=True, index=True)
+    name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    status: Mapped[str] = mapped_column(
+        String(20), default="running", nullable=False
+    )  # running, completed
+    total_tasks: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, nullable=False
+    )
+    completed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True, default=None
+    )
+
+
+class TaskSpan(Base):
+    """Интервал одного этапа выполнения задачи (очередь, установка, клонирование, ...)"""
+
+    __tablename__ = "task_spans"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    task_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    source: Mapped[str] = mapped_column(String(10), nullable=False)  # api, runner
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    ended_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    attributes: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, default=None
+    )  # JSON
+
+
+class Artifact(Base):
+    """Файл результатов задачи в хранилище артефактов (адресуется по хешу содержимого)"""
+
+    __tablename__ = "artifacts"
+    __table_args__ = (UniqueConstraint("task_id", "format"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    task_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
+    format: Mapped[str] = mapped_column(String(10), nullable=False)  # csv, npz, arrow
+    digest: Mapped[str] = mapped_column(
+        String(64), nullable=False, index=True
+    )  # sha256 несжатого содержимого
+    media_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)  # Размер без сжатия
+    stored_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    encoding: Mapped[str] = mapped_column(String(10), nullable=False)  # zstd, gzip
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, nullable=False
+    )
+    last_accessed_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, nullable=False
+    )
+
+
+class RepositoryStats(Base):
+    """
+    Индекс репозитория на одной ревизии: размер кода, на который
+    нормируются метрики анализаторов (строки и файлы в секунду, память на kLOC).
+    """
+
+    __tablename__ = "repository_stats"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    commit_sha: Mapped[str] = mapped_column(
+        String(80), unique=True, index=True
+    )  # SHA коммита или отпечаток содержимого источника (sha256:..., tree:..., synthetic:...)
+    repository_url: Mapped[str] = mapped_column(String(255), nullable=False)
+    files: Mapped[int] = mapped_column(Integer, nullable=False)
+    physical_loc: Mapped[int] = mapped_column(Integer, nullable=False)
+    logical_loc: Mapped[int] = mapped_column(Integer, nullable=False)
+    ast_nodes: Mapped[int] = mapped_column(Integer, nullable=False)
+    parse_errors: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, nullable=False
+    )
+
+
+class Job(Base):
+    """
+    Задача в очереди на выполнение. Runner сервисы забирают задачи сами
+    и держат их по аренде (lease), продлевая ее heartbeat'ами; задача с
+    истекшей арендой возвращается в очередь.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_available_at", "status", "available_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    task_id: Mapped[str] = mapped_column(String(36), unique=True, index=True)
+    status: Mapped[str] = mapped_column(
+        String(20), default="queued", nullable=False
+    )  # queued, leased, done, dead
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, nullable=False
+    )  # Не раньше этого момента (отсрочка повторной попытки)
+    lease_owner: Mapped[Optional[str]] = mapped_column(
+        String(255), nullable=True, default=None
+    )  # ID runner'а, арендовавшего задачу
+    lease_url: Mapped[Optional[str]] = mapped_column(
+        String(255), nullable=True, default=None
+    )  # Базовый URL runner'а, арендовавшего задачу (None = RUNNER_SERVICE_URL)
+    leased_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True, default=None
+    )
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True, default=None
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True, default=None)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, nullable=False
+    )
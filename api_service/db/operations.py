@@ -1,11 +1,24 @@
 import datetime
+import json
 import uuid
-from typing import Any
+from typing import Any, cast
 
-from sqlalchemy import select, update
+from sqlalchemy import delete, func, literal, select, tuple_, update
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .models import Task
+from metrics import TASK_TRANSITIONS
+
+from .cache import ACTIVE_STATUSES, TaskStatusSnapshot, get_status_cache
+from .models import Artifact, Campaign, Job, RepositoryStats, Task, TaskSpan
+
+
+def _cache_task(task: Task) -> None:
+    """Обновляет кэш статусов после записи задачи."""
+    get_status_cache().put(
+        TaskStatusSnapshot(task.task_id, task.status, task.metrics_downloaded)
+    )
 
 
 async def create_task(
@@ -13,18 +26,42 @@ async def create_task(
     analyzer_name: str,
     repository_url: str,
     command_template: str = "{analyzer_cmd} .",
+    mode: str = "standard",
+    max_workers: int | None = None,
+    edit_files: int | None = None,
+    schedule: str = "grouped",
+    seed: int | None = None,
+    exclusive: bool = False,
+    memory_max_mb: int | None = None,
+    cpu_max: float | None = None,
+    profile: str | None = None,
+    startup_analysis: bool = False,
 ) -> Task:
-    """Создает новую задачу анализа."""
+    """Создает новую задачу анализа и ставит ее в очередь одной транзакцией."""
     task_id = str(uuid.uuid4())
     task = Task(
         task_id=task_id,
         analyzer_name=analyzer_name,
         repository_url=repository_url,
         command_template=command_template,
+        mode=mode,
+        max_workers=max_workers,
+        edit_files=edit_files,
+        schedule=schedule,
+        seed=seed,
+        exclusive=exclusive,
+        memory_max_mb=memory_max_mb,
+        cpu_max=cpu_max,
+        profile=profile,
+        startup_analysis=startup_analysis,
+        status="queued",
     )
     db.add(task)
+    db.add(Job(task_id=task_id))
     await db.commit()
     await db.refresh(task)
+    _cache_task(task)
+    TASK_TRANSITIONS.labels(task.status).inc()
     return task
 
 
@@ -35,6 +72,78 @@ async def get_task_by_id(db: AsyncSession, task_id: str) -> Task | None:
     return result.scalars().first()
 
 
+async def get_task_status_snapshot(
+    db: AsyncSession, task_id: str
+) -> TaskStatusSnapshot | None:
+    """
+    Получает статус задачи: из кэша, а при промахе - одним узким запросом.
+    """
+    cache = get_status_cache()
+    snapshot = cache.get(task_id)
+    if snapshot is not None:
+        return snapshot
+
+    query = select(Task.task_id, Task.status, Task.metrics_downloaded).where(
+        Task.task_id == task_id
+    )
+    row = (await db.execute(query)).first()
+    if row is None:
+        return None
+
+    snapshot = TaskStatusSnapshot(row.task_id, row.status, bool(row.metrics_downloaded))
+    cache.fill(snapshot)
+    return snapshot
+
+
+async def list_tasks(
+    db: AsyncSession,
+    limit: int,
+    analyzer_name: str | None = None,
+    repository_url: str | None = None,
+    status: str | None = None,
+    created_from: datetime.datetime | None = None,
+    created_to: datetime.datetime | None = None,
+    after: tuple[datetime.datetime, int] | None = None,
+    include_errors: bool = False,
+) -> list[Any]:
+    """
+    Возвращает страницу истории задач, от новых к старым.
+    Пагинация по курсору (created_at, id): следующая страница начинается
+    строго после последней строки предыдущей, без OFFSET.
+    """
+    columns = [
+        Task.id,
+        Task.task_id,
+        Task.analyzer_name,
+        Task.repository_url,
+        Task.mode,
+        Task.status,
+        Task.created_at,
+        Task.completed_at,
+    ]
+    if include_errors:
+        columns.append(Task.error_message)
+
+    query = select(*columns)
+    if analyzer_name is not None:
+        query = query.where(Task.analyzer_name == analyzer_name)
+    if repository_url is not None:
+        query = query.where(Task.repository_url == repository_url)
+    if status is not None:
+        query = query.where(Task.status == status)
+    if created_from is not None:
+        query = query.where(Task.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(Task.created_at < created_to)
+    if after is not None:
+        created_at, row_id = after
+        query = query.where(tuple_(Task.created_at, Task.id) < tuple_(literal(created_at), literal(row_id)))
+
+    query = query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit)
+    result = await db.execute(query)
+    return list(result.all())
+
+
 async def update_task_status(
     db: AsyncSession,
     task_id: str,
@@ -45,7 +154,7 @@ async def update_task_status(
     """Обновляет статус задачи."""
     update_values: dict[str, Any] = {"status": status}
 
-    if status in ["completed", "failed"]:
+    if status in ["completed", "partial", "failed"]:
         update_values["completed_at"] = datetime.datetime.now(tz=None)
 
     if error_message:
@@ -54,17 +163,523 @@ async def update_task_status(
     if metrics_file_path:
         update_values["metrics_file_path"] = metrics_file_path
 
-    stmt = update(Task).where(Task.task_id == task_id).values(**update_values)
-    await db.execute(stmt)
+    # RETURNING возвращает обновленную строку без повторного SELECT
+    stmt = (
+        update(Task)
+        .where(Task.task_id == task_id)
+        .values(**update_values)
+        .returning(Task)
+        .execution_options(populate_existing=True)
+    )
+    task = (await db.execute(stmt)).scalars().first()
     await db.commit()
 
-    return await get_task_by_id(db, task_id)
+    if task is not None:
+        _cache_task(task)
+        TASK_TRANSITIONS.labels(status).inc()
+    return task
 
 
 async def mark_metrics_downloaded(db: AsyncSession, task_id: str) -> Task | None:
     """Отмечает, что метрики были скачаны."""
-    stmt = update(Task).where(Task.task_id == task_id).values(metrics_downloaded=True)
+    stmt = (
+        update(Task)
+        .where(Task.task_id == task_id)
+        .values(metrics_downloaded=True)
+        .returning(Task)
+        .execution_options(populate_existing=True)
+    )
+    task = (await db.execute(stmt)).scalars().first()
+    await db.commit()
+
+    if task is not None:
+        _cache_task(task)
+    return task
+
+
+async def mark_runner_cleaned(db: AsyncSession, task_id: str, cleaned: bool) -> bool:
+    """
+    Отмечает результат очистки ресурсов задачи на runner сервисе.
+    Возвращает False, если задача не найдена.
+    """
+    stmt = (
+        update(Task)
+        .where(Task.task_id == task_id)
+        .values(runner_cleaned=cleaned)
+        .returning(Task.id)
+    )
+    found = (await db.execute(stmt)).first() is not None
+    await db.commit()
+    return found
+
+
+async def get_artifact(db: AsyncSession, task_id: str, format: str) -> Artifact | None:
+    """Получает артефакт задачи в заданном формате."""
+    query = select(Artifact).where(Artifact.task_id == task_id, Artifact.format == format)
+    result = await db.execute(query)
+    return result.scalars().first()
+
+
+async def create_artifact(db: AsyncSession, **values: Any) -> Artifact:
+    """Регистрирует артефакт задачи."""
+    artifact = Artifact(**values)
+    db.add(artifact)
+    await db.commit()
+    await db.refresh(artifact)
+    return artifact
+
+
+async def touch_artifact(db: AsyncSession, artifact_id: int) -> None:
+    """Обновляет время последнего обращения к артефакту."""
+    stmt = (
+        update(Artifact)
+        .where(Artifact.id == artifact_id)
+        .values(last_accessed_at=datetime.datetime.now(tz=None))
+    )
     await db.execute(stmt)
     await db.commit()
 
-    return await get_task_by_id(db, task_id)
+
+async def delete_artifacts_older_than(db: AsyncSession, deadline: datetime.datetime) -> int:
+    """Удаляет записи об артефактах, к которым не обращались с момента deadline."""
+    stmt = delete(Artifact).where(Artifact.last_accessed_at < deadline)
+    result = cast(CursorResult, await db.execute(stmt))
+    await db.commit()
+    return result.rowcount
+
+
+async def list_artifact_blobs(db: AsyncSession) -> list[tuple[str, int, datetime.datetime]]:
+    """
+    Возвращает хранимые блобы (digest, размер на диске, последнее обращение)
+    от давно не использовавшихся к недавним.
+    """
+    query = (
+        select(
+            Artifact.digest,
+            func.max(Artifact.stored_size),
+            func.max(Artifact.last_accessed_at).label("last_accessed_at"),
+        )
+        .group_by(Artifact.digest)
+        .order_by("last_accessed_at")
+    )
+    result = await db.execute(query)
+    return [(digest, size, accessed) for digest, size, accessed in result.all()]
+
+
+async def delete_artifacts_by_digest(db: AsyncSession, digest: str) -> None:
+    """Удаляет все записи, ссылающиеся на блоб."""
+    await db.execute(delete(Artifact).where(Artifact.digest == digest))
+    await db.commit()
+
+
+async def digest_in_use(db: AsyncSession, digest: str) -> bool:
+    """Проверяет, ссылается ли на блоб хотя бы один артефакт."""
+    query = select(Artifact.id).where(Artifact.digest == digest).limit(1)
+    result = await db.execute(query)
+    return result.first() is not None
+
+
+async def create_campaign(
+    db: AsyncSession,
+    name: str | None,
+    repositories: list[str],
+    analyzers: list[str],
+    **task_options: Any,
+) -> tuple[Campaign, list[Task]]:
+    """
+    Создает кампанию и ее задачи одной транзакцией.
+    Задачи идут по репозиториям, чтобы задачи одного репозитория
+    выполнялись подряд и использовали общий клон на runner сервисе.
+    """
+    campaign = Campaign(
+        campaign_id=str(uuid.uuid4()),
+        name=name,
+        total_tasks=len(repositories) * len(analyzers),
+    )
+    db.add(campaign)
+
+    tasks = [
+        Task(
+            task_id=str(uuid.uuid4()),
+            campaign_id=campaign.campaign_id,
+            analyzer_name=analyzer_name,
+            repository_url=repository_url,
+            **task_options,
+        )
+        for repository_url in repositories
+        for analyzer_name in analyzers
+    ]
+    db.add_all(tasks)
+    await db.commit()
+
+    for task in tasks:
+        _cache_task(task)
+    TASK_TRANSITIONS.labels("pending").inc(len(tasks))
+    return campaign, tasks
+
+
+async def get_campaign(db: AsyncSession, campaign_id: str) -> Campaign | None:
+    """Получает кампанию по ID."""
+    query = select(Campaign).where(Campaign.campaign_id == campaign_id)
+    result = await db.execute(query)
+    return result.scalars().first()
+
+
+async def count_campaign_tasks(db: AsyncSession, campaign_id: str) -> dict[str, int]:
+    """Возвращает число задач кампании по статусам."""
+    query = (
+        select(Task.status, func.count())
+        .where(Task.campaign_id == campaign_id)
+        .group_by(Task.status)
+    )
+    result = await db.execute(query)
+    return {status: count for status, count in result.all()}
+
+
+async def list_campaign_tasks(db: AsyncSession, campaign_id: str) -> list[Task]:
+    """Возвращает задачи кампании в порядке создания."""
+    query = select(Task).where(Task.campaign_id == campaign_id).order_by(Task.id)
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
+async def get_running_campaign_load(db: AsyncSession) -> dict[str, dict[str, int]]:
+    """
+    Возвращает для незавершенных кампаний число задач по статусам:
+    {campaign_id: {status: count}}. Кампании без задач в очереди тоже
+    попадают в результат - по нему определяется их завершение.
+    """
+    query = (
+        select(Campaign.campaign_id, Task.status, func.count())
+        .join(Task, Task.campaign_id == Campaign.campaign_id)
+        .where(Campaign.status == "running")
+        .group_by(Campaign.campaign_id, Task.status)
+        .order_by(Campaign.id)
+    )
+    result = await db.execute(query)
+    load: dict[str, dict[str, int]] = {}
+    for campaign_id, status, count in result.all():
+        load.setdefault(campaign_id, {})[status] = count
+    return load
+
+
+async def get_next_campaign_task(db: AsyncSession, campaign_id: str) -> Task | None:
+    """Следующая задача кампании в очереди: сначала по репозиторию, затем по порядку создания."""
+    query = (
+        select(Task)
+        .where(Task.campaign_id == campaign_id, Task.status == "pending")
+        .order_by(Task.repository_url, Task.id)
+        .limit(1)
+    )
+    result = await db.execute(query)
+    return result.scalars().first()
+
+
+async def mark_campaign_completed(db: AsyncSession, campaign_id: str) -> None:
+    """Отмечает кампанию завершенной."""
+    stmt = (
+        update(Campaign)
+        .where(Campaign.campaign_id == campaign_id)
+        .values(status="completed", completed_at=datetime.datetime.now(tz=None))
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+
+async def add_task_spans(
+    db: AsyncSession, task_id: str, source: str, spans: list[dict[str, Any]]
+) -> None:
+    """Сохраняет интервалы этапов задачи."""
+    db.add_all(
+        [
+            TaskSpan(
+                task_id=task_id,
+                name=span["name"],
+                source=source,
+                started_at=span["start"],
+                ended_at=span["end"],
+                attributes=json.dumps(span["attributes"]) if span.get("attributes") else None,
+            )
+            for span in spans
+        ]
+    )
+    await db.commit()
+
+
+async def list_task_spans(db: AsyncSession, task_id: str) -> list[TaskSpan]:
+    """Возвращает интервалы этапов задачи в порядке начала."""
+    query = (
+        select(TaskSpan)
+        .where(TaskSpan.task_id == task_id)
+        .order_by(TaskSpan.started_at, TaskSpan.id)
+    )
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
+async def save_repository_stats(
+    db: AsyncSession, task_id: str, repository_url: str, stats: dict[str, Any]
+) -> RepositoryStats | None:
+    """
+    Сохраняет индекс репозитория (один на ревизию) и привязывает
+    к ревизии задачу, на которой он получен.
+    """
+    commit_sha = stats["commit_sha"]
+    repo_stats = await get_repository_stats(db, commit_sha)
+    if repo_stats is None:
+        try:
+            repo_stats = RepositoryStats(repository_url=repository_url, **stats)
+            db.add(repo_stats)
+            await db.commit()
+        except IntegrityError:
+            # Индекс той же ревизии одновременно прислала другая задача
+            await db.rollback()
+            repo_stats = await get_repository_stats(db, commit_sha)
+
+    await db.execute(update(Task).where(Task.task_id == task_id).values(commit_sha=commit_sha))
+    await db.commit()
+    return repo_stats
+
+
+async def get_repository_stats(db: AsyncSession, commit_sha: str) -> RepositoryStats | None:
+    """Возвращает индекс репозитория на ревизии."""
+    result = await db.execute(select(RepositoryStats).where(RepositoryStats.commit_sha == commit_sha))
+    return result.scalars().first()
+
+
+async def enqueue_task(db: AsyncSession, task_id: str) -> Task | None:
+    """Ставит существующую задачу (например, задачу кампании) в очередь."""
+    stmt = (
+        update(Task)
+        .where(Task.task_id == task_id)
+        .values(status="queued")
+        .returning(Task)
+        .execution_options(populate_existing=True)
+    )
+    task = (await db.execute(stmt)).scalars().first()
+    if task is not None:
+        db.add(Job(task_id=task_id))
+    await db.commit()
+
+    if task is not None:
+        _cache_task(task)
+        TASK_TRANSITIONS.labels("queued").inc()
+    return task
+
+
+async def lease_jobs(
+    db: AsyncSession,
+    runner_id: str,
+    capacity: int,
+    lease_until: datetime.datetime,
+    runner_url: str | None = None,
+) -> list[tuple[Job, Task]]:
+    """
+    Выдает runner'у до capacity задач из очереди, от давно ожидающих к новым.
+    Выборка и захват - один UPDATE, поэтому задачу получает только один runner.
+    runner_url - адрес, по которому API сервис обращается к runner'у за
+    результатами, отменой и очисткой задачи.
+    """
+    now = datetime.datetime.now(tz=None)
+    available = (
+        select(Job.id)
+        .where(Job.status == "queued", Job.available_at <= now)
+        .order_by(Job.available_at, Job.id)
+        .limit(capacity)
+    )
+    stmt = (
+        update(Job)
+        .where(Job.id.in_(available.scalar_subquery()), Job.status == "queued")
+        .values(
+            status="leased",
+            lease_owner=runner_id,
+            lease_url=runner_url,
+            leased_at=now,
+            lease_expires_at=lease_until,
+            attempts=Job.attempts + 1,
+        )
+        .returning(Job)
+    )
+    jobs = list((await db.execute(stmt)).scalars().all())
+    await db.commit()
+    if not jobs:
+        return []
+
+    query = select(Task).where(Task.task_id.in_([job.task_id for job in jobs]))
+    tasks = {task.task_id: task for task in (await db.execute(query)).scalars().all()}
+    return [(job, tasks[job.task_id]) for job in sorted(jobs, key=lambda j: j.id) if job.task_id in tasks]
+
+
+async def extend_job_leases(
+    db: AsyncSession, runner_id: str, task_ids: list[str], lease_until: datetime.datetime
+) -> int:
+    """
+    Продлевает аренду задач, которые runner продолжает выполнять. Задача,
+    возвращенная в очередь по истечении его же аренды, снова закрепляется
+    за ним; задача, возвращенная после сообщенной runner'ом ошибки, - нет.
+    """
+    if not task_ids:
+        return 0
+    stmt = (
+        update(Job)
+        .where(
+            Job.task_id.in_(task_ids),
+            Job.status.in_(["queued", "leased"]),
+            Job.lease_owner == runner_id,
+        )
+        .values(status="leased", lease_owner=runner_id, lease_expires_at=lease_until)
+    )
+    result = cast(CursorResult, await db.execute(stmt))
+    await db.commit()
+    return result.rowcount
+
+
+async def list_expired_jobs(db: AsyncSession) -> list[Job]:
+    """Возвращает задачи, аренда которых истекла без heartbeat'а."""
+    now = datetime.datetime.now(tz=None)
+    query = select(Job).where(Job.status == "leased", Job.lease_expires_at < now)
+    return list((await db.execute(query)).scalars().all())
+
+
+async def get_job(db: AsyncSession, task_id: str) -> Job | None:
+    """Получает задачу очереди по ID задачи анализа."""
+    query = select(Job).where(Job.task_id == task_id)
+    return (await db.execute(query)).scalars().first()
+
+
+async def get_job_runner_url(db: AsyncSession, task_id: str) -> str | None:
+    """Адрес runner'а, которому последним выдавалась задача (None - адрес не известен)."""
+    query = select(Job.lease_url).where(Job.task_id == task_id)
+    return (await db.execute(query)).scalars().first()
+
+
+async def list_campaign_runner_urls(db: AsyncSession, campaign_id: str) -> list[str]:
+    """Адреса runner'ов, выполнявших задачи кампании."""
+    query = (
+        select(Job.lease_url)
+        .join(Task, Task.task_id == Job.task_id)
+        .where(Task.campaign_id == campaign_id, Job.lease_url.is_not(None))
+        .distinct()
+    )
+    return [url for url in (await db.execute(query)).scalars().all() if url]
+
+
+async def requeue_job(
+    db: AsyncSession,
+    job_id: int,
+    available_at: datetime.datetime,
+    error: str | None,
+    keep_owner: bool = False,
+) -> None:
+    """
+    Возвращает задачу в очередь для повторной попытки не раньше available_at.
+    С keep_owner задача остается за прежним runner'ом, пока ее не арендует
+    другой: runner, продолжающий ее выполнять, вернет ее heartbeat'ом.
+    """
+    values: dict[str, Any] = {
+        "status": "queued",
+        "available_at": available_at,
+        "lease_expires_at": None,
+        "last_error": error,
+    }
+    if not keep_owner:
+        values["lease_owner"] = None
+    stmt = update(Job).where(Job.id == job_id).values(**values)
+    await db.execute(stmt)
+    await db.commit()
+
+
+async def close_job(
+    db: AsyncSession, task_id: str, status: str = "done", only_queued: bool = False
+) -> bool:
+    """
+    Снимает задачу с очереди (done - задача завершена, dead - попытки
+    исчерпаны). С only_queued закрывает только еще не выданную задачу.
+    """
+    stmt = update(Job).where(Job.task_id == task_id, Job.status.in_(["queued", "leased"]))
+    if only_queued:
+        stmt = stmt.where(Job.status == "queued")
+    result = cast(CursorResult, await db.execute(stmt.values(status=status, lease_expires_at=None)))
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def count_jobs(db: AsyncSession) -> dict[str, int]:
+    """Возвращает число задач очереди по статусам (кроме завершенных)."""
+    query = (
+        select(Job.status, func.count())
+        .where(Job.status.in_(["queued", "leased"]))
+        .group_by(Job.status)
+    )
+    return {status: count for status, count in (await db.execute(query)).all()}
+
+
+async def list_phase_history(
+    db: AsyncSession, phases: list[str], limit: int
+) -> list[Any]:
+    """
+    Интервалы этапов runner'а последних limit успешно завершенных задач вместе
+    с параметрами задачи и размером репозитория (логические строки) - история
+    для моделей длительности задач.
+    """
+    recent = (
+        select(Task.task_id)
+        .where(Task.status == "completed")
+        .order_by(Task.completed_at.desc())
+        .limit(limit)
+    )
+    query = (
+        select(
+            Task.task_id,
+            Task.analyzer_name,
+            Task.mode,
+            Task.schedule,
+            Task.exclusive,
+            RepositoryStats.logical_loc,
+            TaskSpan.name,
+            TaskSpan.started_at,
+            TaskSpan.ended_at,
+        )
+        .join(TaskSpan, TaskSpan.task_id == Task.task_id)
+        .outerjoin(RepositoryStats, RepositoryStats.commit_sha == Task.commit_sha)
+        .where(
+            Task.task_id.in_(recent.scalar_subquery()),
+            TaskSpan.source == "runner",
+            TaskSpan.name.in_(phases),
+        )
+    )
+    return list((await db.execute(query)).all())
+
+
+async def list_active_jobs(db: AsyncSession) -> list[tuple[Job, Task]]:
+    """Задачи очереди, ожидающие и выданные runner'ам, в порядке выдачи."""
+    query = (
+        select(Job, Task)
+        .join(Task, Task.task_id == Job.task_id)
+        .where(Job.status.in_(["queued", "leased"]))
+        .order_by(Job.available_at, Job.id)
+    )
+    return [(job, task) for job, task in (await db.execute(query)).all()]
+
+
+async def list_active_repository_urls(db: AsyncSession, prefix: str) -> set[str]:
+    """repository_url незавершенных задач, начинающиеся с prefix."""
+    query = (
+        select(Task.repository_url)
+        .where(Task.status.in_(ACTIVE_STATUSES), Task.repository_url.startswith(prefix))
+        .distinct()
+    )
+    return set((await db.execute(query)).scalars().all())
+
+
+async def get_repository_sizes(db: AsyncSession, repository_urls: list[str]) -> dict[str, int]:
+    """Логические строки последнего индекса каждого репозитория (если он уже строился)."""
+    if not repository_urls:
+        return {}
+    query = (
+        select(RepositoryStats.repository_url, RepositoryStats.logical_loc)
+        .where(RepositoryStats.repository_url.in_(set(repository_urls)))
+        .order_by(RepositoryStats.computed_at)
+    )
+    # Более поздний индекс перезаписывает ранний
+    return {url: loc for url, loc in (await db.execute(query)).all()}
@@ -1,12 +1,19 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from api.campaigns import router as campaigns_router
 from api.endpoints import router as api_router
 from api.internal import router as internal_router
+from api.sources import router as sources_router
 from config import get_settings
 from db.database import close_db_connection, create_tables
+from services.artifacts import evict_artifacts
+from services.campaigns import schedule_campaigns
+from services.sources import evict_sources
+from services.telemetry import PrometheusMiddleware, render_metrics
 
 # Получение настроек
 settings = get_settings()
@@ -18,8 +25,17 @@ async def lifespan(app: FastAPI):
     # Создаем таблицы
     await create_tables()
 
+    # Применяем политику хранения артефактов и исходников, накопившихся до перезапуска
+    await evict_artifacts()
+    await evict_sources()
+
+    # Продолжаем очередь кампаний, прерванную перезапуском (не блокируя старт)
+    scheduler = asyncio.create_task(schedule_campaigns())
+
     yield
 
+    scheduler.cancel()
+
     # Закрываем соединения при завершении
     await close_db_connection()
 
@@ -41,9 +57,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Метрики длительности запросов по маршрутам
+app.add_middleware(PrometheusMiddleware)
+
 # Регистрация маршрутов
 app.include_router(api_router, prefix="/api/v1")
+app.include_router(campaigns_router, prefix="/api/v1")
 app.include_router(internal_router, prefix="/api/v1")
+app.include_router(sources_router, prefix="/api/v1")
 
 
 # Эндпоинт для проверки состояния
@@ -52,6 +73,13 @@ async def health_check():
     return {"status": "ok"}
 
 
+# Метрики сервиса в формате Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
 # Запуск приложения
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,68 @@
+"""
+Метрики Prometheus сервиса. Модуль лежит на верхнем уровне, как config:
+его импортируют и слой БД, и сервисы, не создавая зависимости db от services.
+
+Gauge'и отражают состояние общей БД, поэтому в режиме нескольких воркеров
+(PROMETHEUS_MULTIPROC_DIR) берется последнее записанное значение.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# HTTP-запросы к сервису
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Длительность обработки HTTP-запросов",
+    ["method", "route", "status"],
+)
+
+# Задачи и кампании
+TASK_TRANSITIONS = Counter(
+    "task_transitions_total", "Переходы задач между статусами", ["status"]
+)
+CAMPAIGN_QUEUE_DEPTH = Gauge(
+    "campaign_queue_depth",
+    "Задачи кампаний, ожидающие отправки на runner сервис",
+    multiprocess_mode="mostrecent",
+)
+CAMPAIGN_TASKS_IN_FLIGHT = Gauge(
+    "campaign_tasks_in_flight",
+    "Задачи кампаний, выполняющиеся на runner сервисе",
+    multiprocess_mode="mostrecent",
+)
+JOB_QUEUE_DEPTH = Gauge(
+    "job_queue_depth",
+    "Задачи очереди: ожидающие (queued) и выданные runner'ам (leased)",
+    ["status"],
+    multiprocess_mode="mostrecent",
+)
+JOB_RETRIES = Counter(
+    "job_retries_total", "Повторные попытки задач очереди", ["reason"]
+)
+QUEUE_BACKLOG_SECONDS = Gauge(
+    "queue_backlog_seconds",
+    "Прогноз ожидания слота runner'а новой задачей",
+    multiprocess_mode="mostrecent",
+)
+QUEUE_REJECTIONS = Counter(
+    "queue_rejections_total", "Задачи, отклоненные из-за прогноза очереди (HTTP 429)"
+)
+
+# База данных
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Длительность SQL-запросов",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+# Исходящие HTTP-запросы (runner сервис, PyPI)
+HTTP_CLIENT_DURATION = Histogram(
+    "http_client_request_duration_seconds",
+    "Время до получения заголовков ответа внешнего сервиса",
+    ["target", "method", "status"],
+)
+
+# Кэши: статусы задач, хранилище артефактов
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Обращения к кэшам сервиса", ["cache", "result"]
+)
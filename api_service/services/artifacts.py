@@ -0,0 +1,319 @@
+import asyncio
+import datetime
+import hashlib
+import logging
+import os
+import uuid
+import weakref
+import zlib
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional, Tuple
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from db.database import async_session_maker
+from db.models import Artifact
+from db.operations import (
+    create_artifact,
+    delete_artifacts_by_digest,
+    delete_artifacts_older_than,
+    digest_in_use,
+    get_artifact,
+    list_artifact_blobs,
+)
+from metrics import CACHE_REQUESTS
+from services.compression import zstandard
+from services.runner_client import open_metrics_stream, request_cleanup
+from services.tracing import record_spans, span
+
+settings = get_settings()
+logger = logging.getLogger("api.artifacts")
+
+CHUNK_SIZE = 64 * 1024
+
+# Форматы результатов, которые забираются у runner сервиса после завершения задачи.
+# arrow создается runner'ом только при установленном pyarrow,
+# scaling и scaling_csv (сводка и все прогоны) и incremental - только в соответствующих
+# режимах, profile и startup - только для задач с профилированием и анализом запуска
+ARTIFACT_FORMATS = ["csv", "npz", "arrow", "scaling", "scaling_csv", "incremental", "profile", "startup"]
+
+
+class ArtifactBackend(ABC):
+    """Хранилище блобов артефактов, адресуемых по ключу"""
+
+    @abstractmethod
+    async def put_file(self, key: str, source_path: str) -> None:
+        """Помещает локальный файл в хранилище под ключом key (файл перемещается)."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Проверяет наличие блоба."""
+
+    @abstractmethod
+    def iter_bytes(self, key: str) -> AsyncIterator[bytes]:
+        """Читает блоб по частям."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Удаляет блоб (отсутствующий блоб не считается ошибкой)."""
+
+
+class LocalDiskBackend(ArtifactBackend):
+    """Хранилище блобов на локальном диске с раскладкой по префиксу хеша"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    async def put_file(self, key: str, source_path: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+    async def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    async def iter_bytes(self, key: str) -> AsyncIterator[bytes]:
+        with open(self._path(key), "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    async def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+# Доступные реализации хранилища (настройка artifact_backend)
+BACKENDS = {"local": LocalDiskBackend}
+
+_backend: Optional[ArtifactBackend] = None
+
+
+def get_backend() -> ArtifactBackend:
+    """Возвращает настроенное хранилище блобов."""
+    global _backend
+    if _backend is None:
+        backend_cls = BACKENDS[settings.artifact_backend]
+        _backend = backend_cls(os.path.join(settings.artifact_store_dir, "blobs"))
+    return _backend
+
+
+def _blob_key(digest: str, encoding: str) -> str:
+    return f"{digest}.{encoding}"
+
+
+def _new_compressor(encoding: str):
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    return zlib.compressobj(6, zlib.DEFLATED, 31)
+
+
+def _new_decompressor(encoding: str):
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(31)
+
+
+# Блокировки, исключающие одновременную загрузку одного артефакта. Запись
+# исчезает, когда блокировку больше не удерживает и не ждет ни одна загрузка
+_ingest_locks: "weakref.WeakValueDictionary[Tuple[str, str], asyncio.Lock]" = weakref.WeakValueDictionary()
+
+# Блокировка хранилища: сохранение блоба с записью о нем и удаление
+# блобов без ссылок не выполняются одновременно
+_store_lock = asyncio.Lock()
+
+
+async def ingest_artifact(db: AsyncSession, task_id: str, fmt: str) -> Artifact:
+    """
+    Забирает файл результатов задачи у runner сервиса в хранилище.
+    Файл сжимается при загрузке и дедуплицируется по sha256 содержимого.
+    Исключения httpx (например, 404 для отсутствующего формата) пробрасываются.
+
+    Args:
+        db: Сессия БД
+        task_id: ID задачи
+        fmt: Формат файла (csv, npz, arrow)
+
+    Returns:
+        Artifact: Запись об артефакте
+    """
+    lock = _ingest_locks.setdefault((task_id, fmt), asyncio.Lock())
+    async with lock:
+        artifact = await get_artifact(db, task_id, fmt)
+        if artifact is not None:
+            return artifact
+
+        encoding = "zstd" if zstandard is not None else "gzip"
+        tmp_dir = os.path.join(settings.artifact_store_dir, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+
+        digest = hashlib.sha256()
+        compressor = _new_compressor(encoding)
+        size = 0
+
+        stream = await open_metrics_stream(task_id, fmt)
+        try:
+            media_type = stream.headers.get("content-type", "application/octet-stream")
+            with open(tmp_path, "wb") as f:
+                async for chunk in stream.iter_bytes():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    await asyncio.to_thread(f.write, compressor.compress(chunk))
+                f.write(compressor.flush())
+            stored_size = os.path.getsize(tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            await stream.aclose()
+
+        backend = get_backend()
+        key = _blob_key(digest.hexdigest(), encoding)
+        # Блоб и ссылка на него появляются под блокировкой хранилища: иначе
+        # evict_artifacts может удалить найденный блоб до фиксации записи
+        async with _store_lock:
+            try:
+                # Одинаковое содержимое хранится один раз
+                if await backend.exists(key):
+                    os.remove(tmp_path)
+                else:
+                    await backend.put_file(key, tmp_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            logger.info(f"Артефакт {task_id}/{fmt} сохранен: {size} байт, {stored_size} на диске ({encoding})")
+            return await create_artifact(
+                db,
+                task_id=task_id,
+                format=fmt,
+                digest=digest.hexdigest(),
+                media_type=media_type,
+                size=size,
+                stored_size=stored_size,
+                encoding=encoding,
+            )
+
+
+async def get_or_ingest_artifact(db: AsyncSession, task_id: str, fmt: str) -> Artifact:
+    """
+    Возвращает артефакт из хранилища, а если его еще нет - забирает
+    у runner сервиса.
+    """
+    artifact = await get_artifact(db, task_id, fmt)
+    if artifact is not None:
+        CACHE_REQUESTS.labels("artifacts", "hit").inc()
+        return artifact
+
+    CACHE_REQUESTS.labels("artifacts", "miss").inc()
+    return await ingest_artifact(db, task_id, fmt)
+
+
+async def ingest_task_artifacts(task_id: str) -> None:
+    """
+    Забирает все доступные файлы результатов завершенной задачи и после
+    этого освобождает ресурсы на runner сервисе.
+    """
+    ingested = []
+    started = datetime.datetime.now()
+    async with async_session_maker() as db:
+        for fmt in ARTIFACT_FORMATS:
+            try:
+                await ingest_artifact(db, task_id, fmt)
+                ingested.append(fmt)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 404:
+                    logger.error(f"Ошибка загрузки артефакта {task_id}/{fmt}: {str(e)}")
+            except Exception as e:
+                logger.error(f"Ошибка загрузки артефакта {task_id}/{fmt}: {str(e)}")
+
+        await record_spans(
+            db,
+            task_id,
+            "api",
+            [span("ingest", started, datetime.datetime.now(), formats=",".join(ingested))],
+        )
+
+    # Ресурсы runner'а освобождаются, только если основной файл сохранен
+    if "csv" in ingested:
+        try:
+            await request_cleanup(task_id)
+        except Exception as e:
+            logger.error(f"Не удалось запросить очистку задачи {task_id}: {str(e)}")
+
+    await evict_artifacts()
+
+
+async def open_artifact(artifact: Artifact) -> AsyncIterator[bytes]:
+    """Читает сохраненный артефакт в сжатом виде (кодировка artifact.encoding)."""
+    async for chunk in get_backend().iter_bytes(_blob_key(artifact.digest, artifact.encoding)):
+        yield chunk
+
+
+async def read_artifact(
+    artifact: Artifact, start: int = 0, end: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    Читает артефакт в исходном (несжатом) виде, при необходимости
+    ограничивая диапазон байтов [start, end] включительно.
+    """
+    decompressor = _new_decompressor(artifact.encoding)
+    end = artifact.size - 1 if end is None else end
+    position = 0
+
+    async for chunk in open_artifact(artifact):
+        data = decompressor.decompress(chunk)
+        if not data:
+            continue
+        chunk_start, position = position, position + len(data)
+        if position <= start:
+            continue
+        yield data[max(0, start - chunk_start) : end + 1 - chunk_start]
+        if position > end:
+            break
+
+
+async def evict_artifacts() -> None:
+    """
+    Применяет политику хранения: удаляет артефакты, не запрашивавшиеся
+    дольше TTL, затем вытесняет давно не использовавшиеся блобы, пока
+    объем хранилища превышает лимит.
+    """
+    backend = get_backend()
+    deadline = datetime.datetime.now() - datetime.timedelta(hours=settings.artifact_ttl_hours)
+    limit = settings.artifact_store_max_mb * 1024 * 1024
+
+    async with _store_lock, async_session_maker() as db:
+        blobs_before = {digest for digest, _, _ in await list_artifact_blobs(db)}
+        expired = await delete_artifacts_older_than(db, deadline)
+
+        blobs = await list_artifact_blobs(db)
+        total = sum(size for _, size, _ in blobs)
+        evicted = 0
+        for digest, size, _ in blobs:
+            if total <= limit:
+                break
+            await delete_artifacts_by_digest(db, digest)
+            total -= size
+            evicted += 1
+
+        # Удаляем блобы, на которые больше не ссылается ни один артефакт
+        for digest in blobs_before:
+            if not await digest_in_use(db, digest):
+                for encoding in ("zstd", "gzip"):
+                    await backend.delete(_blob_key(digest, encoding))
+
+    if expired or evicted:
+        logger.info(f"Хранилище артефактов: удалено по TTL {expired}, вытеснено блобов {evicted}")
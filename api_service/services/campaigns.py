@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from db.database import async_session_maker
+from db.models import Task
+from db.operations import (
+    enqueue_task,
+    get_artifact,
+    get_next_campaign_task,
+    get_repository_stats,
+    get_running_campaign_load,
+    mark_campaign_completed,
+)
+from metrics import CAMPAIGN_QUEUE_DEPTH, CAMPAIGN_TASKS_IN_FLIGHT
+from services.artifacts import read_artifact
+from services.runner_client import release_campaign
+from services.summary import normalize, tool_medians
+
+settings = get_settings()
+logger = logging.getLogger("api.campaigns")
+
+# Статусы задач, которые уже поставлены в очередь runner'ов и еще выполняются
+IN_FLIGHT_STATUSES = ("queued", "running", "cancelling")
+TERMINAL_STATUSES = ("completed", "partial", "failed", "cancelled")
+# Статусы задач с результатами: partial - часть замеров завершена до таймаута или отмены
+RESULT_STATUSES = ("completed", "partial")
+
+_schedule_lock = asyncio.Lock()
+# Время последней отправки задачи каждой кампании (для справедливой очереди)
+_last_dispatch: Dict[str, float] = {}
+
+
+async def schedule_campaigns() -> None:
+    """
+    Ставит задачи кампаний в очередь runner'ов, пока есть свободные слоты.
+
+    Очередь справедливая: следующий слот получает кампания с наименьшим
+    числом выполняющихся задач, а при равенстве - та, что дольше ждала.
+    Вызывается после создания кампании, после завершения любой задачи
+    кампании и при старте сервиса.
+    """
+    async with _schedule_lock:
+        async with async_session_maker() as db:
+            while True:
+                load = await get_running_campaign_load(db)
+                in_flight = {
+                    campaign_id: sum(counts.get(s, 0) for s in IN_FLIGHT_STATUSES)
+                    for campaign_id, counts in load.items()
+                }
+
+                # Кампании без задач в очереди и в работе завершены
+                for campaign_id, counts in load.items():
+                    if counts.get("pending", 0) == 0 and in_flight[campaign_id] == 0:
+                        await _finish_campaign(db, campaign_id)
+
+                CAMPAIGN_QUEUE_DEPTH.set(sum(c.get("pending", 0) for c in load.values()))
+                CAMPAIGN_TASKS_IN_FLIGHT.set(sum(in_flight.values()))
+
+                waiting = [c for c, counts in load.items() if counts.get("pending", 0) > 0]
+                if not waiting or sum(in_flight.values()) >= settings.campaign_max_running:
+                    return
+
+                campaign_id = min(
+                    waiting,
+                    key=lambda c: (in_flight[c], _last_dispatch.get(c, 0.0)),
+                )
+                task = await get_next_campaign_task(db, campaign_id)
+                if task is None:
+                    continue
+
+                _last_dispatch[campaign_id] = time.monotonic()
+                await _dispatch(db, task)
+
+
+async def _dispatch(db: AsyncSession, task: Task) -> None:
+    """Ставит задачу кампании в очередь runner'ов."""
+    logger.info(f"Кампания {task.campaign_id}: задача {task.task_id} поставлена в очередь")
+    await enqueue_task(db, task.task_id)
+
+
+async def _finish_campaign(db: AsyncSession, campaign_id: str) -> None:
+    """Завершает кампанию и освобождает ее общие ресурсы на runner сервисе."""
+    await mark_campaign_completed(db, campaign_id)
+    _last_dispatch.pop(campaign_id, None)
+    logger.info(f"Кампания {campaign_id} завершена")
+    try:
+        await release_campaign(campaign_id)
+    except Exception as e:
+        logger.error(f"Не удалось освободить ресурсы кампании {campaign_id}: {str(e)}")
+
+
+async def summarize_task(db: AsyncSession, task: Task) -> Dict[str, Any]:
+    """
+    Сводка по одной задаче кампании: медианы метрик анализатора задачи
+    из сохраненного CSV и их значения на единицу размера репозитория
+    (только для режима standard).
+    """
+    cell: Dict[str, Any] = {"task_id": task.task_id, "status": task.status}
+    if task.status not in RESULT_STATUSES or task.mode != "standard":
+        return cell
+
+    artifact = await get_artifact(db, task.task_id, "csv")
+    if artifact is None:
+        return cell
+
+    content = b"".join([chunk async for chunk in read_artifact(artifact)])
+    medians = next(
+        (m for m in tool_medians(content.decode("utf-8")) if m["tool"] == task.analyzer_name),
+        {"iterations": 0, "median_exec_time": None, "median_cpu_percent": None, "median_memory_kb": None},
+    )
+    medians.pop("tool", None)
+
+    # Индекс репозитория: метрики сравнимы между репозиториями разного размера
+    stats = await get_repository_stats(db, task.commit_sha) if task.commit_sha else None
+    cell.update(medians, **normalize(medians, stats))
+    return cell
@@ -0,0 +1,69 @@
+import zlib
+from typing import AsyncIterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd - необязательная зависимость (extra "zstd")
+    zstandard = None
+
+
+def supported_encodings() -> List[str]:
+    """Кодировки сжатия ответа в порядке предпочтения сервера."""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Выбирает кодировку сжатия по заголовку Accept-Encoding.
+    Учитывает q-веса клиента, при равных весах предпочитает zstd.
+
+    Returns:
+        Optional[str]: zstd, gzip или None (без сжатия)
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    candidates = []
+    for preference, encoding in enumerate(supported_encodings()):
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > 0:
+            candidates.append((-q, preference, encoding))
+
+    if not candidates:
+        return None
+    return min(candidates)[2]
+
+
+async def compress_stream(
+    chunks: AsyncIterator[bytes], encoding: str
+) -> AsyncIterator[bytes]:
+    """
+    Сжимает поток байтов по мере чтения, не накапливая его в памяти.
+
+    Args:
+        chunks: Исходный поток
+        encoding: zstd или gzip
+    """
+    if encoding == "zstd" and zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    else:
+        # wbits=31 - формат gzip (заголовок и контрольная сумма)
+        compressor = zlib.compressobj(5, zlib.DEFLATED, 31)
+
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
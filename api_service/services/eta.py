@@ -0,0 +1,250 @@
+import asyncio
+import datetime
+import heapq
+import logging
+import math
+import statistics
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from db.operations import get_repository_sizes, list_active_jobs, list_phase_history
+from metrics import QUEUE_BACKLOG_SECONDS
+
+settings = get_settings()
+logger = logging.getLogger("api.eta")
+
+# Этапы выполнения задачи на runner сервисе, из которых складывается ее длительность
+# (ожидание слота runner'а, очистка и забор артефактов в нее не входят)
+PHASES = ["prepare", "collect", "verify", "export", "startup", "profile"]
+
+# Границы корзин размера репозитория, логические строки
+SIZE_BUCKETS = [(1_000, "<1k"), (10_000, "1k-10k"), (100_000, "10k-100k"), (1_000_000, "100k-1M")]
+
+
+def size_bucket(logical_loc: Optional[int]) -> str:
+    """Корзина размера репозитория (unknown - индекс репозитория еще не строился)."""
+    if logical_loc is None:
+        return "unknown"
+    for limit, label in SIZE_BUCKETS:
+        if logical_loc < limit:
+            return label
+    return ">=1M"
+
+
+def iteration_policy(mode: str, schedule: str, exclusive: bool) -> str:
+    """Политика итераций: режим сбора, порядок замеров и эксклюзивность."""
+    return f"{mode}/{schedule}/{'exclusive' if exclusive else 'shared'}"
+
+
+def task_phases(task: Any) -> List[str]:
+    """Этапы задачи: анализ запуска и профилирование - только если они заказаны."""
+    phases = [phase for phase in PHASES if phase not in ("startup", "profile")]
+    if getattr(task, "startup_analysis", False):
+        phases.append("startup")
+    if getattr(task, "profile", None):
+        phases.append("profile")
+    return phases
+
+
+@dataclass
+class Prediction:
+    seconds: float
+    basis: str  # Уровень модели: analyzer+size+policy, analyzer+policy, policy, all, default
+    samples: int
+
+
+class DurationModel:
+    """
+    Модели длительности этапов задач по истории: медиана длительности этапа
+    для (анализатор, корзина размера репозитория, политика итераций). Если
+    для ключа мало замеров, используется более общий уровень: без размера,
+    только политика, вся история.
+    """
+
+    LEVELS = ["analyzer+size+policy", "analyzer+policy", "policy", "all"]
+
+    def __init__(self, samples: Dict[Tuple[str, str, str, str], List[float]]):
+        # Замеры этапа по уровням: (уровень, этап, ключ уровня) -> длительности
+        grouped: Dict[Tuple[str, str, Tuple[str, ...]], List[float]] = {}
+        for (phase, analyzer, bucket, policy), durations in samples.items():
+            keys = [(analyzer, bucket, policy), (analyzer, policy), (policy,), ()]
+            for level, key in zip(self.LEVELS, keys):
+                grouped.setdefault((level, phase, key), []).extend(durations)
+        self.medians = {key: (statistics.median(values), len(values)) for key, values in grouped.items()}
+        self.built_at = datetime.datetime.now()
+
+    def predict(self, analyzer: str, bucket: str, policy: str, phases: List[str]) -> Prediction:
+        """Прогноз длительности задачи: сумма прогнозов ее этапов."""
+        keys = [(analyzer, bucket, policy), (analyzer, policy), (policy,), ()]
+        total = 0.0
+        basis: Optional[str] = None
+        samples = 0
+        for phase in phases:
+            for level, key in zip(self.LEVELS, keys):
+                median, count = self.medians.get((level, phase, key), (0.0, 0))
+                if count >= settings.eta_min_samples or (level == "all" and count > 0):
+                    total += median
+                    samples = max(samples, count)
+                    # Основание прогноза - уровень основного этапа (замеров)
+                    if phase == "collect" or basis is None:
+                        basis = level
+                    break
+        if basis is None:
+            return Prediction(float(settings.eta_default_seconds), "default", 0)
+        return Prediction(total, basis, samples)
+
+
+@dataclass
+class TaskEta:
+    position: Optional[int]  # Место в очереди (None - задача выполняется)
+    estimated_start_at: datetime.datetime
+    estimated_completion_at: datetime.datetime
+    estimated_duration_s: float
+
+
+@dataclass
+class QueueForecast:
+    """Прогноз очереди: сроки задач и моменты освобождения слотов runner'ов"""
+
+    computed_at: datetime.datetime
+    slots: int
+    free_at: List[datetime.datetime]
+    tasks: Dict[str, TaskEta] = field(default_factory=dict)
+
+    @property
+    def backlog_seconds(self) -> float:
+        """Ожидание слота новой задачей (если не поступит других задач)."""
+        if not self.free_at:
+            return 0.0
+        return max((min(self.free_at) - self.computed_at).total_seconds(), 0.0)
+
+
+_model: Optional[DurationModel] = None
+_forecast: Optional[QueueForecast] = None
+_lock = asyncio.Lock()
+
+
+async def get_duration_model(db: AsyncSession) -> DurationModel:
+    """Модель длительности задач, перестраиваемая не чаще ETA_MODEL_REFRESH_SECONDS."""
+    global _model
+    now = datetime.datetime.now()
+    if _model is not None and (now - _model.built_at).total_seconds() < settings.eta_model_refresh_seconds:
+        return _model
+
+    rows = await list_phase_history(db, PHASES, settings.eta_history_tasks)
+    # Этап может состоять из нескольких интервалов (например, после перезапуска runner'а)
+    per_task: Dict[Tuple[str, str, str, str, str], float] = {}
+    for row in rows:
+        key = (
+            row.task_id,
+            row.name,
+            row.analyzer_name,
+            size_bucket(row.logical_loc),
+            iteration_policy(row.mode, row.schedule, row.exclusive),
+        )
+        per_task[key] = per_task.get(key, 0.0) + (row.ended_at - row.started_at).total_seconds()
+
+    samples: Dict[Tuple[str, str, str, str], List[float]] = {}
+    for (_, phase, analyzer, bucket, policy), seconds in per_task.items():
+        samples.setdefault((phase, analyzer, bucket, policy), []).append(seconds)
+    _model = DurationModel(samples)
+    logger.info(f"Модель длительности задач построена по {len({key[0] for key in per_task})} задачам")
+    return _model
+
+
+async def predict_task(db: AsyncSession, task: Any, sizes: Optional[Dict[str, int]] = None) -> Prediction:
+    """
+    Прогноз длительности выполнения задачи по ее параметрам. Размер
+    репозитория - по последнему индексу того же репозитория (sizes - уже
+    загруженные размеры).
+    """
+    model = await get_duration_model(db)
+    if sizes is None:
+        sizes = await get_repository_sizes(db, [task.repository_url])
+    return model.predict(
+        task.analyzer_name,
+        size_bucket(sizes.get(task.repository_url)),
+        iteration_policy(task.mode, task.schedule, task.exclusive),
+        task_phases(task),
+    )
+
+
+async def build_forecast(db: AsyncSession) -> QueueForecast:
+    """
+    Прогноз очереди: выполняющиеся задачи освобождают слоты через прогноз
+    за вычетом прошедшего времени, ожидающие занимают первый свободный слот
+    в порядке выдачи (и не раньше окончания отсрочки повтора).
+    """
+    now = datetime.datetime.now()
+    jobs = await list_active_jobs(db)
+    sizes = await get_repository_sizes(db, [task.repository_url for _, task in jobs])
+    leased = [(job, task) for job, task in jobs if job.status == "leased"]
+    queued = [(job, task) for job, task in jobs if job.status == "queued"]
+
+    # Задача, которая доступна к выдаче дольше периода опроса очереди runner'ами,
+    # но все еще ждет, означает, что runner'ы заняты полностью: число выданных
+    # задач - оценка числа слотов. Иначе у runner'ов есть хотя бы один свободный слот
+    grace = datetime.timedelta(seconds=settings.queue_saturation_grace_seconds)
+    saturated = any(job.available_at + grace <= now for job, _ in queued)
+    slots = settings.queue_slots or (max(len(leased), 1) if saturated else len(leased) + 1)
+    forecast = QueueForecast(computed_at=now, slots=slots, free_at=[])
+
+    free_at: List[datetime.datetime] = []
+    for job, task in leased:
+        prediction = await predict_task(db, task, sizes)
+        started = job.leased_at or now
+        completion = max(started + datetime.timedelta(seconds=prediction.seconds), now)
+        forecast.tasks[task.task_id] = TaskEta(None, started, completion, prediction.seconds)
+        free_at.append(completion)
+    free_at.sort()
+    free_at = free_at[:slots] + [now] * max(slots - len(free_at), 0)
+    heapq.heapify(free_at)
+
+    for position, (job, task) in enumerate(queued, start=1):
+        prediction = await predict_task(db, task, sizes)
+        start = max(heapq.heappop(free_at), job.available_at, now)
+        completion = start + datetime.timedelta(seconds=prediction.seconds)
+        heapq.heappush(free_at, completion)
+        forecast.tasks[task.task_id] = TaskEta(position, start, completion, prediction.seconds)
+
+    forecast.free_at = sorted(free_at)
+    QUEUE_BACKLOG_SECONDS.set(forecast.backlog_seconds)
+    return forecast
+
+
+async def get_queue_forecast(db: AsyncSession, fresh: bool = False) -> QueueForecast:
+    """
+    Прогноз очереди из кэша (не старше ETA_FORECAST_REFRESH_SECONDS): опрос
+    статусов задач не пересчитывает его на каждый запрос.
+    """
+    global _forecast
+    async with _lock:
+        now = datetime.datetime.now()
+        if (
+            fresh
+            or _forecast is None
+            or (now - _forecast.computed_at).total_seconds() >= settings.eta_forecast_refresh_seconds
+        ):
+            _forecast = await build_forecast(db)
+        return _forecast
+
+
+def invalidate_forecast() -> None:
+    """Сбрасывает кэш прогноза (после постановки задачи в очередь)."""
+    global _forecast
+    _forecast = None
+
+
+def retry_after_seconds(forecast: QueueForecast) -> Optional[int]:
+    """
+    Проверка допуска новой задачи: если ожидание слота превышает
+    QUEUE_MAX_BACKLOG_SECONDS, возвращает, через сколько секунд (по прогнозу)
+    очередь сократится до предела.
+    """
+    limit = settings.queue_max_backlog_seconds
+    if limit <= 0 or forecast.backlog_seconds <= limit:
+        return None
+    return max(math.ceil(forecast.backlog_seconds - limit), 1)
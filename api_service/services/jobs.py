@@ -0,0 +1,153 @@
+import datetime
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from db.models import Job, Task
+from db.operations import (
+    close_job,
+    count_jobs,
+    get_job,
+    lease_jobs,
+    list_expired_jobs,
+    requeue_job,
+    update_task_status,
+)
+from metrics import JOB_QUEUE_DEPTH, JOB_RETRIES
+from services.campaigns import schedule_campaigns
+from services.tracing import record_spans, span
+
+settings = get_settings()
+logger = logging.getLogger("api.jobs")
+
+
+def retry_delay(attempts: int) -> datetime.timedelta:
+    """Экспоненциальная отсрочка повторной попытки: base, 2*base, 4*base, ... (не больше часа)."""
+    seconds = settings.job_retry_base_seconds * 2 ** max(attempts - 1, 0)
+    return datetime.timedelta(seconds=min(seconds, 3600))
+
+
+def runner_payload(task: Task) -> Dict[str, Any]:
+    """Параметры запуска задачи в формате runner сервиса."""
+    return {
+        "task_id": task.task_id,
+        "analyzer_name": task.analyzer_name,
+        "repository_url": task.repository_url,
+        "command_template": task.command_template,
+        "iterations": 100,  # Количество итераций для замеров
+        "mode": task.mode,
+        "max_workers": task.max_workers,
+        "edit_files": task.edit_files,
+        "schedule": task.schedule,
+        "seed": task.seed,
+        "exclusive": task.exclusive,
+        "campaign_id": task.campaign_id,
+        "memory_max_mb": task.memory_max_mb,
+        "cpu_max": task.cpu_max,
+        "profile": task.profile,
+        "startup_analysis": task.startup_analysis,
+    }
+
+
+async def lease_for_runner(
+    db: AsyncSession, runner_id: str, capacity: int, runner_url: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Выдает runner'у задачи из очереди в пределах его свободных слотов.
+    Перед выдачей задачи с истекшей арендой возвращаются в очередь.
+    """
+    await requeue_expired_jobs(db)
+
+    now = datetime.datetime.now()
+    lease_until = now + datetime.timedelta(seconds=settings.job_lease_seconds)
+    leased = await lease_jobs(db, runner_id, capacity, lease_until, runner_url)
+
+    leases = []
+    for job, task in leased:
+        # Ожидание в очереди: от создания задачи (или от окончания отсрочки повтора)
+        queued_at = task.created_at if job.attempts <= 1 else job.available_at
+        await record_spans(
+            db,
+            task.task_id,
+            "api",
+            [span("queue_wait", queued_at, now, attempt=job.attempts, campaign=bool(task.campaign_id))],
+        )
+        logger.info(f"Задача {task.task_id} выдана runner'у {runner_id} (попытка {job.attempts})")
+        leases.append(
+            {
+                "job_id": job.id,
+                "task_id": task.task_id,
+                "attempt": job.attempts,
+                "lease_expires_at": lease_until,
+                "task": runner_payload(task),
+            }
+        )
+
+    await update_queue_metrics(db)
+    return leases
+
+
+async def requeue_expired_jobs(db: AsyncSession) -> List[str]:
+    """
+    Возвращает в очередь задачи, runner которых перестал присылать heartbeat.
+
+    Returns:
+        List[str]: ID задач, у которых попытки исчерпаны (они отмечены как failed)
+    """
+    failed = []
+    for job in await list_expired_jobs(db):
+        error = f"Lease expired: runner {job.lease_owner} stopped sending heartbeats"
+        if await retry_or_bury(db, job, error, reason="lease_expired", keep_owner=True):
+            continue
+        task = await update_task_status(db, job.task_id, "failed", error)
+        failed.append(job.task_id)
+        # Освободившийся слот занимает следующая задача из очереди кампаний
+        if task is not None and task.campaign_id:
+            await schedule_campaigns()
+    return failed
+
+
+async def retry_failed_task(db: AsyncSession, task_id: str, error: Optional[str]) -> bool:
+    """
+    Обрабатывает неудачную попытку, о которой сообщил runner.
+
+    Returns:
+        bool: True, если задача возвращена в очередь для повтора
+    """
+    job = await get_job(db, task_id)
+    if job is None or job.status != "leased":
+        return False
+    return await retry_or_bury(db, job, error or "Unknown error", reason="failed")
+
+
+async def retry_or_bury(db: AsyncSession, job: Job, error: str, reason: str, keep_owner: bool = False) -> bool:
+    """
+    Возвращает задачу в очередь с экспоненциальной отсрочкой или, если
+    попытки исчерпаны, снимает ее с очереди. keep_owner оставляет задачу за
+    runner'ом, чья аренда истекла: его heartbeat вернет задачу ему.
+
+    Returns:
+        bool: True, если назначена повторная попытка
+    """
+    if job.attempts >= settings.job_max_attempts:
+        await close_job(db, job.task_id, "dead")
+        logger.error(f"Задача {job.task_id}: попытки исчерпаны ({job.attempts}): {error}")
+        return False
+
+    available_at = datetime.datetime.now() + retry_delay(job.attempts)
+    await requeue_job(db, job.id, available_at, error, keep_owner=keep_owner)
+    await update_task_status(
+        db, job.task_id, "queued", f"Attempt {job.attempts} failed, retry at {available_at:%H:%M:%S}: {error}"
+    )
+    JOB_RETRIES.labels(reason).inc()
+    logger.warning(f"Задача {job.task_id}: попытка {job.attempts} не удалась, повтор в {available_at}")
+    return True
+
+
+async def update_queue_metrics(db: AsyncSession) -> None:
+    """Обновляет метрики глубины очереди."""
+    counts = await count_jobs(db)
+    for status in ("queued", "leased"):
+        JOB_QUEUE_DEPTH.labels(status).set(counts.get(status, 0))
@@ -1,8 +1,7 @@
 from typing import Any, Dict, List
 
-import httpx
-
 from config import get_settings
+from services.telemetry import instrumented_client
 
 settings = get_settings()
 
@@ -13,10 +12,10 @@ async def search_pypi_packages(query: str = "") -> List[Dict[str, Any]]:
 
     Возвращает список пакетов, отсортированных по релевантности для статического анализа.
     """
-    url = "https://pypi.org/simple/"
+    url = settings.pypi_simple_url
     headers = {"Accept": "application/vnd.pypi.simple.v1+json"}
 
-    async with httpx.AsyncClient(timeout=settings.request_timeout) as client:
+    async with instrumented_client("pypi", timeout=settings.request_timeout) as client:
         response = await client.get(url, headers=headers)
         response.raise_for_status()
         data = response.json()
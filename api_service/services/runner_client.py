@@ -1,69 +1,115 @@
-from typing import Tuple
+import logging
+from typing import AsyncIterator, List, Optional
 
 import httpx
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import get_settings
-from db.operations import update_task_status
+from db.database import async_session_maker
+from db.operations import get_job_runner_url, list_campaign_runner_urls
+from services.telemetry import instrumented_client
 
 settings = get_settings()
+logger = logging.getLogger("api.runner_client")
 
 
-async def start_analysis(
-    task_id: str,
-    analyzer_name: str,
-    repository_url: str,
-    command_template: str,
-    db: AsyncSession,
-) -> None:
+async def runner_url(task_id: str) -> str:
     """
-    Отправляет запрос на запуск анализа в Runner сервис.
-    Обновляет статус задачи в БД.
+    Адрес runner'а, выполнявшего задачу: runner'ы сообщают свой адрес при
+    аренде задач (RUNNER_URL). Если адрес не известен - RUNNER_SERVICE_URL.
     """
-    url = f"{settings.runner_service_url}/tasks"
-    payload = {
-        "task_id": task_id,
-        "analyzer_name": analyzer_name,
-        "repository_url": repository_url,
-        "command_template": command_template,
-        "iterations": 100,  # Количество итераций для замеров
-    }
+    async with async_session_maker() as db:
+        url = await get_job_runner_url(db, task_id)
+    return url or settings.runner_service_url
 
-    try:
-        async with httpx.AsyncClient(timeout=120) as client:  # Увеличенный таймаут
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
 
-        # Обновляем статус задачи
-        await update_task_status(db, task_id, "running")
-    except Exception as e:
-        # В случае ошибки обновляем статус на failed
-        await update_task_status(db, task_id, "failed", str(e))
-        raise
+async def campaign_runner_urls(campaign_id: str) -> List[str]:
+    """Адреса runner'ов, выполнявших задачи кампании (RUNNER_SERVICE_URL, если не известны)."""
+    async with async_session_maker() as db:
+        urls = await list_campaign_runner_urls(db, campaign_id)
+    return urls or [settings.runner_service_url]
+
+
+class MetricsStream:
+    """Потоковое чтение файла метрик от Runner сервиса без буферизации в памяти"""
+
+    def __init__(self, client: httpx.AsyncClient, response: httpx.Response):
+        self._client = client
+        self._response = response
+        self.completed = False  # Поток прочитан до конца
 
+    @property
+    def status_code(self) -> int:
+        return self._response.status_code
 
-async def get_metrics_file(task_id: str) -> Tuple[bytes, str]:
+    @property
+    def headers(self) -> httpx.Headers:
+        return self._response.headers
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        """Отдает тело ответа по частям в том виде, в котором его прислал runner."""
+        async for chunk in self._response.aiter_raw():
+            yield chunk
+        self.completed = True
+
+    async def aclose(self) -> None:
+        await self._response.aclose()
+        await self._client.aclose()
+
+
+async def open_metrics_stream(
+    task_id: str, fmt: str = "csv", range_header: Optional[str] = None
+) -> MetricsStream:
     """
-    Получает файл с метриками от Runner сервиса.
-    Запрашивает удаление ресурсов после скачивания.
+    Открывает потоковое чтение файла с метриками от Runner сервиса.
+    Заголовок Range передается runner сервису как есть.
+    Вызывающий код обязан закрыть поток через aclose().
+
+    Args:
+        task_id: ID задачи
+        fmt: Формат файла (csv, npz или arrow)
+        range_header: Значение заголовка Range запроса клиента (если есть)
 
     Returns:
-        Tuple[bytes, str]: Содержимое файла и MIME-тип
+        MetricsStream: Открытый поток
     """
-    url = f"{settings.runner_service_url}/tasks/{task_id}/metrics"
+    url = f"{await runner_url(task_id)}/tasks/{task_id}/metrics"
+    headers = {"Range": range_header} if range_header else {}
+
+    # Таймаут ограничивает ожидание очередной части, а не всю загрузку
+    client = instrumented_client("runner", timeout=30)
+    try:
+        request = client.build_request("GET", url, params={"format": fmt}, headers=headers)
+        response = await client.send(request, stream=True)
+        if response.is_error:
+            await response.aread()
+            response.raise_for_status()
+    except Exception:
+        await client.aclose()
+        raise
+
+    return MetricsStream(client, response)
+
 
-    async with httpx.AsyncClient(timeout=30) as client:
-        response = await client.get(url)
-        response.raise_for_status()
+async def request_cleanup(task_id: str) -> None:
+    """Запрашивает у Runner сервиса удаление ресурсов задачи."""
+    url = f"{await runner_url(task_id)}/tasks/{task_id}/cleanup"
 
-        # Запрашиваем очистку после получения файла
-        cleanup_url = f"{settings.runner_service_url}/tasks/{task_id}/cleanup"
-        await client.post(cleanup_url)
+    async with instrumented_client("runner", timeout=30) as client:
+        await client.post(url)
 
-        return response.content, response.headers.get("content-type", "text/csv")
 
+async def release_campaign(campaign_id: str) -> None:
+    """Сообщает runner'ам кампании, что ее общие ресурсы больше не нужны."""
+    async with instrumented_client("runner", timeout=30) as client:
+        for base_url in await campaign_runner_urls(campaign_id):
+            # Недоступный runner не мешает освободить ресурсы на остальных
+            try:
+                await client.delete(f"{base_url}/campaigns/{campaign_id}")
+            except Exception as e:
+                logger.error(f"Runner {base_url} не освободил ресурсы кампании {campaign_id}: {str(e)}")
 
-async def cancel_analysis(task_id: str) -> bool:
+
+async def cancel_analysis(task_id: str) -> Optional[str]:
     """
     Отправляет запрос на отмену анализа в Runner сервис.
 
@@ -71,13 +117,21 @@ async def cancel_analysis(task_id: str) -> bool:
         task_id: ID задачи для отмены
 
     Returns:
-        bool: Успешность отмены
+        Optional[str]: Итоговый статус задачи (cancelled или partial, если
+        завершенные замеры сохранены), None при неудаче
     """
-    url = f"{settings.runner_service_url}/tasks/{task_id}/cancel"
-
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
+        url = f"{await runner_url(task_id)}/tasks/{task_id}/cancel"
+        async with instrumented_client("runner", timeout=30) as client:
             response = await client.post(url)
-            return response.status_code == 200
+            if response.status_code != 200:
+                return None
+            # Runner отвечает 200 и тогда, когда задачу отменить не удалось
+            # (not_found, not_running, error): успехом считаются только
+            # cancelled и partial (завершенные замеры сохранены)
+            final_status = response.json().get("status")
+            if final_status in ("cancelled", "partial"):
+                return final_status
+            return None
     except Exception:
-        return False
+        return None
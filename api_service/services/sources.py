@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config import get_settings
+from db.database import async_session_maker
+from db.operations import list_active_repository_urls
+
+settings = get_settings()
+logger = logging.getLogger("api.sources")
+
+UPLOAD_SCHEME = "upload"
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UnsupportedSourceError(Exception):
+    """Загруженный файл не является архивом tar/zip или git bundle."""
+
+
+class SourceTooLargeError(Exception):
+    """Загрузка превышает SOURCE_MAX_UPLOAD_MB."""
+
+
+def detect_kind(header: bytes) -> Optional[str]:
+    """Формат исходников по первым байтам файла (None - формат не поддерживается)."""
+    if header.startswith((b"# v2 git bundle\n", b"# v3 git bundle\n")):
+        return "bundle"
+    if header.startswith(b"PK\x03\x04"):
+        return "zip"
+    if header.startswith(b"\x1f\x8b"):
+        return "tar.gz"
+    if header.startswith(b"BZh"):
+        return "tar.bz2"
+    if header.startswith(b"\xfd7zXZ\x00"):
+        return "tar.xz"
+    if header[257:262] == b"ustar":
+        return "tar"
+    return None
+
+
+def source_url(digest: str) -> str:
+    """URL загруженных исходников для repository_url задачи."""
+    return f"{UPLOAD_SCHEME}://sha256/{digest}"
+
+
+def parse_source_url(repository_url: str) -> Optional[str]:
+    """
+    sha256 загруженных исходников из URL upload://sha256/<digest>
+    (None - URL другого источника).
+
+    Raises:
+        ValueError: URL со схемой upload в неверном формате
+    """
+    parts = urlsplit(repository_url)
+    if parts.scheme != UPLOAD_SCHEME:
+        return None
+    digest = parts.path.strip("/")
+    if parts.netloc != "sha256" or not _DIGEST_RE.match(digest):
+        raise ValueError(f"Invalid uploaded source URL {repository_url}, expected upload://sha256/<digest>")
+    return digest
+
+
+def source_path(digest: str) -> str:
+    return os.path.join(settings.source_store_dir, digest[:2], digest)
+
+
+def source_exists(digest: str) -> bool:
+    return bool(_DIGEST_RE.match(digest)) and os.path.exists(source_path(digest))
+
+
+def touch_source(digest: str) -> None:
+    """Отмечает использование исходников: время изменения файла - последнее обращение."""
+    try:
+        os.utime(source_path(digest))
+    except OSError:
+        pass
+
+
+def missing_sources(repository_urls: List[str]) -> List[str]:
+    """
+    URL загруженных исходников, которых нет в хранилище.
+
+    Raises:
+        ValueError: URL со схемой upload в неверном формате
+    """
+    missing = []
+    for url in repository_urls:
+        digest = parse_source_url(url)
+        if digest is not None and not source_exists(digest):
+            missing.append(url)
+    return missing
+
+
+async def store_source(chunks: AsyncIterator[bytes]) -> Dict[str, object]:
+    """
+    Сохраняет загружаемые исходники на диск по мере поступления (без
+    буферизации в памяти) и адресует их по sha256 содержимого: одинаковые
+    загрузки хранятся один раз и дают один и тот же URL.
+
+    Args:
+        chunks: Тело запроса по частям
+
+    Returns:
+        Dict[str, object]: sha256, формат, размер и URL для repository_url
+
+    Raises:
+        SourceTooLargeError: превышен SOURCE_MAX_UPLOAD_MB
+        UnsupportedSourceError: файл не является архивом tar/zip или git bundle
+    """
+    tmp_dir = os.path.join(settings.source_store_dir, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+
+    limit = settings.source_max_upload_mb * 1024 * 1024
+    digest = hashlib.sha256()
+    header = b""
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > limit:
+                    raise SourceTooLargeError(f"Upload exceeds {settings.source_max_upload_mb} MB")
+                if len(header) < 512:
+                    header += chunk[: 512 - len(header)]
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+
+        kind = detect_kind(header)
+        if kind is None:
+            raise UnsupportedSourceError(
+                "Expected a tar (optionally gzip, bzip2 or xz compressed), zip or git bundle file"
+            )
+
+        path = source_path(digest.hexdigest())
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            touch_source(digest.hexdigest())
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    logger.info(f"Исходники {digest.hexdigest()} сохранены: {kind}, {size} байт")
+    return {
+        "digest": digest.hexdigest(),
+        "kind": kind,
+        "size": size,
+        "source_url": source_url(digest.hexdigest()),
+    }
+
+
+def _list_sources() -> List[Tuple[str, int, float]]:
+    """Сохраненные исходники (digest, размер, последнее обращение) от давних к недавним."""
+    sources = []
+    for prefix in os.listdir(settings.source_store_dir) if os.path.isdir(settings.source_store_dir) else []:
+        directory = os.path.join(settings.source_store_dir, prefix)
+        if prefix == "tmp" or not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            if not _DIGEST_RE.match(name):
+                continue
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except OSError:
+                continue
+            sources.append((name, stat.st_size, stat.st_mtime))
+    return sorted(sources, key=lambda source: source[2])
+
+
+async def evict_sources(keep: Optional[str] = None) -> None:
+    """
+    Применяет политику хранения загруженных исходников: удаляет исходники,
+    не использовавшиеся дольше SOURCE_TTL_HOURS, затем самые давние, пока
+    объем хранилища превышает SOURCE_STORE_MAX_MB. Исходники незавершенных
+    задач и keep (только что загруженные) не удаляются.
+    """
+    async with async_session_maker() as db:
+        urls = await list_active_repository_urls(db, f"{UPLOAD_SCHEME}://")
+    in_use = {parse_source_url(url) for url in urls} | {keep}
+
+    sources = await asyncio.to_thread(_list_sources)
+    deadline = time.time() - settings.source_ttl_hours * 3600
+    limit = settings.source_store_max_mb * 1024 * 1024
+    total = sum(size for _, size, _ in sources)
+    expired = evicted = 0
+    for digest, size, accessed in sources:
+        if digest in in_use:
+            continue
+        if accessed < deadline:
+            expired += 1
+        elif total > limit:
+            evicted += 1
+        else:
+            continue
+        try:
+            os.remove(source_path(digest))
+        except OSError as e:
+            logger.warning(f"Не удалось удалить исходники {digest}: {str(e)}")
+            continue
+        total -= size
+
+    if expired or evicted:
+        logger.info(f"Хранилище исходников: удалено по TTL {expired}, вытеснено {evicted}")
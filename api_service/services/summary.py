@@ -0,0 +1,109 @@
+import csv
+import io
+import statistics
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from db.models import RepositoryStats
+
+
+def tool_medians(text: str) -> List[Dict[str, Any]]:
+    """
+    Медианы метрик каждого анализатора по CSV с результатами итераций
+    (в порядке первого появления анализатора в файле) и диагностики:
+    число замечаний и их отпечаток по большинству итераций, время на
+    замечание. Итерации, в которых анализатор завершился с ошибкой (Broken),
+    в медианы не входят и только подсчитываются.
+    """
+    samples: Dict[str, Dict[str, Any]] = {}
+    for row in csv.DictReader(io.StringIO(text)):
+        tool = row.get("Tool")
+        # Время итерации, остановленной по таймауту, - только нижняя граница;
+        # итерация, завершенная по лимиту памяти, не дошла до конца
+        if not tool or row.get("Timed Out") == "true" or row.get("OOM Killed") == "true":
+            continue
+        tool_samples = samples.setdefault(
+            tool,
+            {"time": [], "cpu": [], "memory": [], "diagnostics": [], "broken": 0, "inconsistent": 0},
+        )
+        # Анализатор не проверил код (ошибка конфигурации, падение): время не сравнимо
+        if row.get("Broken") == "true":
+            tool_samples["broken"] += 1
+            continue
+        try:
+            values = (
+                float(row["Execution Time (s)"]),
+                float(row["CPU Used (%)"]),
+                float(row["Memory Used (KB)"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            continue
+        tool_samples["time"].append(values[0])
+        tool_samples["cpu"].append(values[1])
+        tool_samples["memory"].append(values[2])
+
+        # CSV сборщиков без разбора диагностик не содержит этих столбцов
+        try:
+            findings = int(row["Findings"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if findings >= 0:
+            tool_samples["diagnostics"].append((findings, row.get("Diagnostic Fingerprint") or None))
+        if row.get("Inconsistent") == "true":
+            tool_samples["inconsistent"] += 1
+
+    summaries = []
+    for tool, tool_samples in samples.items():
+        median_exec_time = _median(tool_samples["time"])
+        tool_findings, fingerprint = _mode(tool_samples["diagnostics"]) or (None, None)
+        time_per_finding = None
+        if tool_findings and median_exec_time is not None:
+            time_per_finding = median_exec_time / tool_findings
+        summaries.append(
+            {
+                "tool": tool,
+                "iterations": len(tool_samples["time"]),
+                "median_exec_time": median_exec_time,
+                "median_cpu_percent": _median(tool_samples["cpu"]),
+                "median_memory_kb": _median(tool_samples["memory"]),
+                "findings": tool_findings,
+                "diagnostic_fingerprint": fingerprint,
+                "time_per_finding": time_per_finding,
+                "broken_iterations": tool_samples["broken"],
+                "inconsistent_iterations": tool_samples["inconsistent"],
+            }
+        )
+    return summaries
+
+
+def normalize(medians: Dict[str, Any], stats: Optional[RepositoryStats]) -> Dict[str, Any]:
+    """
+    Нормирует медианы на размер репозитория, чтобы анализаторы можно было
+    сравнивать между репозиториями разного размера:
+    логические строки и файлы в секунду, память (KB) на 1000 логических строк.
+    """
+    normalized: Dict[str, Any] = {
+        "loc_per_second": None,
+        "files_per_second": None,
+        "kb_per_kloc": None,
+    }
+    if stats is None:
+        return normalized
+
+    exec_time = medians.get("median_exec_time")
+    if exec_time:
+        normalized["loc_per_second"] = stats.logical_loc / exec_time
+        normalized["files_per_second"] = stats.files / exec_time
+
+    memory = medians.get("median_memory_kb")
+    if memory is not None and stats.logical_loc:
+        normalized["kb_per_kloc"] = memory / (stats.logical_loc / 1000)
+    return normalized
+
+
+def _median(values: List[float]) -> Optional[float]:
+    return statistics.median(values) if values else None
+
+
+def _mode(values: List[Tuple[int, Optional[str]]]) -> Optional[Tuple[int, Optional[str]]]:
+    return Counter(values).most_common(1)[0][0] if values else None
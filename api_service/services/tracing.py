@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from db.models import Task
+from db.operations import add_task_spans
+from services.telemetry import instrumented_client
+
+settings = get_settings()
+logger = logging.getLogger("api.tracing")
+
+# Имена сервисов в ресурсе OTLP по источнику интервала
+SERVICE_NAMES = {"api": "analyzer-api", "runner": "analyzer-runner"}
+
+# Незавершенные фоновые отправки (ссылки удерживаются до окончания)
+_pending_exports: set = set()
+
+
+def span(name: str, start: datetime, end: datetime, **attributes: Any) -> Dict[str, Any]:
+    """Описание интервала в том же виде, в каком его присылает runner сервис."""
+    return {"name": name, "start": start, "end": end, "attributes": attributes}
+
+
+async def record_spans(
+    db: AsyncSession, task_id: str, source: str, spans: List[Dict[str, Any]]
+) -> None:
+    """
+    Сохраняет интервалы этапов задачи и, если задан OTLP_ENDPOINT,
+    отправляет их в OpenTelemetry Collector.
+    """
+    if not spans:
+        return
+
+    await add_task_spans(db, task_id, source, spans)
+
+    # Экспорт не задерживает обработку статуса задачи
+    if settings.otlp_endpoint:
+        export = asyncio.create_task(
+            _export(task_id, [(source, s, _root_span_id(task_id)) for s in spans])
+        )
+        _pending_exports.add(export)
+        export.add_done_callback(_pending_exports.discard)
+
+
+async def export_task_trace(task: Task) -> None:
+    """
+    Отправляет корневой интервал задачи (от создания до конечного статуса),
+    к которому привязаны все интервалы этапов.
+    """
+    root = span(
+        "task",
+        task.created_at,
+        task.completed_at or datetime.now(),
+        analyzer=task.analyzer_name,
+        repository=task.repository_url,
+        mode=task.mode,
+        status=task.status,
+    )
+    await _export(task.task_id, [("api", root, None)])
+
+
+def _trace_id(task_id: str) -> str:
+    # UUID задачи уже имеет длину идентификатора трассы (16 байт)
+    return task_id.replace("-", "")
+
+
+def _root_span_id(task_id: str) -> str:
+    return hashlib.sha256(task_id.encode()).hexdigest()[:16]
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _unix_nano(value: datetime) -> str:
+    return str(int(value.timestamp() * 1_000_000_000))
+
+
+async def _export(
+    task_id: str, spans: List[Tuple[str, Dict[str, Any], Optional[str]]]
+) -> None:
+    """
+    Отправляет интервалы в формате OTLP/HTTP JSON.
+    Ошибки экспорта не влияют на обработку задачи.
+    """
+    if not settings.otlp_endpoint:
+        return
+
+    by_source: Dict[str, List[Dict[str, Any]]] = {}
+    for source, item, parent_id in spans:
+        otlp_span: Dict[str, Any] = {
+            "traceId": _trace_id(task_id),
+            "spanId": _root_span_id(task_id) if parent_id is None else os.urandom(8).hex(),
+            "name": item["name"],
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": _unix_nano(item["start"]),
+            "endTimeUnixNano": _unix_nano(item["end"]),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in {"task.id": task_id, **item.get("attributes", {})}.items()
+            ],
+        }
+        if parent_id is not None:
+            otlp_span["parentSpanId"] = parent_id
+        by_source.setdefault(source, []).append(otlp_span)
+
+    payload = {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": SERVICE_NAMES[source]}}
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": "analyzer.tasks"}, "spans": otlp_spans}],
+            }
+            for source, otlp_spans in by_source.items()
+        ]
+    }
+
+    url = f"{settings.otlp_endpoint.rstrip('/')}/v1/traces"
+    try:
+        async with instrumented_client("otlp", timeout=5) as client:
+            response = await client.post(url, json=payload)
+            response.raise_for_status()
+    except Exception as e:
+        logger.warning(f"Не удалось экспортировать интервалы задачи {task_id}: {str(e)}")
+
+
+def parse_attributes(raw: Optional[str]) -> Dict[str, Any]:
+    """Разбирает сохраненные атрибуты интервала."""
+    return json.loads(raw) if raw else {}
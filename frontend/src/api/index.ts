@@ -1,5 +1,23 @@
 import ky from "ky";
-import type { PyPISearchResponse, TaskCreate, TaskResponse, TaskStatusResponse, CancelTaskResponse } from "@/types";
+import type {
+    PyPISearchResponse,
+    TaskCreate,
+    TaskResponse,
+    TaskListQuery,
+    TaskListResponse,
+    TaskStatusResponse,
+    TaskTimeline,
+    CancelTaskResponse,
+    ScalingSummary,
+    IncrementalSummary,
+    TaskProfile,
+    StartupSummary,
+    TaskSummary,
+    CampaignCreate,
+    CampaignResponse,
+    CampaignResults,
+    SourceUploadResponse,
+} from "@/types";
 
 // Function to get API base URL from environment variables
 function getApiBaseUrl(): string {
@@ -55,14 +73,75 @@ export const startAnalysis = async (taskData: TaskCreate): Promise<TaskResponse>
     return await api.post("analyze", { json: taskData }).json<TaskResponse>();
 };
 
+export const listTasks = async (query: TaskListQuery = {}): Promise<TaskListResponse> => {
+    const params = new URLSearchParams();
+    for (const [key, value] of Object.entries(query)) {
+        if (value !== undefined && value !== null && value !== "") {
+            params.set(key, String(value));
+        }
+    }
+
+    return await api.get(`tasks?${params}`).json<TaskListResponse>();
+};
+
 export const getTaskStatus = async (taskId: string): Promise<TaskStatusResponse> => {
     return await api.get(`tasks/${taskId}/status`).json<TaskStatusResponse>();
 };
 
+export const getTaskTimeline = async (taskId: string): Promise<TaskTimeline> => {
+    return await api.get(`tasks/${taskId}/timeline`).json<TaskTimeline>();
+};
+
 export const cancelTask = async (taskId: string): Promise<CancelTaskResponse> => {
     return await api.post(`tasks/${taskId}/cancel`).json<CancelTaskResponse>();
 };
 
+export const getScalingSummary = async (taskId: string): Promise<ScalingSummary[]> => {
+    return await api.get(`tasks/${taskId}/scaling`).json<ScalingSummary[]>();
+};
+
+export const getIncrementalSummary = async (taskId: string): Promise<IncrementalSummary[]> => {
+    return await api.get(`tasks/${taskId}/incremental`).json<IncrementalSummary[]>();
+};
+
+export const getTaskProfile = async (taskId: string): Promise<TaskProfile> => {
+    return await api.get(`tasks/${taskId}/profile`).json<TaskProfile>();
+};
+
+export const getTaskProfileCollapsed = async (taskId: string): Promise<string> => {
+    return await api.get(`tasks/${taskId}/profile/collapsed`).text();
+};
+
+export const getStartupSummary = async (taskId: string): Promise<StartupSummary[]> => {
+    return await api.get(`tasks/${taskId}/startup`).json<StartupSummary[]>();
+};
+
+export const getTaskSummary = async (taskId: string): Promise<TaskSummary> => {
+    return await api.get(`tasks/${taskId}/summary`).json<TaskSummary>();
+};
+
+export const uploadSource = async (file: Blob): Promise<SourceUploadResponse> => {
+    return await api
+        .post("sources", {
+            body: file,
+            timeout: false,
+            headers: { "Content-Type": "application/octet-stream" },
+        })
+        .json<SourceUploadResponse>();
+};
+
+export const startCampaign = async (campaign: CampaignCreate): Promise<CampaignResponse> => {
+    return await api.post("campaigns", { json: campaign }).json<CampaignResponse>();
+};
+
+export const getCampaign = async (campaignId: string): Promise<CampaignResponse> => {
+    return await api.get(`campaigns/${campaignId}`).json<CampaignResponse>();
+};
+
+export const getCampaignResults = async (campaignId: string): Promise<CampaignResults> => {
+    return await api.get(`campaigns/${campaignId}/results`).json<CampaignResults>();
+};
+
 export const downloadMetrics = async (taskId: string): Promise<Blob> => {
     try {
         const blob = await api
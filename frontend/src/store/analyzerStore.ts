@@ -1,4 +1,5 @@
 import { defineStore } from "pinia";
+import { HTTPError } from "ky";
 import { ref, computed } from "vue";
 import * as api from "@/api";
 import type { PyPIPackage, TaskCreate, TaskResponse, TaskStatus } from "@/types";
@@ -10,6 +11,9 @@ export const useAnalyzerStore = defineStore("analyzer", () => {
     const isSearching = ref(false);
     const currentTask = ref<TaskResponse | null>(null);
     const taskStatus = ref<TaskStatus | null>(null);
+    // Прогноз сроков задачи по истории длительностей и текущей очереди
+    const queuePosition = ref<number | null>(null);
+    const estimatedCompletionAt = ref<string | null>(null);
     const isPolling = ref(false);
     const pollingInterval = ref<number | null>(null);
     const errorMessage = ref<string | null>(null);
@@ -17,7 +21,7 @@ export const useAnalyzerStore = defineStore("analyzer", () => {
 
     // Computed properties
     const isTaskRunning = computed(() => {
-        return taskStatus.value === "pending" || taskStatus.value === "running";
+        return taskStatus.value === "pending" || taskStatus.value === "queued" || taskStatus.value === "running";
     });
 
     const canStartAnalysis = computed(() => {
@@ -56,11 +60,19 @@ export const useAnalyzerStore = defineStore("analyzer", () => {
             const response = await api.startAnalysis(taskData);
             currentTask.value = response;
             taskStatus.value = response.status as TaskStatus;
+            queuePosition.value = response.queue_position ?? null;
+            estimatedCompletionAt.value = response.estimated_completion_at ?? null;
 
             // Start polling for task status
             startPolling(response.task_id);
         } catch (error) {
             console.error("Failed to start analysis:", error);
+            if (error instanceof HTTPError && error.response.status === 429) {
+                // Очередь переполнена: сервис сообщает, когда повторить запуск
+                const retryAfter = Number(error.response.headers.get("Retry-After") ?? 0);
+                errorMessage.value = `Очередь задач переполнена, повторите запуск через ${Math.ceil(retryAfter / 60)} мин`;
+                return;
+            }
             errorMessage.value =
                 error instanceof Error ? error.message : "Failed to start analysis";
         } finally {
@@ -74,9 +86,12 @@ export const useAnalyzerStore = defineStore("analyzer", () => {
         try {
             const response = await api.getTaskStatus(taskId);
             taskStatus.value = response.status as TaskStatus;
+            queuePosition.value = response.queue_position ?? null;
+            estimatedCompletionAt.value = response.estimated_completion_at ?? null;
 
             if (
                 taskStatus.value === "completed" ||
+                taskStatus.value === "partial" ||
                 taskStatus.value === "failed" ||
                 taskStatus.value === "cancelled" ||
                 taskStatus.value === "data_already_retrieved"
@@ -132,8 +147,9 @@ export const useAnalyzerStore = defineStore("analyzer", () => {
         errorMessage.value = null;
 
         try {
-            await api.cancelTask(currentTask.value.task_id);
-            taskStatus.value = "cancelled";
+            const response = await api.cancelTask(currentTask.value.task_id);
+            // Завершенные до отмены замеры сохраняются как частичный результат
+            taskStatus.value = response.status === "partial" ? "partial" : "cancelled";
             stopPolling();
         } catch (error) {
             console.error("Failed to cancel task:", error);
@@ -147,6 +163,8 @@ export const useAnalyzerStore = defineStore("analyzer", () => {
         stopPolling();
         currentTask.value = null;
         taskStatus.value = null;
+        queuePosition.value = null;
+        estimatedCompletionAt.value = null;
         errorMessage.value = null;
     }
 
@@ -157,6 +175,8 @@ export const useAnalyzerStore = defineStore("analyzer", () => {
         isSearching,
         currentTask,
         taskStatus,
+        queuePosition,
+        estimatedCompletionAt,
         isPolling,
         errorMessage,
         isLoading,
@@ -11,6 +11,16 @@ export interface TaskCreate {
     analyzer_name: string;
     repository_url: string;
     command_template?: string;
+    mode?: "standard" | "scaling" | "incremental";
+    max_workers?: number;
+    edit_files?: number;
+    schedule?: "grouped" | "interleaved";
+    seed?: number;
+    exclusive?: boolean;
+    memory_max_mb?: number;
+    cpu_max?: number;
+    profile?: "cprofile" | "sampling";
+    startup_analysis?: boolean;
 }
 
 export interface TaskResponse {
@@ -18,15 +28,246 @@ export interface TaskResponse {
     analyzer_name: string;
     repository_url: string;
     command_template: string;
+    mode: string;
     status: string;
     created_at: string;
     completed_at?: string;
     error_message?: string;
+    queue_position?: number;
+    estimated_duration_s?: number;
+    estimated_start_at?: string;
+    estimated_completion_at?: string;
+}
+
+export interface TaskListItem {
+    task_id: string;
+    analyzer_name: string;
+    repository_url: string;
+    mode: string;
+    status: string;
+    created_at: string;
+    completed_at?: string;
+    error_message?: string;
+}
+
+export interface TaskListResponse {
+    items: TaskListItem[];
+    next_cursor?: string;
+}
+
+export interface TaskListQuery {
+    analyzer_name?: string;
+    repository_url?: string;
+    status?: string;
+    created_from?: string;
+    created_to?: string;
+    cursor?: string;
+    limit?: number;
+    include_errors?: boolean;
+}
+
+export interface TimelineSpan {
+    name: string;
+    source: "api" | "runner";
+    start: string;
+    end: string;
+    duration_s: number;
+    attributes: Record<string, string | number | boolean>;
+}
+
+export interface TaskTimeline {
+    task_id: string;
+    status: string;
+    spans: TimelineSpan[];
 }
 
 export interface TaskStatusResponse {
     task_id: string;
     status: string;
+    queue_position?: number;
+    estimated_start_at?: string;
+    estimated_completion_at?: string;
+}
+
+export interface ScalingPoint {
+    workers: number;
+    median_time: number;
+    speedup: number;
+    efficiency: number;
+}
+
+export interface ScalingSummary {
+    tool: string;
+    strategy: string;
+    serial_fraction: number;
+    points: ScalingPoint[];
+}
+
+export interface IncrementalEditStats {
+    edit: string;
+    samples: number;
+    median_time: number;
+    median_memory_kb: number;
+}
+
+export interface IncrementalSummary {
+    tool: string;
+    variant: "cli" | "daemon";
+    cold_time: number;
+    cold_memory_kb: number;
+    median_recheck_time: number;
+    speedup: number;
+    edits: IncrementalEditStats[];
+}
+
+export interface ProfileFunction {
+    function: string;
+    calls?: number;
+    self_s: number;
+    cumulative_s: number;
+}
+
+export interface ProfileStack {
+    stack: string;
+    value: number;
+}
+
+export interface TaskProfile {
+    task_id: string;
+    profiler: "cprofile" | "sampling";
+    command: string[];
+    exit_code: number;
+    wall_time_s: number;
+    samples?: number;
+    interval_ms?: number;
+    functions: ProfileFunction[];
+    stacks: ProfileStack[];
+}
+
+export interface ImportTime {
+    module: string;
+    self_us: number;
+    cumulative_us: number;
+    depth: number;
+}
+
+export interface StartupIteration {
+    iteration: number;
+    total_s: number;
+    analysis_s: number;
+}
+
+export interface StartupSummary {
+    tool: string;
+    python: boolean;
+    samples: number;
+    empty_exit_code: number;
+    interpreter_s?: number;
+    startup_s: number;
+    analyzer_init_s?: number;
+    import_time_s?: number;
+    imported_modules: number;
+    top_imports: ImportTime[];
+    median_total_s?: number;
+    median_analysis_s?: number;
+    startup_share?: number;
+    iterations: StartupIteration[];
+}
+
+export interface SourceUploadResponse {
+    digest: string;
+    kind: string;
+    size: number;
+    source_url: string;
+}
+
+export interface RepositoryStats {
+    commit_sha: string;
+    repository_url: string;
+    files: number;
+    physical_loc: number;
+    logical_loc: number;
+    ast_nodes: number;
+    parse_errors: number;
+    computed_at: string;
+}
+
+export interface ToolSummary {
+    tool: string;
+    iterations: number;
+    median_exec_time?: number;
+    median_cpu_percent?: number;
+    median_memory_kb?: number;
+    loc_per_second?: number;
+    files_per_second?: number;
+    kb_per_kloc?: number;
+    findings?: number;
+    diagnostic_fingerprint?: string;
+    time_per_finding?: number;
+    broken_iterations: number;
+    inconsistent_iterations: number;
+}
+
+export interface TaskSummary {
+    task_id: string;
+    status: string;
+    repository?: RepositoryStats;
+    tools: ToolSummary[];
+}
+
+export interface CampaignCreate {
+    name?: string;
+    repositories: string[];
+    analyzers: string[];
+    command_template?: string;
+    mode?: "standard" | "scaling" | "incremental";
+    max_workers?: number;
+    edit_files?: number;
+    schedule?: "grouped" | "interleaved";
+    seed?: number;
+    exclusive?: boolean;
+    memory_max_mb?: number;
+    cpu_max?: number;
+}
+
+export interface CampaignProgress {
+    total: number;
+    finished: number;
+    percent: number;
+    by_status: Record<string, number>;
+}
+
+export interface CampaignResponse {
+    campaign_id: string;
+    name?: string;
+    status: string;
+    created_at: string;
+    completed_at?: string;
+    progress: CampaignProgress;
+}
+
+export interface CampaignCell {
+    task_id: string;
+    status: string;
+    iterations: number;
+    median_exec_time?: number;
+    median_cpu_percent?: number;
+    median_memory_kb?: number;
+    loc_per_second?: number;
+    files_per_second?: number;
+    kb_per_kloc?: number;
+    findings?: number;
+    diagnostic_fingerprint?: string;
+    time_per_finding?: number;
+    broken_iterations: number;
+    inconsistent_iterations: number;
+}
+
+export interface CampaignResults {
+    campaign_id: string;
+    repositories: string[];
+    analyzers: string[];
+    matrix: (CampaignCell | null)[][];
 }
 
 export interface CancelTaskResponse {
@@ -37,8 +278,10 @@ export interface CancelTaskResponse {
 
 export type TaskStatus =
     | "pending"
+    | "queued"
     | "running"
     | "completed"
+    | "partial"
     | "failed"
     | "cancelled"
     | "data_already_retrieved";
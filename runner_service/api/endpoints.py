@@ -1,14 +1,23 @@
+import json
 import logging
 import os
-from datetime import datetime
+from typing import Any, Dict, List, Literal
 
 from fastapi import APIRouter, BackgroundTasks, HTTPException, status
 from fastapi.responses import FileResponse
 
-from api.models import AnalyzeTaskCreate, CancelResponse
+from api.models import AnalyzeTaskCreate, CancelResponse, IncrementalSummary, ScalingSummary
 from config import get_settings
-from services.analyzer import cancel_task, cleanup_task, start_analysis_task
-from services.api_client import api_client
+from services.analyzer import (
+    accept_task,
+    cancel_task,
+    cleanup_task,
+    incremental_summary_path,
+    scaling_summary_path,
+)
+from services.campaigns import release_campaign
+from services.results import RESULT_FORMATS, result_file_path
+from services.state import task_state
 
 # Получение настроек
 settings = get_settings()
@@ -18,58 +27,46 @@ logger = logging.getLogger("runner.api")
 
 router = APIRouter()
 
-# Хранение активных задач и их процессов
-active_tasks = {}
+# Процессы задач, выполняемых этим воркером; состояние задач, общее для
+# воркеров и переживающее перезапуск, хранится в task_state
+active_tasks: Dict[str, Dict[str, Any]] = {}
 
 
 @router.post("/tasks", status_code=status.HTTP_202_ACCEPTED)
-async def create_analysis_task(
-    task_data: AnalyzeTaskCreate, background_tasks: BackgroundTasks
-):
+async def create_analysis_task(task_data: AnalyzeTaskCreate):
     """
     Создает новую задачу анализа кода.
     Устанавливает анализатор, клонирует репозиторий и запускает сбор метрик.
+    Обычно задачи забираются из очереди API сервиса (services/jobs.py),
+    эндпоинт позволяет передать задачу runner'у напрямую.
     """
+    # Параметры запуска сохраняются в состоянии задачи, чтобы после
+    # перезапуска runner'а ее можно было продолжить
+    params = {
+        "analyzer_name": task_data.analyzer_name,
+        "repository_url": str(task_data.repository_url),
+        "command_template": task_data.command_template,
+        "iterations": task_data.iterations,
+        "mode": task_data.mode,
+        "max_workers": task_data.max_workers,
+        "edit_files": task_data.edit_files,
+        "schedule": task_data.schedule,
+        "seed": task_data.seed,
+        "exclusive": task_data.exclusive,
+        "memory_max_mb": task_data.memory_max_mb,
+        "cpu_max": task_data.cpu_max,
+        "campaign_id": task_data.campaign_id,
+        "profile": task_data.profile,
+        "startup_analysis": task_data.startup_analysis,
+    }
+
+    # Проверяем, не запущена ли уже задача с таким ID (в том числе другим воркером)
     try:
-        # Проверяем, не запущена ли уже задача с таким ID
-        if task_data.task_id in active_tasks:
+        if not await accept_task(task_data.task_id, params, active_tasks):
             return {"status": "already_running", "task_id": task_data.task_id}
-
-        # Сообщаем API-сервису, что задача принята к выполнению
-        success = await api_client.update_task_status(
-            task_id=task_data.task_id, status="running"
-        )
-
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update task status in API service",
-            )
-
-        # Создаем запись о задаче в хранилище активных задач
-        active_tasks[task_data.task_id] = {
-            "status": "running",
-            "process": None,  # Процесс будет добавлен позже
-            "start_time": datetime.now(),
-            "analyzer_name": task_data.analyzer_name,
-        }
-
-        # Запускаем задачу в фоне
-        background_tasks.add_task(
-            start_analysis_task,
-            task_id=task_data.task_id,
-            analyzer_name=task_data.analyzer_name,
-            repository_url=str(task_data.repository_url),
-            command_template=task_data.command_template,
-            iterations=task_data.iterations,
-            active_tasks=active_tasks,
-        )
-
         return {"status": "accepted", "task_id": task_data.task_id}
     except Exception as e:
         logger.error(f"Error in create_analysis_task: {str(e)}")
-        if task_data.task_id in active_tasks:
-            del active_tasks[task_data.task_id]
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process task: {str(e)}",
@@ -77,22 +74,61 @@ async def create_analysis_task(
 
 
 @router.get("/tasks/{task_id}/metrics")
-async def get_metrics(task_id: str):
+async def get_metrics(
+    task_id: str,
+    format: Literal["csv", "npz", "arrow", "scaling", "scaling_csv", "incremental", "profile", "startup"] = "csv",
+):
     """
     Возвращает файл с метриками для заданной задачи.
+    npz и arrow - столбцовые файлы с полной точностью, csv - текстовый экспорт,
+    scaling и incremental - JSON-сводки соответствующих режимов, scaling_csv -
+    все прогоны режима масштабирования, profile -
+    профиль анализатора, startup - сводка анализа запуска.
     """
     # Пытаемся найти файл с метриками
-    metrics_file = os.path.join(settings.metrics_dir, f"metrics_{task_id}.csv")
+    metrics_file = result_file_path(task_id, format)
 
     if not os.path.exists(metrics_file):
         raise HTTPException(status_code=404, detail="Metrics file not found")
 
     # Возвращаем файл
     return FileResponse(
-        path=metrics_file, filename=f"metrics_{task_id}.csv", media_type="text/csv"
+        path=metrics_file,
+        filename=os.path.basename(metrics_file),
+        media_type=RESULT_FORMATS[format]["media_type"],
     )
 
 
+@router.get("/tasks/{task_id}/scaling", response_model=List[ScalingSummary])
+async def get_scaling_summary(task_id: str):
+    """
+    Возвращает сводку масштабирования (ускорение, эффективность и
+    последовательная доля по Амдалу) для задачи в режиме scaling.
+    """
+    summary_file = scaling_summary_path(task_id)
+
+    if not os.path.exists(summary_file):
+        raise HTTPException(status_code=404, detail="Scaling summary not found")
+
+    with open(summary_file, "r") as f:
+        return json.load(f)
+
+
+@router.get("/tasks/{task_id}/incremental", response_model=List[IncrementalSummary])
+async def get_incremental_summary(task_id: str):
+    """
+    Возвращает сводку инкрементального режима (холодный запуск и медианы
+    перепроверки по видам правок) для задачи в режиме incremental.
+    """
+    summary_file = incremental_summary_path(task_id)
+
+    if not os.path.exists(summary_file):
+        raise HTTPException(status_code=404, detail="Incremental summary not found")
+
+    with open(summary_file, "r") as f:
+        return json.load(f)
+
+
 @router.post("/tasks/{task_id}/cleanup")
 async def request_cleanup(task_id: str, background_tasks: BackgroundTasks):
     """
@@ -106,6 +142,7 @@ async def request_cleanup(task_id: str, background_tasks: BackgroundTasks):
         analyzer_name = task_info.get("analyzer_name")  # type: ignore
         # Удаляем задачу из активных
         del active_tasks[task_id]
+    await task_state.remove(task_id)
 
     # Запускаем очистку ресурсов в фоновом режиме
     background_tasks.add_task(cleanup_task, task_id, analyzer_name)
@@ -113,13 +150,25 @@ async def request_cleanup(task_id: str, background_tasks: BackgroundTasks):
     return {"status": "cleanup_initiated", "task_id": task_id}
 
 
+@router.delete("/campaigns/{campaign_id}")
+async def release_campaign_resources(campaign_id: str, background_tasks: BackgroundTasks):
+    """
+    Освобождает общие ресурсы завершенной кампании (клоны репозиториев,
+    пакеты анализаторов).
+    """
+    background_tasks.add_task(release_campaign, campaign_id)
+
+    return {"status": "release_initiated", "campaign_id": campaign_id}
+
+
 @router.post("/tasks/{task_id}/cancel", response_model=CancelResponse)
 async def cancel_analysis_task(task_id: str):
     """
     Отменяет выполнение задачи анализа.
     """
-    # Проверяем, существует ли задача
-    if task_id not in active_tasks:
+    # Проверяем, существует ли задача (ее может выполнять другой воркер)
+    state = await task_state.get(task_id)
+    if state is None:
         return CancelResponse(
             task_id=task_id,
             status="not_found",
@@ -127,17 +176,31 @@ async def cancel_analysis_task(task_id: str):
         )
 
     # Получаем информацию о задаче
-    task_info = active_tasks[task_id]
-
-    # Проверяем, запущен ли процесс
-    if task_info.get("process") is None:
+    task_info = active_tasks.get(task_id, {})
+
+    # Проверяем, запущен ли процесс (или еще идет подготовка задачи)
+    if (
+        task_info.get("process") is None
+        and state.collector_pid is None
+        and task_info.get("preparation") is None
+    ):
         return CancelResponse(
             task_id=task_id, status="not_running", message="Task process is not running"
         )
 
-    # Отменяем процесс
+    # Отменяем процесс; завершенные замеры сохраняются (статус partial)
     try:
-        await cancel_task(task_id, active_tasks)
+        final_status = await cancel_task(task_id, active_tasks)
+        if final_status is None:
+            return CancelResponse(
+                task_id=task_id, status="error", message="Failed to cancel task"
+            )
+        if final_status == "partial":
+            return CancelResponse(
+                task_id=task_id,
+                status="partial",
+                message="Task has been cancelled, completed samples were saved",
+            )
         return CancelResponse(
             task_id=task_id,
             status="cancelled",
@@ -1,16 +1,40 @@
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, List, Literal, Optional, Union
 
-from pydantic import BaseModel, HttpUrl
+from pydantic import AnyUrl, BaseModel, HttpUrl, UrlConstraints
+
+# Источник кода задачи: git-репозиторий, синтетический репозиторий
+# (synthetic://python?seed=1&modules=50), каталог, архив или git bundle
+# на runner сервисе (file:///...) либо загруженные исходники (upload://sha256/...)
+RepositoryUrl = Union[
+    HttpUrl, Annotated[AnyUrl, UrlConstraints(allowed_schemes=["synthetic", "file", "upload"])]
+]
 
 
 # Модель для создания задачи анализа
 class AnalyzeTaskCreate(BaseModel):
     task_id: str
     analyzer_name: str
-    repository_url: HttpUrl
+    repository_url: RepositoryUrl
     command_template: str = "{analyzer_cmd} {path}"
     iterations: int = 100
+    # standard - обычный сбор метрик, scaling - кривая ускорения по числу воркеров,
+    # incremental - время перепроверки после правок
+    mode: Literal["standard", "scaling", "incremental"] = "standard"
+    max_workers: Optional[int] = None  # Бюджет ядер для режима scaling (None = все ядра)
+    edit_files: Optional[int] = None  # Файлов в каждой правке режима incremental (None = из настроек)
+    # Контроль шума: grouped - замеры по инструментам, interleaved - случайное чередование
+    schedule: Literal["grouped", "interleaved"] = "grouped"
+    seed: Optional[int] = None  # Зерно перемешивания для interleaved (None = случайное)
+    exclusive: bool = False  # Не допускать одновременного выполнения замеров
+    # Лимиты ресурсов одной итерации (применяются через cgroup v2)
+    memory_max_mb: Optional[int] = None
+    cpu_max: Optional[float] = None  # Ядер
+    campaign_id: Optional[str] = None  # Кампания: общий клон репозитория и пакет анализатора
+    # Отдельный прогон анализатора под профилировщиком после замеров
+    profile: Optional[Literal["cprofile", "sampling"]] = None
+    # Анализ запуска: интерпретатор и импорты отдельно от анализа (режим standard)
+    startup_analysis: bool = False
 
 
 # Модель для ответа о статусе задачи
@@ -33,3 +57,36 @@ class CancelResponse(BaseModel):
     task_id: str
     status: str
     message: str
+
+
+# Модели сводки масштабирования анализаторов
+class ScalingPoint(BaseModel):
+    workers: int
+    median_time: float
+    speedup: float
+    efficiency: float
+
+
+class ScalingSummary(BaseModel):
+    tool: str
+    strategy: str
+    serial_fraction: float
+    points: List[ScalingPoint]
+
+
+# Модели сводки инкрементального режима
+class IncrementalEditStats(BaseModel):
+    edit: str
+    samples: int
+    median_time: float
+    median_memory_kb: float
+
+
+class IncrementalSummary(BaseModel):
+    tool: str
+    variant: str
+    cold_time: float
+    cold_memory_kb: int
+    median_recheck_time: float
+    speedup: float
+    edits: List[IncrementalEditStats]
@@ -0,0 +1,171 @@
+"""
+Общие части нагрузочных бенчмарков: поддельные внешние сервисы на локальном
+порту, сбор задержек по эндпоинтам, базовая линия в JSON и сравнение
+с базовой линией другого коммита.
+
+Модуль намеренно одинаков в api_service и runner_service: каждый сервис
+собирается из своего каталога (контекст сборки Docker) и не импортирует
+код другого. Изменения вносятся в обе копии.
+"""
+
+import datetime
+import json
+import math
+import platform
+import socket
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class FakeServer:
+    """
+    ASGI-приложение, заменяющее внешний сервис (runner, API, PyPI), на случайном
+    локальном порту. Работает в отдельном потоке со своим циклом событий, чтобы
+    не отнимать время у измеряемого сервиса.
+    """
+
+    def __init__(self, app: Any) -> None:
+        import uvicorn
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self._socket.getsockname()[1]}"
+        config = uvicorn.Config(app, log_level="warning", access_log=False, lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._socket]}, daemon=True)
+
+    def __enter__(self) -> "FakeServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f"Fake server {self.url} failed to start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+        self._socket.close()
+
+
+class LatencyRecorder:
+    """Накапливает длительности запросов по эндпоинтам (шаблонам маршрутов)."""
+
+    def __init__(self) -> None:
+        self._latencies: Dict[str, List[float]] = {}
+        self._errors: Dict[str, int] = {}
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        self._latencies.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def summary(self, duration: float) -> Dict[str, Dict[str, float]]:
+        """Число запросов, ошибки, запросы в секунду и перцентили задержки (мс) по эндпоинтам."""
+        endpoints = {}
+        for endpoint, latencies in sorted(self._latencies.items()):
+            latencies = sorted(latencies)
+            endpoints[endpoint] = {
+                "requests": len(latencies),
+                "errors": self._errors.get(endpoint, 0),
+                "throughput_rps": len(latencies) / duration,
+                "mean_ms": sum(latencies) / len(latencies) * 1000,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+            }
+        return endpoints
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Перцентиль по методу ближайшего ранга (значения отсортированы)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def build_baseline(benchmark: str, config: Dict[str, Any], endpoints: Dict[str, Any], **extra: Any) -> Dict[str, Any]:
+    """Базовая линия: результаты по эндпоинтам с коммитом и параметрами нагрузки."""
+    return {
+        "benchmark": benchmark,
+        "commit": _git_commit(),
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "endpoints": endpoints,
+        **extra,
+    }
+
+
+def print_table(endpoints: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'endpoint':<48} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for endpoint, result in endpoints.items():
+        print(
+            f"{endpoint:<48} {result['throughput_rps']:>9.1f} {result['p50_ms']:>8.2f} "
+            f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>7}"
+        )
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Сравнивает базовую линию с предыдущей и печатает изменения p95 и
+    пропускной способности.
+
+    Args:
+        current: Текущая базовая линия
+        previous: Базовая линия для сравнения (например, с другого коммита)
+        threshold: Допустимое ухудшение, доля (0.2 = 20%)
+
+    Returns:
+        List[str]: Эндпоинты, у которых p95 или пропускная способность ухудшились сильнее порога
+    """
+    print(f"\nсравнение с {previous.get('commit') or 'базовой линией'} ({previous.get('created_at')}):")
+    if current.get("config") != previous.get("config"):
+        print("внимание: параметры нагрузки отличаются, сравнение может быть некорректным")
+    print(f"{'endpoint':<48} {'req/s':>9} {'p95 ms':>9}")
+    regressions = []
+    for endpoint, result in current["endpoints"].items():
+        before = previous.get("endpoints", {}).get(endpoint)
+        if before is None:
+            print(f"{endpoint:<48} {'new':>9} {'new':>9}")
+            continue
+        throughput = _change(result["throughput_rps"], before["throughput_rps"])
+        p95 = _change(result["p95_ms"], before["p95_ms"])
+        print(f"{endpoint:<48} {_format(throughput):>9} {_format(p95):>9}")
+        if (throughput is not None and throughput < -threshold) or (p95 is not None and p95 > threshold):
+            regressions.append(endpoint)
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_baseline(path: str, baseline: Dict[str, Any]) -> None:
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+
+def _change(current: float, before: float) -> Optional[float]:
+    return (current - before) / before if before else None
+
+
+def _format(change: Optional[float]) -> str:
+    return "n/a" if change is None else f"{change * 100:+.1f}%"
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True
+        )
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
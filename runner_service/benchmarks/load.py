@@ -0,0 +1,271 @@
+"""
+Нагрузочный бенчмарк runner сервиса.
+
+Запускает приложение в процессе (ASGI-транспорт httpx) с временными каталогами
+данных, а API сервис заменяет поддельным сервисом на локальном порту.
+Параллельные нагрузки (число клиентов задается для каждой):
+
+    submit  - прием задач (POST /tasks); подготовка задачи завершается ошибкой
+              клонирования, и runner сообщает об этом поддельному API сервису
+    metrics - отдача файлов результатов задач
+    report  - обновления статусов задач в API сервисе (клиент runner'а)
+    lease   - запросы задач из очереди API сервиса (клиент runner'а)
+
+Для каждого эндпоинта выводятся пропускная способность и p50/p95/p99 задержки;
+--output сохраняет их базовой линией в JSON, --compare сравнивает с базовой
+линией другого коммита (код возврата 1, если ухудшение больше --threshold).
+
+Запуск из каталога runner_service:
+
+    python -m benchmarks.load --duration 10 --output baseline.json
+    python -m benchmarks.load --workload submit=0 --workload metrics=16 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from benchmarks.harness import (
+    FakeServer,
+    LatencyRecorder,
+    build_baseline,
+    compare,
+    load_baseline,
+    print_table,
+    write_baseline,
+)
+
+# Клиентов каждой нагрузки по умолчанию
+WORKLOADS = {"submit": 2, "metrics": 8, "report": 4, "lease": 1}
+
+# Запрос нагрузки возвращает эндпоинт для отчета и признак успеха
+Operation = Callable[[int], Awaitable[Tuple[str, bool]]]
+
+
+def fake_api(received: Dict[str, int]) -> Any:
+    """
+    Поддельный API сервис: принимает статусы задач (считая их в received),
+    отвечает на опрос статуса и выдает пустую очередь задач.
+    """
+    from fastapi import FastAPI
+
+    app = FastAPI()
+
+    @app.post("/api/v1/internal/tasks/{task_id}/status")
+    async def update_status(task_id: str, update: Dict[str, Any]) -> Dict[str, str]:
+        status = str(update.get("status"))
+        received[status] = received.get(status, 0) + 1
+        return {"status": "updated", "task_id": task_id}
+
+    @app.get("/api/v1/tasks/{task_id}/status")
+    async def task_status(task_id: str) -> Dict[str, str]:
+        return {"task_id": task_id, "status": "running"}
+
+    @app.post("/api/v1/internal/jobs/lease")
+    async def lease(request: Dict[str, Any]) -> List[Any]:
+        return []
+
+    @app.post("/api/v1/internal/jobs/heartbeat")
+    async def heartbeat(request: Dict[str, Any]) -> Dict[str, int]:
+        return {"extended": len(request.get("task_ids", []))}
+
+    return app
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    """Выполняет замер в текущем процессе (каталоги данных уже заданы окружением)."""
+    received: Dict[str, int] = {}
+    with FakeServer(fake_api(received)) as api:
+        # Настройки читаются при импорте приложения
+        os.environ["API_SERVICE_URL"] = f"{api.url}/api/v1"
+        endpoints = await _load(args, api.url)
+    return {"endpoints": endpoints, "fake_api_updates": received}
+
+
+async def _load(args: argparse.Namespace, api_url: str) -> Dict[str, Any]:
+    import logging
+
+    import httpx
+
+    from api.endpoints import active_tasks
+    from main import app
+    from services.api_client import api_client
+    from services.results import result_file_path
+
+    # Запросы клиента бенчмарка не журналируются
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # Файлы результатов завершенных задач для отдачи
+    os.makedirs(os.path.dirname(result_file_path("bench")), exist_ok=True)
+    lines = ["Tool,Iteration,Execution Time (s),CPU Used (%),Memory Used (KB)"]
+    lines += [f"ruff,{i},{0.1 + i % 7 / 100:.3f},95.0,{20000 + i % 13}" for i in range(args.csv_rows)]
+    result_ids = [f"bench-{i}" for i in range(args.result_tasks)]
+    for task_id in result_ids:
+        with open(result_file_path(task_id, "csv"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    recorder = LatencyRecorder()
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    deadline = measure_from + args.duration
+
+    # Необработанное исключение приложения считается ошибкой запроса (ответ 500)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+
+        async def submit(n: int) -> Tuple[str, bool]:
+            # Репозиторий на поддельном сервисе не существует: задача быстро завершается ошибкой
+            response = await client.post(
+                "/tasks",
+                json={
+                    "task_id": str(uuid.uuid4()),
+                    "analyzer_name": "ruff",
+                    "repository_url": f"{api_url}/repos/missing-{n}.git",
+                },
+            )
+            return "POST /tasks", response.status_code < 400
+
+        async def metrics(n: int) -> Tuple[str, bool]:
+            response = await client.get(f"/tasks/{result_ids[n % len(result_ids)]}/metrics?format=csv")
+            return "GET /tasks/{task_id}/metrics", response.status_code < 400
+
+        async def report(n: int) -> Tuple[str, bool]:
+            ok = await api_client.update_task_status(task_id=result_ids[n % len(result_ids)], status="running")
+            return "api_client.update_task_status", ok
+
+        async def lease(n: int) -> Tuple[str, bool]:
+            await api_client.lease_jobs(1)
+            return "api_client.lease_jobs", True
+
+        operations: Dict[str, Operation] = {
+            "submit": submit,
+            "metrics": metrics,
+            "report": report,
+            "lease": lease,
+        }
+
+        async def client_loop(operation: Operation) -> None:
+            n = 0
+            while time.perf_counter() < deadline:
+                request_started = time.perf_counter()
+                try:
+                    endpoint, ok = await operation(n)
+                except httpx.HTTPError:
+                    endpoint, ok = operation.__name__, False
+                n += 1
+                # Запросы прогрева не учитываются
+                if request_started >= measure_from:
+                    recorder.record(endpoint, time.perf_counter() - request_started, ok)
+
+        await asyncio.gather(
+            *(
+                client_loop(operations[name])
+                for name, clients in args.workloads.items()
+                for _ in range(clients)
+            )
+        )
+
+    # Принятые задачи дорабатывают до конечного статуса, пока поддельный API сервис доступен
+    drain_deadline = time.perf_counter() + args.drain_timeout
+    while active_tasks and time.perf_counter() < drain_deadline:
+        await asyncio.sleep(0.1)
+
+    return recorder.summary(args.duration)
+
+
+def _parse_workloads(parser: argparse.ArgumentParser, values: List[str]) -> Dict[str, int]:
+    workloads = dict(WORKLOADS)
+    for value in values:
+        name, _, clients = value.partition("=")
+        if name not in WORKLOADS or not clients.isdigit():
+            parser.error(f"invalid workload {value!r}, expected one of {list(WORKLOADS)}=N")
+        workloads[name] = int(clients)
+    return {name: clients for name, clients in workloads.items() if clients > 0}
+
+
+def _run_worker(args: argparse.Namespace) -> dict:
+    """
+    Запускает замер в отдельном процессе: состояние задач и клиенты
+    создаются при импорте по настройкам из окружения.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ)
+        env["DATA_DIR"] = tmp_dir
+        env["REPOS_DIR"] = os.path.join(tmp_dir, "repos")
+        env["METRICS_DIR"] = os.path.join(tmp_dir, "metrics")
+        env["CACHE_DIR"] = os.path.join(tmp_dir, "cache")
+        env["REPO_STATS_DIR"] = os.path.join(tmp_dir, "repo_stats")
+        env["STATE_DB_PATH"] = os.path.join(tmp_dir, "runner_state.db")
+        env["ANALYZER_PROFILES_PATH"] = os.path.abspath("analyzers.json")
+        command = [sys.executable, "-m", "benchmarks.load", "--worker", "--config", json.dumps(_config(args))]
+        output = subprocess.run(command, env=env, capture_output=True, text=True)
+        if output.returncode != 0:
+            sys.stderr.write(output.stderr)
+            sys.exit(output.returncode)
+        return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def _config(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "workloads": args.workloads,
+        "result_tasks": args.result_tasks,
+        "csv_rows": args.csv_rows,
+        "drain_timeout": args.drain_timeout,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк runner сервиса")
+    parser.add_argument(
+        "--workload",
+        action="append",
+        default=[],
+        metavar="NAME=CLIENTS",
+        help=f"Число клиентов нагрузки (0 - отключить), по умолчанию {WORKLOADS}",
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность замера, с")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Прогрев перед замером, с")
+    parser.add_argument("--result-tasks", type=int, default=20, help="Задач с файлами результатов")
+    parser.add_argument("--csv-rows", type=int, default=300, help="Строк в файле результатов")
+    parser.add_argument(
+        "--drain-timeout", type=float, default=30.0, help="Ожидание завершения принятых задач после замера, с"
+    )
+    parser.add_argument("--output", help="Сохранить базовую линию в JSON")
+    parser.add_argument("--compare", help="Сравнить с базовой линией из JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Допустимое ухудшение p95 и req/s (доля)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(_run(argparse.Namespace(**json.loads(args.config))))))
+        return
+
+    args.workloads = _parse_workloads(parser, args.workload)
+    result = _run_worker(args)
+    baseline = build_baseline(
+        "runner_load", _config(args), result["endpoints"], fake_api_updates=result["fake_api_updates"]
+    )
+    print_table(result["endpoints"])
+    print(f"статусы, полученные API сервисом: {result['fake_api_updates']}")
+
+    if args.output:
+        write_baseline(args.output, baseline)
+    if args.compare:
+        regressions = compare(baseline, load_baseline(args.compare), args.threshold)
+        if regressions:
+            print(f"регрессии (> {args.threshold:.0%}): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,16 +20,25 @@ class Settings(BaseSettings):
     data_dir: str = "/app/data"
     repos_dir: str = "/app/data/repos"
     metrics_dir: str = "/app/data/metrics"
+    cache_dir: str = "/app/data/cache"  # Изолированные кеши анализаторов по задачам
+    state_db_path: str = "/app/data/runner_state.db"  # Состояние задач, переживающее перезапуск
+    repo_stats_dir: str = "/app/data/repo_stats"  # Индексы репозиториев по SHA коммита
+    # Каталог локальных исходников для задач file:///... (монтируется только для чтения)
+    local_sources_dir: str = "/app/sources"
 
     # Настройки анализатора
     go_binary_path: str = "/usr/local/go/bin/go"
     metrics_collector_path: str = "/app/metrics_collector.go"
     compiled_collector_path: str = "/app/metrics_collector"
+    analyzer_profiles_path: str = "/app/analyzers.json"  # Реестр профилей анализаторов
+    analyzer_threads: int = 0  # Число потоков анализаторов в режиме standard (0 = по умолчанию)
 
     # Таймауты
     clone_timeout: int = 300  # 5 минут на клонирование репозитория
     install_timeout: int = 300  # 5 минут на установку пакета
     analyze_timeout: int = 3600  # 1 час на выполнение анализа
+    iteration_timeout: int = 0  # Таймаут одной итерации анализатора в секундах (0 = без ограничения)
+    stop_grace_period: int = 30  # Время на запись завершенных замеров после остановки сборщика
 
     api_service_url: str = "http://api:8000/api/v1"
     api_request_timeout: int = 10
@@ -37,6 +46,45 @@ class Settings(BaseSettings):
     # Ограничения
     max_concurrent_tasks: int = 2  # Максимальное количество одновременных задач
 
+    # Очередь задач API сервиса: runner сам забирает задачи в пределах свободных слотов
+    runner_id: str = ""  # Идентификатор runner'а в очереди (пусто = имя хоста)
+    runner_url: str = ""  # Адрес runner'а для API сервиса (пусто = RUNNER_SERVICE_URL API сервиса)
+    job_poll_interval: int = 5  # Период опроса очереди, секунды
+
+    # Восстановление задач после перезапуска
+    state_heartbeat_interval: int = 10  # Период подтверждения задач процессом-владельцем
+    task_stale_after: int = 30  # Через сколько секунд без heartbeat задачу подхватывает другой процесс
+
+    # Учет ресурсов итераций через cgroup v2 (каталог должен быть делегирован
+    # runner'у; если cgroup недоступна, метрики берутся из rusage)
+    cgroup_root: str = "/sys/fs/cgroup/code-analyzer"
+
+    # Контроль шума измерений
+    load_threshold: float = 0.0  # Порог фоновой загрузки CPU, % от всех ядер (0 = не проверять)
+    max_noise_reruns: int = 2  # Перезапусков замера при превышении порога
+
+    # Режим масштабирования
+    scaling_iterations: int = 5  # Повторов на каждую точку кривой ускорения
+    max_scaling_workers: int = 0  # Верхний бюджет ядер (0 = все ядра)
+
+    # Индекс репозитория
+    repo_stats_workers: int = 0  # Процессов для разбора файлов (0 = по числу ядер)
+
+    # Инкрементальный режим
+    incremental_steps: int = 12  # Правок (и перепроверок) после холодного запуска
+    incremental_edit_files: int = 5  # Файлов в каждой правке по умолчанию
+
+    # Профилирование анализатора (отдельный прогон после замеров)
+    profile_timeout: int = 900  # Таймаут прогона под профилировщиком, с
+    profile_interval_ms: float = 5.0  # Интервал сэмплирующего профилировщика
+    profile_top_functions: int = 200  # Функций в статистике профиля
+    profile_max_stacks: int = 20000  # Самых тяжелых свернутых стеков в профиле
+
+    # Анализ запуска анализаторов (отдельные прогоны после замеров)
+    startup_iterations: int = 5  # Прогонов интерпретатора и анализатора на пустом каталоге
+    startup_top_imports: int = 20  # Самых медленных импортов в сводке
+    startup_timeout: int = 120  # Таймаут одного прогона, с
+
     model_config = SettingsConfigDict(
         env_file=".env.development.local" if os.environ.get("ENV") != "production" else ".env.production.local",
         env_file_encoding="utf-8",
@@ -1,13 +1,18 @@
+import asyncio
 import logging
 import os
 import subprocess
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from api.endpoints import active_tasks
 from api.endpoints import router as api_router
 from config import get_settings
+from services.jobs import pull_jobs
+from services.recovery import keep_task_state
+from services.telemetry import PrometheusMiddleware, mark_worker_stopped, render_metrics
 
 # Настройка логирования
 logging.basicConfig(
@@ -25,6 +30,7 @@ async def lifespan(app: FastAPI):
     # Создаем необходимые директории
     os.makedirs(settings.repos_dir, exist_ok=True)
     os.makedirs(settings.metrics_dir, exist_ok=True)
+    os.makedirs(settings.cache_dir, exist_ok=True)
 
     # Компилируем Go-сборщик метрик
     logger.info("Компиляция Go-сборщика метрик...")
@@ -43,8 +49,17 @@ async def lifespan(app: FastAPI):
     except subprocess.CalledProcessError as e:
         logger.error(f"Ошибка компиляции Go-сборщика: {e}")
 
+    # Подтверждаем свои задачи и продолжаем брошенные (после перезапуска
+    # или падения другого воркера) с последнего сохраненного замера
+    keeper = asyncio.create_task(keep_task_state(active_tasks))
+    # Задачи забираются из очереди API сервиса по мере освобождения слотов
+    puller = asyncio.create_task(pull_jobs(active_tasks))
+
     yield
 
+    puller.cancel()
+    keeper.cancel()
+    mark_worker_stopped()
     logger.info("Завершение работы runner сервиса")
 
 
@@ -65,6 +80,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Метрики длительности запросов по маршрутам
+app.add_middleware(PrometheusMiddleware)
+
 # Регистрация маршрутов
 app.include_router(api_router, prefix="")
 
@@ -75,6 +93,13 @@ async def health_check():
     return {"status": "ok"}
 
 
+# Метрики сервиса в формате Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
 # Запуск приложения
 if __name__ == "__main__":
     import uvicorn
@@ -1,43 +1,429 @@
 package main
 
 import (
+	"archive/zip"
+	"bytes"
+	"encoding/binary"
 	"encoding/csv"
+	"encoding/json"
 	"flag"
 	"fmt"
+	"hash/fnv"
+	"io"
+	"math"
+	"math/rand"
 	"os"
 	"os/exec"
+	"os/signal"
 	"path/filepath"
 	"regexp"
 	"runtime"
+	"sort"
 	"strconv"
 	"strings"
 	"sync"
+	"sync/atomic"
+	"syscall"
 	"time"
 )
 
-// Определение инструмента статического анализа
+// Профиль инструмента статического анализа (запись реестра analyzers.json)
 type Tool struct {
-	Name      string
-	Command   []string
-	Weight    int // Относительная "тяжесть" инструмента (используется только для логирования)
-	TargetArg int // Индекс аргумента, в который нужно подставить путь к целевой директории
+	Name      string   `json:"name"`
+	Package   string   `json:"package"` // Имя pip-пакета (по умолчанию совпадает с Name)
+	Command   []string `json:"command"`
+	Weight    int      `json:"weight"`     // Относительная "тяжесть" инструмента (используется только для логирования)
+	TargetArg int      `json:"target_arg"` // Индекс аргумента, в который нужно подставить путь к целевой директории
+	Standard  bool     `json:"standard"`   // Входит в базовый набор сравнения (предустановлен)
+
+	// Изоляция кеша: каталог кеша задачи передается через CacheFlag
+	// ({dir} заменяется на путь) и/или переменную окружения CacheEnv.
+	// CacheDir - имя подкаталога кеша в каталоге кешей задачи.
+	CacheDir  string `json:"cache_dir"`
+	CacheFlag string `json:"cache_flag"`
+	CacheEnv  string `json:"cache_env"`
+
+	// Нативное управление параллелизмом.
+	// ParallelFlag - флаг командной строки, {n} заменяется на число воркеров;
+	// ThreadEnv - переменные окружения, которым присваивается число воркеров.
+	// Если оба пусты, в режиме scaling список файлов шардируется между процессами.
+	ParallelFlag string   `json:"parallel_flag"`
+	ThreadEnv    []string `json:"thread_env"`
+
+	// Поддержка инкрементальной проверки и демон-режима (например, dmypy)
+	// Daemon - команда клиента демона вместо Command[0], DaemonStop - остановка
+	// демона; {dir} заменяется на каталог состояния демона задачи
+	Daemon      []string `json:"daemon"`
+	DaemonStop  []string `json:"daemon_stop"`
+	Incremental bool     `json:"incremental"`
+
+	// Разбор диагностик из stdout анализатора.
+	// Findings - формат вывода: lines (строка path:line[:col]: ... на замечание,
+	// как у flake8 и mypy) или json (массив замечаний; FindingsPath - ключ
+	// массива в объекте верхнего уровня, пусто - массив на верхнем уровне);
+	// FindingsArgs переключают анализатор в этот формат.
+	// OkExitMask - биты кода возврата, допустимые при успешной проверке
+	// (0 = по умолчанию 1: 0 - замечаний нет, 1 - есть)
+	Findings     string   `json:"findings"`
+	FindingsPath string   `json:"findings_path"`
+	FindingsArgs []string `json:"findings_args"`
+	OkExitMask   int      `json:"ok_exit_mask"`
 }
 
 // Результат запуска инструмента
 type ToolResult struct {
 	Name       string
+	Iteration  int
 	ExecTime   float64
 	CPUPercent float64
 	MemoryKB   int64
 	Timestamp  string
-	Error      error
+	StartedAt  time.Time
+	Error      error `json:"-"`
+	TimedOut   bool  // Итерация остановлена по таймауту, время равно таймауту
+	Stopped    bool  `json:"-"` // Замер прерван остановкой сбора и не сохраняется
+
+	// Источник метрик: cgroup (счетчики cgroup v2 итерации) или rusage
+	Accounting   string
+	IOReadBytes  int64 // Прочитано с устройств, байт
+	IOWriteBytes int64 // Записано на устройства, байт
+	OOMKilled    bool  // Процесс итерации завершен по превышению лимита памяти
+
+	// Метрики шума, снятые во время замера
+	BackgroundLoad float64 // Фоновая загрузка CPU, % от всех ядер (без учета самого замера)
+	LoadAvg        float64 // Средняя загрузка системы за 1 минуту на момент старта
+	Reruns         int     // Число перезапусков из-за превышения порога нагрузки
+	Noisy          bool    // Порог нагрузки превышен и после всех перезапусков
+
+	// Диагностики, разобранные из вывода анализатора
+	Findings              int64  // Число замечаний (-1 = вывод не разобран)
+	DiagnosticFingerprint string // Отпечаток набора замечаний без учета порядка (пусто = неизвестен)
+	ExitCode              int    // Код возврата анализатора (-1 = завершен сигналом)
+	OutputBytes           int64  // Объем stdout и stderr анализатора, байт
+	Broken                bool   // Анализатор завершился с ошибкой, а не по итогам проверки
+	BrokenReason          string
+	Inconsistent          bool // Набор замечаний отличается от большинства итераций инструмента
+}
+
+// Параметры планирования и контроля шума измерений
+type NoiseControl struct {
+	Schedule      string  // grouped - по инструментам, interleaved - случайное чередование (инструмент, итерация)
+	Seed          int64   // Зерно перемешивания (0 = от текущего времени)
+	Exclusive     bool    // Не допускать одновременного выполнения измеряемых процессов
+	LoadThreshold float64 // Порог фоновой загрузки, % от всех ядер (0 = не проверять)
+	MaxReruns     int     // Сколько раз перезапускать замер при превышении порога
+}
+
+// Пара (инструмент, итерация) в плане измерений
+type measurementJob struct {
+	tool      Tool
+	iteration int
+}
+
+// Реестр профилей анализаторов, загружается из файла при запуске
+var registry []Tool
+
+// Параметры запуска, общие для всех инструментов
+var (
+	cacheRoot        string        // Каталог изолированных кешей задачи (пусто = кеш анализатора по умолчанию)
+	targetRoot       string        // Анализируемый каталог: убирается из путей в отпечатке диагностик
+	analyzerThreads  int           // Явное число потоков анализатора в режиме standard (0 = по умолчанию)
+	iterationTimeout time.Duration // Таймаут одной итерации (0 = без ограничения)
+	checkpointFile   string        // Контрольная точка завершенных замеров (пусто = без нее)
+)
+
+// Код завершения при остановке сбора по сигналу: файлы результатов
+// записаны и содержат только завершенные замеры
+const stoppedExitCode = 3
+
+// Остановка сбора по SIGTERM/SIGINT: новые замеры не запускаются,
+// группы процессов текущих замеров завершаются
+var (
+	stopping      atomic.Bool
+	runningMu     sync.Mutex
+	runningGroups = map[int]bool{}
+)
+
+// Запоминает группу процессов замера; если сбор уже останавливается,
+// сразу завершает ее
+func trackGroup(pgid int) {
+	runningMu.Lock()
+	defer runningMu.Unlock()
+	runningGroups[pgid] = true
+	if stopping.Load() {
+		syscall.Kill(-pgid, syscall.SIGKILL)
+	}
+}
+
+func untrackGroup(pgid int) {
+	runningMu.Lock()
+	defer runningMu.Unlock()
+	delete(runningGroups, pgid)
+}
+
+// Останавливает сбор: завершает группы процессов всех текущих замеров
+func stopCollection() {
+	runningMu.Lock()
+	defer runningMu.Unlock()
+	stopping.Store(true)
+	for pgid := range runningGroups {
+		syscall.Kill(-pgid, syscall.SIGKILL)
+	}
+}
+
+// Учет ресурсов через cgroup v2: каждая итерация выполняется в собственной
+// дочерней cgroup каталога cgroupParent. Счетчики cgroup учитывают все
+// процессы итерации, включая воркеры и демоны, пережившие основной процесс
+var (
+	cgroupParent string       // Каталог дочерних cgroup (пусто = учет через rusage)
+	cgroupSeq    atomic.Int64 // Счетчик имен дочерних cgroup
+	memoryMaxMB  int64        // Лимит памяти итерации, МБ (0 = без ограничения)
+	cpuMax       float64      // Лимит CPU итерации, ядер (0 = без ограничения)
+)
+
+// Дочерняя cgroup одной итерации
+type leafCgroup struct {
+	path string
+	dir  *os.File // Дескриптор каталога для запуска процесса сразу в cgroup
+}
+
+// Потребление ресурсов процессами cgroup
+type cgroupUsage struct {
+	cpuSeconds   float64
+	memoryKB     int64
+	ioReadBytes  int64
+	ioWriteBytes int64
+	oomKilled    bool
+}
+
+// Включает учет через cgroup v2, если root находится в cgroup2 и доступен
+// для записи; иначе метрики берутся из rusage процесса /usr/bin/time
+func setupCgroups(root string) {
+	if root == "" {
+		fmt.Println("Учет ресурсов: rusage (cgroup не задана)")
+		return
+	}
+	// Каталог создается только внутри иерархии cgroup v2
+	if !fileExists(filepath.Join(filepath.Dir(root), "cgroup.controllers")) {
+		fmt.Printf("Учет ресурсов: rusage (%s не в иерархии cgroup v2)\n", root)
+		return
+	}
+	if err := os.Mkdir(root, 0755); err != nil && !os.IsExist(err) {
+		fmt.Printf("Учет ресурсов: rusage (каталог cgroup %s недоступен: %v)\n", root, err)
+		return
+	}
+	// Контроллеры, недоступные в родительской cgroup, не включатся:
+	// их отсутствие проверяется на пробной cgroup
+	for _, controller := range []string{"cpu", "memory", "io"} {
+		os.WriteFile(filepath.Join(root, "cgroup.subtree_control"), []byte("+"+controller), 0644)
+	}
+
+	cgroupParent = root
+	probe := newLeafCgroup()
+	if probe == nil {
+		cgroupParent = ""
+		fmt.Printf("Учет ресурсов: rusage (нет прав на создание cgroup в %s)\n", root)
+		return
+	}
+	defer probe.close()
+
+	for _, file := range []string{"cpu.stat", "memory.peak"} {
+		if _, err := os.Stat(filepath.Join(probe.path, file)); err != nil {
+			cgroupParent = ""
+			fmt.Printf("Учет ресурсов: rusage (нет %s: контроллер memory не включен или ядро старше 5.19)\n", file)
+			return
+		}
+	}
+	// Процесс запускается сразу в cgroup (clone3, Linux 5.7+), чтобы ни один
+	// его потомок не успел создаться вне нее
+	cmd := exec.Command("/bin/sh", "-c", "exit 0")
+	cmd.SysProcAttr = &syscall.SysProcAttr{UseCgroupFD: true, CgroupFD: int(probe.dir.Fd())}
+	if err := cmd.Run(); err != nil {
+		cgroupParent = ""
+		fmt.Printf("Учет ресурсов: rusage (запуск процесса в cgroup не поддерживается: %v)\n", err)
+		return
+	}
+
+	if memoryMaxMB > 0 && !fileExists(filepath.Join(probe.path, "memory.max")) {
+		fmt.Println("Внимание: лимит памяти не применяется - контроллер memory недоступен")
+	}
+	if cpuMax > 0 && !fileExists(filepath.Join(probe.path, "cpu.max")) {
+		fmt.Println("Внимание: лимит CPU не применяется - контроллер cpu недоступен")
+	}
+	fmt.Printf("Учет ресурсов: cgroup v2 (%s)\n", root)
+}
+
+func fileExists(path string) bool {
+	_, err := os.Stat(path)
+	return err == nil
+}
+
+// Создает дочернюю cgroup для итерации и применяет лимиты;
+// nil, если учет через cgroup выключен или cgroup создать не удалось
+func newLeafCgroup() *leafCgroup {
+	if cgroupParent == "" {
+		return nil
+	}
+	path := filepath.Join(cgroupParent, fmt.Sprintf("collector-%d-%d", os.Getpid(), cgroupSeq.Add(1)))
+	if err := os.Mkdir(path, 0755); err != nil {
+		fmt.Fprintf(os.Stderr, "Ошибка создания cgroup %s: %v\n", path, err)
+		return nil
+	}
+	if memoryMaxMB > 0 {
+		os.WriteFile(filepath.Join(path, "memory.max"), []byte(strconv.FormatInt(memoryMaxMB*1024*1024, 10)), 0644)
+		// Без ограничения swap лимит памяти лишь замедлял бы анализатор
+		os.WriteFile(filepath.Join(path, "memory.swap.max"), []byte("0"), 0644)
+	}
+	if cpuMax > 0 {
+		quota := int64(cpuMax * 100000)
+		os.WriteFile(filepath.Join(path, "cpu.max"), []byte(fmt.Sprintf("%d 100000", quota)), 0644)
+	}
+	dir, err := os.Open(path)
+	if err != nil {
+		os.Remove(path)
+		return nil
+	}
+	return &leafCgroup{path: path, dir: dir}
 }
 
-// Определение стандартных инструментов - все с одинаковым весом
-var standardTools = []Tool{
-	{Name: "flake8", Command: []string{"flake8"}, Weight: 1, TargetArg: 1},
-	{Name: "ruff", Command: []string{"ruff", "check"}, Weight: 1, TargetArg: 2},
-	{Name: "mypy", Command: []string{"mypy"}, Weight: 1, TargetArg: 1},
+// Завершает все процессы cgroup (в том числе вышедшие из группы процессов)
+func (c *leafCgroup) kill() {
+	// cgroup.kill появился в Linux 5.14, в более старых ядрах процессы завершаются по списку
+	if os.WriteFile(filepath.Join(c.path, "cgroup.kill"), []byte("1"), 0644) == nil {
+		return
+	}
+	for _, pid := range c.pids() {
+		syscall.Kill(pid, syscall.SIGKILL)
+	}
+}
+
+func (c *leafCgroup) pids() []int {
+	data, err := os.ReadFile(filepath.Join(c.path, "cgroup.procs"))
+	if err != nil {
+		return nil
+	}
+	pids := []int{}
+	for _, field := range strings.Fields(string(data)) {
+		if pid, err := strconv.Atoi(field); err == nil {
+			pids = append(pids, pid)
+		}
+	}
+	return pids
+}
+
+// Ожидает завершения процессов cgroup (не дольше 2 секунд)
+func (c *leafCgroup) drain() {
+	deadline := time.Now().Add(2 * time.Second)
+	for len(c.pids()) > 0 && time.Now().Before(deadline) {
+		time.Sleep(10 * time.Millisecond)
+	}
+}
+
+// Читает итоговые счетчики cgroup: процессорное время, пиковую память
+// (включая page cache, отнесенный к cgroup), объем ввода-вывода и срабатывания OOM
+func (c *leafCgroup) usage() (cgroupUsage, bool) {
+	var usage cgroupUsage
+	cpuStat := readKeyedFile(filepath.Join(c.path, "cpu.stat"))
+	usec, ok := cpuStat["usage_usec"]
+	if !ok {
+		return usage, false
+	}
+	peak, err := os.ReadFile(filepath.Join(c.path, "memory.peak"))
+	if err != nil {
+		return usage, false
+	}
+	peakBytes, _ := strconv.ParseInt(strings.TrimSpace(string(peak)), 10, 64)
+
+	usage.cpuSeconds = float64(usec) / 1e6
+	usage.memoryKB = peakBytes / 1024
+	usage.oomKilled = readKeyedFile(filepath.Join(c.path, "memory.events"))["oom_kill"] > 0
+
+	// io.stat: строка на устройство вида "8:0 rbytes=... wbytes=... rios=..."
+	if data, err := os.ReadFile(filepath.Join(c.path, "io.stat")); err == nil {
+		for _, field := range strings.Fields(string(data)) {
+			if value, ok := strings.CutPrefix(field, "rbytes="); ok {
+				n, _ := strconv.ParseInt(value, 10, 64)
+				usage.ioReadBytes += n
+			} else if value, ok := strings.CutPrefix(field, "wbytes="); ok {
+				n, _ := strconv.ParseInt(value, 10, 64)
+				usage.ioWriteBytes += n
+			}
+		}
+	}
+	return usage, true
+}
+
+// Удаляет cgroup (после завершения всех ее процессов)
+func (c *leafCgroup) close() {
+	c.dir.Close()
+	for attempt := 0; attempt < 50; attempt++ {
+		if err := os.Remove(c.path); err == nil || os.IsNotExist(err) {
+			return
+		}
+		time.Sleep(10 * time.Millisecond)
+	}
+	fmt.Fprintf(os.Stderr, "Не удалось удалить cgroup %s\n", c.path)
+}
+
+// Читает файл cgroup формата "ключ значение" построчно
+func readKeyedFile(path string) map[string]int64 {
+	values := map[string]int64{}
+	data, err := os.ReadFile(path)
+	if err != nil {
+		return values
+	}
+	for _, line := range strings.Split(string(data), "\n") {
+		fields := strings.Fields(line)
+		if len(fields) != 2 {
+			continue
+		}
+		if value, err := strconv.ParseInt(fields[1], 10, 64); err == nil {
+			values[fields[0]] = value
+		}
+	}
+	return values
+}
+
+// Загружает реестр профилей анализаторов из JSON-файла
+func loadRegistry(path string) ([]Tool, error) {
+	data, err := os.ReadFile(path)
+	if err != nil {
+		return nil, err
+	}
+	var config struct {
+		Analyzers []Tool `json:"analyzers"`
+	}
+	if err := json.Unmarshal(data, &config); err != nil {
+		return nil, err
+	}
+	for i := range config.Analyzers {
+		if config.Analyzers[i].Weight == 0 {
+			config.Analyzers[i].Weight = 1
+		}
+	}
+	return config.Analyzers, nil
+}
+
+// Возвращает стандартные инструменты из реестра
+func standardTools() []Tool {
+	tools := []Tool{}
+	for _, tool := range registry {
+		if tool.Standard {
+			tools = append(tools, tool)
+		}
+	}
+	return tools
+}
+
+// Ищет профиль анализатора по имени; для неизвестного анализатора
+// возвращает профиль по умолчанию (путь - первый аргумент)
+func lookupTool(name string) Tool {
+	for _, tool := range registry {
+		if tool.Name == name {
+			return tool
+		}
+	}
+	return Tool{Name: name, Command: []string{name}, Weight: 1, TargetArg: 1}
 }
 
 // Регулярные выражения для извлечения метрик
@@ -49,85 +435,489 @@ var (
 
 // Запуск инструмента с использованием пользовательского шаблона команды
 func runToolWithTemplate(tool Tool, targetDir string, commandTemplate string) ToolResult {
+	return runTemplated(tool, []string{targetDir}, commandTemplate, "", analyzerThreads)
+}
+
+// Запуск инструмента на целях (каталог или шард файлов) по шаблону команды;
+// cacheKey и workers передаются в toolExtras
+func runTemplated(tool Tool, targets []string, commandTemplate string, cacheKey string, workers int) ToolResult {
 	// Получаем команду анализатора как строку
-	analyzerCmd := strings.Join(tool.Command, " ")
+	extraArgs, env := toolExtras(tool, cacheKey, workers)
+	analyzerCmd := strings.Join(append(append([]string{}, tool.Command...), extraArgs...), " ")
 	
 	// Заменяем плейсхолдеры в шаблоне
 	cmd := strings.Replace(commandTemplate, "{analyzer_cmd}", analyzerCmd, -1)
-	cmd = strings.Replace(cmd, "{path}", targetDir, -1)
+	cmd = strings.Replace(cmd, "{path}", strings.Join(targets, " "), -1)
 	
 	// Разбиваем команду на аргументы
 	cmdParts := strings.Fields(cmd)
 	
 	// Если команда пуста, используем стандартный подход
 	if len(cmdParts) == 0 {
-		return runTool(tool, targetDir)
+		return runTimed(tool, append(toolCommand(tool, targets), extraArgs...), env)
 	}
 	
-	// Подготавливаем команду time
-	timeCmd := exec.Command("/usr/bin/time", append([]string{"-v"}, cmdParts...)...)
-	
-	// Перенаправляем вывод - игнорируем ошибку выполнения
-	output, _ := timeCmd.CombinedOutput()
-	
-	// Извлекаем метрики из вывода time
-	timeStr := extractRegex(timeRegex, string(output), "0")
-	cpuStr := extractRegex(cpuRegex, string(output), "0")
-	memoryStr := extractRegex(memoryRegex, string(output), "0")
-	
-	// Преобразуем строки в числа
-	execTime := parseTime(timeStr)
-	cpuPercent, _ := strconv.ParseFloat(cpuStr, 64)
-	memoryKB, _ := strconv.ParseInt(memoryStr, 10, 64)
-	
-	return ToolResult{
-		Name:       tool.Name,
-		ExecTime:   execTime,
-		CPUPercent: cpuPercent,
-		MemoryKB:   memoryKB,
-		Timestamp:  time.Now().Format(time.RFC3339),
-		Error:      nil, // Всегда игнорируем ошибки от анализаторов
-	}
+	return runTimed(tool, cmdParts, env)
 }
 
 // Запуск инструмента и сбор метрик (стандартный метод)
 func runTool(tool Tool, targetDir string) ToolResult {
-	// Копируем команду и подставляем путь к целевой директории
-	cmd := make([]string, len(tool.Command))
-	copy(cmd, tool.Command)
-	
-	// Расширяем команду до необходимой длины
-	for len(cmd) <= tool.TargetArg {
-		cmd = append(cmd, "")
+	extraArgs, env := toolExtras(tool, "", analyzerThreads)
+	cmd := append(toolCommand(tool, []string{targetDir}), extraArgs...)
+	return runTimed(tool, cmd, env)
+}
+
+// Дополнительные аргументы и окружение запуска инструмента: формат вывода
+// диагностик, изолированный каталог кеша (cacheKey разделяет кеши
+// одновременно работающих процессов) и явное число потоков, если workers > 0
+func toolExtras(tool Tool, cacheKey string, workers int) ([]string, []string) {
+	args := append([]string{}, tool.FindingsArgs...)
+	env := []string{}
+
+	if cacheRoot != "" && (tool.CacheFlag != "" || tool.CacheEnv != "") {
+		name := tool.CacheDir
+		if name == "" {
+			name = tool.Name
+		}
+		dir := filepath.Join(cacheRoot, name, cacheKey)
+		os.MkdirAll(dir, 0755)
+		if tool.CacheFlag != "" {
+			args = append(args, strings.Fields(strings.Replace(tool.CacheFlag, "{dir}", dir, -1))...)
+		}
+		if tool.CacheEnv != "" {
+			env = append(env, tool.CacheEnv+"="+dir)
+		}
 	}
-	cmd[tool.TargetArg] = targetDir
-	
-	// Подготавливаем команду time
-	timeCmd := exec.Command("/usr/bin/time", append([]string{"-v"}, cmd...)...)
-	
-	// Перенаправляем вывод - игнорируем ошибку выполнения
-	output, _ := timeCmd.CombinedOutput()
-	
-	// Не выводим предупреждение о завершении с ошибкой - это нормально для анализаторов
-	
-	// Извлекаем метрики из вывода time
-	timeStr := extractRegex(timeRegex, string(output), "0")
-	cpuStr := extractRegex(cpuRegex, string(output), "0")
-	memoryStr := extractRegex(memoryRegex, string(output), "0")
-	
-	// Преобразуем строки в числа
-	execTime := parseTime(timeStr)
-	cpuPercent, _ := strconv.ParseFloat(cpuStr, 64)
-	memoryKB, _ := strconv.ParseInt(memoryStr, 10, 64)
-	
-	return ToolResult{
-		Name:       tool.Name,
-		ExecTime:   execTime,
-		CPUPercent: cpuPercent,
-		MemoryKB:   memoryKB,
+
+	if workers > 0 {
+		n := strconv.Itoa(workers)
+		if tool.ParallelFlag != "" {
+			args = append(args, strings.Fields(strings.Replace(tool.ParallelFlag, "{n}", n, -1))...)
+		}
+		for _, name := range tool.ThreadEnv {
+			env = append(env, name+"="+n)
+		}
+	}
+	return args, env
+}
+
+// Собирает аргументы команды инструмента, подставляя targets на место TargetArg
+func toolCommand(tool Tool, targets []string) []string {
+	// Копируем команду и расширяем её до необходимой длины
+	prefix := make([]string, len(tool.Command))
+	copy(prefix, tool.Command)
+	for len(prefix) <= tool.TargetArg {
+		prefix = append(prefix, "")
+	}
+
+	cmd := make([]string, 0, len(prefix)+len(targets))
+	cmd = append(cmd, prefix[:tool.TargetArg]...)
+	cmd = append(cmd, targets...)
+	return append(cmd, prefix[tool.TargetArg+1:]...)
+}
+
+// Запускает команду и снимает метрики процесса. Если доступен учет через
+// cgroup v2, команда выполняется в собственной cgroup и метрики читаются из
+// ее счетчиков; иначе команда запускается под /usr/bin/time -v (rusage).
+// env дополняет окружение текущего процесса (формат KEY=VALUE).
+// Команда выполняется в собственной группе процессов: по таймауту итерации
+// или при остановке сбора завершается вся группа (включая дочерние процессы
+// анализатора), остальные замеры продолжаются.
+// stdout и stderr читаются потоково: в памяти остаются только начало и конец
+// каждого потока, а замечания из stdout считаются по мере вывода.
+func runTimed(tool Tool, args []string, env []string) ToolResult {
+	name := tool.Name
+	leaf := newLeafCgroup()
+	accounting := "rusage"
+	var timeCmd *exec.Cmd
+	if leaf != nil {
+		defer leaf.close()
+		accounting = "cgroup"
+		timeCmd = exec.Command(args[0], args[1:]...)
+		timeCmd.SysProcAttr = &syscall.SysProcAttr{Setpgid: true, UseCgroupFD: true, CgroupFD: int(leaf.dir.Fd())}
+	} else {
+		// Подготавливаем команду time
+		timeCmd = exec.Command("/usr/bin/time", append([]string{"-v"}, args...)...)
+		timeCmd.SysProcAttr = &syscall.SysProcAttr{Setpgid: true}
+	}
+	if len(env) > 0 {
+		timeCmd.Env = append(os.Environ(), env...)
+	}
+	parser := newFindingsParser(tool)
+	stdout := &outputCapture{parser: parser}
+	stderr := &outputCapture{}
+	timeCmd.Stdout = stdout
+	timeCmd.Stderr = stderr
+
+	startedAt := time.Now()
+	if err := timeCmd.Start(); err != nil {
+		parser.finish()
+		fmt.Fprintf(os.Stderr, "Ошибка запуска %s: %v\n", name, err)
+		return ToolResult{Name: name, Timestamp: time.Now().Format(time.RFC3339), StartedAt: startedAt, Error: err, Accounting: accounting, Findings: -1}
+	}
+	pgid := timeCmd.Process.Pid
+	trackGroup(pgid)
+
+	var timedOut atomic.Bool
+	if iterationTimeout > 0 {
+		timer := time.AfterFunc(iterationTimeout, func() {
+			timedOut.Store(true)
+			syscall.Kill(-pgid, syscall.SIGKILL)
+			if leaf != nil {
+				leaf.kill()
+			}
+		})
+		defer timer.Stop()
+	}
+
+	// Ненулевой код возврата нормален для анализаторов: он проверяется по
+	// маске профиля вместе с выводом (diagnose)
+	timeCmd.Wait()
+	wall := time.Since(startedAt).Seconds()
+	untrackGroup(pgid)
+	findings, fingerprint, parseErr := parser.finish()
+
+	// Процессы, пережившие основной (демоны, отделившиеся воркеры), завершаются:
+	// их потребление до этого момента уже учтено в счетчиках cgroup
+	var usage cgroupUsage
+	usageOK := false
+	if leaf != nil {
+		leaf.kill()
+		leaf.drain()
+		usage, usageOK = leaf.usage()
+	}
+
+	if timedOut.Load() {
+		// Вывод time недоступен: записываем время до остановки как отметку таймаута
+		fmt.Fprintf(os.Stderr, "Таймаут итерации %s (%s)\n", name, iterationTimeout)
+		return ToolResult{
+			Name:        name,
+			ExecTime:    wall,
+			Timestamp:   time.Now().Format(time.RFC3339),
+			StartedAt:   startedAt,
+			TimedOut:    true,
+			Accounting:  accounting,
+			Findings:    -1,
+			ExitCode:    -1,
+			OutputBytes: stdout.total + stderr.total,
+		}
+	}
+	if stopping.Load() {
+		return ToolResult{Name: name, StartedAt: startedAt, Stopped: true}
+	}
+
+	result := ToolResult{
+		Name:       name,
+		ExecTime:   wall,
 		Timestamp:  time.Now().Format(time.RFC3339),
-		Error:      nil, // Всегда игнорируем ошибки от анализаторов
+		StartedAt:  startedAt,
+		Accounting: accounting,
+		Error:      nil, // Ошибки анализаторов отражаются в Broken
+	}
+	errorOutput := stderr.text()
+
+	if leaf != nil {
+		if usageOK {
+			if wall > 0 {
+				result.CPUPercent = usage.cpuSeconds / wall * 100
+			}
+			result.MemoryKB = usage.memoryKB
+			result.IOReadBytes = usage.ioReadBytes
+			result.IOWriteBytes = usage.ioWriteBytes
+			result.OOMKilled = usage.oomKilled
+		} else if timeCmd.ProcessState != nil && wall > 0 {
+			// Счетчики cgroup не прочитались: rusage непосредственного процесса
+			result.Accounting = "rusage"
+			cpuTime := timeCmd.ProcessState.UserTime() + timeCmd.ProcessState.SystemTime()
+			result.CPUPercent = cpuTime.Seconds() / wall * 100
+			if rusage, ok := timeCmd.ProcessState.SysUsage().(*syscall.Rusage); ok {
+				result.MemoryKB = rusage.Maxrss
+			}
+		}
+	} else {
+		// Извлекаем метрики из вывода time (он завершает stderr)
+		timeStr := extractRegex(timeRegex, errorOutput, "0")
+		cpuStr := extractRegex(cpuRegex, errorOutput, "0")
+		memoryStr := extractRegex(memoryRegex, errorOutput, "0")
+
+		// Преобразуем строки в числа
+		result.ExecTime = parseTime(timeStr)
+		result.CPUPercent, _ = strconv.ParseFloat(cpuStr, 64)
+		result.MemoryKB, _ = strconv.ParseInt(memoryStr, 10, 64)
+
+		// Вывод time округлен до сотых, поэтому время и CPU берем с полной точностью:
+		// монотонные часы и rusage процесса time, включающий ресурсы анализатора
+		if timeCmd.ProcessState != nil && wall > 0 {
+			result.ExecTime = wall
+			cpuTime := timeCmd.ProcessState.UserTime() + timeCmd.ProcessState.SystemTime()
+			result.CPUPercent = cpuTime.Seconds() / wall * 100
+			// Ввод-вывод в rusage считается блоками по 512 байт
+			if rusage, ok := timeCmd.ProcessState.SysUsage().(*syscall.Rusage); ok {
+				result.IOReadBytes = rusage.Inblock * 512
+				result.IOWriteBytes = rusage.Oublock * 512
+			}
+		}
+	}
+
+	result.Findings = findings
+	result.DiagnosticFingerprint = fingerprint
+	result.OutputBytes = stdout.total + stderr.total
+	result.ExitCode = -1
+	if timeCmd.ProcessState != nil {
+		result.ExitCode = timeCmd.ProcessState.ExitCode()
+	}
+	if leaf == nil && terminatedRegex.MatchString(errorOutput) {
+		// time сообщает о завершении анализатора сигналом в своем выводе
+		result.ExitCode = -1
+	}
+	errorOutput = stripTimeReport(errorOutput)
+	// Завершение по лимиту памяти отмечено отдельно (OOM Killed)
+	if !result.OOMKilled {
+		result.BrokenReason = diagnose(tool, result.ExitCode, result.Findings, errorOutput, parseErr)
+		result.Broken = result.BrokenReason != ""
+	}
+	if result.Broken {
+		// Анализаторы пишут сообщения об ошибках и в stdout (flake8), поэтому приводятся оба потока
+		fmt.Fprintf(os.Stderr, "Итерация %s завершилась с ошибкой (%s)\nstdout: %s\nstderr: %s\n", name, result.BrokenReason, excerpt(stdout.text(), 1024), excerpt(errorOutput, 2048))
+	}
+	return result
+}
+
+// Размер сохраняемых начала и конца каждого потока вывода анализатора
+const captureLimit = 16 * 1024
+
+// Наибольшая длина строки вывода, разбираемой как замечание
+const maxFindingLine = 64 * 1024
+
+// Поток вывода анализатора с ограниченным захватом: сохраняются первые и
+// последние captureLimit байт; если задан parser, весь поток передается ему
+type outputCapture struct {
+	head   []byte
+	tail   []byte
+	total  int64
+	parser *findingsParser
+}
+
+func (c *outputCapture) Write(data []byte) (int, error) {
+	c.total += int64(len(data))
+	if c.parser != nil {
+		c.parser.write(data)
+	}
+	rest := data
+	if room := captureLimit - len(c.head); room > 0 {
+		n := min(room, len(rest))
+		c.head = append(c.head, rest[:n]...)
+		rest = rest[n:]
+	}
+	c.tail = append(c.tail, rest...)
+	// Хвост сокращается пачками, чтобы не копировать его на каждой записи
+	if len(c.tail) > 2*captureLimit {
+		c.tail = append(c.tail[:0], c.tail[len(c.tail)-captureLimit:]...)
+	}
+	return len(data), nil
+}
+
+// Сохраненный вывод; пропущенная середина отмечается строкой с числом байт
+func (c *outputCapture) text() string {
+	tail := c.tail
+	if len(tail) > captureLimit {
+		tail = tail[len(tail)-captureLimit:]
+	}
+	skipped := c.total - int64(len(c.head)) - int64(len(tail))
+	if skipped > 0 {
+		return fmt.Sprintf("%s\n... пропущено %d байт ...\n%s", c.head, skipped, tail)
+	}
+	return string(c.head) + string(tail)
+}
+
+// Потоковый разбор замечаний анализатора. Отпечаток - сумма хешей замечаний
+// (не зависит от порядка вывода, который меняется при параллельной проверке),
+// пути анализируемого каталога из замечаний убираются
+type findingsParser struct {
+	format string
+	count  int64
+	sum    uint64
+	err    error
+
+	partial []byte // Незавершенная строка формата lines
+
+	pipe *io.PipeWriter // Поток в декодер формата json
+	done chan struct{}
+}
+
+// Разбор замечаний в формате профиля; nil - формат не задан
+func newFindingsParser(tool Tool) *findingsParser {
+	switch tool.Findings {
+	case "lines":
+		return &findingsParser{format: "lines"}
+	case "json":
+		reader, writer := io.Pipe()
+		p := &findingsParser{format: "json", pipe: writer, done: make(chan struct{})}
+		go func() {
+			defer close(p.done)
+			p.err = p.decodeJSON(reader, tool.FindingsPath)
+			// Остаток вывода дочитывается, чтобы запись анализатора не блокировалась
+			io.Copy(io.Discard, reader)
+		}()
+		return p
+	}
+	return nil
+}
+
+func (p *findingsParser) write(data []byte) {
+	if p.format == "json" {
+		p.pipe.Write(data)
+		return
+	}
+	for len(data) > 0 {
+		i := bytes.IndexByte(data, '\n')
+		chunk := data
+		if i >= 0 {
+			chunk = data[:i]
+		}
+		if room := maxFindingLine - len(p.partial); room > 0 {
+			p.partial = append(p.partial, chunk[:min(room, len(chunk))]...)
+		}
+		if i < 0 {
+			return
+		}
+		p.line(p.partial)
+		p.partial = p.partial[:0]
+		data = data[i+1:]
+	}
+}
+
+// Строка замечания: path:line[:col]: сообщение (flake8, ruff concise, mypy)
+var findingLineRegex = regexp.MustCompile(`^(.+?):(\d+):(?:\d+:)?\s*(.*)$`)
+
+func (p *findingsParser) line(line []byte) {
+	text := strings.TrimRight(string(line), "\r")
+	matches := findingLineRegex.FindStringSubmatch(text)
+	if matches == nil {
+		return
+	}
+	// Примечания mypy дополняют предыдущую ошибку и отдельным замечанием не считаются
+	if strings.HasPrefix(matches[3], "note:") {
+		return
+	}
+	p.add(text)
+}
+
+// Считает элементы массива замечаний, не загружая весь вывод в память
+func (p *findingsParser) decodeJSON(reader io.Reader, path string) error {
+	decoder := json.NewDecoder(reader)
+	if path != "" {
+		if token, err := decoder.Token(); err != nil || token != json.Delim('{') {
+			return fmt.Errorf("ожидался объект JSON с ключом %q", path)
+		}
+		found := false
+		for !found && decoder.More() {
+			key, err := decoder.Token()
+			if err != nil {
+				return err
+			}
+			if key == path {
+				found = true
+				break
+			}
+			var skipped json.RawMessage
+			if err := decoder.Decode(&skipped); err != nil {
+				return err
+			}
+		}
+		if !found {
+			return fmt.Errorf("в выводе нет ключа %q", path)
+		}
+	}
+	if token, err := decoder.Token(); err != nil || token != json.Delim('[') {
+		return fmt.Errorf("ожидался массив замечаний JSON")
+	}
+	for decoder.More() {
+		var item json.RawMessage
+		if err := decoder.Decode(&item); err != nil {
+			return err
+		}
+		p.add(string(item))
+	}
+	_, err := decoder.Token()
+	return err
+}
+
+func (p *findingsParser) add(finding string) {
+	if targetRoot != "" {
+		finding = strings.ReplaceAll(finding, targetRoot+string(filepath.Separator), "")
+	}
+	hash := fnv.New64a()
+	hash.Write([]byte(finding))
+	p.sum += hash.Sum64()
+	p.count++
+}
+
+// Завершает разбор: число замечаний и отпечаток их набора
+// (-1 и пустой отпечаток, если формат не задан или вывод не разобран)
+func (p *findingsParser) finish() (int64, string, error) {
+	if p == nil {
+		return -1, "", nil
+	}
+	if p.format == "json" {
+		p.pipe.Close()
+		<-p.done
+	} else if len(p.partial) > 0 {
+		p.line(p.partial)
+		p.partial = nil
+	}
+	if p.err != nil {
+		return -1, "", p.err
+	}
+	return p.count, fmt.Sprintf("%016x", p.sum), nil
+}
+
+// Сообщения /usr/bin/time -v в stderr
+var (
+	terminatedRegex = regexp.MustCompile(`Command terminated by signal [0-9]+`)
+	timeReportRegex = regexp.MustCompile(`(?m)^(Command exited with non-zero status [0-9]+|Command terminated by signal [0-9]+|\tCommand being timed:)`)
+)
+
+// Убирает из stderr отчет /usr/bin/time, оставляя вывод анализатора
+func stripTimeReport(text string) string {
+	if loc := timeReportRegex.FindStringIndex(text); loc != nil {
+		return text[:loc[0]]
+	}
+	return text
+}
+
+// Определяет, завершился ли анализатор с ошибкой вместо проверки кода:
+// код возврата вне маски профиля, завершение сигналом, трассировка
+// исключения Python в stderr, вывод, не разобранный в формате профиля, или
+// код возврата "есть замечания" без единого замечания (так flake8 сообщает
+// об ошибке конфигурации). Пустая строка - запуск корректен
+func diagnose(tool Tool, exitCode int, findings int64, stderr string, parseErr error) string {
+	mask := tool.OkExitMask
+	if mask == 0 {
+		mask = 1
+	}
+	switch {
+	case exitCode < 0:
+		return "terminated by signal"
+	case exitCode&^mask != 0:
+		return fmt.Sprintf("exit code %d", exitCode)
+	case strings.Contains(stderr, "Traceback (most recent call last)"):
+		return "python traceback"
+	case parseErr != nil:
+		return "unparsable output: " + parseErr.Error()
+	case exitCode != 0 && findings == 0:
+		return fmt.Sprintf("exit code %d without findings", exitCode)
 	}
+	return ""
+}
+
+// Последние limit байт текста для сообщения об ошибке
+func excerpt(text string, limit int) string {
+	text = strings.TrimSpace(text)
+	if len(text) > limit {
+		return "..." + text[len(text)-limit:]
+	}
+	return text
 }
 
 // Извлекает значение из текста по регулярному выражению
@@ -160,7 +950,7 @@ func parseTime(timeStr string) float64 {
 }
 
 func isStandardAnalyzer(name string) bool {
-    for _, tool := range standardTools {
+    for _, tool := range standardTools() {
         if tool.Name == name {
             return true
         }
@@ -168,96 +958,360 @@ func isStandardAnalyzer(name string) bool {
     return false
 }
 
-// Собирает метрики для всех инструментов
-func collectMetrics(targetDir string, iterations int, outputFile string, parallelism int, smartScheduling bool, commandTemplate string, customAnalyzer string) {
-    var wg sync.WaitGroup
-    var tools []Tool
-    
+// Формирует список инструментов: стандартные плюс пользовательский анализатор
+func buildTools(customAnalyzer string) []Tool {
     // Используем стандартные инструменты
-    tools = make([]Tool, len(standardTools))
-    copy(tools, standardTools)
+    tools := standardTools()
     
     // Добавляем пользовательский анализатор, если указан
     if customAnalyzer != "" && !isStandardAnalyzer(customAnalyzer) {
-        customTool := Tool{
-            Name:      customAnalyzer,
-            Command:   []string{customAnalyzer},
-            Weight:    1,
-            TargetArg: 1, // Предполагаем, что путь - первый аргумент
-        }
-        tools = append(tools, customTool)
+        tools = append(tools, lookupTool(customAnalyzer))
     }
+    return tools
+}
+
+// Собирает метрики для всех инструментов
+func collectMetrics(targetDir string, iterations int, outputFile string, npzOutput string, labels map[string]string, parallelism int, smartScheduling bool, commandTemplate string, customAnalyzer string, noise NoiseControl) {
+    var wg sync.WaitGroup
+    tools := buildTools(customAnalyzer)
 	
-	resultChan := make(chan ToolResult, iterations*len(tools))
-	
-	// Ограничиваем количество одновременно выполняющихся горутин
+	// Ограничиваем количество одновременно выполняющихся замеров
 	if parallelism <= 0 {
 		parallelism = runtime.NumCPU() - 1
 		if parallelism <= 0 {
 			parallelism = 1
 		}
 	}
-	sem := make(chan struct{}, parallelism)
-	
-	// Планируем задачи
-	taskCount := 0
+	if noise.Exclusive {
+		parallelism = 1
+	}
 	
-	// Вычисляем количество итераций для каждого инструмента
 	// Всегда используем точно указанное количество итераций для каждого инструмента
 	toolIterations := iterations
+	jobs := planJobs(tools, toolIterations, &noise)
+
+	// Замеры из контрольной точки прерванного запуска не повторяются
+	restored, checkpoint := openCheckpoint(checkpointFile)
+	if checkpoint != nil {
+		defer checkpoint.Close()
+	}
+	jobs = skipRestoredJobs(jobs, restored)
+	total := len(jobs) + len(restored)
 	
-	for _, tool := range tools {
-		for i := 0; i < toolIterations; i++ {
-			wg.Add(1)
-			taskCount++
-			
-			go func(t Tool) {
-				defer wg.Done()
-				
-				// Получаем "разрешение" на выполнение
-				sem <- struct{}{}
-				defer func() { <-sem }()
-				
-				// Запускаем инструмент с указанным шаблоном команды
-				var result ToolResult
-				if commandTemplate != "" {
-					result = runToolWithTemplate(t, targetDir, commandTemplate)
-				} else {
-					result = runTool(t, targetDir)
+	// Воркеры берут задания из очереди строго в порядке плана
+	jobChan := make(chan measurementJob)
+	resultChan := make(chan ToolResult, len(jobs))
+	
+	for w := 0; w < parallelism; w++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			for job := range jobChan {
+				if stopping.Load() {
+					continue
 				}
+				result := measure(noise, func() ToolResult {
+					// Запускаем инструмент с указанным шаблоном команды
+					if commandTemplate != "" {
+						return runToolWithTemplate(job.tool, targetDir, commandTemplate)
+					}
+					return runTool(job.tool, targetDir)
+				})
+				result.Iteration = job.iteration
 				resultChan <- result
-			}(tool)
-		}
+			}
+		}()
 	}
 	
-	// Ожидаем завершения всех горутин в отдельной горутине
+	go func() {
+		for _, job := range jobs {
+			jobChan <- job
+		}
+		close(jobChan)
+	}()
+	
+	// Ожидаем завершения всех воркеров в отдельной горутине
 	go func() {
 		wg.Wait()
 		close(resultChan)
 	}()
 	
 	// Собираем результаты
-	results := make([]ToolResult, 0, taskCount)
+	results := make([]ToolResult, 0, total)
+	results = append(results, restored...)
+	noisy := 0
+	timedOut := 0
 	for result := range resultChan {
+		// Прерванные остановкой замеры неполны и не сохраняются
+		if result.Stopped {
+			continue
+		}
 		results = append(results, result)
+		appendCheckpoint(checkpoint, result)
+		if result.Noisy {
+			noisy++
+		}
+		if result.TimedOut {
+			timedOut++
+		}
 	}
 	
-	// Записываем результаты в CSV
+	broken := 0
+	for _, result := range results {
+		if result.Broken {
+			broken++
+		}
+	}
+	inconsistent := markInconsistent(results)
+
+	// Записываем результаты: столбцовый файл с полной точностью и CSV-экспорт
+	if npzOutput != "" {
+		writeResultsToNPZ(results, labels, npzOutput)
+	}
 	writeResultsToCSV(results, outputFile)
 	
 	fmt.Printf("Собрано %d измерений в %s (по %d для каждого из %d инструментов)\n", len(results), outputFile, toolIterations, len(tools))
+	if noisy > 0 {
+		fmt.Printf("Внимание: %d измерений выполнены при фоновой загрузке выше %.1f%%\n", noisy, noise.LoadThreshold)
+	}
+	if timedOut > 0 {
+		fmt.Printf("Внимание: %d итераций остановлены по таймауту %s\n", timedOut, iterationTimeout)
+	}
+	if broken > 0 {
+		fmt.Printf("Внимание: %d итераций завершились с ошибкой анализатора (Broken), их время не отражает проверку кода\n", broken)
+	}
+	if inconsistent > 0 {
+		fmt.Printf("Внимание: у %d итераций набор замечаний отличается от большинства итераций инструмента\n", inconsistent)
+	}
+	if stopping.Load() {
+		fmt.Printf("Сбор остановлен: сохранено %d из %d измерений\n", len(results), total)
+	}
 }
 
-// Записывает результаты в CSV-файл
-func writeResultsToCSV(results []ToolResult, outputFile string) {
-	// Проверяем существование файла
-	fileExists := false
-	if _, err := os.Stat(outputFile); err == nil {
-		fileExists = true
+// Сверяет наборы замечаний итераций каждого инструмента: корректные итерации
+// с отпечатком, отличным от самого частого, помечаются как Inconsistent
+// (анализатор недетерминирован или часть итераций проверила не весь код).
+// Возвращает число помеченных итераций
+func markInconsistent(results []ToolResult) int {
+	counts := map[string]map[string]int{}
+	for _, r := range results {
+		if !comparableFindings(r) {
+			continue
+		}
+		if counts[r.Name] == nil {
+			counts[r.Name] = map[string]int{}
+		}
+		counts[r.Name][r.DiagnosticFingerprint]++
 	}
-	
-	// Открываем файл для записи (создаем, если не существует)
-	file, err := os.OpenFile(outputFile, os.O_APPEND|os.O_CREATE|os.O_WRONLY, 0644)
+
+	modal := map[string]string{}
+	for name, fingerprints := range counts {
+		best := ""
+		for fingerprint, count := range fingerprints {
+			// При равенстве частот выбор детерминирован: меньший отпечаток
+			if best == "" || count > fingerprints[best] || (count == fingerprints[best] && fingerprint < best) {
+				best = fingerprint
+			}
+		}
+		modal[name] = best
+	}
+
+	marked := 0
+	for i := range results {
+		r := &results[i]
+		r.Inconsistent = comparableFindings(*r) && r.DiagnosticFingerprint != modal[r.Name]
+		if r.Inconsistent {
+			marked++
+		}
+	}
+	return marked
+}
+
+// Итерация завершилась корректно и ее замечания разобраны
+func comparableFindings(r ToolResult) bool {
+	return r.Findings >= 0 && r.DiagnosticFingerprint != "" && !r.Broken && !r.TimedOut && !r.OOMKilled
+}
+
+// Загружает замеры из контрольной точки и открывает ее для дозаписи.
+// Оборванная при сбое последняя строка отбрасывается: файл перезаписывается
+// только целыми записями.
+func openCheckpoint(path string) ([]ToolResult, *os.File) {
+	if path == "" {
+		return nil, nil
+	}
+
+	restored := []ToolResult{}
+	if data, err := os.ReadFile(path); err == nil {
+		for _, line := range strings.Split(string(data), "\n") {
+			var result ToolResult
+			if line == "" || json.Unmarshal([]byte(line), &result) != nil {
+				continue
+			}
+			restored = append(restored, result)
+		}
+	}
+
+	file, err := os.Create(path)
+	if err != nil {
+		fmt.Fprintf(os.Stderr, "Ошибка создания контрольной точки %s: %v\n", path, err)
+		return restored, nil
+	}
+	for _, result := range restored {
+		appendCheckpoint(file, result)
+	}
+	if len(restored) > 0 {
+		fmt.Printf("Восстановлено %d измерений из контрольной точки %s\n", len(restored), path)
+	}
+	return restored, file
+}
+
+// Дописывает завершенный замер в контрольную точку (одна JSON-запись на строку)
+func appendCheckpoint(file *os.File, result ToolResult) {
+	if file == nil {
+		return
+	}
+	line, err := json.Marshal(result)
+	if err != nil {
+		return
+	}
+	file.Write(append(line, '\n'))
+	file.Sync()
+}
+
+// Исключает из плана пары (инструмент, итерация), уже измеренные до перезапуска
+func skipRestoredJobs(jobs []measurementJob, restored []ToolResult) []measurementJob {
+	if len(restored) == 0 {
+		return jobs
+	}
+	done := make(map[string]bool, len(restored))
+	for _, result := range restored {
+		done[fmt.Sprintf("%s/%d", result.Name, result.Iteration)] = true
+	}
+	pending := make([]measurementJob, 0, len(jobs))
+	for _, job := range jobs {
+		if !done[fmt.Sprintf("%s/%d", job.tool.Name, job.iteration)] {
+			pending = append(pending, job)
+		}
+	}
+	return pending
+}
+
+// Формирует план измерений. В режиме interleaved пары (инструмент, итерация)
+// перемешиваются, чтобы дрейф (нагрев, прогрев page cache) не ложился
+// систематически на один инструмент
+func planJobs(tools []Tool, iterations int, noise *NoiseControl) []measurementJob {
+	jobs := make([]measurementJob, 0, iterations*len(tools))
+	for _, tool := range tools {
+		for i := 0; i < iterations; i++ {
+			jobs = append(jobs, measurementJob{tool: tool, iteration: i})
+		}
+	}
+
+	if noise.Schedule == "interleaved" {
+		if noise.Seed == 0 {
+			noise.Seed = time.Now().UnixNano()
+		}
+		rng := rand.New(rand.NewSource(noise.Seed))
+		rng.Shuffle(len(jobs), func(i, j int) { jobs[i], jobs[j] = jobs[j], jobs[i] })
+		fmt.Printf("Порядок измерений перемешан (seed %d)\n", noise.Seed)
+	}
+	return jobs
+}
+
+// Выполняет замер с контролем фоновой нагрузки: при превышении порога
+// замер повторяется до MaxReruns раз, после чего помечается как шумный
+func measure(noise NoiseControl, run func() ToolResult) ToolResult {
+	var result ToolResult
+	for attempt := 0; ; attempt++ {
+		loadAvg := readLoadAvg()
+		before, ok := readCPUSnapshot()
+		result = run()
+		after, okAfter := readCPUSnapshot()
+
+		result.LoadAvg = loadAvg
+		result.Reruns = attempt
+		// Остановленный замер не повторяется: таймаут воспроизведется снова
+		if result.TimedOut || result.Stopped {
+			return result
+		}
+		if ok && okAfter {
+			result.BackgroundLoad = backgroundLoad(before, after, result)
+		}
+
+		if noise.LoadThreshold <= 0 || result.BackgroundLoad <= noise.LoadThreshold {
+			return result
+		}
+		if attempt >= noise.MaxReruns {
+			result.Noisy = true
+			return result
+		}
+	}
+}
+
+// Снимок счетчиков процессора из /proc/stat (в тиках)
+type cpuSnapshot struct {
+	busy  uint64
+	total uint64
+}
+
+// Читает суммарные счетчики всех ядер из /proc/stat
+func readCPUSnapshot() (cpuSnapshot, bool) {
+	data, err := os.ReadFile("/proc/stat")
+	if err != nil {
+		return cpuSnapshot{}, false
+	}
+	line := strings.SplitN(string(data), "\n", 2)[0]
+	fields := strings.Fields(line)
+	if len(fields) < 5 || fields[0] != "cpu" {
+		return cpuSnapshot{}, false
+	}
+
+	var snapshot cpuSnapshot
+	for i, field := range fields[1:] {
+		// guest и guest_nice уже учтены в user и nice
+		if i >= 8 {
+			break
+		}
+		value, _ := strconv.ParseUint(field, 10, 64)
+		snapshot.total += value
+		// idle и iowait - простой процессора
+		if i != 3 && i != 4 {
+			snapshot.busy += value
+		}
+	}
+	return snapshot, true
+}
+
+// Читает среднюю загрузку системы за 1 минуту из /proc/loadavg
+func readLoadAvg() float64 {
+	data, err := os.ReadFile("/proc/loadavg")
+	if err != nil {
+		return 0
+	}
+	fields := strings.Fields(string(data))
+	if len(fields) == 0 {
+		return 0
+	}
+	value, _ := strconv.ParseFloat(fields[0], 64)
+	return value
+}
+
+// Оценивает фоновую загрузку CPU за время замера: доля занятого времени всех
+// ядер минус доля, приходящаяся на сам измеряемый процесс, в % от всех ядер
+func backgroundLoad(before, after cpuSnapshot, result ToolResult) float64 {
+	total := float64(after.total - before.total)
+	if total <= 0 || result.ExecTime <= 0 {
+		return 0
+	}
+	busyShare := float64(after.busy-before.busy) / total
+	ownShare := result.CPUPercent / 100 / float64(runtime.NumCPU())
+	return math.Max(0, busyShare-ownShare) * 100
+}
+
+// Записывает результаты в CSV-файл (производный текстовый экспорт)
+func writeResultsToCSV(results []ToolResult, outputFile string) {
+	// Файл перезаписывается: результаты разных запусков не смешиваются
+	file, err := os.Create(outputFile)
 	if err != nil {
 		fmt.Fprintf(os.Stderr, "Ошибка открытия файла %s: %v\n", outputFile, err)
 		return
@@ -268,22 +1322,1001 @@ func writeResultsToCSV(results []ToolResult, outputFile string) {
 	writer := csv.NewWriter(file)
 	defer writer.Flush()
 	
-	// Записываем заголовок, если файл новый
-	if !fileExists {
-		writer.Write([]string{"Tool", "Execution Time (s)", "CPU Used (%)", "Memory Used (KB)"})
-	}
+	writer.Write([]string{"Tool", "Execution Time (s)", "CPU Used (%)", "Memory Used (KB)", "Background Load (%)", "Load Average", "Reruns", "Noisy", "Iteration", "Started At", "Timed Out", "Accounting", "IO Read (B)", "IO Write (B)", "OOM Killed", "Findings", "Diagnostic Fingerprint", "Exit Code", "Output (B)", "Broken", "Broken Reason", "Inconsistent"})
 	
 	// Записываем результаты
 	for _, result := range results {
 		writer.Write([]string{
 			result.Name,
-			fmt.Sprintf("%.2f", result.ExecTime),
+			fmt.Sprintf("%.6f", result.ExecTime),
 			fmt.Sprintf("%.2f", result.CPUPercent),
 			fmt.Sprintf("%d", result.MemoryKB),
+			fmt.Sprintf("%.2f", result.BackgroundLoad),
+			fmt.Sprintf("%.2f", result.LoadAvg),
+			strconv.Itoa(result.Reruns),
+			strconv.FormatBool(result.Noisy),
+			strconv.Itoa(result.Iteration),
+			result.StartedAt.Format(time.RFC3339Nano),
+			strconv.FormatBool(result.TimedOut),
+			result.Accounting,
+			strconv.FormatInt(result.IOReadBytes, 10),
+			strconv.FormatInt(result.IOWriteBytes, 10),
+			strconv.FormatBool(result.OOMKilled),
+			strconv.FormatInt(result.Findings, 10),
+			result.DiagnosticFingerprint,
+			strconv.Itoa(result.ExitCode),
+			strconv.FormatInt(result.OutputBytes, 10),
+			strconv.FormatBool(result.Broken),
+			result.BrokenReason,
+			strconv.FormatBool(result.Inconsistent),
 		})
 	}
 }
 
+// Метки конфигурации запуска (-label key=value, флаг можно повторять)
+type labelFlags map[string]string
+
+func (l labelFlags) String() string {
+	pairs := make([]string, 0, len(l))
+	for key, value := range l {
+		pairs = append(pairs, key+"="+value)
+	}
+	sort.Strings(pairs)
+	return strings.Join(pairs, ",")
+}
+
+func (l labelFlags) Set(value string) error {
+	parts := strings.SplitN(value, "=", 2)
+	if len(parts) != 2 || parts[0] == "" {
+		return fmt.Errorf("метка должна иметь вид key=value: %q", value)
+	}
+	l[parts[0]] = parts[1]
+	return nil
+}
+
+// Столбец результатов в формате NumPy (.npy внутри .npz)
+type npyColumn struct {
+	name  string
+	descr string
+	count int
+	data  []byte
+}
+
+func float64Column(name string, values []float64) npyColumn {
+	data := make([]byte, 8*len(values))
+	for i, v := range values {
+		binary.LittleEndian.PutUint64(data[i*8:], math.Float64bits(v))
+	}
+	return npyColumn{name, "<f8", len(values), data}
+}
+
+func int64Column(name string, values []int64) npyColumn {
+	data := make([]byte, 8*len(values))
+	for i, v := range values {
+		binary.LittleEndian.PutUint64(data[i*8:], uint64(v))
+	}
+	return npyColumn{name, "<i8", len(values), data}
+}
+
+func boolColumn(name string, values []bool) npyColumn {
+	data := make([]byte, len(values))
+	for i, v := range values {
+		if v {
+			data[i] = 1
+		}
+	}
+	return npyColumn{name, "|b1", len(values), data}
+}
+
+// Метки времени хранятся как datetime64 с микросекундной точностью
+func datetimeColumn(name string, values []time.Time) npyColumn {
+	data := make([]byte, 8*len(values))
+	for i, v := range values {
+		binary.LittleEndian.PutUint64(data[i*8:], uint64(v.UnixMicro()))
+	}
+	return npyColumn{name, "<M8[us]", len(values), data}
+}
+
+// Строки хранятся как массив фиксированной ширины в UTF-32 (тип <U)
+func stringColumn(name string, values []string) npyColumn {
+	width := 1
+	runes := make([][]rune, len(values))
+	for i, v := range values {
+		runes[i] = []rune(v)
+		if len(runes[i]) > width {
+			width = len(runes[i])
+		}
+	}
+	data := make([]byte, 4*width*len(values))
+	for i, r := range runes {
+		for j, c := range r {
+			binary.LittleEndian.PutUint32(data[(i*width+j)*4:], uint32(c))
+		}
+	}
+	return npyColumn{name, fmt.Sprintf("<U%d", width), len(values), data}
+}
+
+// Формирует заголовок .npy версии 1.0, выровненный до 64 байт
+func npyHeader(descr string, count int) []byte {
+	header := fmt.Sprintf("{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }", descr, count)
+	// magic (6 байт) + версия (2) + длина заголовка (2) + заголовок + перевод строки
+	if padding := (64 - (10+len(header)+1)%64) % 64; padding > 0 {
+		header += strings.Repeat(" ", padding)
+	}
+	header += "\n"
+
+	buf := []byte("\x93NUMPY\x01\x00")
+	buf = binary.LittleEndian.AppendUint16(buf, uint16(len(header)))
+	return append(buf, header...)
+}
+
+// Раскладывает результаты по типизированным столбцам
+func resultColumns(results []ToolResult, labels map[string]string) []npyColumn {
+	n := len(results)
+	tools := make([]string, n)
+	iterations := make([]int64, n)
+	startedAt := make([]time.Time, n)
+	execTimes := make([]float64, n)
+	cpuPercents := make([]float64, n)
+	memoryKB := make([]int64, n)
+	backgroundLoads := make([]float64, n)
+	loadAvgs := make([]float64, n)
+	reruns := make([]int64, n)
+	noisy := make([]bool, n)
+	timedOut := make([]bool, n)
+	accounting := make([]string, n)
+	ioRead := make([]int64, n)
+	ioWrite := make([]int64, n)
+	oomKilled := make([]bool, n)
+	findings := make([]int64, n)
+	fingerprints := make([]string, n)
+	exitCodes := make([]int64, n)
+	outputBytes := make([]int64, n)
+	broken := make([]bool, n)
+	brokenReasons := make([]string, n)
+	inconsistent := make([]bool, n)
+
+	for i, r := range results {
+		tools[i] = r.Name
+		iterations[i] = int64(r.Iteration)
+		startedAt[i] = r.StartedAt
+		execTimes[i] = r.ExecTime
+		cpuPercents[i] = r.CPUPercent
+		memoryKB[i] = r.MemoryKB
+		backgroundLoads[i] = r.BackgroundLoad
+		loadAvgs[i] = r.LoadAvg
+		reruns[i] = int64(r.Reruns)
+		noisy[i] = r.Noisy
+		timedOut[i] = r.TimedOut
+		accounting[i] = r.Accounting
+		ioRead[i] = r.IOReadBytes
+		ioWrite[i] = r.IOWriteBytes
+		oomKilled[i] = r.OOMKilled
+		findings[i] = r.Findings
+		fingerprints[i] = r.DiagnosticFingerprint
+		exitCodes[i] = int64(r.ExitCode)
+		outputBytes[i] = r.OutputBytes
+		broken[i] = r.Broken
+		brokenReasons[i] = r.BrokenReason
+		inconsistent[i] = r.Inconsistent
+	}
+
+	columns := []npyColumn{
+		stringColumn("tool", tools),
+		int64Column("iteration", iterations),
+		datetimeColumn("started_at", startedAt),
+		float64Column("exec_time_s", execTimes),
+		float64Column("cpu_percent", cpuPercents),
+		int64Column("memory_kb", memoryKB),
+		float64Column("background_load", backgroundLoads),
+		float64Column("load_avg", loadAvgs),
+		int64Column("reruns", reruns),
+		boolColumn("noisy", noisy),
+		boolColumn("timed_out", timedOut),
+		stringColumn("accounting", accounting),
+		int64Column("io_read_bytes", ioRead),
+		int64Column("io_write_bytes", ioWrite),
+		boolColumn("oom_killed", oomKilled),
+		int64Column("findings", findings),
+		stringColumn("diagnostic_fingerprint", fingerprints),
+		int64Column("exit_code", exitCodes),
+		int64Column("output_bytes", outputBytes),
+		boolColumn("broken", broken),
+		stringColumn("broken_reason", brokenReasons),
+		boolColumn("inconsistent", inconsistent),
+	}
+
+	// Метки конфигурации повторяются в каждой строке, чтобы файлы разных
+	// запусков можно было объединять без потери контекста
+	keys := make([]string, 0, len(labels))
+	for key := range labels {
+		keys = append(keys, key)
+	}
+	sort.Strings(keys)
+	for _, key := range keys {
+		values := make([]string, n)
+		for i := range values {
+			values[i] = labels[key]
+		}
+		columns = append(columns, stringColumn("label_"+key, values))
+	}
+	return columns
+}
+
+// Записывает результаты в типизированный столбцовый формат NumPy .npz
+// с полной точностью значений
+func writeResultsToNPZ(results []ToolResult, labels map[string]string, outputFile string) {
+	file, err := os.Create(outputFile)
+	if err != nil {
+		fmt.Fprintf(os.Stderr, "Ошибка открытия файла %s: %v\n", outputFile, err)
+		return
+	}
+	defer file.Close()
+
+	archive := zip.NewWriter(file)
+	for _, column := range resultColumns(results, labels) {
+		// Без сжатия: массивы лежат в файле как есть и читаются без копирования
+		w, err := archive.CreateHeader(&zip.FileHeader{Name: column.name + ".npy", Method: zip.Store})
+		if err != nil {
+			fmt.Fprintf(os.Stderr, "Ошибка записи столбца %s: %v\n", column.name, err)
+			return
+		}
+		w.Write(npyHeader(column.descr, column.count))
+		w.Write(column.data)
+	}
+	if err := archive.Close(); err != nil {
+		fmt.Fprintf(os.Stderr, "Ошибка записи файла %s: %v\n", outputFile, err)
+	}
+}
+
+// Один прогон инструмента в режиме масштабирования
+type ScalingSample struct {
+	Workers  int
+	Strategy string // native - встроенный параллелизм, shard - шардирование файлов
+	Result   ToolResult
+}
+
+// Агрегированная точка кривой масштабирования
+type ScalingPoint struct {
+	Workers    int     `json:"workers"`
+	MedianTime float64 `json:"median_time"`
+	Speedup    float64 `json:"speedup"`
+	Efficiency float64 `json:"efficiency"`
+}
+
+// Итог масштабирования одного инструмента
+type ScalingSummary struct {
+	Tool           string         `json:"tool"`
+	Strategy       string         `json:"strategy"`
+	SerialFraction float64        `json:"serial_fraction"`
+	Points         []ScalingPoint `json:"points"`
+}
+
+// Возвращает ряд 1, 2, 4, ... до бюджета ядер включительно
+func workerCounts(budget int) []int {
+	if budget < 1 {
+		budget = 1
+	}
+	counts := []int{}
+	for n := 1; n <= budget; n *= 2 {
+		counts = append(counts, n)
+	}
+	if counts[len(counts)-1] != budget {
+		counts = append(counts, budget)
+	}
+	return counts
+}
+
+// Определяет способ распараллеливания инструмента
+func scalingStrategy(tool Tool) string {
+	if tool.ParallelFlag != "" || len(tool.ThreadEnv) > 0 {
+		return "native"
+	}
+	return "shard"
+}
+
+// Собирает Python-файлы целевой директории, пропуская скрытые каталоги и окружения
+func collectPythonFiles(targetDir string) []string {
+	skipDirs := map[string]bool{"venv": true, "__pycache__": true, "node_modules": true, "site-packages": true}
+	files := []string{}
+	filepath.WalkDir(targetDir, func(path string, d os.DirEntry, err error) error {
+		if err != nil {
+			return nil
+		}
+		if d.IsDir() {
+			if path != targetDir && (strings.HasPrefix(d.Name(), ".") || skipDirs[d.Name()]) {
+				return filepath.SkipDir
+			}
+			return nil
+		}
+		if strings.HasSuffix(d.Name(), ".py") {
+			files = append(files, path)
+		}
+		return nil
+	})
+	return files
+}
+
+// Делит файлы на n шардов с примерно равным суммарным размером
+// (жадное распределение от крупных файлов к мелким)
+func shardFiles(files []string, n int) [][]string {
+	type sizedFile struct {
+		path string
+		size int64
+	}
+	sized := make([]sizedFile, 0, len(files))
+	for _, f := range files {
+		var size int64
+		if info, err := os.Stat(f); err == nil {
+			size = info.Size()
+		}
+		sized = append(sized, sizedFile{f, size})
+	}
+	sort.Slice(sized, func(i, j int) bool { return sized[i].size > sized[j].size })
+
+	shards := make([][]string, n)
+	loads := make([]int64, n)
+	for _, f := range sized {
+		lightest := 0
+		for i := 1; i < n; i++ {
+			if loads[i] < loads[lightest] {
+				lightest = i
+			}
+		}
+		shards[lightest] = append(shards[lightest], f.path)
+		loads[lightest] += f.size + 1
+	}
+
+	// Пустые шарды не запускаем (файлов меньше, чем воркеров)
+	nonEmpty := shards[:0]
+	for _, shard := range shards {
+		if len(shard) > 0 {
+			nonEmpty = append(nonEmpty, shard)
+		}
+	}
+	return nonEmpty
+}
+
+// Запускает инструмент с n воркерами через его встроенный механизм параллелизма
+func runNativeParallel(tool Tool, targetDir string, n int, commandTemplate string) ToolResult {
+	return runTemplated(tool, []string{targetDir}, commandTemplate, fmt.Sprintf("workers-%d", n), n)
+}
+
+// Запускает по одному процессу инструмента на шард одновременно.
+// Время - от старта первого до завершения последнего процесса,
+// CPU - суммарное процессорное время относительно этого интервала,
+// память - сумма пиковых RSS (верхняя оценка одновременного потребления).
+func runSharded(tool Tool, shards [][]string, commandTemplate string) ToolResult {
+	results := make([]ToolResult, len(shards))
+	var wg sync.WaitGroup
+
+	start := time.Now()
+	for i, shard := range shards {
+		wg.Add(1)
+		go func(i int, shard []string) {
+			defer wg.Done()
+			results[i] = runTemplated(tool, shard, commandTemplate, fmt.Sprintf("shard-%d", i), 0)
+		}(i, shard)
+	}
+	wg.Wait()
+	wall := time.Since(start).Seconds()
+
+	var cpuSeconds float64
+	var memoryKB, ioRead, ioWrite, findings, outputBytes int64
+	var fingerprint uint64
+	timedOut, stopped, oomKilled := false, false, false
+	accounting := "cgroup"
+	exitCode, brokenReason := 0, ""
+	for _, r := range results {
+		cpuSeconds += r.CPUPercent / 100 * r.ExecTime
+		memoryKB += r.MemoryKB
+		ioRead += r.IOReadBytes
+		ioWrite += r.IOWriteBytes
+		outputBytes += r.OutputBytes
+		timedOut = timedOut || r.TimedOut
+		stopped = stopped || r.Stopped
+		oomKilled = oomKilled || r.OOMKilled
+		if r.Accounting != "cgroup" {
+			accounting = "rusage"
+		}
+		// Замечания шардов не пересекаются: их число и отпечаток (сумма хешей) складываются
+		if findings >= 0 && r.Findings >= 0 {
+			findings += r.Findings
+			shard, _ := strconv.ParseUint(r.DiagnosticFingerprint, 16, 64)
+			fingerprint += shard
+		} else {
+			findings = -1
+		}
+		if r.ExitCode < 0 || (exitCode >= 0 && r.ExitCode > exitCode) {
+			exitCode = r.ExitCode
+		}
+		if brokenReason == "" {
+			brokenReason = r.BrokenReason
+		}
+	}
+	diagnosticFingerprint := ""
+	if findings >= 0 {
+		diagnosticFingerprint = fmt.Sprintf("%016x", fingerprint)
+	}
+	cpuPercent := 0.0
+	if wall > 0 {
+		cpuPercent = cpuSeconds / wall * 100
+	}
+
+	return ToolResult{
+		Name:       tool.Name,
+		ExecTime:   wall,
+		CPUPercent: cpuPercent,
+		MemoryKB:   memoryKB,
+		Timestamp:  time.Now().Format(time.RFC3339),
+		StartedAt:  start,
+		TimedOut:   timedOut,
+		Stopped:    stopped,
+
+		Accounting:   accounting,
+		IOReadBytes:  ioRead,
+		IOWriteBytes: ioWrite,
+		OOMKilled:    oomKilled,
+
+		Findings:              findings,
+		DiagnosticFingerprint: diagnosticFingerprint,
+		ExitCode:              exitCode,
+		OutputBytes:           outputBytes,
+		Broken:                brokenReason != "",
+		BrokenReason:          brokenReason,
+	}
+}
+
+// Медиана выборки
+func median(values []float64) float64 {
+	if len(values) == 0 {
+		return 0
+	}
+	sorted := make([]float64, len(values))
+	copy(sorted, values)
+	sort.Float64s(sorted)
+	mid := len(sorted) / 2
+	if len(sorted)%2 == 0 {
+		return (sorted[mid-1] + sorted[mid]) / 2
+	}
+	return sorted[mid]
+}
+
+// Оценивает последовательную долю f по закону Амдала: 1/S(n) = f + (1-f)/n.
+// Подбор методом наименьших квадратов по точкам с n > 1, результат в [0, 1].
+func amdahlSerialFraction(points []ScalingPoint) float64 {
+	var num, den float64
+	for _, p := range points {
+		if p.Workers <= 1 || p.Speedup <= 0 {
+			continue
+		}
+		x := 1 - 1/float64(p.Workers)
+		y := 1/p.Speedup - 1/float64(p.Workers)
+		num += x * y
+		den += x * x
+	}
+	// Без точек с n > 1 параллельная часть не наблюдаема
+	if den == 0 {
+		return 1
+	}
+	return math.Max(0, math.Min(1, num/den))
+}
+
+// Строит кривые ускорения для всех инструментов: каждый инструмент запускается
+// последовательно (без перекрытия) с 1, 2, 4, ... воркерами до бюджета ядер.
+// Все прогоны записываются в scalingFile, а в outputFile в стандартном формате
+// попадают прогоны с одним воркером (последовательная база, сравнимая с режимом standard)
+func collectScaling(targetDir string, iterations int, outputFile string, scalingFile string, summaryFile string, maxWorkers int, commandTemplate string, customAnalyzer string) {
+	if maxWorkers <= 0 {
+		maxWorkers = runtime.NumCPU()
+	}
+	counts := workerCounts(maxWorkers)
+	tools := buildTools(customAnalyzer)
+
+	var files []string
+	samples := []ScalingSample{}
+	summaries := []ScalingSummary{}
+
+	for _, tool := range tools {
+		if stopping.Load() {
+			break
+		}
+		strategy := scalingStrategy(tool)
+		if strategy == "shard" && files == nil {
+			files = collectPythonFiles(targetDir)
+			if len(files) == 0 {
+				files = []string{targetDir}
+			}
+		}
+
+		points := []ScalingPoint{}
+		for _, n := range counts {
+			var shards [][]string
+			if strategy == "shard" {
+				shards = shardFiles(files, n)
+			}
+
+			times := make([]float64, 0, iterations)
+			for i := 0; i < iterations && !stopping.Load(); i++ {
+				var result ToolResult
+				if strategy == "native" {
+					result = runNativeParallel(tool, targetDir, n, commandTemplate)
+				} else {
+					result = runSharded(tool, shards, commandTemplate)
+				}
+				if result.Stopped {
+					break
+				}
+				result.Name = tool.Name
+				result.Iteration = i
+				samples = append(samples, ScalingSample{Workers: n, Strategy: strategy, Result: result})
+				// Время остановленной по таймауту итерации - нижняя граница, в медиану не входит
+				if !result.TimedOut {
+					times = append(times, result.ExecTime)
+				}
+			}
+			if len(times) == 0 {
+				continue
+			}
+			points = append(points, ScalingPoint{Workers: n, MedianTime: median(times)})
+		}
+
+		// Точки кривой без завершенных замеров пропускаются
+		if len(points) == 0 {
+			continue
+		}
+
+		// Ускорение и эффективность относительно запуска с одним воркером
+		base := points[0].MedianTime
+		for i := range points {
+			if points[i].MedianTime > 0 {
+				points[i].Speedup = base / points[i].MedianTime
+				points[i].Efficiency = points[i].Speedup / float64(points[i].Workers)
+			}
+		}
+
+		summary := ScalingSummary{
+			Tool:           tool.Name,
+			Strategy:       strategy,
+			SerialFraction: amdahlSerialFraction(points),
+			Points:         points,
+		}
+		summaries = append(summaries, summary)
+		fmt.Printf("%s (%s): последовательная доля %.3f\n", tool.Name, strategy, summary.SerialFraction)
+	}
+
+	baseline := []ToolResult{}
+	for _, sample := range samples {
+		if sample.Workers == 1 {
+			baseline = append(baseline, sample.Result)
+		}
+	}
+	writeResultsToCSV(baseline, outputFile)
+	writeScalingCSV(samples, scalingFile)
+	writeScalingSummary(summaries, summaryFile)
+
+	fmt.Printf("Собрано %d измерений масштабирования в %s (воркеры: %v)\n", len(samples), scalingFile, counts)
+}
+
+// Записывает сырые измерения масштабирования в CSV-файл
+func writeScalingCSV(samples []ScalingSample, outputFile string) {
+	file, err := os.Create(outputFile)
+	if err != nil {
+		fmt.Fprintf(os.Stderr, "Ошибка открытия файла %s: %v\n", outputFile, err)
+		return
+	}
+	defer file.Close()
+
+	writer := csv.NewWriter(file)
+	defer writer.Flush()
+
+	writer.Write([]string{"Tool", "Workers", "Strategy", "Iteration", "Execution Time (s)", "CPU Used (%)", "Memory Used (KB)", "Timed Out"})
+	for _, sample := range samples {
+		writer.Write([]string{
+			sample.Result.Name,
+			strconv.Itoa(sample.Workers),
+			sample.Strategy,
+			strconv.Itoa(sample.Result.Iteration),
+			fmt.Sprintf("%.4f", sample.Result.ExecTime),
+			fmt.Sprintf("%.2f", sample.Result.CPUPercent),
+			fmt.Sprintf("%d", sample.Result.MemoryKB),
+			strconv.FormatBool(sample.Result.TimedOut),
+		})
+	}
+}
+
+// Записывает сводку масштабирования (ускорение, эффективность, доля Амдала) в JSON
+func writeScalingSummary(summaries []ScalingSummary, summaryFile string) {
+	data, err := json.MarshalIndent(summaries, "", "  ")
+	if err != nil {
+		fmt.Fprintf(os.Stderr, "Ошибка сериализации сводки: %v\n", err)
+		return
+	}
+	if err := os.WriteFile(summaryFile, data, 0644); err != nil {
+		fmt.Fprintf(os.Stderr, "Ошибка записи файла %s: %v\n", summaryFile, err)
+	}
+}
+
+// Виды синтетических правок инкрементального режима, применяются по кругу
+var editKinds = []string{"touch", "add_function", "change_signature"}
+
+// Один шаг инкрементального режима: холодный запуск (шаг 0) или перепроверка после правки
+type IncrementalSample struct {
+	Name       string
+	Variant    string // cli - повторный запуск с теплым кешем, daemon - клиент демона
+	Step       int
+	Edit       string // cold или вид правки
+	Files      int    // Число измененных файлов
+	ExecTime   float64
+	CPUPercent float64
+	MemoryKB   int64
+	TimedOut   bool
+	Accounting string
+}
+
+// Медианы перепроверки после правок одного вида
+type IncrementalEditStats struct {
+	Edit           string  `json:"edit"`
+	Samples        int     `json:"samples"`
+	MedianTime     float64 `json:"median_time"`
+	MedianMemoryKB float64 `json:"median_memory_kb"`
+}
+
+// Итог инкрементального режима для инструмента и варианта запуска
+type IncrementalSummary struct {
+	Tool              string                 `json:"tool"`
+	Variant           string                 `json:"variant"`
+	ColdTime          float64                `json:"cold_time"`
+	ColdMemoryKB      int64                  `json:"cold_memory_kb"`
+	MedianRecheckTime float64                `json:"median_recheck_time"`
+	Speedup           float64                `json:"speedup"` // Холодный запуск / медиана перепроверки
+	Edits             []IncrementalEditStats `json:"edits"`
+}
+
+// Сценарий правок: изменяет выбранные файлы и восстанавливает их исходное содержимое
+type editScript struct {
+	files     []string
+	originals map[string][]byte
+	added     map[string][]string // Сигнатуры добавленных функций по файлам
+	seq       int
+}
+
+// Выбирает до n файлов, равномерно распределенных по отсортированному списку
+func newEditScript(files []string, n int) *editScript {
+	sorted := append([]string{}, files...)
+	sort.Strings(sorted)
+	if n > len(sorted) {
+		n = len(sorted)
+	}
+	script := &editScript{originals: map[string][]byte{}, added: map[string][]string{}}
+	for i := 0; i < n; i++ {
+		path := sorted[i*len(sorted)/n]
+		data, err := os.ReadFile(path)
+		if err != nil {
+			continue
+		}
+		script.files = append(script.files, path)
+		script.originals[path] = data
+	}
+	return script
+}
+
+// Применяет правку ко всем файлам сценария. touch меняет только время
+// изменения, add_function дописывает функцию, change_signature меняет
+// сигнатуру последней добавленной функции
+func (s *editScript) apply(kind string) {
+	s.seq++
+	now := time.Now()
+	for _, path := range s.files {
+		switch kind {
+		case "touch":
+			os.Chtimes(path, now, now)
+			continue
+		case "add_function":
+			s.added[path] = append(s.added[path], fmt.Sprintf("_bench_edit_%d(value: int)", s.seq))
+		case "change_signature":
+			functions := s.added[path]
+			if len(functions) == 0 {
+				s.added[path] = append(functions, fmt.Sprintf("_bench_edit_%d(value: int)", s.seq))
+			} else {
+				last := functions[len(functions)-1]
+				functions[len(functions)-1] = strings.TrimSuffix(last, ")") + fmt.Sprintf(", extra_%d: int = 0)", s.seq)
+			}
+		}
+		os.WriteFile(path, s.render(path), 0644)
+	}
+}
+
+// Исходный файл и добавленные сценарием функции
+func (s *editScript) render(path string) []byte {
+	var buffer bytes.Buffer
+	buffer.Write(s.originals[path])
+	if !bytes.HasSuffix(s.originals[path], []byte("\n")) {
+		buffer.WriteByte('\n')
+	}
+	for _, signature := range s.added[path] {
+		fmt.Fprintf(&buffer, "\n\ndef %s -> int:\n    return value\n", signature)
+	}
+	return buffer.Bytes()
+}
+
+// Возвращает файлам исходное содержимое
+func (s *editScript) restore() {
+	for _, path := range s.files {
+		os.WriteFile(path, s.originals[path], 0644)
+	}
+	s.added = map[string][]string{}
+}
+
+// Подставляет каталог состояния демона ({dir}) в команду профиля
+func daemonCommand(command []string, stateDir string) []string {
+	args := make([]string, len(command))
+	for i, arg := range command {
+		args[i] = strings.Replace(arg, "{dir}", stateDir, -1)
+	}
+	return args
+}
+
+// Запускает клиент демона анализатора в общей cgroup сессии: демон
+// переживает шаги, поэтому CPU считается как прирост счетчика cgroup за
+// шаг (включая работу демона), а память - как резидентная память сессии
+// (anon + file_mapped) после шага. Без cgroup используется runTimed
+func runInSession(tool Tool, args []string, env []string, session *leafCgroup) ToolResult {
+	name := tool.Name
+	if session == nil {
+		return runTimed(tool, args, env)
+	}
+
+	cmd := exec.Command(args[0], args[1:]...)
+	cmd.SysProcAttr = &syscall.SysProcAttr{Setpgid: true, UseCgroupFD: true, CgroupFD: int(session.dir.Fd())}
+	if len(env) > 0 {
+		cmd.Env = append(os.Environ(), env...)
+	}
+	var buffer bytes.Buffer
+	cmd.Stdout = &buffer
+	cmd.Stderr = &buffer
+
+	cpuBefore := readKeyedFile(filepath.Join(session.path, "cpu.stat"))["usage_usec"]
+	startedAt := time.Now()
+	if err := cmd.Start(); err != nil {
+		fmt.Fprintf(os.Stderr, "Ошибка запуска %s: %v\n", name, err)
+		return ToolResult{Name: name, Timestamp: time.Now().Format(time.RFC3339), StartedAt: startedAt, Error: err, Accounting: "cgroup"}
+	}
+	pgid := cmd.Process.Pid
+	trackGroup(pgid)
+
+	var timedOut atomic.Bool
+	if iterationTimeout > 0 {
+		timer := time.AfterFunc(iterationTimeout, func() {
+			timedOut.Store(true)
+			// Зависший демон тоже останавливается, следующий шаг запустит его заново
+			session.kill()
+		})
+		defer timer.Stop()
+	}
+
+	cmd.Wait()
+	wall := time.Since(startedAt).Seconds()
+	untrackGroup(pgid)
+
+	result := ToolResult{
+		Name:       name,
+		ExecTime:   wall,
+		Timestamp:  time.Now().Format(time.RFC3339),
+		StartedAt:  startedAt,
+		TimedOut:   timedOut.Load(),
+		Stopped:    stopping.Load() && !timedOut.Load(),
+		Accounting: "cgroup",
+	}
+	if result.TimedOut || result.Stopped {
+		return result
+	}
+
+	cpuAfter := readKeyedFile(filepath.Join(session.path, "cpu.stat"))["usage_usec"]
+	if wall > 0 {
+		result.CPUPercent = float64(cpuAfter-cpuBefore) / 1e6 / wall * 100
+	}
+	memory := readKeyedFile(filepath.Join(session.path, "memory.stat"))
+	result.MemoryKB = (memory["anon"] + memory["file_mapped"]) / 1024
+	return result
+}
+
+// Собирает метрики инкрементального режима: после холодного запуска
+// (прогрев кеша или демона) на editFiles файлах по кругу применяются правки
+// editKinds, и после каждой измеряется время и память перепроверки.
+// Каждый инструмент измеряется вариантом cli (повторный запуск с теплым
+// кешем), а инструменты с демон-режимом в профиле - еще и вариантом daemon
+func collectIncremental(targetDir string, iterations int, outputFile string, summaryFile string, editFiles int, customAnalyzer string) {
+	tools := buildTools(customAnalyzer)
+	files := collectPythonFiles(targetDir)
+	samples := []IncrementalSample{}
+	summaries := []IncrementalSummary{}
+
+	if len(files) == 0 {
+		fmt.Println("В репозитории нет Python-файлов для правок, инкрементальный режим пропущен")
+	}
+
+	for _, tool := range tools {
+		variants := []string{"cli"}
+		if len(tool.Daemon) > 0 {
+			variants = append(variants, "daemon")
+		}
+		for _, variant := range variants {
+			if stopping.Load() || len(files) == 0 {
+				break
+			}
+			script := newEditScript(files, editFiles)
+			toolSamples := runIncrementalVariant(tool, variant, targetDir, iterations, script)
+			script.restore()
+
+			samples = append(samples, toolSamples...)
+			if summary, ok := summarizeIncremental(tool.Name, variant, toolSamples); ok {
+				summaries = append(summaries, summary)
+				fmt.Printf("%s (%s): холодный запуск %.3f с, перепроверка %.3f с (x%.1f)\n",
+					tool.Name, variant, summary.ColdTime, summary.MedianRecheckTime, summary.Speedup)
+			}
+		}
+	}
+
+	writeIncrementalCSV(samples, outputFile)
+	writeIncrementalSummary(summaries, summaryFile)
+
+	fmt.Printf("Собрано %d измерений инкрементального режима в %s (файлов для правок: %d)\n", len(samples), outputFile, editFiles)
+}
+
+// Выполняет холодный запуск и шаги правок одного варианта запуска инструмента
+func runIncrementalVariant(tool Tool, variant string, targetDir string, iterations int, script *editScript) []IncrementalSample {
+	extraArgs, env := toolExtras(tool, "incremental-"+variant, analyzerThreads)
+	args := append(toolCommand(tool, []string{targetDir}), extraArgs...)
+
+	var session *leafCgroup
+	stateDir := ""
+	if variant == "daemon" {
+		// Состояние демона изолировано в каталоге кешей задачи
+		base := cacheRoot
+		if base == "" {
+			base = os.TempDir()
+		}
+		stateDir = filepath.Join(base, tool.Name, "daemon")
+		os.MkdirAll(stateDir, 0755)
+		args = append(daemonCommand(tool.Daemon, stateDir), args[1:]...)
+		session = newLeafCgroup()
+		defer func() {
+			if len(tool.DaemonStop) > 0 {
+				stop := daemonCommand(tool.DaemonStop, stateDir)
+				exec.Command(stop[0], stop[1:]...).Run()
+			}
+			if session != nil {
+				session.kill()
+				session.drain()
+				session.close()
+			}
+		}()
+	}
+
+	samples := []IncrementalSample{}
+	for step := 0; step <= iterations && !stopping.Load(); step++ {
+		edit := "cold"
+		if step > 0 {
+			edit = editKinds[(step-1)%len(editKinds)]
+			script.apply(edit)
+		}
+
+		var result ToolResult
+		if variant == "daemon" {
+			result = runInSession(tool, args, env, session)
+		} else {
+			result = runTimed(tool, args, env)
+		}
+		if result.Stopped {
+			break
+		}
+
+		files := 0
+		if step > 0 {
+			files = len(script.files)
+		}
+		samples = append(samples, IncrementalSample{
+			Name:       tool.Name,
+			Variant:    variant,
+			Step:       step,
+			Edit:       edit,
+			Files:      files,
+			ExecTime:   result.ExecTime,
+			CPUPercent: result.CPUPercent,
+			MemoryKB:   result.MemoryKB,
+			TimedOut:   result.TimedOut,
+			Accounting: result.Accounting,
+		})
+	}
+	return samples
+}
+
+// Сводит шаги варианта: холодный запуск отдельно, перепроверки - по видам правок
+func summarizeIncremental(tool string, variant string, samples []IncrementalSample) (IncrementalSummary, bool) {
+	if len(samples) == 0 || samples[0].Edit != "cold" {
+		return IncrementalSummary{}, false
+	}
+	summary := IncrementalSummary{
+		Tool:         tool,
+		Variant:      variant,
+		ColdTime:     samples[0].ExecTime,
+		ColdMemoryKB: samples[0].MemoryKB,
+		Edits:        []IncrementalEditStats{},
+	}
+
+	recheck := []float64{}
+	for _, kind := range editKinds {
+		times, memory := []float64{}, []float64{}
+		for _, sample := range samples[1:] {
+			// Время остановленной по таймауту итерации - нижняя граница, в медиану не входит
+			if sample.Edit != kind || sample.TimedOut {
+				continue
+			}
+			times = append(times, sample.ExecTime)
+			memory = append(memory, float64(sample.MemoryKB))
+		}
+		if len(times) == 0 {
+			continue
+		}
+		recheck = append(recheck, times...)
+		summary.Edits = append(summary.Edits, IncrementalEditStats{
+			Edit:           kind,
+			Samples:        len(times),
+			MedianTime:     median(times),
+			MedianMemoryKB: median(memory),
+		})
+	}
+	if len(recheck) > 0 {
+		summary.MedianRecheckTime = median(recheck)
+		if summary.MedianRecheckTime > 0 {
+			summary.Speedup = summary.ColdTime / summary.MedianRecheckTime
+		}
+	}
+	return summary, true
+}
+
+// Записывает шаги инкрементального режима в CSV-файл
+func writeIncrementalCSV(samples []IncrementalSample, outputFile string) {
+	file, err := os.Create(outputFile)
+	if err != nil {
+		fmt.Fprintf(os.Stderr, "Ошибка открытия файла %s: %v\n", outputFile, err)
+		return
+	}
+	defer file.Close()
+
+	writer := csv.NewWriter(file)
+	defer writer.Flush()
+
+	writer.Write([]string{"Tool", "Variant", "Step", "Edit", "Files", "Execution Time (s)", "CPU Used (%)", "Memory Used (KB)", "Timed Out", "Accounting"})
+	for _, sample := range samples {
+		writer.Write([]string{
+			sample.Name,
+			sample.Variant,
+			strconv.Itoa(sample.Step),
+			sample.Edit,
+			strconv.Itoa(sample.Files),
+			fmt.Sprintf("%.6f", sample.ExecTime),
+			fmt.Sprintf("%.2f", sample.CPUPercent),
+			fmt.Sprintf("%d", sample.MemoryKB),
+			strconv.FormatBool(sample.TimedOut),
+			sample.Accounting,
+		})
+	}
+}
+
+// Записывает сводку инкрементального режима в JSON
+func writeIncrementalSummary(summaries []IncrementalSummary, summaryFile string) {
+	data, err := json.MarshalIndent(summaries, "", "  ")
+	if err != nil {
+		fmt.Fprintf(os.Stderr, "Ошибка сериализации сводки: %v\n", err)
+		return
+	}
+	if err := os.WriteFile(summaryFile, data, 0644); err != nil {
+		fmt.Fprintf(os.Stderr, "Ошибка записи файла %s: %v\n", summaryFile, err)
+	}
+}
+
 func main() {
     // Разбор аргументов командной строки
     targetDirPtr := flag.String("target", ".", "Директория для анализа")
@@ -293,17 +2326,62 @@ func main() {
     smartPtr := flag.Bool("smart", true, "Использовать умное планирование (не влияет на количество итераций)")
     commandTemplatePtr := flag.String("command-template", "{analyzer_cmd} {path}", "Шаблон команды для запуска анализатора")
     customAnalyzerPtr := flag.String("custom-analyzer", "", "Пользовательский анализатор для запуска вместе со стандартными")
+    modePtr := flag.String("mode", "standard", "Режим сбора: standard, scaling (кривая ускорения по числу воркеров) или incremental (перепроверка после правок)")
+    maxWorkersPtr := flag.Int("max-workers", 0, "Бюджет ядер для режима scaling (0 = все ядра)")
+    scalingSummaryPtr := flag.String("scaling-summary", "scaling_summary.json", "Выходной JSON-файл сводки для режима scaling")
+    scalingCSVPtr := flag.String("scaling-csv", "scaling.csv", "Выходной CSV-файл всех прогонов режима scaling")
+    editFilesPtr := flag.Int("edit-files", 5, "Число файлов, изменяемых между итерациями режима incremental")
+    incrementalSummaryPtr := flag.String("incremental-summary", "incremental_summary.json", "Выходной JSON-файл сводки для режима incremental")
+    schedulePtr := flag.String("schedule", "grouped", "Порядок замеров: grouped (по инструментам) или interleaved (случайное чередование)")
+    seedPtr := flag.Int64("seed", 0, "Зерно перемешивания для режима interleaved (0 = случайное)")
+    exclusivePtr := flag.Bool("exclusive", false, "Исключить одновременное выполнение измеряемых процессов")
+    loadThresholdPtr := flag.Float64("load-threshold", 0, "Порог фоновой загрузки CPU в % от всех ядер (0 = не проверять)")
+    maxRerunsPtr := flag.Int("max-reruns", 2, "Число перезапусков замера при превышении порога нагрузки")
+    npzOutputPtr := flag.String("npz-output", "", "Выходной столбцовый файл .npz с полной точностью (пусто = не писать)")
+    labels := labelFlags{}
+    flag.Var(labels, "label", "Метка конфигурации key=value для столбцового файла (можно повторять)")
+    profilesPtr := flag.String("profiles", "analyzers.json", "Файл реестра профилей анализаторов")
+    flag.StringVar(&cacheRoot, "cache-root", "", "Каталог изолированных кешей анализаторов (пусто = без изоляции)")
+    flag.IntVar(&analyzerThreads, "threads", 0, "Число потоков анализаторов в режиме standard (0 = по умолчанию)")
+    flag.DurationVar(&iterationTimeout, "iteration-timeout", 0, "Таймаут одной итерации анализатора, например 10m (0 = без ограничения)")
+    cgroupRootPtr := flag.String("cgroup-root", "", "Каталог cgroup v2 для учета ресурсов итераций (пусто = rusage)")
+    flag.Int64Var(&memoryMaxMB, "memory-max-mb", 0, "Лимит памяти одной итерации, МБ (0 = без ограничения, нужна cgroup v2)")
+    flag.Float64Var(&cpuMax, "cpu-max", 0, "Лимит CPU одной итерации в ядрах, например 1.5 (0 = без ограничения, нужна cgroup v2)")
+    flag.StringVar(&checkpointFile, "checkpoint", "", "JSONL-файл контрольной точки: завершенные замеры переживают перезапуск (только standard)")
     flag.Parse()
     
+    tools, err := loadRegistry(*profilesPtr)
+    if err != nil {
+        fmt.Fprintf(os.Stderr, "Ошибка загрузки реестра анализаторов %s: %v\n", *profilesPtr, err)
+        os.Exit(1)
+    }
+    registry = tools
+    
     // Преобразуем относительный путь в абсолютный
     targetDir, err := filepath.Abs(*targetDirPtr)
     if err != nil {
         fmt.Fprintf(os.Stderr, "Ошибка определения пути: %v\n", err)
         os.Exit(1)
     }
+    targetRoot = targetDir
     
+    // По SIGTERM/SIGINT сохраняем уже завершенные замеры и выходим с кодом stoppedExitCode
+    signals := make(chan os.Signal, 1)
+    signal.Notify(signals, syscall.SIGTERM, syscall.SIGINT)
+    go func() {
+        sig := <-signals
+        fmt.Fprintf(os.Stderr, "Получен сигнал %v: сбор остановлен, сохраняются завершенные замеры\n", sig)
+        stopCollection()
+    }()
+
+    // Учет ресурсов: cgroup v2, если доступна, иначе rusage
+    setupCgroups(*cgroupRootPtr)
+    if cgroupParent == "" && (memoryMaxMB > 0 || cpuMax > 0) {
+        fmt.Println("Внимание: лимиты ресурсов не применяются - cgroup v2 недоступна")
+    }
+
     startTime := time.Now()
-    fmt.Printf("Начинаем сбор метрик: %d итераций для каждого из %d инструментов\n", *iterationsPtr, len(standardTools))
+    fmt.Printf("Начинаем сбор метрик: %d итераций для каждого из %d инструментов\n", *iterationsPtr, len(standardTools()))
     fmt.Printf("Шаблон команды: %s\n", *commandTemplatePtr)
     
     // Если указан пользовательский анализатор, выводим информацию
@@ -311,8 +2389,24 @@ func main() {
         fmt.Printf("Включен пользовательский анализатор: %s\n", *customAnalyzerPtr)
     }
     
-    collectMetrics(targetDir, *iterationsPtr, *outputFilePtr, *parallelismPtr, *smartPtr, *commandTemplatePtr, *customAnalyzerPtr)
+    if *modePtr == "scaling" {
+        collectScaling(targetDir, *iterationsPtr, *outputFilePtr, *scalingCSVPtr, *scalingSummaryPtr, *maxWorkersPtr, *commandTemplatePtr, *customAnalyzerPtr)
+    } else if *modePtr == "incremental" {
+        collectIncremental(targetDir, *iterationsPtr, *outputFilePtr, *incrementalSummaryPtr, *editFilesPtr, *customAnalyzerPtr)
+    } else {
+        noise := NoiseControl{
+            Schedule:      *schedulePtr,
+            Seed:          *seedPtr,
+            Exclusive:     *exclusivePtr,
+            LoadThreshold: *loadThresholdPtr,
+            MaxReruns:     *maxRerunsPtr,
+        }
+        collectMetrics(targetDir, *iterationsPtr, *outputFilePtr, *npzOutputPtr, labels, *parallelismPtr, *smartPtr, *commandTemplatePtr, *customAnalyzerPtr, noise)
+    }
     
     elapsed := time.Since(startTime)
     fmt.Printf("Сбор метрик завершен за %.2f секунд\n", elapsed.Seconds())
+    if stopping.Load() {
+        os.Exit(stoppedExitCode)
+    }
 }
\ No newline at end of file
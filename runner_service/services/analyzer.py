@@ -1,16 +1,104 @@
 import asyncio
 import logging
 import os
-from typing import Any, Dict, Optional
+import shutil
+import signal
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Awaitable, Dict, Iterator, List, Optional, Set
 
 from config import get_settings
 from services.api_client import api_client
-from services.github import clone_repository, remove_repository
+from services.campaigns import is_campaign_package, prepare_campaign_analyzer
+from services.github import (
+    clone_repository,
+    clone_shared_repository,
+    prepare_workspace,
+    remove_repository,
+)
 from services.package import install_package, uninstall_package
+from services.profiles import get_analyzer_registry
+from services.profiling import run_profiling
+from services.repo_stats import get_repository_stats
+from services.results import (
+    checkpoint_path,
+    count_result_rows,
+    export_arrow,
+    remove_result_files,
+    result_file_path,
+)
+from services.spans import SpanRecorder, add_tool_spans
+from services.startup import run_startup_analysis
+from services.state import task_state
+from services.telemetry import ACTIVE_COLLECTORS, TASK_PHASE_DURATION
 
 settings = get_settings()
 logger = logging.getLogger("runner.analyzer")
 
+# Код завершения сборщика, остановленного по SIGTERM: файлы результатов
+# содержат только завершенные замеры (stoppedExitCode в metrics_collector.go)
+STOPPED_EXIT_CODE = 3
+
+# Ссылки на фоновые задачи анализа, чтобы их не собрал сборщик мусора
+_background: Set[asyncio.Task] = set()
+
+
+async def accept_task(
+    task_id: str, params: Dict[str, Any], active_tasks: Dict[str, Dict[str, Any]]
+) -> bool:
+    """
+    Принимает задачу к выполнению: регистрирует ее в состоянии runner'а,
+    сообщает API сервису о запуске и запускает анализ в фоне.
+
+    Args:
+        task_id: ID задачи
+        params: Параметры запуска start_analysis_task
+        active_tasks: Словарь активных задач
+
+    Returns:
+        bool: False, если задача уже выполняется (в том числе другим воркером)
+
+    Raises:
+        RuntimeError: API сервис не подтвердил запуск (задача отменена или недоступна)
+    """
+    if task_id in active_tasks:
+        return False
+
+    # Запись создается до первого ожидания, чтобы цикл восстановления
+    # не принял задачу за брошенную
+    register_task(task_id, params, active_tasks)
+    if not await task_state.add(task_id, params):
+        active_tasks.pop(task_id, None)
+        return False
+    try:
+        if not await api_client.update_task_status(task_id=task_id, status="running"):
+            raise RuntimeError("Failed to update task status in API service")
+    except Exception:
+        await task_state.remove(task_id)
+        active_tasks.pop(task_id, None)
+        raise
+
+    run_in_background(task_id, params, active_tasks)
+    return True
+
+
+def register_task(task_id: str, params: Dict[str, Any], active_tasks: Dict[str, Dict[str, Any]]) -> None:
+    """Создает запись о задаче в словаре активных задач воркера."""
+    active_tasks[task_id] = {
+        "status": "running",
+        "process": None,  # Процесс будет добавлен позже
+        "start_time": datetime.now(),
+        "analyzer_name": params.get("analyzer_name"),
+    }
+
+
+def run_in_background(task_id: str, params: Dict[str, Any], active_tasks: Dict[str, Dict[str, Any]]) -> None:
+    """Запускает анализ зарегистрированной задачи в фоне."""
+    job = asyncio.create_task(start_analysis_task(task_id=task_id, active_tasks=active_tasks, **params))
+    _background.add(job)
+    job.add_done_callback(_background.discard)
+
 
 async def start_analysis_task(
     task_id: str,
@@ -19,6 +107,17 @@ async def start_analysis_task(
     command_template: str,
     iterations: int,
     active_tasks: Dict[str, Dict[str, Any]],
+    mode: str = "standard",
+    max_workers: Optional[int] = None,
+    schedule: str = "grouped",
+    seed: Optional[int] = None,
+    exclusive: bool = False,
+    campaign_id: Optional[str] = None,
+    edit_files: Optional[int] = None,
+    memory_max_mb: Optional[int] = None,
+    cpu_max: Optional[float] = None,
+    profile: Optional[str] = None,
+    startup_analysis: bool = False,
 ) -> None:
     """
     Выполняет анализ кода в репозитории с помощью стандартных анализаторов и пользовательского, если указан.
@@ -30,50 +129,64 @@ async def start_analysis_task(
         command_template: Шаблон команды для запуска анализатора
         iterations: Количество итераций для метрик
         active_tasks: Словарь активных задач для отслеживания процессов
+        mode: Режим сбора (standard, scaling или incremental)
+        max_workers: Бюджет ядер для режима scaling (None = все ядра)
+        schedule: Порядок замеров (grouped или interleaved)
+        seed: Зерно перемешивания для interleaved
+        exclusive: Выполнять замеры строго по одному
+        campaign_id: ID кампании (клон репозитория и пакет анализатора общие для ее задач)
+        edit_files: Файлов в каждой правке режима incremental (None = из настроек)
+        memory_max_mb: Лимит памяти одной итерации, МБ (None = без ограничения)
+        cpu_max: Лимит CPU одной итерации в ядрах (None = без ограничения)
+        profile: Профилировщик отдельного прогона анализатора (cprofile, sampling или None)
+        startup_analysis: Отделить стоимость запуска анализаторов от времени анализа (режим standard)
     """
+    # Интервалы этапов задачи отправляются в API сервис вместе со статусом
+    spans = SpanRecorder()
+    task_info = active_tasks.get(task_id, {})
+    task_info["spans"] = spans
+    if task_info.get("start_time"):
+        spans.add("runner_queue", task_info["start_time"], datetime.now())
+
     try:
         # Определяем, является ли анализатор стандартным
-        standard_analyzers = ["ruff", "mypy", "flake8"]
-        is_standard_analyzer = analyzer_name in standard_analyzers
-
-        # Шаг 1: Установка анализатора, если он не является стандартным
-        if not is_standard_analyzer:
-            logger.info(f"Установка пользовательского анализатора {analyzer_name}")
-            success, error = await install_package(analyzer_name)
-            if not success:
-                await api_client.update_task_status(
-                    task_id=task_id,
-                    status="failed",
-                    error=f"Failed to install analyzer: {error}",
-                )
-                # Удаляем задачу из активных
-                if task_id in active_tasks:
-                    del active_tasks[task_id]
-                return
-
-        # Шаг 2: Клонирование репозитория
-        logger.info(f"Клонирование репозитория {repository_url}")
-        success, repo_dir, error = await clone_repository(repository_url, task_id)
-        if not success:
+        registry = get_analyzer_registry()
+        is_standard_analyzer = registry.is_standard(analyzer_name)
+
+        # Шаги 1-2: установка анализатора, клонирование, рабочая копия и индекс
+        # репозитория выполняются параллельно; замеры начинаются, как только
+        # завершены все этапы подготовки
+        preparation = asyncio.ensure_future(
+            prepare_task(task_id, analyzer_name, repository_url, campaign_id, spans, task_info)
+        )
+        task_info["preparation"] = preparation
+        try:
+            repo_dir = await preparation
+        except PreparationError as e:
             await api_client.update_task_status(
-                task_id=task_id,
-                status="failed",
-                error=f"Failed to clone repository: {error}",
+                task_id=task_id, status="failed", error=str(e), spans=spans.drain()
             )
-            # Удаляем задачу из активных
-            if task_id in active_tasks:
-                del active_tasks[task_id]
             return
+        except asyncio.CancelledError:
+            # Подготовку отменил cancel_task: статус и очистка ресурсов на его стороне
+            if task_info.get("status") != "cancelled":
+                raise
+            logger.info(f"Подготовка задачи {task_id} отменена")
+            return
+        finally:
+            task_info.pop("preparation", None)
 
         # Шаг 3: Запуск анализаторов и сбор метрик
         logger.info(f"Запуск анализаторов на репозитории {repository_url} с {iterations} итерациями")
         logger.info(f"Используемый шаблон команды: {command_template}")
-        metrics_file_path = os.path.join(settings.metrics_dir, f"metrics_{task_id}.csv")
+        metrics_file_path = result_file_path(task_id, "csv")
 
         # Определяем параллелизм на основе числа доступных CPU
         parallel_arg = "1"  # По умолчанию 1 для слабых серверов
         if os.cpu_count() is not None and os.cpu_count() > 1:  # type: ignore
             parallel_arg = "2"  # Используем 2 потока, если есть больше 1 CPU
+        if exclusive:
+            parallel_arg = "1"  # Измеряемые процессы не должны перекрываться
 
         # Базовая команда для запуска Go-сборщика
         cmd = [
@@ -89,8 +202,99 @@ async def start_analysis_task(
             "-smart=true",
             "-command-template",
             command_template,
+            "-profiles",
+            settings.analyzer_profiles_path,
+            "-cache-root",
+            task_cache_dir(task_id),
         ]
 
+        # Столбцовый файл с полной точностью и метками конфигурации запуска.
+        # Контрольная точка позволяет продолжить сбор после перезапуска runner'а
+        if mode == "standard":
+            cmd.extend(["-npz-output", result_file_path(task_id, "npz")])
+            cmd.extend(["-checkpoint", checkpoint_path(task_id)])
+            labels = {
+                "task_id": task_id,
+                "analyzer": analyzer_name,
+                "schedule": schedule,
+                "exclusive": str(exclusive).lower(),
+                "parallel": parallel_arg,
+                "threads": str(settings.analyzer_threads),
+            }
+            if campaign_id:
+                labels["campaign_id"] = campaign_id
+            if memory_max_mb:
+                labels["memory_max_mb"] = str(memory_max_mb)
+            if cpu_max:
+                labels["cpu_max"] = str(cpu_max)
+            for key, value in labels.items():
+                cmd.extend(["-label", f"{key}={value}"])
+
+        if settings.analyzer_threads > 0:
+            cmd.extend(["-threads", str(settings.analyzer_threads)])
+
+        # Контроль шума: порядок замеров, эксклюзивный режим и порог фоновой нагрузки
+        cmd.extend(
+            [
+                "-schedule",
+                schedule,
+                f"-exclusive={str(exclusive).lower()}",
+                "-load-threshold",
+                str(settings.load_threshold),
+                "-max-reruns",
+                str(settings.max_noise_reruns),
+            ]
+        )
+        if seed is not None:
+            cmd.extend(["-seed", str(seed)])
+
+        # Каждая итерация выполняется в собственной cgroup: учет ресурсов всех
+        # процессов анализатора и лимиты, защищающие остальные задачи хоста
+        cmd.extend(["-cgroup-root", settings.cgroup_root])
+        if memory_max_mb:
+            cmd.extend(["-memory-max-mb", str(memory_max_mb)])
+        if cpu_max:
+            cmd.extend(["-cpu-max", str(cpu_max)])
+
+        # Зависшая итерация останавливается вместе с дочерними процессами анализатора
+        if settings.iteration_timeout > 0:
+            cmd.extend(["-iteration-timeout", f"{settings.iteration_timeout}s"])
+
+        # В режиме масштабирования каждый анализатор прогоняется с 1, 2, 4, ... воркерами
+        if mode == "scaling":
+            worker_budget = scaling_worker_budget(max_workers)
+            cmd[cmd.index("-iterations") + 1] = str(settings.scaling_iterations)
+            cmd.extend(
+                [
+                    "-mode",
+                    "scaling",
+                    "-max-workers",
+                    str(worker_budget),
+                    "-scaling-summary",
+                    scaling_summary_path(task_id),
+                    "-scaling-csv",
+                    result_file_path(task_id, "scaling_csv"),
+                ]
+            )
+            logger.info(f"Режим масштабирования: до {worker_budget} воркеров")
+
+        # В инкрементальном режиме после холодного запуска измеряются перепроверки
+        # после синтетических правок рабочей копии (и клиент демона, если он есть)
+        if mode == "incremental":
+            files = edit_files or settings.incremental_edit_files
+            cmd[cmd.index("-iterations") + 1] = str(settings.incremental_steps)
+            cmd.extend(
+                [
+                    "-mode",
+                    "incremental",
+                    "-edit-files",
+                    str(files),
+                    "-incremental-summary",
+                    incremental_summary_path(task_id),
+                ]
+            )
+            logger.info(f"Инкрементальный режим: {settings.incremental_steps} правок по {files} файлов")
+
         # Добавляем пользовательский анализатор, если он не стандартный
         if not is_standard_analyzer:
             cmd.extend(["-custom-analyzer", analyzer_name])
@@ -104,133 +308,467 @@ async def start_analysis_task(
                 *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
             )
 
-            # Сохраняем процесс в словаре активных задач
+            # Сохраняем процесс в словаре активных задач, а PID - в состоянии задачи
+            # (отмену может принять другой воркер runner сервиса)
             if task_id in active_tasks:
                 active_tasks[task_id]["process"] = proc
+            await task_state.set_collector(task_id, proc.pid)
+
+            # Вывод читается в отдельной задаче: после остановки по таймауту
+            # сборщик успевает записать завершенные замеры
+            communicate = asyncio.ensure_future(proc.communicate())
+            with (
+                TASK_PHASE_DURATION.labels("collect").time(),
+                ACTIVE_COLLECTORS.track_inprogress(),
+                spans.span("collect", mode=mode, iterations=iterations),
+            ):
+                done, _ = await asyncio.wait({communicate}, timeout=settings.analyze_timeout)
+                timed_out = not done
+                if timed_out:
+                    logger.error(f"Таймаут при выполнении анализа для задачи {task_id}")
+                    await stop_collector(proc)
+                stdout, stderr = await communicate
+
+            # Задача могла быть отменена пока мы ждали: результаты сохраняет cancel_task
+            state = await task_state.get(task_id)
+            if state is None or state.status == "cancelled":
+                logger.info(f"Задача {task_id} была отменена, пропускаем обработку результатов")
+                return
 
-            try:
-                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=settings.analyze_timeout)
-
-                # Задача могла быть отменена пока мы ждали
-                if task_id in active_tasks and active_tasks[task_id].get("status") == "cancelled":
-                    logger.info(f"Задача {task_id} была отменена, пропускаем обработку результатов")
-                    return
+            stdout_text = stdout.decode("utf-8") if stdout else ""
+            stderr_text = stderr.decode("utf-8") if stderr else ""
 
-                stdout_text = stdout.decode("utf-8") if stdout else ""
-                stderr_text = stderr.decode("utf-8") if stderr else ""
+            logger.info(f"Вывод процесса: {stdout_text}")
+            if stderr_text:
+                logger.warning(f"Ошибки процесса: {stderr_text}")
 
-                logger.info(f"Вывод процесса: {stdout_text}")
-                if stderr_text:
-                    logger.warning(f"Ошибки процесса: {stderr_text}")
+            # Остановленный сборщик записал только завершенные замеры
+            if timed_out or proc.returncode == STOPPED_EXIT_CODE:
+                reason = (
+                    f"Analysis timed out after {settings.analyze_timeout} seconds"
+                    if timed_out
+                    else "Analysis was stopped"
+                )
+                rows = count_result_rows(task_id)
+                if rows == 0:
+                    await api_client.update_task_status(
+                        task_id=task_id, status="failed", error=reason, spans=spans.drain()
+                    )
+                    return
+                await report_results(
+                    task_id,
+                    mode,
+                    "partial",
+                    spans,
+                    error=f"{reason}; {rows} completed samples saved",
+                    repo_stats=task_info.get("repo_stats"),
+                )
+                logger.warning(f"Задача {task_id} завершена частично: сохранено {rows} замеров")
+                return
 
-                if proc.returncode != 0 and not stderr_text.strip():
-                    # Проверяем только критические ошибки, когда нет вывода в stderr
-                    # Ненулевой код возврата от анализаторов - это нормально
-                    error_msg = "Unknown error during analysis"
-                    raise RuntimeError(f"Ошибка при выполнении анализа: {error_msg}")
+            if proc.returncode != 0 and not stderr_text.strip():
+                # Проверяем только критические ошибки, когда нет вывода в stderr
+                # Ненулевой код возврата от анализаторов - это нормально
+                error_msg = "Unknown error during analysis"
+                raise RuntimeError(f"Ошибка при выполнении анализа: {error_msg}")
 
+            with spans.span("verify") as verify:
                 # Проверяем, что файл метрик создан
                 if not os.path.exists(metrics_file_path):
                     raise RuntimeError("Файл метрик не был создан")
 
-                # Проверяем количество строк в файле метрик
-                with open(metrics_file_path, "r") as f:
-                    line_count = sum(1 for _ in f) - 1  # Вычитаем строку заголовка
-                    logger.info(f"Создан файл метрик с {line_count} строками данных")
+                line_count = count_result_rows(task_id)
+                logger.info(f"Создан файл метрик с {line_count} строками данных")
+                verify["rows"] = line_count
 
-                expected_lines = iterations * 3  # 3 стандартных анализатора
-                if line_count < expected_lines:
+                expected_lines = iterations * len(registry.standard)
+                if mode == "standard" and line_count < expected_lines:
                     logger.warning(
                         f"Внимание: количество строк метрик ({line_count}) меньше ожидаемого ({expected_lines})"
                     )
 
-                # Обновляем статус задачи
-                await api_client.update_task_status(task_id=task_id, status="completed", metrics_file=metrics_file_path)
-                logger.info(f"Анализ для задачи {task_id} успешно завершен")
+            # Анализ запуска и профилирование - отдельные прогоны после замеров,
+            # чтобы не искажать их
+            if startup_analysis:
+                if mode == "standard":
+                    await run_startup_analysis(task_id, task_cache_dir(task_id), spans, task_info)
+                else:
+                    logger.warning(f"Анализ запуска доступен только в режиме standard, задача {task_id}")
+                state = await task_state.get(task_id)
+                if state is None or state.status == "cancelled":
+                    logger.info(f"Задача {task_id} отменена во время анализа запуска")
+                    return
 
-            except asyncio.TimeoutError:
-                # Обрабатываем превышение таймаута
-                await api_client.update_task_status(
-                    task_id=task_id,
-                    status="failed",
-                    error=f"Analysis timed out after {settings.analyze_timeout} seconds",
+            if profile:
+                await run_profiling(
+                    task_id, analyzer_name, repo_dir or ".", profile, task_cache_dir(task_id), spans, task_info
                 )
-                logger.error(f"Таймаут при выполнении анализа для задачи {task_id}")
-                # Убиваем процесс, если он все еще работает
-                try:
-                    proc.kill()
-                except Exception:
-                    pass
+                state = await task_state.get(task_id)
+                if state is None or state.status == "cancelled":
+                    logger.info(f"Задача {task_id} отменена во время профилирования")
+                    return
+
+            await report_results(task_id, mode, "completed", spans, repo_stats=task_info.get("repo_stats"))
+            logger.info(f"Анализ для задачи {task_id} успешно завершен")
 
         except Exception as e:
             await api_client.update_task_status(
                 task_id=task_id,
                 status="failed",
                 error=f"Error during analysis: {str(e)}",
+                spans=spans.drain(),
             )
             logger.error(f"Ошибка при выполнении анализа для задачи {task_id}: {str(e)}")
 
     except Exception as e:
         # Обрабатываем любые исключения
-        await api_client.update_task_status(task_id=task_id, status="failed", error=f"Unexpected error: {str(e)}")
+        await api_client.update_task_status(
+            task_id=task_id, status="failed", error=f"Unexpected error: {str(e)}", spans=spans.drain()
+        )
         logger.error(f"Неожиданная ошибка при выполнении задачи {task_id}: {str(e)}")
     finally:
         # Удаляем задачу из активных
+        await task_state.remove(task_id)
         if task_id in active_tasks:
             del active_tasks[task_id]
 
 
-async def cancel_task(task_id: str, active_tasks: Dict[str, Dict[str, Any]]) -> bool:
+class PreparationError(Exception):
+    """Этап подготовки задачи (установка анализатора, клонирование) завершился ошибкой."""
+
+
+async def prepare_task(
+    task_id: str,
+    analyzer_name: str,
+    repository_url: str,
+    campaign_id: Optional[str],
+    spans: SpanRecorder,
+    task_info: Dict[str, Any],
+) -> str:
+    """
+    Готовит задачу к замерам конвейером из параллельных этапов:
+    установка анализатора || клонирование -> (рабочая копия || индекс репозитория).
+    Ошибка обязательного этапа или отмена задачи отменяет остальные этапы.
+
+    Args:
+        task_id: ID задачи
+        analyzer_name: Имя пакета анализатора
+        repository_url: URL репозитория
+        campaign_id: ID кампании (клон репозитория и пакет анализатора общие для ее задач)
+        spans: Интервалы этапов задачи
+        task_info: Запись задачи в словаре активных задач (сюда сохраняется индекс репозитория)
+
+    Returns:
+        str: Путь к рабочей копии репозитория
+
+    Raises:
+        PreparationError: Не удалось установить анализатор или подготовить рабочую копию
+    """
+    registry = get_analyzer_registry()
+    profile = registry.get(analyzer_name)
+    durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        started = time.monotonic()
+        try:
+            with TASK_PHASE_DURATION.labels(name).time(), spans.span(name, **attributes) as span_attributes:
+                yield span_attributes
+        finally:
+            durations[name] = time.monotonic() - started
+
+    async def install() -> None:
+        # Стандартные анализаторы предустановлены
+        if registry.is_standard(analyzer_name):
+            return
+        logger.info(f"Установка пользовательского анализатора {analyzer_name}")
+        with stage("install", package=profile.package_name):
+            if campaign_id:
+                success, error = await prepare_campaign_analyzer(campaign_id, profile.package_name)
+            else:
+                success, error = await install_package(profile.package_name)
+        if not success:
+            raise PreparationError(f"Failed to install analyzer: {error}")
+
+    async def workspace(source_dir: str) -> str:
+        # Рабочий каталог задачи: копия общего клона кампании и каталог кешей анализаторов
+        with stage("workspace"):
+            repo_dir = source_dir
+            if campaign_id:
+                success, copied_dir, error = await prepare_workspace(source_dir, task_id)
+                if not success or not copied_dir:
+                    raise PreparationError(f"Failed to clone repository: {error}")
+                repo_dir = copied_dir
+            os.makedirs(task_cache_dir(task_id), exist_ok=True)
+        return repo_dir
+
+    async def index(source_dir: str) -> None:
+        # Индекс репозитория (файлы, строки, узлы AST) для нормировки метрик строится
+        # по клону одновременно с копированием; ошибка индекса не прерывает задачу
+        try:
+            with stage("repo_stats") as stats_span:
+                repo_stats = await get_repository_stats(source_dir)
+                stats_span["files"] = repo_stats["files"]
+            task_info["repo_stats"] = repo_stats
+        except Exception as e:
+            logger.warning(f"Не удалось построить индекс репозитория задачи {task_id}: {str(e)}")
+
+    async def repository() -> str:
+        logger.info(f"Клонирование репозитория {repository_url}")
+        with stage("clone", shared=bool(campaign_id)):
+            if campaign_id:
+                success, source_dir, error = await clone_shared_repository(repository_url, campaign_id)
+            else:
+                success, source_dir, error = await clone_repository(repository_url, task_id)
+        if not success or not source_dir:
+            raise PreparationError(f"Failed to clone repository: {error}")
+        repo_dir, _ = await run_stages(workspace(source_dir), index(source_dir))
+        return repo_dir
+
+    with TASK_PHASE_DURATION.labels("prepare").time(), spans.span("prepare") as prepare_span:
+        _, repo_dir = await run_stages(install(), repository())
+
+        # serial_s - сумма этапов (столько заняла бы последовательная подготовка),
+        # critical_path_s - самая длинная цепочка этапов, которую ждут замеры
+        chains = {
+            "install": durations.get("install", 0.0),
+            "repository": durations.get("clone", 0.0)
+            + max(durations.get("workspace", 0.0), durations.get("repo_stats", 0.0)),
+        }
+        critical = max(chains, key=lambda chain: chains[chain])
+        prepare_span.update(
+            serial_s=round(sum(durations.values()), 6),
+            critical_path_s=round(chains[critical], 6),
+            critical=critical,
+        )
+
+    logger.info(
+        f"Задача {task_id} подготовлена: этапы {prepare_span['serial_s']:.2f} с, "
+        f"критический путь ({critical}) {prepare_span['critical_path_s']:.2f} с"
+    )
+    return repo_dir
+
+
+async def run_stages(*stages: Awaitable[Any]) -> List[Any]:
+    """
+    Выполняет этапы параллельно и возвращает их результаты по порядку.
+    Ошибка одного этапа или отмена вызывающей задачи отменяет остальные;
+    управление возвращается только после завершения всех этапов.
+    """
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def report_results(
+    task_id: str,
+    mode: str,
+    status: str,
+    spans: SpanRecorder,
+    error: Optional[str] = None,
+    repo_stats: Optional[Dict[str, Any]] = None,
+) -> None:
     """
-    Отменяет выполнение задачи анализа.
+    Сообщает API сервису о результатах задачи: восстанавливает блоки замеров
+    анализаторов, экспортирует столбцовый файл в Arrow и отправляет статус
+    вместе с индексом репозитория.
+
+    Args:
+        task_id: ID задачи
+        mode: Режим сбора (standard, scaling или incremental)
+        status: Итоговый статус (completed или partial)
+        spans: Интервалы этапов задачи
+        error: Причина неполных результатов (для partial)
+        repo_stats: Индекс репозитория (None, если построить не удалось)
+    """
+    metrics_file_path = result_file_path(task_id, "csv")
+
+    # Блоки замеров каждого анализатора внутри этапа collect
+    if mode == "standard":
+        add_tool_spans(spans, metrics_file_path)
+
+    # Arrow-экспорт столбцового файла (если доступен pyarrow)
+    if mode == "standard" and os.path.exists(result_file_path(task_id, "npz")):
+        try:
+            loop = asyncio.get_event_loop()
+            with TASK_PHASE_DURATION.labels("export").time(), spans.span("export"):
+                await loop.run_in_executor(None, export_arrow, task_id)
+        except Exception as e:
+            logger.warning(f"Не удалось экспортировать результаты в Arrow: {str(e)}")
+
+    await api_client.update_task_status(
+        task_id=task_id,
+        status=status,
+        error=error,
+        metrics_file=metrics_file_path,
+        spans=spans.drain(),
+        repo_stats=repo_stats,
+    )
+
+
+async def stop_collector(proc: asyncio.subprocess.Process) -> None:
+    """
+    Останавливает сборщик метрик. По SIGTERM он завершает группы процессов
+    текущих замеров и записывает уже завершенные; если за stop_grace_period
+    сборщик не завершился, он останавливается принудительно.
+    """
+    if proc.returncode is not None:
+        return
+
+    try:
+        proc.terminate()
+    except ProcessLookupError:
+        return
+    try:
+        await asyncio.wait_for(proc.wait(), settings.stop_grace_period)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+
+
+def collector_alive(pid: int) -> bool:
+    """Проверяет, что PID принадлежит работающему Go-сборщику (а не зомби или чужому процессу)."""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmdline = f.read()
+    except OSError:
+        return False
+    return os.path.basename(settings.compiled_collector_path).encode() in cmdline
+
+
+async def stop_collector_pid(pid: int) -> None:
+    """
+    Останавливает сборщик, запущенный другим процессом runner сервиса
+    (другим воркером или до перезапуска), так же как stop_collector.
+    """
+    if not collector_alive(pid):
+        return
+
+    os.kill(pid, signal.SIGTERM)
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + settings.stop_grace_period
+    while collector_alive(pid):
+        if loop.time() > deadline:
+            os.kill(pid, signal.SIGKILL)
+            return
+        await asyncio.sleep(0.2)
+
+
+def scaling_worker_budget(max_workers: Optional[int] = None) -> int:
+    """
+    Определяет бюджет ядер для режима масштабирования.
+
+    Args:
+        max_workers: Запрошенный бюджет (None = все доступные ядра)
+
+    Returns:
+        int: Число воркеров, не превышающее доступные ядра и лимит из настроек
+    """
+    budget = os.cpu_count() or 1
+    if settings.max_scaling_workers > 0:
+        budget = min(budget, settings.max_scaling_workers)
+    if max_workers is not None and max_workers > 0:
+        budget = min(budget, max_workers)
+    return budget
+
+
+def task_cache_dir(task_id: str) -> str:
+    """Каталог изолированных кешей анализаторов задачи."""
+    return os.path.join(settings.cache_dir, task_id)
+
+
+def scaling_summary_path(task_id: str) -> str:
+    """Путь к JSON-сводке масштабирования задачи."""
+    return result_file_path(task_id, "scaling")
+
+
+def incremental_summary_path(task_id: str) -> str:
+    """Путь к JSON-сводке инкрементального режима задачи."""
+    return result_file_path(task_id, "incremental")
+
+
+async def cancel_task(task_id: str, active_tasks: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    """
+    Отменяет выполнение задачи анализа. Завершенные к моменту отмены замеры
+    сохраняются: задача получает статус partial, и ее результаты забирает
+    API сервис (он же затем запрашивает очистку). Сборщик может принадлежать
+    другому воркеру: тогда он останавливается по PID из состояния задачи.
+    Задача, которая еще готовится, отменяется вместе со всеми этапами подготовки.
 
     Args:
         task_id: ID задачи
         active_tasks: Словарь активных задач
 
     Returns:
-        bool: Успешность отмены
+        Optional[str]: Итоговый статус (cancelled или partial), None при неудаче
     """
-    if task_id not in active_tasks:
+    state = await task_state.get(task_id)
+    if state is None:
         logger.warning(f"Попытка отменить несуществующую задачу {task_id}")
-        return False
+        return None
 
-    task_info = active_tasks[task_id]
+    task_info = active_tasks.get(task_id, {})
     proc = task_info.get("process")
+    preparation = task_info.get("preparation")
 
-    if proc is None:
+    if proc is None and state.collector_pid is None and preparation is None:
         logger.warning(f"Процесс для задачи {task_id} не найден")
-        return False
+        return None
 
     # Отмечаем задачу как отмененную
     task_info["status"] = "cancelled"
+    await task_state.set_status(task_id, "cancelled")
 
-    # Останавливаем процесс
     try:
-        # Пытаемся сначала аккуратно остановить
-        proc.terminate()
-
-        # Ждем до 5 секунд для завершения
-        try:
-            await asyncio.wait_for(proc.wait(), 5)
-        except asyncio.TimeoutError:
-            # Если не завершился, убиваем принудительно
-            proc.kill()
-
-        # Уведомляем API сервис об отмене
-        await api_client.update_task_status(task_id=task_id, status="cancelled", error="Task cancelled by user request")
+        # Сборщик дописывает завершенные замеры и завершается
+        if proc is not None:
+            await stop_collector(proc)
+        elif state.collector_pid is not None:
+            await stop_collector_pid(state.collector_pid)
+        else:
+            # Задача еще готовится: установка, клонирование и индекс отменяются,
+            # очистка начинается после завершения всех этапов
+            assert preparation is not None
+            preparation.cancel()
+            await asyncio.wait({preparation})
 
         # Удаляем процесс из словаря
         task_info["process"] = None
 
+        # Уведомляем API сервис (вместе с интервалами уже пройденных этапов)
+        recorder: SpanRecorder = task_info.get("spans") or SpanRecorder()
+        rows = count_result_rows(task_id)
+        if rows > 0:
+            await report_results(
+                task_id,
+                state.params.get("mode", "standard"),
+                "partial",
+                recorder,
+                error=f"Task cancelled by user request; {rows} completed samples saved",
+                repo_stats=task_info.get("repo_stats"),
+            )
+            logger.info(f"Задача {task_id} отменена, сохранено {rows} замеров")
+            return "partial"
+
+        await api_client.update_task_status(
+            task_id=task_id,
+            status="cancelled",
+            error="Task cancelled by user request",
+            spans=recorder.drain(),
+        )
+
         # Запускаем очистку ресурсов
-        await cleanup_task(task_id, task_info.get("analyzer_name"))
+        await cleanup_task(task_id, state.params.get("analyzer_name"))
 
         logger.info(f"Задача {task_id} успешно отменена")
-        return True
+        return "cancelled"
     except Exception as e:
         logger.error(f"Ошибка при отмене задачи {task_id}: {str(e)}")
-        return False
+        return None
 
 
 async def cleanup_task(task_id: str, analyzer_name: Optional[str] = None) -> None:
@@ -242,25 +780,38 @@ async def cleanup_task(task_id: str, analyzer_name: Optional[str] = None) -> Non
         analyzer_name: Имя пакета анализатора (если известно)
     """
     logger.info(f"Очистка ресурсов для задачи {task_id}")
+    spans = SpanRecorder()
+    cleanup_started = datetime.now()
 
     try:
-        # Удаляем пакет анализатора, если имя предоставлено и это не стандартный анализатор
-        if analyzer_name and analyzer_name not in ["ruff", "mypy", "flake8"]:
-            await uninstall_package(analyzer_name)
+        # Удаляем пакет анализатора, если имя предоставлено и это не стандартный анализатор.
+        # Пакеты кампаний удаляются при освобождении кампании
+        registry = get_analyzer_registry()
+        if analyzer_name and not registry.is_standard(analyzer_name):
+            package_name = registry.get(analyzer_name).package_name
+            if not is_campaign_package(package_name):
+                await uninstall_package(package_name)
 
         # Удаляем репозиторий
         await remove_repository(task_id)
 
-        # Удаляем файл метрик
-        metrics_file = os.path.join(settings.metrics_dir, f"metrics_{task_id}.csv")
-        if os.path.exists(metrics_file):
-            os.remove(metrics_file)
-            logger.info(f"Файл метрик {metrics_file} удален")
+        # Удаляем изолированные кеши анализаторов
+        shutil.rmtree(task_cache_dir(task_id), ignore_errors=True)
+
+        # Удаляем файлы метрик во всех форматах (включая сводку масштабирования)
+        remove_result_files(task_id)
 
         # Уведомляем API сервис о завершении очистки
-        await api_client.update_task_status(task_id=task_id, status="cleaned")
+        spans.add("cleanup", cleanup_started, datetime.now())
+        await api_client.update_task_status(task_id=task_id, status="cleaned", spans=spans.drain())
         logger.info(f"Очистка ресурсов для задачи {task_id} завершена")
 
     except Exception as e:
         logger.error(f"Ошибка при очистке ресурсов для задачи {task_id}: {str(e)}")
-        await api_client.update_task_status(task_id=task_id, status="cleanup_failed", error=f"Cleanup failed: {str(e)}")
+        spans.add("cleanup", cleanup_started, datetime.now(), error=type(e).__name__)
+        await api_client.update_task_status(
+            task_id=task_id,
+            status="cleanup_failed",
+            error=f"Cleanup failed: {str(e)}",
+            spans=spans.drain(),
+        )
@@ -1,9 +1,9 @@
 import logging
-from typing import Optional
-
-import httpx
+import socket
+from typing import Any, Dict, List, Optional
 
 from config import get_settings
+from services.telemetry import STATUS_REPORTS, instrumented_client
 
 settings = get_settings()
 logger = logging.getLogger("runner.api_client")
@@ -15,6 +15,7 @@ class APIClient:
     def __init__(self):
         self.base_url = settings.api_service_url
         self.timeout = settings.api_request_timeout
+        self.runner_id = settings.runner_id or socket.gethostname()
 
     async def update_task_status(
         self,
@@ -22,6 +23,8 @@ class APIClient:
         status: str,
         error: Optional[str] = None,
         metrics_file: Optional[str] = None,
+        spans: Optional[List[Dict[str, Any]]] = None,
+        repo_stats: Optional[Dict[str, Any]] = None,
     ) -> bool:
         """
         Отправляет обновление статуса задачи в API сервис.
@@ -31,16 +34,25 @@ class APIClient:
             status: Новый статус задачи
             error: Сообщение об ошибке (если есть)
             metrics_file: Путь к файлу с метриками (если есть)
+            spans: Интервалы этапов задачи с момента прошлого обновления
+            repo_stats: Индекс репозитория (с итоговым статусом)
 
         Returns:
             bool: Успешность обновления
         """
         url = f"{self.base_url}/internal/tasks/{task_id}/status"
 
-        payload = {"status": status, "error": error, "metrics_file": metrics_file}
+        payload: Dict[str, Any] = {
+            "status": status,
+            "error": error,
+            "metrics_file": metrics_file,
+            "spans": spans or [],
+        }
+        if repo_stats is not None:
+            payload["repo_stats"] = repo_stats
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with instrumented_client("api", timeout=self.timeout) as client:
                 logger.info(f"Sending status update to {url}: {payload}")
                 response = await client.post(url, json=payload)
 
@@ -48,15 +60,114 @@ class APIClient:
                     logger.error(
                         f"Ошибка при обновлении статуса задачи {task_id}: {response.text}"
                     )
+                    STATUS_REPORTS.labels(status, "error").inc()
                     return False
 
+                STATUS_REPORTS.labels(status, "ok").inc()
                 return True
         except Exception as e:
             logger.error(
                 f"Исключение при обновлении статуса задачи {task_id}: {str(e)}"
             )
+            STATUS_REPORTS.labels(status, "error").inc()
+            return False
+
+    async def get_task_status(self, task_id: str) -> Optional[str]:
+        """
+        Запрашивает статус задачи в API сервисе (для сверки после перезапуска).
+
+        Args:
+            task_id: ID задачи
+
+        Returns:
+            Optional[str]: Статус задачи, "not_found", если API сервис ее не знает,
+            или None, если API сервис недоступен
+        """
+        url = f"{self.base_url}/tasks/{task_id}/status"
+
+        try:
+            async with instrumented_client("api", timeout=self.timeout) as client:
+                response = await client.get(url)
+                if response.status_code == 404:
+                    return "not_found"
+                response.raise_for_status()
+                return response.json().get("status")
+        except Exception as e:
+            logger.error(f"Исключение при запросе статуса задачи {task_id}: {str(e)}")
+            return None
+
+    async def lease_jobs(self, capacity: int) -> List[Dict[str, Any]]:
+        """
+        Забирает задачи из очереди API сервиса в аренду.
+
+        Args:
+            capacity: Число свободных слотов runner'а
+
+        Returns:
+            List[Dict[str, Any]]: Выданные задачи (пустой список, если очередь пуста
+            или API сервис недоступен)
+        """
+        url = f"{self.base_url}/internal/jobs/lease"
+
+        try:
+            async with instrumented_client("api", timeout=self.timeout) as client:
+                response = await client.post(
+                    url,
+                    json={
+                        "runner_id": self.runner_id,
+                        "capacity": capacity,
+                        "runner_url": settings.runner_url or None,
+                    },
+                )
+                response.raise_for_status()
+                return response.json()
+        except Exception as e:
+            logger.error(f"Исключение при получении задач из очереди: {str(e)}")
+            return []
+
+    async def heartbeat_jobs(self, task_ids: List[str]) -> bool:
+        """
+        Продлевает аренду задач, которые выполняет runner.
+
+        Args:
+            task_ids: ID выполняющихся задач
+
+        Returns:
+            bool: Успешность продления
+        """
+        url = f"{self.base_url}/internal/jobs/heartbeat"
+
+        try:
+            async with instrumented_client("api", timeout=self.timeout) as client:
+                response = await client.post(
+                    url, json={"runner_id": self.runner_id, "task_ids": task_ids}
+                )
+                return response.status_code == 200
+        except Exception as e:
+            logger.error(f"Исключение при продлении аренды задач: {str(e)}")
             return False
 
+    async def download_source(self, digest: str, path: str) -> None:
+        """
+        Скачивает загруженные исходники задачи в файл по частям
+        (архив не буферизуется в памяти целиком).
+
+        Args:
+            digest: sha256 исходников
+            path: Путь к файлу назначения
+
+        Raises:
+            httpx.HTTPError: API сервис недоступен или исходников нет
+        """
+        url = f"{self.base_url}/internal/sources/{digest}"
+
+        async with instrumented_client("api", timeout=settings.clone_timeout) as client:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                with open(path, "wb") as f:
+                    async for chunk in response.aiter_bytes():
+                        f.write(chunk)
+
 
 # Глобальный экземпляр клиента
 api_client = APIClient()
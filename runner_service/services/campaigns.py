@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Set, Tuple
+
+from services.github import remove_shared_repositories
+from services.package import install_package, uninstall_package
+from services.telemetry import CACHE_REQUESTS
+
+logger = logging.getLogger("runner.campaigns")
+
+# Пакеты анализаторов, установленные для кампаний: {campaign_id: {package}}
+_campaign_packages: Dict[str, Set[str]] = {}
+_install_locks: Dict[str, asyncio.Lock] = {}
+
+
+def is_campaign_package(package_name: str) -> bool:
+    """Проверяет, нужен ли пакет хотя бы одной незавершенной кампании."""
+    return any(package_name in packages for packages in _campaign_packages.values())
+
+
+async def prepare_campaign_analyzer(
+    campaign_id: str, package_name: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Устанавливает пакет анализатора для кампании один раз.
+    Последующие задачи кампании (и других кампаний) используют
+    уже установленный пакет до освобождения кампании.
+
+    Args:
+        campaign_id: ID кампании
+        package_name: Имя пакета анализатора
+
+    Returns:
+        Tuple[bool, Optional[str]]: как у install_package
+    """
+    # Установку ждут и другие задачи кампании: отмена одной задачи
+    # снимает только ее ожидание, установка завершается в фоне
+    return await asyncio.shield(_install_for_campaign(campaign_id, package_name))
+
+
+async def _install_for_campaign(campaign_id: str, package_name: str) -> Tuple[bool, Optional[str]]:
+    lock = _install_locks.setdefault(package_name, asyncio.Lock())
+    async with lock:
+        if is_campaign_package(package_name):
+            CACHE_REQUESTS.labels("campaign_package", "hit").inc()
+            _campaign_packages.setdefault(campaign_id, set()).add(package_name)
+            logger.info(f"Пакет {package_name} уже установлен для кампаний, пропускаем установку")
+            return True, None
+
+        CACHE_REQUESTS.labels("campaign_package", "miss").inc()
+        success, error = await install_package(package_name)
+        if success:
+            _campaign_packages.setdefault(campaign_id, set()).add(package_name)
+        return success, error
+
+
+async def release_campaign(campaign_id: str) -> None:
+    """
+    Освобождает общие ресурсы кампании: общие клоны репозиториев и пакеты
+    анализаторов, которые больше не нужны другим кампаниям.
+    """
+    packages = _campaign_packages.pop(campaign_id, set())
+    for package_name in packages:
+        async with _install_locks.setdefault(package_name, asyncio.Lock()):
+            if not is_campaign_package(package_name):
+                await uninstall_package(package_name)
+
+    remove_shared_repositories(campaign_id)
+    logger.info(f"Ресурсы кампании {campaign_id} освобождены")
@@ -1,16 +1,35 @@
 import asyncio
+import hashlib
 import logging
 import os
 import shutil
-from typing import Optional, Tuple
-
-import git
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
 
 from config import get_settings
+from services.api_client import api_client
+from services.sources import (
+    copy_tree,
+    file_digest,
+    is_local_url,
+    is_upload_url,
+    local_source_path,
+    remove_fingerprint,
+    source_kind,
+    unpack_archive,
+    upload_digest,
+    write_fingerprint,
+)
+from services.synthetic import generate_repository, is_synthetic_url
+from services.telemetry import CACHE_REQUESTS
 
 settings = get_settings()
 logger = logging.getLogger("runner.github")
 
+T = TypeVar("T")
+
+# Блокировки общих клонов: один репозиторий кампании клонируется один раз
+_shared_locks: Dict[str, asyncio.Lock] = {}
+
 
 async def clone_repository(
     repository_url: str, task_id: str
@@ -30,27 +49,234 @@ async def clone_repository(
     """
     # Создаем директорию для репозитория
     repo_dir = os.path.join(settings.repos_dir, task_id)
+    # Остатки предыдущей попытки (задача повторяется из очереди) удаляются
+    if os.path.exists(repo_dir):
+        shutil.rmtree(repo_dir, ignore_errors=True)
     os.makedirs(repo_dir, exist_ok=True)
 
     logger.info(f"Клонирование репозитория {repository_url} в {repo_dir}")
 
     try:
-        # Запускаем клонирование асинхронно через выполнение в отдельном потоке
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None, lambda: git.Repo.clone_from(repository_url, repo_dir, depth=1)
-        )
-
+        await fetch_repository(repository_url, repo_dir)
         logger.info(f"Репозиторий {repository_url} успешно клонирован в {repo_dir}")
         return True, repo_dir, None
 
+    except asyncio.CancelledError:
+        shutil.rmtree(repo_dir, ignore_errors=True)
+        remove_fingerprint(repo_dir)
+        raise
     except Exception as e:
         logger.error(f"Ошибка при клонировании репозитория {repository_url}: {str(e)}")
         # Очищаем директорию, если что-то пошло не так
         shutil.rmtree(repo_dir, ignore_errors=True)
+        remove_fingerprint(repo_dir)
+        return False, None, str(e)
+
+
+async def fetch_repository(repository_url: str, target_dir: str) -> None:
+    """
+    Получает исходный код по URL задачи в target_dir:
+
+    - http(s)://... - клонирует git-репозиторий
+    - synthetic://python?... - генерирует синтетический репозиторий
+    - file:///... - копирует каталог или распаковывает архив либо git bundle
+      из LOCAL_SOURCES_DIR runner'а, без сети
+    - upload://sha256/<digest> - скачивает загруженные в API сервис исходники
+
+    Для всех источников, кроме git-репозитория, рядом с каталогом сохраняется
+    отпечаток содержимого: по нему кэшируется индекс репозитория.
+    """
+    remove_fingerprint(target_dir)
+    if is_synthetic_url(repository_url):
+        fingerprint = f"synthetic:{await generate_repository(repository_url, target_dir)}"
+    elif is_local_url(repository_url):
+        fingerprint = await _fetch_local(repository_url, target_dir)
+    elif is_upload_url(repository_url):
+        fingerprint = await _fetch_upload(repository_url, target_dir)
+    else:
+        await git_clone(repository_url, target_dir)
+        return
+    write_fingerprint(target_dir, fingerprint)
+
+
+async def _fetch_local(repository_url: str, target_dir: str) -> str:
+    path = local_source_path(repository_url)
+    if os.path.isdir(path):
+        return await _run_blocking(copy_tree, path, target_dir)
+    await _unpack(path, target_dir)
+    return f"sha256:{await _run_blocking(file_digest, path)}"
+
+
+async def _fetch_upload(repository_url: str, target_dir: str) -> str:
+    digest = upload_digest(repository_url)
+    # Архив скачивается рядом с каталогом задачи и удаляется после распаковки
+    download_path = f"{os.path.normpath(target_dir)}.download"
+    try:
+        await api_client.download_source(digest, download_path)
+        if await _run_blocking(file_digest, download_path) != digest:
+            raise RuntimeError(f"Downloaded source does not match sha256 {digest}")
+        await _unpack(download_path, target_dir)
+    finally:
+        if os.path.exists(download_path):
+            os.remove(download_path)
+    return f"sha256:{digest}"
+
+
+async def _unpack(path: str, target_dir: str) -> None:
+    """Распаковывает архив tar/zip или клонирует git bundle в target_dir."""
+    kind = await _run_blocking(source_kind, path)
+    if kind == "bundle":
+        await git_clone(path, target_dir)
+    else:
+        await _run_blocking(unpack_archive, path, kind, target_dir)
+
+
+async def _run_blocking(func: Callable[..., T], *args: Any) -> T:
+    """
+    Выполняет файловую операцию в пуле потоков. Поток не прерывается:
+    при отмене задачи управление возвращается после его завершения,
+    чтобы вызывающий удалил каталог, в который уже никто не пишет.
+    """
+    future = asyncio.get_event_loop().run_in_executor(None, func, *args)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait({future})
+        raise
+
+
+async def git_clone(repository_url: str, target_dir: str) -> None:
+    """
+    Неглубокое клонирование отдельным процессом git: при отмене задачи
+    процесс завершается, а не продолжает писать в каталог в фоне.
+
+    Raises:
+        RuntimeError: git завершился с ошибкой
+    """
+    proc = await asyncio.create_subprocess_exec(
+        "git",
+        "clone",
+        "--depth",
+        "1",
+        "--quiet",
+        "--",
+        repository_url,
+        target_dir,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        # Закрытый или несуществующий репозиторий - ошибка, а не ожидание ввода пароля
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+    )
+    try:
+        _, stderr = await proc.communicate()
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+
+    if proc.returncode != 0:
+        raise RuntimeError(stderr.decode().strip() or f"git clone exited with code {proc.returncode}")
+
+
+def shared_repository_dir(repository_url: str, group_id: str) -> str:
+    """Каталог общего клона репозитория для группы задач (кампании)."""
+    url_hash = hashlib.sha1(repository_url.encode()).hexdigest()[:16]
+    return os.path.join(settings.repos_dir, "_shared", group_id, url_hash)
+
+
+async def clone_shared_repository(
+    repository_url: str, group_id: str
+) -> Tuple[bool, Optional[str], Optional[str]]:
+    """
+    Клонирует репозиторий в общий каталог группы задач (кампании).
+    Сеть используется только при первом обращении, повторные вызовы
+    возвращают уже готовый клон.
+
+    Args:
+        repository_url: URL репозитория GitHub
+        group_id: ID группы задач (кампании)
+
+    Returns:
+        Tuple[bool, Optional[str], Optional[str]]:
+            - Успешность операции
+            - Путь к общему клону (если успешно)
+            - Сообщение об ошибке (если неуспешно)
+    """
+    shared_dir = shared_repository_dir(repository_url, group_id)
+    # Общий клон ждут и другие задачи кампании: отмена одной задачи
+    # снимает только ее ожидание, клонирование завершается в фоне
+    return await asyncio.shield(_clone_shared(repository_url, shared_dir, group_id))
+
+
+async def _clone_shared(
+    repository_url: str, shared_dir: str, group_id: str
+) -> Tuple[bool, Optional[str], Optional[str]]:
+    lock = _shared_locks.setdefault(shared_dir, asyncio.Lock())
+
+    async with lock:
+        if os.path.exists(shared_dir):
+            CACHE_REQUESTS.labels("shared_repository", "hit").inc()
+            return True, shared_dir, None
+
+        CACHE_REQUESTS.labels("shared_repository", "miss").inc()
+        logger.info(f"Общий клон {repository_url} для группы {group_id}")
+        os.makedirs(shared_dir)
+        try:
+            await fetch_repository(repository_url, shared_dir)
+            return True, shared_dir, None
+        except Exception as e:
+            logger.error(f"Ошибка при клонировании репозитория {repository_url}: {str(e)}")
+            shutil.rmtree(shared_dir, ignore_errors=True)
+            remove_fingerprint(shared_dir)
+            return False, None, str(e)
+
+
+async def prepare_workspace(
+    source_dir: str, task_id: str
+) -> Tuple[bool, Optional[str], Optional[str]]:
+    """
+    Копирует общий клон в рабочий каталог задачи (копия, а не ссылки:
+    шаблон команды может включать исправляющие флаги, и общий клон
+    должен остаться нетронутым).
+
+    Args:
+        source_dir: Путь к общему клону
+        task_id: ID задачи
+
+    Returns:
+        Tuple[bool, Optional[str], Optional[str]]: как у clone_repository
+    """
+    repo_dir = os.path.join(settings.repos_dir, task_id)
+    loop = asyncio.get_event_loop()
+    copy = loop.run_in_executor(
+        None,
+        lambda: shutil.copytree(source_dir, repo_dir, symlinks=True, dirs_exist_ok=True),
+    )
+    try:
+        await asyncio.shield(copy)
+        logger.info(f"Рабочая копия {source_dir} подготовлена в {repo_dir}")
+        return True, repo_dir, None
+    except asyncio.CancelledError:
+        # Поток копирования не прерывается: копия удаляется после его завершения
+        await asyncio.wait({copy})
+        shutil.rmtree(repo_dir, ignore_errors=True)
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при подготовке рабочей копии {repo_dir}: {str(e)}")
+        shutil.rmtree(repo_dir, ignore_errors=True)
         return False, None, str(e)
 
 
+def remove_shared_repositories(group_id: str) -> None:
+    """Удаляет общие клоны группы задач."""
+    group_dir = os.path.join(settings.repos_dir, "_shared", group_id)
+    for shared_dir in [d for d in _shared_locks if d.startswith(group_dir + os.sep)]:
+        del _shared_locks[shared_dir]
+    shutil.rmtree(group_dir, ignore_errors=True)
+    logger.info(f"Общие клоны группы {group_id} удалены")
+
+
 async def remove_repository(task_id: str) -> bool:
     """
     Удаляет директорию с клонированным репозиторием.
@@ -70,6 +296,7 @@ async def remove_repository(task_id: str) -> bool:
     try:
         # Удаляем директорию
         shutil.rmtree(repo_dir, ignore_errors=True)
+        remove_fingerprint(repo_dir)
         logger.info(f"Директория репозитория {repo_dir} успешно удалена")
         return True
     except Exception as e:
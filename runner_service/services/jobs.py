@@ -0,0 +1,42 @@
+import asyncio
+import logging
+from typing import Any, Dict
+
+from config import get_settings
+from services.analyzer import accept_task
+from services.api_client import api_client
+from services.state import task_state
+
+settings = get_settings()
+logger = logging.getLogger("runner.jobs")
+
+
+async def pull_jobs(active_tasks: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Фоновый цикл процесса runner сервиса: забирает задачи из очереди API
+    сервиса, пока есть свободные слоты (MAX_CONCURRENT_TASKS на весь runner).
+    Аренда задач продлевается циклом keep_task_state; если runner пропадет,
+    API сервис вернет задачу в очередь по истечении аренды.
+    """
+    while True:
+        try:
+            # Состояние задач общее для воркеров: слоты резервируются в нем
+            # атомарно, чтобы воркеры не арендовали задачи на одни и те же слоты
+            reservation = await task_state.reserve(
+                settings.max_concurrent_tasks, ttl=settings.api_request_timeout + settings.job_poll_interval
+            )
+            if reservation:
+                try:
+                    for job in await api_client.lease_jobs(reservation.slots):
+                        params = {k: v for k, v in job["task"].items() if k != "task_id"}
+                        try:
+                            if not await accept_task(job["task_id"], params, active_tasks):
+                                logger.info(f"Задача {job['task_id']} уже выполняется")
+                        except Exception as e:
+                            # Аренда не продлевается, задача вернется в очередь
+                            logger.error(f"Не удалось принять задачу {job['task_id']}: {str(e)}")
+                finally:
+                    await task_state.release(reservation)
+        except Exception as e:
+            logger.error(f"Ошибка при получении задач из очереди: {str(e)}")
+        await asyncio.sleep(settings.job_poll_interval)
@@ -4,6 +4,7 @@ import sys
 from typing import Optional, Tuple
 
 from config import get_settings
+from services.profiles import get_analyzer_registry
 
 settings = get_settings()
 logger = logging.getLogger("runner.package")
@@ -23,8 +24,7 @@ async def install_package(package_name: str) -> Tuple[bool, Optional[str]]:
             - Сообщение об ошибке (если неуспешно)
     """
     # Пропускаем установку для стандартных анализаторов
-    standard_analyzers = ["ruff", "mypy", "flake8"]
-    if package_name in standard_analyzers:
+    if get_analyzer_registry().is_standard(package_name):
         logger.info(f"Пакет {package_name} уже предустановлен, пропускаем установку")
         return True, None
 
@@ -42,7 +42,14 @@ async def install_package(package_name: str) -> Tuple[bool, Optional[str]]:
             stderr=asyncio.subprocess.PIPE,
         )
 
-        stdout, stderr = await proc.communicate()
+        try:
+            stdout, stderr = await proc.communicate()
+        except asyncio.CancelledError:
+            # Задача отменена во время подготовки: pip не продолжает установку в фоне
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
 
         if proc.returncode != 0:
             error_msg = stderr.decode() if stderr else "Unknown error during package installation"
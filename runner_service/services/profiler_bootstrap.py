@@ -0,0 +1,274 @@
+"""
+Запуск Python-анализатора под профилировщиком. Скрипт выполняется
+интерпретатором анализатора отдельным процессом и использует только
+стандартную библиотеку:
+
+    python3 profiler_bootstrap.py --profiler sampling --output profile.json -- /usr/local/bin/flake8 /repo
+
+Результат - JSON со статистикой функций (собственное и накопленное время)
+и свернутыми стеками (collapsed stacks) для flamegraph, веса стеков в
+микросекундах.
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Кадры запуска (этот скрипт и runpy) в стеки и статистику не попадают
+_SKIP_FILES = {os.path.abspath(__file__), os.path.abspath(runpy.__file__), "<frozen runpy>"}
+
+# Ветви графа вызовов cProfile легче этой доли общего времени не разворачиваются в стеки
+_MIN_STACK_SHARE = 0.0005
+_MAX_STACK_DEPTH = 128
+
+
+class Labels:
+    """Имена функций вида module:function с путями относительно sys.path и strip"""
+
+    def __init__(self, strip: List[str]):
+        roots = [os.path.abspath(p) for p in sys.path + strip if p]
+        # Сначала самые длинные корни: site-packages точнее, чем его родительский каталог
+        self.roots = sorted(set(roots), key=len, reverse=True)
+        self.cache: Dict[Tuple[str, str], str] = {}
+
+    def module(self, filename: str) -> str:
+        # Замороженные и сгенерированные модули: <frozen importlib._bootstrap>, <string>
+        if filename.startswith("<"):
+            return filename.strip("<>")
+        path = os.path.abspath(filename)
+        for root in self.roots:
+            if path.startswith(root + os.sep):
+                relative = os.path.splitext(path[len(root) + 1 :])[0]
+                parts = relative.split(os.sep)
+                if parts[-1] == "__init__":
+                    parts.pop()
+                return ".".join(parts) or relative
+        return os.path.basename(filename)
+
+    def code(self, code: Any) -> str:
+        key = (code.co_filename, getattr(code, "co_qualname", code.co_name))
+        label = self.cache.get(key)
+        if label is None:
+            label = f"{self.module(key[0])}:{key[1]}"
+            self.cache[key] = label
+        return label
+
+    def pstats_key(self, key: Tuple[str, int, str]) -> str:
+        filename, _, name = key
+        # Встроенные функции: ('~', 0, "<built-in method builtins.exec>")
+        if filename == "~":
+            return name.strip("<>")
+        return f"{self.module(filename)}:{name}"
+
+
+def run_target(target: List[str], module: bool) -> int:
+    """Выполняет анализатор в текущем процессе и возвращает его код завершения."""
+    sys.argv = list(target)
+    try:
+        if module:
+            runpy.run_module(target[0], run_name="__main__", alter_sys=True)
+        else:
+            sys.path.insert(0, os.path.dirname(os.path.abspath(target[0])))
+            runpy.run_path(target[0], run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def profile_sampling(
+    target: List[str], module: bool, labels: Labels, interval: float
+) -> Tuple[int, float, Counter, int]:
+    """
+    Встроенный сэмплирующий профилировщик: отдельный поток с заданным
+    интервалом снимает стек главного потока. Анализатор не инструментируется,
+    поэтому накладные расходы не зависят от числа вызовов.
+    """
+    main_id = threading.get_ident()
+    stacks: Counter = Counter()
+    stop = threading.Event()
+
+    def sample() -> None:
+        while not stop.wait(interval):
+            frame = sys._current_frames().get(main_id)
+            stack = []
+            while frame is not None:
+                if frame.f_code.co_filename not in _SKIP_FILES:
+                    stack.append(labels.code(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                stacks[";".join(reversed(stack))] += 1
+
+    sampler = threading.Thread(target=sample, name="profiler-sampler", daemon=True)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        exit_code = run_target(target, module)
+    finally:
+        stop.set()
+        sampler.join()
+    wall = time.perf_counter() - started
+
+    # Вес отсчета - фактическое время между отсчетами, а не номинальный интервал
+    samples = sum(stacks.values())
+    weight_us = wall * 1e6 / samples if samples else 0.0
+    return exit_code, wall, Counter({s: round(c * weight_us) for s, c in stacks.items()}), samples
+
+
+def sampling_functions(stacks: Counter) -> List[Dict[str, Any]]:
+    """Собственное и накопленное время функций по весам стеков."""
+    self_us: Counter = Counter()
+    cumulative_us: Counter = Counter()
+    for stack, value in stacks.items():
+        frames = stack.split(";")
+        self_us[frames[-1]] += value
+        # Рекурсивная функция учитывается в стеке один раз
+        for frame in set(frames):
+            cumulative_us[frame] += value
+    return [
+        {
+            "function": function,
+            "calls": None,
+            "self_s": self_us[function] / 1e6,
+            "cumulative_s": cumulative_us[function] / 1e6,
+        }
+        for function in cumulative_us
+    ]
+
+
+def profile_cprofile(target: List[str], module: bool) -> Tuple[int, float, Dict[Any, Any]]:
+    """Детерминированный профиль cProfile: точные числа вызовов и время функций."""
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        exit_code = run_target(target, module)
+    finally:
+        profiler.disable()
+    wall = time.perf_counter() - started
+    return exit_code, wall, pstats.Stats(profiler).stats  # type: ignore[attr-defined]
+
+
+def _launcher(key: Tuple[str, int, str]) -> bool:
+    return key[0] in _SKIP_FILES
+
+
+def cprofile_functions(stats: Dict[Any, Any], labels: Labels) -> List[Dict[str, Any]]:
+    functions: Dict[str, Dict[str, Any]] = {}
+    for key, (_, calls, self_s, cumulative_s, _) in stats.items():
+        if _launcher(key):
+            continue
+        label = labels.pstats_key(key)
+        # Одноименные функции одного модуля (например, lambda) объединяются
+        entry = functions.setdefault(label, {"function": label, "calls": 0, "self_s": 0.0, "cumulative_s": 0.0})
+        entry["calls"] += calls
+        entry["self_s"] += self_s
+        entry["cumulative_s"] += cumulative_s
+    return list(functions.values())
+
+
+def cprofile_stacks(stats: Dict[Any, Any], labels: Labels) -> Counter:
+    """
+    Восстанавливает стеки из графа вызовов cProfile: время вызываемой функции
+    распределяется по вызывающим пропорционально накопленному времени ребер.
+    Это приближение - cProfile хранит только пары (вызывающий, вызываемый),
+    а при рекурсии ребра учитывают вложенное время повторно, поэтому веса
+    стеков масштабируются к точной сумме собственного времени функций.
+    """
+    children: Dict[Any, Dict[Any, float]] = defaultdict(dict)
+    for key, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            children[caller][key] = edge[3]
+    roots = [key for key, value in stats.items() if not value[4]]
+    total = sum(stats[key][3] for key in roots) or 1.0
+    threshold = total * _MIN_STACK_SHARE
+
+    stacks: Counter = Counter()
+
+    def walk(key: Any, path: List[Any], share: float) -> None:
+        _, _, self_s, cumulative_s, _ = stats[key]
+        frames = [labels.pstats_key(k) for k in path if not _launcher(k)]
+        own = self_s * share
+        if own > 0 and frames:
+            stacks[";".join(frames)] += own * 1e6
+        if len(path) >= _MAX_STACK_DEPTH or cumulative_s <= 0:
+            return
+        for child, edge_s in children.get(key, {}).items():
+            # Рекурсия: время вложенного вызова уже входит в накопленное время
+            if child in path or child not in stats:
+                continue
+            child_cumulative = stats[child][3]
+            attributed = edge_s * share
+            if attributed < threshold or child_cumulative <= 0:
+                continue
+            walk(child, path + [child], min(attributed / child_cumulative, 1.0))
+
+    for root in roots:
+        if stats[root][3] >= threshold:
+            walk(root, [root], 1.0)
+
+    own_us = sum(value[2] for key, value in stats.items() if not _launcher(key)) * 1e6
+    scale = own_us / sum(stacks.values()) if stacks else 0.0
+    scaled = Counter({stack: round(value * scale) for stack, value in stacks.items()})
+    return Counter({stack: value for stack, value in scaled.items() if value > 0})
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiler", choices=["cprofile", "sampling"], default="sampling")
+    parser.add_argument("--interval-ms", type=float, default=5.0)
+    parser.add_argument("--top", type=int, default=200, help="Функций в статистике")
+    parser.add_argument("--max-stacks", type=int, default=20000, help="Самых тяжелых стеков в результате")
+    parser.add_argument("--strip", action="append", default=[], help="Каталог, убираемый из путей модулей")
+    parser.add_argument("--module", action="store_true", help="Цель - модуль (python -m), а не скрипт")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("target", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    target = args.target[1:] if args.target[:1] == ["--"] else args.target
+    if not target:
+        parser.error("не задана команда анализатора")
+
+    labels = Labels(args.strip)
+    samples = None
+    if args.profiler == "sampling":
+        exit_code, wall, stacks, samples = profile_sampling(target, args.module, labels, args.interval_ms / 1000)
+        functions = sampling_functions(stacks)
+    else:
+        exit_code, wall, stats = profile_cprofile(target, args.module)
+        functions = cprofile_functions(stats, labels)
+        stacks = cprofile_stacks(stats, labels)
+
+    functions.sort(key=lambda f: f["cumulative_s"], reverse=True)
+    result = {
+        "profiler": args.profiler,
+        "command": target,
+        "exit_code": exit_code,
+        "wall_time_s": wall,
+        "samples": samples,
+        "interval_ms": args.interval_ms if args.profiler == "sampling" else None,
+        "functions": functions[: args.top],
+        "stacks": [{"stack": stack, "value": value} for stack, value in stacks.most_common(args.max_stacks)],
+    }
+    tmp_path = args.output + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(result, f)
+    os.replace(tmp_path, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
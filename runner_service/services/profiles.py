@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger("runner.profiles")
+
+
+class AnalyzerProfile(BaseModel):
+    """Профиль анализатора из реестра (формат общий с Go-сборщиком метрик)"""
+
+    name: str
+    package: Optional[str] = None  # Имя pip-пакета (по умолчанию совпадает с name)
+    command: List[str]
+    target_arg: int = 1
+    weight: int = 1
+    standard: bool = False  # Входит в базовый набор сравнения и предустановлен
+
+    # Изоляция кеша
+    cache_dir: Optional[str] = None
+    cache_flag: Optional[str] = None
+    cache_env: Optional[str] = None
+
+    # Управление параллелизмом
+    parallel_flag: Optional[str] = None
+    thread_env: List[str] = []
+
+    # Инкрементальная проверка и демон-режим
+    daemon: Optional[List[str]] = None  # Команда клиента демона ({dir} - каталог состояния)
+    daemon_stop: Optional[List[str]] = None  # Остановка демона
+    incremental: bool = False
+
+    # Разбор диагностик из вывода: формат (lines или json), ключ массива
+    # замечаний в JSON, аргументы формата вывода и допустимые биты кода возврата
+    findings: Optional[str] = None
+    findings_path: Optional[str] = None
+    findings_args: List[str] = []
+    ok_exit_mask: int = 0
+
+    @property
+    def package_name(self) -> str:
+        return self.package or self.name
+
+
+class NotPythonAnalyzerError(Exception):
+    """Команда анализатора не найдена или не выполняется интерпретатором Python"""
+
+
+def analyzer_command(
+    profile: AnalyzerProfile, target: str, cache_root: Optional[str] = None, workers: int = 0
+) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Команда запуска анализатора и ее окружение, как у итераций Go-сборщика
+    (toolCommand и toolExtras): цель на месте target_arg, аргументы формата
+    диагностик, изолированный каталог кеша и явное число воркеров, если workers > 0.
+
+    Args:
+        profile: Профиль анализатора
+        target: Проверяемый каталог
+        cache_root: Корень каталогов кеша (None = кеш анализатора не изолируется)
+        workers: Число воркеров анализатора (0 = по умолчанию)
+
+    Returns:
+        Tuple[List[str], Dict[str, str]]: Команда и окружение процесса
+    """
+    command = list(profile.command)
+    while len(command) <= profile.target_arg:
+        command.append("")
+    command[profile.target_arg] = target
+    command = [arg for arg in command if arg] + list(profile.findings_args)
+
+    env = dict(os.environ)
+    if cache_root and (profile.cache_flag or profile.cache_env):
+        cache_dir = os.path.join(cache_root, profile.cache_dir or profile.name)
+        os.makedirs(cache_dir, exist_ok=True)
+        if profile.cache_flag:
+            command.extend(profile.cache_flag.replace("{dir}", cache_dir).split())
+        if profile.cache_env:
+            env[profile.cache_env] = cache_dir
+    if workers > 0:
+        if profile.parallel_flag:
+            command.extend(profile.parallel_flag.replace("{n}", str(workers)).split())
+        for name in profile.thread_env:
+            env[name] = str(workers)
+    return command, env
+
+
+def python_entry_point(command: List[str]) -> Tuple[List[str], List[str], bool]:
+    """
+    Определяет интерпретатор и точку входа Python-анализатора: консольный
+    скрипт с shebang python (flake8, pylint, mypy) или python -m <модуль>.
+
+    Returns:
+        Tuple[List[str], List[str], bool]: Команда интерпретатора, цель
+        (скрипт или модуль с аргументами) и признак запуска модуля
+
+    Raises:
+        NotPythonAnalyzerError: Команда не найдена или не является Python-скриптом
+    """
+    executable = shutil.which(command[0])
+    if executable is None:
+        raise NotPythonAnalyzerError(f"{command[0]} not found")
+
+    if os.path.basename(executable).startswith("python"):
+        if len(command) < 3 or command[1] != "-m":
+            raise NotPythonAnalyzerError("Only 'python -m <module>' commands are supported")
+        return [executable], command[2:], True
+
+    with open(executable, "rb") as f:
+        shebang = f.readline(256)
+    # Нативные анализаторы (ruff) и анализаторы на Node.js (pyright)
+    if not shebang.startswith(b"#!") or b"python" not in shebang:
+        raise NotPythonAnalyzerError(f"{command[0]} is not a Python script")
+    return shebang[2:].decode().split(), [executable, *command[1:]], False
+
+
+class AnalyzerRegistry:
+    """Реестр профилей анализаторов"""
+
+    def __init__(self, profiles: List[AnalyzerProfile]):
+        self._profiles: Dict[str, AnalyzerProfile] = {p.name: p for p in profiles}
+
+    @property
+    def standard(self) -> List[AnalyzerProfile]:
+        """Стандартные анализаторы в порядке объявления в реестре."""
+        return [p for p in self._profiles.values() if p.standard]
+
+    def get(self, name: str) -> AnalyzerProfile:
+        """
+        Возвращает профиль анализатора по имени.
+        Для неизвестного анализатора - профиль по умолчанию (путь - первый аргумент).
+        """
+        profile = self._profiles.get(name)
+        if profile is None:
+            return AnalyzerProfile(name=name, command=[name])
+        return profile
+
+    def is_standard(self, name: str) -> bool:
+        """Проверяет, является ли анализатор (или pip-пакет) стандартным."""
+        return any(name in (p.name, p.package_name) for p in self.standard)
+
+
+def load_registry(path: str) -> AnalyzerRegistry:
+    """
+    Загружает реестр профилей анализаторов из JSON-файла.
+
+    Args:
+        path: Путь к файлу реестра
+
+    Returns:
+        AnalyzerRegistry: Загруженный реестр
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+    profiles = [AnalyzerProfile(**item) for item in data.get("analyzers", [])]
+    logger.info(f"Загружено {len(profiles)} профилей анализаторов из {path}")
+    return AnalyzerRegistry(profiles)
+
+
+# Синглтон реестра
+_registry: Optional[AnalyzerRegistry] = None
+
+
+def get_analyzer_registry() -> AnalyzerRegistry:
+    """
+    Возвращает реестр профилей анализаторов, загружая его при первом обращении.
+    """
+    global _registry
+    if _registry is None:
+        _registry = load_registry(settings.analyzer_profiles_path)
+    return _registry
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+import signal
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import get_settings
+from services.profiles import (
+    AnalyzerProfile,
+    NotPythonAnalyzerError,
+    analyzer_command,
+    get_analyzer_registry,
+    python_entry_point,
+)
+from services.results import result_file_path
+from services.spans import SpanRecorder
+from services.telemetry import TASK_PHASE_DURATION
+
+settings = get_settings()
+logger = logging.getLogger("runner.profiling")
+
+# Скрипт запуска под профилировщиком выполняется интерпретатором анализатора
+BOOTSTRAP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiler_bootstrap.py")
+
+
+def profiling_command(
+    profile: AnalyzerProfile, repo_dir: str, profiler: str, output: str, cache_dir: str
+) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Команда прогона анализатора под профилировщиком и ее окружение.
+    Анализатор запускается одним процессом (профилируется только он) и с
+    собственным пустым кешем, как холодная итерация замеров.
+
+    Raises:
+        NotPythonAnalyzerError: Анализатор нельзя профилировать
+    """
+    command, env = analyzer_command(profile, repo_dir, cache_dir, workers=1)
+    interpreter, target, module = python_entry_point(command)
+    cmd = [
+        *interpreter,
+        BOOTSTRAP_PATH,
+        "--profiler",
+        profiler,
+        "--interval-ms",
+        str(settings.profile_interval_ms),
+        "--top",
+        str(settings.profile_top_functions),
+        "--max-stacks",
+        str(settings.profile_max_stacks),
+        "--strip",
+        repo_dir,
+        "--output",
+        output,
+    ]
+    if module:
+        cmd.append("--module")
+    return [*cmd, "--", *target], env
+
+
+async def run_profiling(
+    task_id: str,
+    analyzer_name: str,
+    repo_dir: str,
+    profiler: str,
+    cache_dir: str,
+    spans: SpanRecorder,
+    task_info: Dict[str, Any],
+) -> Optional[str]:
+    """
+    Отдельный прогон анализатора задачи под профилировщиком после замеров:
+    профилировщик замедляет анализатор, поэтому в измеряемые итерации он не
+    попадает. Ошибка профилирования не влияет на результат задачи.
+
+    Args:
+        task_id: ID задачи
+        analyzer_name: Имя анализатора задачи
+        repo_dir: Рабочая копия репозитория
+        profiler: cprofile (точные числа вызовов) или sampling (низкие накладные расходы)
+        cache_dir: Каталог кешей задачи
+        spans: Интервалы этапов задачи
+        task_info: Запись задачи в словаре активных задач (процесс доступен отмене)
+
+    Returns:
+        Optional[str]: Путь к профилю (None, если профилирование не удалось)
+    """
+    output = result_file_path(task_id, "profile")
+    profile = get_analyzer_registry().get(analyzer_name)
+    try:
+        cmd, env = profiling_command(profile, repo_dir, profiler, output, os.path.join(cache_dir, "profile"))
+    except (NotPythonAnalyzerError, OSError) as e:
+        logger.warning(f"Профилирование {analyzer_name} пропущено: {str(e)}")
+        return None
+
+    logger.info(f"Профилирование {analyzer_name} ({profiler}): {' '.join(cmd)}")
+    with TASK_PHASE_DURATION.labels("profile").time(), spans.span("profile", profiler=profiler) as span:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                cwd=repo_dir,
+                env=env,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+        except OSError as e:
+            # Например, интерпретатор из shebang анализатора не найден
+            span["error"] = str(e)
+            logger.warning(f"Профилирование задачи {task_id} не запущено: {str(e)}")
+            return None
+        task_info["process"] = proc
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), settings.profile_timeout)
+        except asyncio.TimeoutError:
+            # Анализатор мог запустить дочерние процессы: завершается вся группа
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except OSError:
+                pass  # Группа уже завершилась
+            await proc.wait()
+            span["error"] = "timeout"
+            logger.warning(f"Профилирование задачи {task_id} остановлено по таймауту {settings.profile_timeout} с")
+            return None
+        finally:
+            task_info["process"] = None
+
+        if proc.returncode != 0 or not os.path.exists(output):
+            span["error"] = f"exit code {proc.returncode}"
+            tail = stderr.decode("utf-8", errors="replace")[-2000:] if stderr else ""
+            logger.warning(f"Профилирование задачи {task_id} завершилось с кодом {proc.returncode}: {tail}")
+            return None
+
+    logger.info(f"Профиль задачи {task_id} сохранен в {output}")
+    return output
+
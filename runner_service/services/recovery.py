@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+from config import get_settings
+from services.analyzer import (
+    cleanup_task,
+    register_task,
+    report_results,
+    run_in_background,
+    stop_collector_pid,
+)
+from services.api_client import api_client
+from services.github import remove_repository
+from services.results import count_result_rows
+from services.spans import SpanRecorder
+from services.state import INSTANCE_ID, TaskState, task_state
+from services.telemetry import ACTIVE_TASKS
+
+settings = get_settings()
+logger = logging.getLogger("runner.recovery")
+
+# Статусы API сервиса, при которых результаты задачи еще забираются и не удаляются
+RESULT_STATUSES = ("completed", "partial", "data_already_retrieved")
+
+
+async def keep_task_state(active_tasks: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Фоновый цикл процесса runner сервиса: подтверждает выполнение своих задач
+    и подхватывает задачи процессов, переставших это делать (перезапуск,
+    деплой, падение воркера).
+    """
+    while True:
+        # Значение записывается воркером (а не вычисляется при опросе /metrics),
+        # чтобы в режиме нескольких воркеров его видел MultiProcessCollector
+        ACTIVE_TASKS.set(len(active_tasks))
+        try:
+            await task_state.heartbeat()
+            # Аренда задач в очереди API сервиса продлевается, пока они выполняются
+            own = [state.task_id for state in await task_state.list() if state.owner == INSTANCE_ID]
+            if own:
+                await api_client.heartbeat_jobs(own)
+            await recover_tasks(active_tasks)
+        except Exception as e:
+            logger.error(f"Ошибка при восстановлении задач: {str(e)}")
+        await asyncio.sleep(settings.state_heartbeat_interval)
+
+
+async def recover_tasks(active_tasks: Dict[str, Dict[str, Any]]) -> None:
+    """Подхватывает брошенные задачи и сверяет их со статусом в API сервисе."""
+    now = time.time()
+    for state in await task_state.list():
+        if state.owner == INSTANCE_ID:
+            # Задача уже подхвачена, но API сервис был недоступен для сверки
+            if state.task_id not in active_tasks:
+                await reconcile_task(state, active_tasks)
+            continue
+
+        if now - state.heartbeat_at < settings.task_stale_after:
+            continue
+
+        if not await task_state.claim(state):
+            continue  # Задачу забрал другой воркер
+
+        logger.warning(f"Задача {state.task_id} осталась без процесса {state.owner}, восстанавливаем")
+        # Сборщик мог пережить свой воркер: он дописывает контрольную точку и завершается
+        if state.collector_pid:
+            await stop_collector_pid(state.collector_pid)
+        await reconcile_task(state, active_tasks)
+
+
+async def reconcile_task(state: TaskState, active_tasks: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Сверяет брошенную задачу с API сервисом: продолжает выполняющуюся
+    с последнего сохраненного замера, остальные снимает с учета.
+    """
+    task_id = state.task_id
+    analyzer_name = state.params.get("analyzer_name")
+
+    api_status = await api_client.get_task_status(task_id)
+    if api_status is None:
+        return  # Повторим на следующем цикле
+
+    # Отмена, не завершенная до перезапуска, доводится до конца; завершенные
+    # замеры сохраняются, как при обычной отмене (статус partial)
+    if state.status == "cancelled" or api_status == "cancelling":
+        await task_state.remove(task_id)
+        rows = count_result_rows(task_id)
+        if rows > 0:
+            await report_results(
+                task_id,
+                state.params.get("mode", "standard"),
+                "partial",
+                SpanRecorder(),
+                error=f"Task cancelled by user request; {rows} completed samples saved",
+            )
+            logger.info(f"Отмена задачи {task_id} завершена после перезапуска, сохранено {rows} замеров")
+            return
+        await api_client.update_task_status(
+            task_id=task_id, status="cancelled", error="Task cancelled by user request"
+        )
+        await cleanup_task(task_id, analyzer_name)
+        return
+
+    if api_status not in ("running", "queued"):
+        logger.info(f"Задача {task_id} в API сервисе в статусе {api_status}, снимаем с учета")
+        await task_state.remove(task_id)
+        if api_status not in RESULT_STATUSES:
+            await cleanup_task(task_id, analyzer_name)
+        return
+
+    # Аренда в очереди закрепляется за этим runner'ом (за время простоя
+    # задача могла вернуться в очередь), чтобы ее не выдали другому
+    await api_client.heartbeat_jobs([task_id])
+    if api_status == "queued":
+        await api_client.update_task_status(task_id=task_id, status="running")
+
+    # Рабочая копия пересоздается, замеры продолжаются с контрольной точки
+    logger.info(f"Возобновление задачи {task_id}")
+    await remove_repository(task_id)
+    register_task(task_id, state.params, active_tasks)
+    run_in_background(task_id, state.params, active_tasks)
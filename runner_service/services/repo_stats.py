@@ -0,0 +1,167 @@
+import ast
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import tokenize
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import git
+
+from config import get_settings
+from services.sources import read_fingerprint
+from services.telemetry import CACHE_REQUESTS
+
+settings = get_settings()
+logger = logging.getLogger("runner.repo_stats")
+
+# Каталоги, которые не входят в анализируемый код (как в Go-сборщике метрик)
+SKIP_DIRS = {"venv", "__pycache__", "node_modules", "site-packages"}
+
+# Пул процессов для разбора файлов: ast.parse упирается в CPU и GIL
+_executor: Optional[ProcessPoolExecutor] = None
+
+# Блокировки по ревизии: индекс одной ревизии строится один раз,
+# даже если ее задачи (например, задачи кампании) стартуют одновременно
+_revision_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.repo_stats_workers or None)
+    return _executor
+
+
+def python_files(repo_dir: str) -> List[str]:
+    """Python-файлы репозитория без скрытых каталогов и окружений, в порядке обхода."""
+    files: List[str] = []
+    for root, dirs, names in os.walk(repo_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d not in SKIP_DIRS)
+        files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(".py"))
+    return files
+
+
+def file_stats(path: str) -> Tuple[int, int, int, bool]:
+    """
+    Статистика одного файла (выполняется в пуле процессов).
+
+    Returns:
+        Tuple[int, int, int, bool]:
+            - Физические строки
+            - Логические строки (инструкции Python, токены NEWLINE)
+            - Число узлов AST
+            - Файл разобран без ошибок
+    """
+    try:
+        with open(path, "rb") as f:
+            source = f.read()
+    except OSError:
+        return 0, 0, 0, False
+
+    physical = source.count(b"\n") + (0 if not source or source.endswith(b"\n") else 1)
+    try:
+        tree = ast.parse(source, filename=path)
+        nodes = sum(1 for _ in ast.walk(tree))
+        logical = sum(
+            1 for token in tokenize.tokenize(io.BytesIO(source).readline) if token.type == tokenize.NEWLINE
+        )
+        return physical, logical, nodes, True
+    except (SyntaxError, ValueError, RecursionError, MemoryError, tokenize.TokenError):
+        # Файл не разбирается текущей версией Python: логические строки
+        # оцениваются как непустые строки без комментариев
+        logical = 0
+        for line in source.splitlines():
+            stripped = line.strip()
+            if stripped and not stripped.startswith(b"#"):
+                logical += 1
+        return physical, logical, 0, False
+
+
+def repository_revision(repo_dir: str, files: List[str]) -> str:
+    """
+    Ключ кэша индекса: отпечаток содержимого источника (архив, git bundle,
+    локальный каталог, синтетический репозиторий), SHA коммита HEAD,
+    а для каталога без git - хеш путей и содержимого Python-файлов.
+    """
+    fingerprint = read_fingerprint(repo_dir)
+    if fingerprint:
+        return fingerprint
+    try:
+        return git.Repo(repo_dir).head.commit.hexsha
+    except Exception:
+        digest = hashlib.sha256()
+        for path in files:
+            digest.update(os.path.relpath(path, repo_dir).encode())
+            try:
+                with open(path, "rb") as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+            except OSError:
+                continue
+        return f"tree:{digest.hexdigest()}"
+
+
+def build_index(repo_dir: str, files: List[str], revision: str) -> Dict[str, Any]:
+    """Строит индекс репозитория, разбирая файлы в пуле процессов."""
+    stats: Dict[str, Any] = {
+        "commit_sha": revision,
+        "files": len(files),
+        "physical_loc": 0,
+        "logical_loc": 0,
+        "ast_nodes": 0,
+        "parse_errors": 0,
+    }
+    for physical, logical, nodes, parsed in _get_executor().map(file_stats, files, chunksize=64):
+        stats["physical_loc"] += physical
+        stats["logical_loc"] += logical
+        stats["ast_nodes"] += nodes
+        stats["parse_errors"] += 0 if parsed else 1
+    return stats
+
+
+def _cache_path(revision: str) -> str:
+    return os.path.join(settings.repo_stats_dir, f"{revision.replace(':', '_')}.json")
+
+
+async def get_repository_stats(repo_dir: str) -> Dict[str, Any]:
+    """
+    Возвращает индекс репозитория: число файлов, физические и логические
+    строки кода и число узлов AST. Индекс строится один раз на ревизию
+    и кэшируется на диске по SHA коммита.
+
+    Args:
+        repo_dir: Путь к рабочей копии репозитория
+
+    Returns:
+        Dict[str, Any]: Индекс с ключом ревизии commit_sha
+    """
+    loop = asyncio.get_event_loop()
+    files = await loop.run_in_executor(None, python_files, repo_dir)
+    revision = await loop.run_in_executor(None, repository_revision, repo_dir, files)
+    path = _cache_path(revision)
+    lock = _revision_locks.setdefault(revision, asyncio.Lock())
+
+    async with lock:
+        if os.path.exists(path):
+            CACHE_REQUESTS.labels("repo_stats", "hit").inc()
+            with open(path, "r") as f:
+                return json.load(f)
+
+        CACHE_REQUESTS.labels("repo_stats", "miss").inc()
+        stats = await loop.run_in_executor(None, build_index, repo_dir, files, revision)
+
+        # Запись через временный файл: параллельные воркеры не увидят неполный индекс
+        os.makedirs(settings.repo_stats_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(stats, f)
+        os.replace(tmp_path, path)
+
+    logger.info(
+        f"Индекс репозитория {revision}: {stats['files']} файлов, "
+        f"{stats['logical_loc']} логических строк, {stats['ast_nodes']} узлов AST"
+    )
+    return stats
@@ -0,0 +1,88 @@
+import logging
+import os
+from typing import Dict, Optional
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger("runner.results")
+
+# Форматы результатов: расширение файла и MIME-тип
+RESULT_FORMATS: Dict[str, Dict[str, str]] = {
+    "csv": {"extension": "csv", "media_type": "text/csv"},
+    "npz": {"extension": "npz", "media_type": "application/x-npz"},
+    "arrow": {"extension": "arrow", "media_type": "application/vnd.apache.arrow.file"},
+    # Сводка режима масштабирования
+    "scaling": {"extension": "scaling.json", "media_type": "application/json"},
+    # Все прогоны режима масштабирования (в CSV задачи - только прогоны с одним воркером)
+    "scaling_csv": {"extension": "scaling.csv", "media_type": "text/csv"},
+    # Сводка инкрементального режима
+    "incremental": {"extension": "incremental.json", "media_type": "application/json"},
+    # Профиль анализатора: статистика функций и свернутые стеки
+    "profile": {"extension": "profile.json", "media_type": "application/json"},
+    # Стоимость запуска анализаторов и время анализа итераций без нее
+    "startup": {"extension": "startup.json", "media_type": "application/json"},
+}
+
+
+def result_file_path(task_id: str, fmt: str = "csv") -> str:
+    """Путь к файлу результатов задачи в заданном формате."""
+    extension = RESULT_FORMATS[fmt]["extension"]
+    return os.path.join(settings.metrics_dir, f"metrics_{task_id}.{extension}")
+
+
+def export_arrow(task_id: str) -> Optional[str]:
+    """
+    Конвертирует столбцовый файл .npz задачи в Arrow IPC.
+    Требует необязательных зависимостей numpy и pyarrow; без них
+    задача обслуживается в форматах .npz и CSV.
+
+    Args:
+        task_id: ID задачи
+
+    Returns:
+        Optional[str]: Путь к файлу Arrow (None, если конвертация недоступна)
+    """
+    try:
+        import numpy as np
+        import pyarrow as pa
+    except ImportError:
+        logger.info("pyarrow не установлен, Arrow-экспорт пропущен")
+        return None
+
+    npz_path = result_file_path(task_id, "npz")
+    arrow_path = result_file_path(task_id, "arrow")
+
+    with np.load(npz_path) as data:
+        table = pa.table({name: data[name] for name in data.files})
+
+    # Файл без сжатия: клиенты могут отображать его в память без копирования
+    with pa.OSFile(arrow_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    logger.info(f"Результаты задачи {task_id} экспортированы в {arrow_path}")
+    return arrow_path
+
+
+def count_result_rows(task_id: str) -> int:
+    """Число сохраненных замеров в CSV-файле задачи (0, если файла нет)."""
+    path = result_file_path(task_id, "csv")
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r") as f:
+        return max(sum(1 for _ in f) - 1, 0)  # Вычитаем строку заголовка
+
+
+def checkpoint_path(task_id: str) -> str:
+    """Путь к контрольной точке задачи: завершенные замеры в формате JSONL."""
+    return os.path.join(settings.metrics_dir, f"metrics_{task_id}.checkpoint.jsonl")
+
+
+def remove_result_files(task_id: str) -> None:
+    """Удаляет файлы результатов задачи во всех форматах и ее контрольную точку."""
+    paths = [result_file_path(task_id, fmt) for fmt in RESULT_FORMATS]
+    for path in paths + [checkpoint_path(task_id)]:
+        if os.path.exists(path):
+            os.remove(path)
+            logger.info(f"Файл метрик {path} удален")
@@ -0,0 +1,196 @@
+import hashlib
+import os
+import shutil
+import tarfile
+import zipfile
+from typing import Iterator, Optional
+from urllib.parse import unquote, urlsplit
+
+from config import get_settings
+
+settings = get_settings()
+
+LOCAL_SCHEME = "file"
+UPLOAD_SCHEME = "upload"
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def is_local_url(repository_url: str) -> bool:
+    return urlsplit(repository_url).scheme == LOCAL_SCHEME
+
+
+def is_upload_url(repository_url: str) -> bool:
+    return urlsplit(repository_url).scheme == UPLOAD_SCHEME
+
+
+def local_source_path(repository_url: str) -> str:
+    """
+    Путь к каталогу, архиву или git bundle из URL file:///... Источник
+    должен лежать внутри LOCAL_SOURCES_DIR (в том числе после разрешения ссылок).
+
+    Raises:
+        ValueError: путь вне LOCAL_SOURCES_DIR или не существует
+    """
+    path = os.path.realpath(unquote(urlsplit(repository_url).path))
+    root = os.path.realpath(settings.local_sources_dir)
+    if os.path.commonpath([path, root]) != root:
+        raise ValueError(f"Local source {path} is outside LOCAL_SOURCES_DIR {root}")
+    if not os.path.exists(path):
+        raise ValueError(f"Local source {path} does not exist")
+    return path
+
+
+def upload_digest(repository_url: str) -> str:
+    """
+    sha256 загруженных исходников из URL upload://sha256/<digest>.
+
+    Raises:
+        ValueError: URL в неверном формате
+    """
+    parts = urlsplit(repository_url)
+    digest = parts.path.strip("/")
+    if parts.netloc != "sha256" or len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+        raise ValueError(f"Invalid uploaded source URL {repository_url}, expected upload://sha256/<digest>")
+    return digest
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_kind(path: str) -> str:
+    """
+    Формат файла исходников по сигнатуре: bundle, zip или tar
+    (tarfile сам определяет сжатие gzip, bzip2 и xz).
+
+    Raises:
+        ValueError: формат не поддерживается
+    """
+    with open(path, "rb") as f:
+        header = f.read(512)
+    if header.startswith((b"# v2 git bundle\n", b"# v3 git bundle\n")):
+        return "bundle"
+    if zipfile.is_zipfile(path):
+        return "zip"
+    if tarfile.is_tarfile(path):
+        return "tar"
+    raise ValueError(f"Unsupported source file {os.path.basename(path)}: expected tar, zip or git bundle")
+
+
+def _inside(path: str, root: str) -> bool:
+    return os.path.commonpath([path, root]) == root
+
+
+def _safe_members(archive: tarfile.TarFile, target_dir: str) -> Iterator[tarfile.TarInfo]:
+    """
+    Элементы tar, которые распаковываются только внутрь target_dir.
+    Устройства и FIFO пропускаются, выход за каталог (.., абсолютные пути,
+    ссылки наружу) считается ошибкой.
+    """
+    root = os.path.realpath(target_dir)
+    for member in archive.getmembers():
+        path = os.path.realpath(os.path.join(root, member.name))
+        if not _inside(path, root):
+            raise ValueError(f"Archive member {member.name} escapes the source directory")
+        if member.issym() or member.islnk():
+            base = os.path.dirname(path) if member.issym() else root
+            if not _inside(os.path.realpath(os.path.join(base, member.linkname)), root):
+                raise ValueError(f"Archive link {member.name} points outside the source directory")
+        elif not (member.isfile() or member.isdir()):
+            continue
+        yield member
+
+
+def unpack_archive(path: str, kind: str, target_dir: str) -> None:
+    """
+    Распаковывает архив tar или zip в target_dir. Если все содержимое лежит
+    в одном каталоге верхнего уровня (как в архивах GitHub), каталог
+    становится корнем исходников.
+    """
+    if kind == "zip":
+        # ZipFile.extractall сам отбрасывает абсолютные пути и ..
+        with zipfile.ZipFile(path) as archive:
+            archive.extractall(target_dir)
+    else:
+        with tarfile.open(path, "r:*") as archive:
+            members = list(_safe_members(archive, target_dir))
+            # Фильтр data (есть в обновлениях безопасности Python) также сбрасывает владельцев и права
+            if hasattr(tarfile, "data_filter"):
+                archive.extractall(target_dir, members=members, filter="data")
+            else:
+                archive.extractall(target_dir, members=members)
+
+    entries = os.listdir(target_dir)
+    if len(entries) == 1 and os.path.isdir(os.path.join(target_dir, entries[0])):
+        top = os.path.join(target_dir, entries[0])
+        nested = os.path.join(target_dir, f".{entries[0]}.unpack")
+        os.rename(top, nested)
+        for name in os.listdir(nested):
+            os.rename(os.path.join(nested, name), os.path.join(target_dir, name))
+        os.rmdir(nested)
+
+
+def copy_tree(source_dir: str, target_dir: str) -> str:
+    """
+    Копирует локальный каталог в рабочий каталог задачи (исходный каталог
+    не меняется анализаторами) и за тот же проход хеширует содержимое.
+
+    Returns:
+        str: Отпечаток tree:<sha256> путей и содержимого файлов
+    """
+    file_digests = {}
+
+    def copy_file(src: str, dst: str) -> str:
+        digest = hashlib.sha256()
+        with open(src, "rb") as fin, open(dst, "wb") as fout:
+            while chunk := fin.read(CHUNK_SIZE):
+                digest.update(chunk)
+                fout.write(chunk)
+        shutil.copymode(src, dst)
+        file_digests[os.path.relpath(src, source_dir).replace(os.sep, "/")] = digest.digest()
+        return dst
+
+    shutil.copytree(source_dir, target_dir, symlinks=True, copy_function=copy_file, dirs_exist_ok=True)
+
+    # Служебные файлы git (индекс, журналы ссылок) меняются без изменения исходников
+    tree = hashlib.sha256()
+    for relative_path, digest in sorted(file_digests.items()):
+        if relative_path.startswith(".git/"):
+            continue
+        tree.update(relative_path.encode() + b"\0" + digest)
+    return f"tree:{tree.hexdigest()}"
+
+
+def fingerprint_path(repo_dir: str) -> str:
+    """Файл с отпечатком содержимого рядом с каталогом исходников (не внутри него)."""
+    return os.path.normpath(repo_dir) + ".fingerprint"
+
+
+def write_fingerprint(repo_dir: str, fingerprint: str) -> None:
+    with open(fingerprint_path(repo_dir), "w") as f:
+        f.write(fingerprint)
+
+
+def read_fingerprint(repo_dir: str) -> Optional[str]:
+    """
+    Отпечаток содержимого исходников (sha256 архива или bundle, хеш дерева
+    локального каталога или синтетического репозитория). None - источник
+    без отпечатка (git-репозиторий определяется SHA коммита).
+    """
+    try:
+        with open(fingerprint_path(repo_dir), "r") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def remove_fingerprint(repo_dir: str) -> None:
+    try:
+        os.remove(fingerprint_path(repo_dir))
+    except FileNotFoundError:
+        pass
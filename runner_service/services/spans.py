@@ -0,0 +1,88 @@
+import csv
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+logger = logging.getLogger("runner.spans")
+
+
+class SpanRecorder:
+    """
+    Накапливает интервалы этапов выполнения задачи (установка, клонирование,
+    сбор метрик и т.д.) до отправки в API сервис вместе со статусом.
+    Время - локальное, как и остальные даты задачи.
+    """
+
+    def __init__(self) -> None:
+        self._spans: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Замеряет этап. Атрибуты можно дополнить внутри блока через
+        возвращаемый словарь; исключение отмечается атрибутом error.
+        """
+        start = datetime.now()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes["error"] = type(e).__name__
+            raise
+        finally:
+            self.add(name, start, datetime.now(), **attributes)
+
+    def add(self, name: str, start: datetime, end: datetime, **attributes: Any) -> None:
+        """Добавляет уже измеренный интервал."""
+        self._spans.append(
+            {
+                "name": name,
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "attributes": attributes,
+            }
+        )
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Возвращает накопленные интервалы и очищает список."""
+        spans, self._spans = self._spans, []
+        return spans
+
+
+def add_tool_spans(recorder: SpanRecorder, metrics_file_path: str) -> None:
+    """
+    Восстанавливает блоки замеров каждого анализатора по CSV сборщика:
+    от старта первой итерации до окончания последней. busy_s - суммарное
+    время выполнения (при чередовании замеров блоки перекрываются).
+    """
+    blocks: Dict[str, Dict[str, Any]] = {}
+    try:
+        with open(metrics_file_path, "r", newline="") as f:
+            for row in csv.DictReader(f):
+                started_at = row.get("Started At")
+                if not started_at:
+                    continue
+                start = datetime.fromisoformat(started_at).astimezone().replace(tzinfo=None)
+                duration = float(row["Execution Time (s)"])
+                end = start + timedelta(seconds=duration)
+
+                block = blocks.setdefault(
+                    row["Tool"], {"start": start, "end": end, "iterations": 0, "busy_s": 0.0}
+                )
+                block["start"] = min(block["start"], start)
+                block["end"] = max(block["end"], end)
+                block["iterations"] += 1
+                block["busy_s"] += duration
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f"Не удалось восстановить интервалы анализаторов: {str(e)}")
+        return
+
+    for tool, block in blocks.items():
+        recorder.add(
+            f"measure:{tool}",
+            block["start"],
+            block["end"],
+            tool=tool,
+            iterations=block["iterations"],
+            busy_s=round(block["busy_s"], 6),
+        )
@@ -0,0 +1,225 @@
+import asyncio
+import csv
+import json
+import logging
+import os
+import re
+import signal
+import statistics
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import get_settings
+from services.profiles import (
+    AnalyzerProfile,
+    NotPythonAnalyzerError,
+    analyzer_command,
+    get_analyzer_registry,
+    python_entry_point,
+)
+from services.results import result_file_path
+from services.spans import SpanRecorder
+from services.telemetry import TASK_PHASE_DURATION
+
+settings = get_settings()
+logger = logging.getLogger("runner.startup")
+
+# Строка вывода python -X importtime:
+# "import time:       331 |        331 |   _io" (отступ - вложенность импорта)
+IMPORT_TIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S.*)$")
+
+
+def parse_import_times(stderr: str) -> List[Dict[str, Any]]:
+    """Разбирает вывод -X importtime: собственное и накопленное время импорта модулей, мкс."""
+    imports = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        imports.append(
+            {
+                "module": module.strip(),
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(indent) - 1) // 2,
+            }
+        )
+    return imports
+
+
+def iteration_times(task_id: str) -> Dict[str, List[Tuple[int, float]]]:
+    """
+    Время итераций анализаторов из CSV-файла задачи. Итерации с таймаутом,
+    остановкой по памяти или ошибкой анализатора не учитываются.
+    """
+    times: Dict[str, List[Tuple[int, float]]] = {}
+    path = result_file_path(task_id, "csv")
+    if not os.path.exists(path):
+        return times
+    with open(path, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            tool = row.get("Tool")
+            if not tool:
+                continue
+            series = times.setdefault(tool, [])
+            if "true" in (row.get("Timed Out"), row.get("OOM Killed"), row.get("Broken")):
+                continue
+            try:
+                series.append((int(row["Iteration"]), float(row["Execution Time (s)"])))
+            except (KeyError, ValueError):
+                continue
+    return times
+
+
+async def _timed_run(
+    cmd: List[str], env: Dict[str, str], cwd: str, task_info: Dict[str, Any]
+) -> Tuple[float, int, bytes]:
+    """
+    Запускает команду и измеряет время до ее завершения.
+    Процесс доступен отмене задачи; по таймауту завершается вся группа процессов.
+
+    Returns:
+        Tuple[float, int, bytes]: Время выполнения (с), код завершения и stderr
+    """
+    started = time.perf_counter()
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=cwd,
+        env=env,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    task_info["process"] = proc
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), settings.startup_timeout)
+    except asyncio.TimeoutError:
+        os.killpg(proc.pid, signal.SIGKILL)
+        await proc.wait()
+        raise RuntimeError(f"{cmd[0]} did not finish in {settings.startup_timeout} seconds")
+    finally:
+        task_info["process"] = None
+    assert proc.returncode is not None
+    return time.perf_counter() - started, proc.returncode, stderr or b""
+
+
+async def measure_startup(
+    profile: AnalyzerProfile,
+    empty_dir: str,
+    cache_root: str,
+    iterations: List[Tuple[int, float]],
+    task_info: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """
+    Измеряет стоимость запуска анализатора: голый интерпретатор (python -c pass),
+    прогон на пустом каталоге (запуск, импорты и плагины без анализа) и
+    импорты под python -X importtime. Время анализа каждой итерации -
+    полное время итерации за вычетом медианы запуска.
+
+    Returns:
+        Optional[Dict[str, Any]]: Сводка запуска анализатора (None, если задача отменена)
+    """
+    command, env = analyzer_command(profile, empty_dir, cache_root, settings.analyzer_threads)
+    try:
+        interpreter, target, module = python_entry_point(command)
+    except NotPythonAnalyzerError:
+        # Нативные анализаторы: только прогон на пустом каталоге
+        interpreter, target, module = None, [], False
+
+    interpreter_times: List[float] = []
+    startup_times: List[float] = []
+    exit_code = 0
+    # Голый интерпретатор и пустой прогон чередуются, чтобы дрейф влиял на оба одинаково
+    for _ in range(settings.startup_iterations):
+        if task_info.get("status") == "cancelled":
+            return None
+        if interpreter:
+            elapsed, _, _ = await _timed_run([*interpreter, "-c", "pass"], env, empty_dir, task_info)
+            interpreter_times.append(elapsed)
+        elapsed, exit_code, _ = await _timed_run(command, env, empty_dir, task_info)
+        startup_times.append(elapsed)
+
+    # Отдельный прогон: -X importtime сам замедляет импорты
+    imports: List[Dict[str, Any]] = []
+    if interpreter:
+        importtime_cmd = [*interpreter, "-X", "importtime", *(["-m"] if module else []), *target]
+        _, _, stderr = await _timed_run(importtime_cmd, env, empty_dir, task_info)
+        imports = parse_import_times(stderr.decode("utf-8", errors="replace"))
+
+    startup_s = statistics.median(startup_times)
+    interpreter_s = statistics.median(interpreter_times) if interpreter_times else None
+    totals = [total for _, total in iterations]
+    median_total = statistics.median(totals) if totals else None
+    return {
+        "tool": profile.name,
+        "python": interpreter is not None,
+        "samples": len(startup_times),
+        "empty_exit_code": exit_code,
+        "interpreter_s": interpreter_s,
+        "startup_s": startup_s,
+        "analyzer_init_s": startup_s - interpreter_s if interpreter_s is not None else None,
+        "import_time_s": sum(item["self_us"] for item in imports) / 1e6 if imports else None,
+        "imported_modules": len(imports),
+        "top_imports": sorted(imports, key=lambda item: item["self_us"], reverse=True)[
+            : settings.startup_top_imports
+        ],
+        "median_total_s": median_total,
+        "median_analysis_s": max(median_total - startup_s, 0.0) if median_total is not None else None,
+        "startup_share": startup_s / median_total if median_total else None,
+        "iterations": [
+            {"iteration": iteration, "total_s": total, "analysis_s": max(total - startup_s, 0.0)}
+            for iteration, total in iterations
+        ],
+    }
+
+
+async def run_startup_analysis(
+    task_id: str, cache_dir: str, spans: SpanRecorder, task_info: Dict[str, Any]
+) -> Optional[str]:
+    """
+    Анализ запуска после замеров: для каждого измеренного анализатора
+    стоимость запуска интерпретатора и импортов отделяется от времени
+    анализа итераций. Ошибка отдельного анализатора не прерывает остальные
+    и не влияет на результат задачи.
+
+    Args:
+        task_id: ID задачи
+        cache_dir: Каталог кешей задачи
+        spans: Интервалы этапов задачи
+        task_info: Запись задачи в словаре активных задач (процесс доступен отмене)
+
+    Returns:
+        Optional[str]: Путь к сводке запуска (None, если задача отменена или анализаторов нет)
+    """
+    times = iteration_times(task_id)
+    if not times:
+        logger.warning(f"Анализ запуска задачи {task_id} пропущен: нет замеров")
+        return None
+
+    # Пустой каталог вместо репозитория: анализатор запускается, но не проверяет файлов
+    startup_root = os.path.join(cache_dir, "startup")
+    empty_dir = os.path.join(startup_root, "empty")
+    os.makedirs(empty_dir, exist_ok=True)
+
+    registry = get_analyzer_registry()
+    summaries = []
+    with TASK_PHASE_DURATION.labels("startup").time(), spans.span("startup", tools=len(times)) as span:
+        for tool, iterations in times.items():
+            try:
+                summary = await measure_startup(
+                    registry.get(tool), empty_dir, startup_root, iterations, task_info
+                )
+            except Exception as e:
+                logger.warning(f"Анализ запуска {tool} для задачи {task_id} не выполнен: {str(e)}")
+                continue
+            if summary is None:
+                return None
+            summaries.append(summary)
+        span["measured"] = len(summaries)
+
+    output = result_file_path(task_id, "startup")
+    with open(output, "w") as f:
+        json.dump(summaries, f)
+    logger.info(f"Сводка запуска анализаторов задачи {task_id} сохранена в {output}")
+    return output
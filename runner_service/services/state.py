@@ -0,0 +1,209 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger("runner.state")
+
+# Идентификатор процесса runner сервиса: задача принадлежит процессу,
+# который ее выполняет (один на каждый воркер uvicorn)
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+@dataclass
+class TaskState:
+    """Сохраненное состояние задачи runner сервиса."""
+
+    task_id: str
+    params: Dict[str, Any]  # Параметры запуска start_analysis_task
+    status: str  # running или cancelled
+    owner: str  # INSTANCE_ID процесса, выполняющего задачу
+    collector_pid: Optional[int]  # PID Go-сборщика (None, пока он не запущен)
+    heartbeat_at: float
+
+
+@dataclass
+class SlotReservation:
+    """Слоты runner сервиса, занятые процессом на время аренды задач."""
+
+    reservation_id: str
+    slots: int
+
+
+class TaskStateStore:
+    """
+    Состояние задач в локальной SQLite. Переживает перезапуск runner сервиса
+    и общее для всех его воркеров: задачу, владелец которой перестал
+    обновлять heartbeat, подхватывает другой процесс.
+
+    Процесс держит одно соединение; запросы выполняются в потоке
+    (asyncio.to_thread), чтобы ожидание блокировки записи другим воркером
+    не останавливало цикл событий.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    owner TEXT NOT NULL,
+                    collector_pid INTEGER,
+                    heartbeat_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reservations (
+                    reservation_id TEXT PRIMARY KEY,
+                    slots INTEGER NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+        finally:
+            conn.close()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Соединение не наследуется дочерним процессом после fork
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._pid = os.getpid()
+        return self._conn
+
+    def _execute(self, sql: str, args: tuple = ()) -> int:
+        with self._lock:
+            return self._connection().execute(sql, args).rowcount
+
+    def _query(self, sql: str, args: tuple = ()) -> List[TaskState]:
+        with self._lock:
+            rows = self._connection().execute(sql, args).fetchall()
+        return [
+            TaskState(
+                task_id=row[0],
+                params=json.loads(row[1]),
+                status=row[2],
+                owner=row[3],
+                collector_pid=row[4],
+                heartbeat_at=row[5],
+            )
+            for row in rows
+        ]
+
+    async def add(self, task_id: str, params: Dict[str, Any]) -> bool:
+        """Регистрирует задачу за текущим процессом; False, если она уже есть."""
+        try:
+            await asyncio.to_thread(
+                self._execute,
+                "INSERT INTO tasks (task_id, params, status, owner, heartbeat_at) VALUES (?, ?, 'running', ?, ?)",
+                (task_id, json.dumps(params), INSTANCE_ID, time.time()),
+            )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    async def get(self, task_id: str) -> Optional[TaskState]:
+        states = await asyncio.to_thread(
+            self._query,
+            "SELECT task_id, params, status, owner, collector_pid, heartbeat_at FROM tasks WHERE task_id = ?",
+            (task_id,),
+        )
+        return states[0] if states else None
+
+    async def list(self) -> List[TaskState]:
+        return await asyncio.to_thread(
+            self._query, "SELECT task_id, params, status, owner, collector_pid, heartbeat_at FROM tasks"
+        )
+
+    async def set_status(self, task_id: str, status: str) -> None:
+        await asyncio.to_thread(self._execute, "UPDATE tasks SET status = ? WHERE task_id = ?", (status, task_id))
+
+    async def set_collector(self, task_id: str, pid: Optional[int]) -> None:
+        await asyncio.to_thread(self._execute, "UPDATE tasks SET collector_pid = ? WHERE task_id = ?", (pid, task_id))
+
+    async def remove(self, task_id: str) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    async def heartbeat(self) -> None:
+        """Подтверждает, что задачи текущего процесса выполняются."""
+        await asyncio.to_thread(
+            self._execute, "UPDATE tasks SET heartbeat_at = ? WHERE owner = ?", (time.time(), INSTANCE_ID)
+        )
+
+    async def claim(self, state: TaskState) -> bool:
+        """
+        Забирает задачу у процесса, переставшего обновлять heartbeat.
+        Условный UPDATE гарантирует, что задачу заберет только один процесс.
+        """
+        updated = await asyncio.to_thread(
+            self._execute,
+            "UPDATE tasks SET owner = ?, heartbeat_at = ?, collector_pid = NULL "
+            "WHERE task_id = ? AND owner = ? AND heartbeat_at = ?",
+            (INSTANCE_ID, time.time(), state.task_id, state.owner, state.heartbeat_at),
+        )
+        return updated == 1
+
+
+    def _reserve(self, limit: int, ttl: float) -> Optional[SlotReservation]:
+        with self._lock:
+            conn = self._connection()
+            # BEGIN IMMEDIATE берет блокировку записи сразу: подсчет свободных
+            # слотов и резерв выполняются атомарно относительно других воркеров
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                conn.execute("DELETE FROM reservations WHERE expires_at < ?", (now,))
+                running = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+                reserved = conn.execute("SELECT COALESCE(SUM(slots), 0) FROM reservations").fetchone()[0]
+                free = limit - running - reserved
+                reservation = None
+                if free > 0:
+                    reservation = SlotReservation(reservation_id=uuid.uuid4().hex, slots=free)
+                    conn.execute(
+                        "INSERT INTO reservations (reservation_id, slots, expires_at) VALUES (?, ?, ?)",
+                        (reservation.reservation_id, free, now + ttl),
+                    )
+                conn.execute("COMMIT")
+                return reservation
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    async def reserve(self, limit: int, ttl: float) -> Optional[SlotReservation]:
+        """
+        Резервирует все свободные слоты runner сервиса (limit на все воркеры)
+        на время аренды задач; None, если свободных слотов нет. Резерв
+        процесса, упавшего до release, перестает учитываться через ttl секунд.
+        """
+        return await asyncio.to_thread(self._reserve, limit, ttl)
+
+    async def release(self, reservation: SlotReservation) -> None:
+        """Освобождает резерв: принятые задачи уже учтены в таблице tasks."""
+        await asyncio.to_thread(
+            self._execute, "DELETE FROM reservations WHERE reservation_id = ?", (reservation.reservation_id,)
+        )
+
+
+# Глобальное хранилище состояния задач
+task_state = TaskStateStore(settings.state_db_path)
@@ -0,0 +1,324 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger("runner.synthetic")
+
+SCHEME = "synthetic"
+
+# Версия генератора входит в манифест: изменение шаблонов кода меняет вывод
+# при том же зерне, и результаты разных версий сравнивать нельзя
+GENERATOR_VERSION = 1
+
+PACKAGE = "synthetic"
+MODULES_PER_PACKAGE = 50
+
+# Нарушения линтеров, которые находят правила по умолчанию ruff, flake8 и pylint
+VIOLATIONS = (
+    "unused_import",  # F401
+    "unused_variable",  # F841
+    "none_comparison",  # E711
+    "bare_except",  # E722
+    "ambiguous_name",  # E741
+    "empty_fstring",  # F541
+    "mutable_default",  # B006 / W0102
+)
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    """Параметры синтетического репозитория (query-параметры URL synthetic://python?...)."""
+
+    seed: int = 0
+    modules: int = 20  # Число модулей
+    loc: int = 200  # Строк кода в модуле (не меньше)
+    imports: float = 0.2  # Плотность графа импортов: вероятность импорта каждого предыдущего модуля
+    annotations: float = 0.5  # Доля аннотированных параметров и возвращаемых значений
+    depth: int = 2  # Глубина иерархии классов
+    violations: float = 0.05  # Вероятность нарушения линтера в функции
+
+    def validate(self) -> None:
+        if not 1 <= self.modules <= 10000:
+            raise ValueError("modules must be between 1 and 10000")
+        if not 10 <= self.loc <= 20000:
+            raise ValueError("loc must be between 10 and 20000")
+        if not 1 <= self.depth <= 20:
+            raise ValueError("depth must be between 1 and 20")
+        for name in ("imports", "annotations", "violations"):
+            if not 0.0 <= getattr(self, name) <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1")
+
+
+def is_synthetic_url(repository_url: str) -> bool:
+    return urlsplit(repository_url).scheme == SCHEME
+
+
+def parse_synthetic_url(repository_url: str) -> SyntheticSpec:
+    """
+    Разбирает URL вида synthetic://python?seed=1&modules=50&loc=300.
+
+    Raises:
+        ValueError: неизвестный язык, параметр или недопустимое значение
+    """
+    parts = urlsplit(repository_url)
+    if parts.netloc not in ("", "python") or parts.path not in ("", "/"):
+        raise ValueError(f"Unsupported synthetic repository {repository_url}, expected synthetic://python?...")
+
+    types = {field.name: field.type for field in fields(SyntheticSpec)}
+    values: Dict[str, Any] = {}
+    for name, value in parse_qsl(parts.query, keep_blank_values=True):
+        if name not in types:
+            raise ValueError(f"Unknown synthetic repository parameter {name!r}, expected one of {list(types)}")
+        cast = int if types[name] is int else float
+        try:
+            values[name] = cast(value)
+        except ValueError:
+            raise ValueError(f"Invalid value {value!r} for synthetic repository parameter {name!r}")
+
+    spec = SyntheticSpec(**values)
+    spec.validate()
+    return spec
+
+
+def module_name(index: int) -> Tuple[str, str]:
+    """Подпакет и имя модуля с заданным номером."""
+    return f"pkg_{index // MODULES_PER_PACKAGE:03d}", f"mod_{index:05d}"
+
+
+class _ModuleWriter:
+    """Генератор одного модуля: функции и цепочки классов до заданного числа строк."""
+
+    def __init__(self, spec: SyntheticSpec, index: int, imported: List[int]) -> None:
+        self.spec = spec
+        self.index = index
+        self.imported = imported
+        self.pending = list(imported)  # Импортированные модули без вызовов
+        # Свой генератор на модуль: модуль зависит только от зерна и своего номера
+        self.rng = random.Random(f"{spec.seed}:{index}")
+        self.functions: List[str] = []
+        self.extra_imports: Set[str] = set()
+        # Переменные, прочитанные в текущей функции: остальные попадают в return,
+        # чтобы неиспользуемые переменные были только намеренными нарушениями
+        self.used: Set[str] = set()
+
+    def annotate(self, text: str) -> str:
+        return text if self.rng.random() < self.spec.annotations else ""
+
+    def violation(self) -> str:
+        return self.rng.choice(VIOLATIONS) if self.rng.random() < self.spec.violations else ""
+
+    def expression(self, names: List[str]) -> str:
+        left = self.rng.choice(names)
+        right = self.rng.choice(names + [str(self.rng.randint(1, 97))])
+        self.used.update((left, right))
+        return f"{left} {self.rng.choice(('+', '-', '*', '^', '|'))} {right}"
+
+    def call(self, argument: str) -> str:
+        """Вызов функции импортированного модуля (импорт используется) или своей."""
+        if self.imported and self.rng.random() < 0.5:
+            # Сначала модули, функции которых еще не вызывались
+            target = self.pending.pop(0) if self.pending else self.rng.choice(self.imported)
+            return f"{module_name(target)[1]}.func_{target}_0({argument})"
+        if self.functions:
+            return f"{self.rng.choice(self.functions)}({argument})"
+        return f"abs({argument})"
+
+    def function(self, number: int, indent: str = "", method: bool = False) -> List[str]:
+        name = f"func_{self.index}_{number}" if not method else f"method_{number}"
+        kind = self.violation()
+        params = ["self"] if method else []
+        params.append(f"value{self.annotate(': int')}")
+        default = self.rng.randint(1, 9)
+        params.append(f"scale: int = {default}" if self.annotate("int") else f"scale={default}")
+        if kind == "mutable_default":
+            params.append("cache=[]")
+        body = [f"{indent}def {name}({', '.join(params)}){self.annotate(' -> int')}:"]
+        inner = indent + "    "
+        body.append(f'{inner}"""Synthetic function {self.index}.{number}."""')
+
+        names = ["value", "scale"]
+        self.used = set()
+        for step in range(self.rng.randint(2, 6)):
+            shape = self.rng.random()
+            target = f"v{step}"
+            if shape < 0.4:
+                body.append(f"{inner}{target} = {self.expression(names)}")
+            elif shape < 0.6:
+                argument = self.rng.choice(names)
+                self.used.add(argument)
+                body.append(f"{inner}{target} = {self.call(argument)}")
+            elif shape < 0.8:
+                body.append(f"{inner}{target} = 0")
+                body.append(f"{inner}for item in range({self.rng.randint(2, 8)}):")
+                body.append(f"{inner}    {target} += {self.expression(names + ['item'])}")
+            else:
+                body.append(f"{inner}if {self.expression(names)} > {self.rng.randint(0, 50)}:")
+                body.append(f"{inner}    {target} = {self.expression(names)}")
+                body.append(f"{inner}else:")
+                body.append(f"{inner}    {target} = {self.expression(names)}")
+            names.append(target)
+
+        if kind == "unused_import":
+            self.extra_imports.add("import json")
+        elif kind == "unused_variable":
+            body.append(f"{inner}unused = {self.expression(names)}")
+        elif kind == "none_comparison":
+            body.append(f"{inner}if value == None:")
+            body.append(f"{inner}    return 0")
+        elif kind == "bare_except":
+            body.append(f"{inner}try:")
+            body.append(f"{inner}    {names[-1]} = {names[-1]} // scale")
+            body.append(f"{inner}except:")
+            body.append(f"{inner}    pass")
+        elif kind == "ambiguous_name":
+            body.append(f"{inner}l = {names[-1]}")
+            self.used.add(names[-1])
+            names.append("l")
+        elif kind == "empty_fstring":
+            body.append(f'{inner}print(f"synthetic")')
+        elif kind == "mutable_default":
+            body.append(f"{inner}cache.append({names[-1]})")
+
+        unused = [name for name in names[2:-1] if name not in self.used]
+        body.append(f"{inner}return {' + '.join([names[-1]] + unused)}")
+        body.append("")
+        if not method:
+            self.functions.append(name)
+        return body
+
+    def class_chain(self, number: int) -> List[str]:
+        """Цепочка наследования глубиной spec.depth."""
+        lines: List[str] = []
+        parent = ""
+        for level in range(self.spec.depth):
+            name = f"Node{self.index}_{number}_{level}"
+            lines.append(f"class {name}{parent}:")
+            lines.append(f'    """Synthetic class {self.index}.{number}, level {level}."""')
+            lines.append("")
+            if level == 0:
+                lines.append(f"    def __init__(self, base{self.annotate(': int')}){self.annotate(' -> None')}:")
+                lines.append("        self.base = base")
+                lines.append("")
+            for method in range(self.rng.randint(1, 3)):
+                lines.extend(self.function(level * 10 + method, indent="    ", method=True))
+            lines.append("")
+            parent = f"({name})"
+        return lines
+
+    def render(self) -> str:
+        body: List[str] = []
+        number = 0
+        classes = 0
+        # Первая функция всегда есть: ее вызывают зависящие модули
+        while number == 0 or len(body) < self.spec.loc:
+            if number > 0 and self.rng.random() < 0.25:
+                body.extend(self.class_chain(classes))
+                classes += 1
+            else:
+                body.extend(self.function(number))
+                body.append("")
+                number += 1
+
+        # Неиспользованные импорты - только намеренные нарушения
+        if self.pending:
+            body.append(f"def link_{self.index}(value: int) -> int:")
+            calls = [f"{module_name(target)[1]}.func_{target}_0(value)" for target in self.pending]
+            body.extend(["    return sum(", *(f"        {call}," for call in calls), "    )", ""])
+
+        header = [f'"""Synthetic module {self.index} (seed {self.spec.seed})."""', ""]
+        if self.extra_imports:
+            header.extend(sorted(self.extra_imports) + [""])
+        if self.imported:
+            by_package: Dict[str, List[str]] = {}
+            for target in self.imported:
+                package, name = module_name(target)
+                by_package.setdefault(package, []).append(name)
+            for package, names in by_package.items():
+                line = f"from {PACKAGE}.{package} import {', '.join(names)}"
+                if len(line) <= 88:
+                    header.append(line)
+                else:
+                    header.append(f"from {PACKAGE}.{package} import (")
+                    header.extend(f"    {name}," for name in names)
+                    header.append(")")
+            header.append("")
+        header.append("")
+        return "\n".join(header + body).rstrip("\n") + "\n"
+
+
+def _import_graph(spec: SyntheticSpec) -> Dict[int, List[int]]:
+    """Ациклический граф импортов: модуль импортирует только модули с меньшими номерами."""
+    rng = random.Random(f"{spec.seed}:imports")
+    return {
+        index: [target for target in range(index) if rng.random() < spec.imports]
+        for index in range(spec.modules)
+    }
+
+
+def generate_tree(spec: SyntheticSpec, target_dir: str) -> Dict[str, Any]:
+    """
+    Записывает синтетический репозиторий в target_dir. Одно и то же зерно
+    с теми же параметрами дает побайтно одинаковые файлы.
+
+    Returns:
+        Dict[str, Any]: Число модулей, строк и импортов между модулями
+        и SHA-256 путей и содержимого файлов (для сверки между хостами)
+    """
+    graph = _import_graph(spec)
+    files: Dict[str, str] = {}
+    lines = 0
+    for index in range(spec.modules):
+        package, name = module_name(index)
+        source = _ModuleWriter(spec, index, graph[index]).render()
+        files[os.path.join(PACKAGE, package, f"{name}.py")] = source
+        lines += source.count("\n")
+
+    packages = sorted({module_name(index)[0] for index in range(spec.modules)})
+    files[os.path.join(PACKAGE, "__init__.py")] = '"""Synthetic package."""\n'
+    for package in packages:
+        files[os.path.join(PACKAGE, package, "__init__.py")] = ""
+
+    summary = {"modules": spec.modules, "lines": lines, "import_edges": sum(map(len, graph.values()))}
+    manifest = {"generator_version": GENERATOR_VERSION, "spec": asdict(spec), **summary}
+    files["synthetic.json"] = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+
+    digest = hashlib.sha256()
+    for relative_path, content in sorted(files.items()):
+        digest.update(relative_path.replace(os.sep, "/").encode() + b"\0" + content.encode() + b"\0")
+        path = os.path.join(target_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(content)
+    return {**summary, "digest": digest.hexdigest()}
+
+
+async def generate_repository(repository_url: str, target_dir: str) -> str:
+    """
+    Генерирует синтетический репозиторий по URL synthetic://python?... в target_dir.
+
+    Returns:
+        str: SHA-256 сгенерированного дерева
+
+    Raises:
+        ValueError: недопустимые параметры генератора
+    """
+    spec = parse_synthetic_url(repository_url)
+    loop = asyncio.get_event_loop()
+    generation = loop.run_in_executor(None, generate_tree, spec, target_dir)
+    try:
+        summary = await asyncio.shield(generation)
+    except asyncio.CancelledError:
+        # Поток генерации не прерывается: вызывающий удаляет каталог после его завершения
+        await asyncio.wait({generation})
+        raise
+    logger.info(
+        f"Синтетический репозиторий {repository_url}: {summary['modules']} модулей, "
+        f"{summary['lines']} строк, {summary['import_edges']} импортов, sha256 {summary['digest']}"
+    )
+    return summary["digest"]
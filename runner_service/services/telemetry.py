@@ -0,0 +1,134 @@
+import os
+import time
+
+import httpx
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# HTTP-запросы к сервису
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Длительность обработки HTTP-запросов",
+    ["method", "route", "status"],
+)
+
+# Этапы выполнения задачи: установка анализатора, клонирование, сбор метрик, экспорт
+TASK_PHASE_DURATION = Histogram(
+    "task_phase_duration_seconds",
+    "Длительность этапов выполнения задачи",
+    ["phase"],
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0),
+)
+# У каждого воркера свои задачи: при PROMETHEUS_MULTIPROC_DIR значения
+# живых воркеров суммируются
+ACTIVE_TASKS = Gauge(
+    "active_tasks", "Задачи, выполняющиеся на runner сервисе", multiprocess_mode="livesum"
+)
+ACTIVE_COLLECTORS = Gauge(
+    "active_collector_processes",
+    "Запущенные процессы Go-сборщика метрик",
+    multiprocess_mode="livesum",
+)
+STATUS_REPORTS = Counter(
+    "task_status_reports_total",
+    "Переходы задач между статусами, отправленные в API сервис",
+    ["status", "result"],
+)
+
+# Исходящие HTTP-запросы (API сервис)
+HTTP_CLIENT_DURATION = Histogram(
+    "http_client_request_duration_seconds",
+    "Время до получения заголовков ответа внешнего сервиса",
+    ["target", "method", "status"],
+)
+
+# Кэши: общие клоны репозиториев и пакеты анализаторов кампаний
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Обращения к кэшам сервиса", ["cache", "result"]
+)
+
+
+class PrometheusMiddleware:
+    """
+    ASGI-middleware, измеряющее длительность запросов по шаблону маршрута
+    (/tasks/{task_id}/status, а не конкретный ID), чтобы число рядов не росло.
+    Для потоковых ответов время считается до отправки последней части.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status_code),
+            ).observe(time.perf_counter() - started)
+
+
+def instrumented_client(target: str, **kwargs) -> httpx.AsyncClient:
+    """
+    Создает httpx-клиент, который учитывает время ответа внешнего сервиса.
+
+    Args:
+        target: Имя внешнего сервиса для метки (api)
+        **kwargs: Параметры httpx.AsyncClient
+    """
+
+    async def on_request(request: httpx.Request) -> None:
+        request.extensions["telemetry_started"] = time.perf_counter()
+
+    async def on_response(response: httpx.Response) -> None:
+        request = response.request
+        elapsed = time.perf_counter() - request.extensions["telemetry_started"]
+        HTTP_CLIENT_DURATION.labels(target, request.method, str(response.status_code)).observe(
+            elapsed
+        )
+
+    return httpx.AsyncClient(
+        event_hooks={"request": [on_request], "response": [on_response]}, **kwargs
+    )
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Возвращает метрики в текстовом формате Prometheus и их Content-Type.
+    Если задан PROMETHEUS_MULTIPROC_DIR (uvicorn --workers N), метрики
+    собираются из файлов всех воркеров, а не только ответившего.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_worker_stopped() -> None:
+    """Исключает gauge'и завершающегося воркера из суммы по живым воркерам."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())